@@ -23,6 +23,7 @@ from rich.panel import Panel
 from rich.table import Table
 
 from aegis.agents.agent_graph import AgentGraph
+from aegis.agents.task_lifecycle import finalize_task
 from aegis.agents.task_state import TaskState
 from aegis.exceptions import AegisError, ToolExecutionError
 from aegis.providers.replay_provider import ReplayProvider
@@ -37,8 +38,12 @@ from aegis.utils.cli_helpers import (
     validate_tool_file,
 )
 from aegis.utils.config_loader import load_agent_config
+from aegis.utils import fault_injection
+from aegis.utils import metrics
 from aegis.utils.log_sinks import task_id_context
+from aegis.utils.loop_watchdog import start_loop_watchdog, stop_loop_watchdog
 from aegis.utils.memory_indexer import update_memory_index
+from aegis.utils.replay_store import has_replay
 from aegis.utils.tool_loader import import_all_tools
 from aegis.utils.dryrun import dry_run
 from aegis.registry import TOOL_REGISTRY, ensure_discovered
@@ -149,6 +154,11 @@ async def _async_task_run_handler(self: cmd2.Cmd, args):
             payload_data["execution"]["backend_profile"] = self.session_backend
             self.pfeedback(f"Using session default backend: '{self.session_backend}'")
 
+        if getattr(args, "profile", False):
+            payload_data.setdefault("execution", {})["cpu_profile"] = True
+        if getattr(args, "memory_profile", False):
+            payload_data.setdefault("execution", {})["memory_profile"] = True
+
         # Fallback to 'default' preset if none is specified at all
         if not payload_data.get("config"):
             payload_data["config"] = "default"
@@ -197,6 +207,8 @@ async def _async_task_resume_handler(self: cmd2.Cmd, args):
         final_state = TaskState(**final_state_dict)
     except Exception as e:
         self.perror(f"An unexpected error occurred during resumption: {e}")
+    finally:
+        await finalize_task(task_id)
 
 
 # --- Tool Handlers ---
@@ -895,6 +907,9 @@ async def _execute_graph(self: cmd2.Cmd, payload: LaunchRequest):
     task_id_context.set(task_id)
     final_status = "UNKNOWN"
     final_state = None
+    start_loop_watchdog()
+    metrics.start_textfile_writer()
+    metrics.ACTIVE_TASKS.inc()
 
     try:
         preset_config = load_agent_config(
@@ -912,8 +927,14 @@ async def _execute_graph(self: cmd2.Cmd, payload: LaunchRequest):
         initial_state = TaskState(
             task_id=task_id, task_prompt=payload.task.prompt, runtime=runtime_config
         )
+        fault_injection.activate(
+            runtime_config.fault_profile, run_id=task_id, seed=runtime_config.seed
+        )
         graph_structure = AgentGraphConfig(**preset_config.model_dump())
-        agent_graph = AgentGraph(graph_structure).build_graph()
+        agent_graph = AgentGraph(graph_structure).build_graph(
+            profile=bool(runtime_config.cpu_profile),
+            memory_profile=bool(runtime_config.memory_profile),
+        )
 
         self.poutput(
             f"\n{cmd2.ansi.style('--- Agent Execution Starting ---', fg='yellow')}"
@@ -938,6 +959,10 @@ async def _execute_graph(self: cmd2.Cmd, payload: LaunchRequest):
         final_status = "ERROR"
         self.perror(f"An unexpected error occurred during task execution: {e}")
     finally:
+        metrics.ACTIVE_TASKS.dec()
+        metrics.write_textfile()
+        await stop_loop_watchdog()
+        await finalize_task(task_id)
         if final_state:
             self.poutput(f"\n{cmd2.ansi.style('Final Summary:', bold=True)}")
             self.console.print(
@@ -974,13 +999,13 @@ def _provide_artifact_choices(self):
 
 
 def _provide_replay_choices(self):
-    """Provides choices for task IDs that have a replay.jsonl file."""
+    """Provides choices for task IDs that have a replay log."""
     reports_dir = Path("reports")
     if not reports_dir.is_dir():
         return []
     replayable_tasks = []
     for task_dir in reports_dir.iterdir():
-        if (task_dir / "replay.jsonl").is_file():
+        if has_replay(task_dir):
             replayable_tasks.append(task_dir.name)
     return sorted(replayable_tasks)
 
@@ -3,8 +3,9 @@
 Constructs and compiles a LangGraph StateGraph from an AgentGraphConfig.
 """
 from functools import partial
-from typing import Callable
+from typing import Callable, Optional
 
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph
 from langgraph.pregel import Pregel
 
@@ -14,6 +15,9 @@ from aegis.exceptions import ConfigurationError
 from aegis.schemas.agent import AgentGraphConfig
 from aegis.schemas.node_registry import AGENT_NODE_REGISTRY
 from aegis.utils.logger import setup_logger
+from aegis.utils.memory_profiling import memory_node
+from aegis.utils.profiling import profile_node
+from aegis.utils.timeline import timeline_enabled, timeline_node
 
 logger = setup_logger(__name__)
 
@@ -35,9 +39,26 @@ class AgentGraph:
             )
         self.config = config
 
-    def build_graph(self) -> Pregel:
+    def build_graph(
+        self,
+        checkpointer: Optional[BaseCheckpointSaver] = None,
+        profile: bool = False,
+        memory_profile: bool = False,
+    ) -> Pregel:
         """Builds and compiles the StateGraph based on the provided configuration.
 
+        :param checkpointer: Optional LangGraph checkpoint saver. When given, a
+                             checkpoint is written after every super-step and
+                             an interrupted run can be resumed from its exact
+                             checkpoint id (invoke with a `thread_id` config).
+        :type checkpointer: Optional[BaseCheckpointSaver]
+        :param profile: Wrap every node with the CPU profiler (see
+                        `aegis.utils.profiling`). Unprofiled graphs have no
+                        wrapper at all.
+        :type profile: bool
+        :param memory_profile: Wrap every node with the memory instrumentation
+                               (see `aegis.utils.memory_profiling`).
+        :type memory_profile: bool
         :return: A compiled, executable LangGraph Pregel object.
         :rtype: Pregel
         :raises ConfigurationError: If the graph configuration is invalid.
@@ -54,6 +75,12 @@ class AgentGraph:
                         f"Node function '{node_config.tool}' not found in AGENT_NODE_REGISTRY."
                     )
                 node_func = AGENT_NODE_REGISTRY[node_config.tool]
+                if profile:
+                    node_func = profile_node(node_config.id, node_func)
+                if memory_profile:
+                    node_func = memory_node(node_config.id, node_func)
+                if timeline_enabled():
+                    node_func = timeline_node(node_config.id, node_func)
                 builder.add_node(node_config.id, node_func)
                 logger.debug(
                     f"Added node '{node_config.id}' with function '{node_config.tool}'"
@@ -101,7 +128,8 @@ class AgentGraph:
 
             logger.info("Graph construction complete. Compiling...")
             compiled_graph = builder.compile(
-                interrupt_before=self.config.interrupt_nodes
+                interrupt_before=self.config.interrupt_nodes,
+                checkpointer=checkpointer,
             )
             logger.info("Graph compiled successfully.")
             return compiled_graph
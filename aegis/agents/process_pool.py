@@ -0,0 +1,446 @@
+# aegis/agents/process_pool.py
+"""
+Shared-nothing worker processes for executing agent graphs.
+
+In `task_queue.mode: process`, the task pool hands each task to one of N
+spawned worker processes instead of running the graph on the API server's
+event loop. Every worker imports the tool registry and builds its own
+provider clients and executors; nothing but the launch payload, progress
+summaries and the final `LaunchResponse` crosses the process boundary.
+
+IPC uses `multiprocessing` queues: one inbox per worker (run / cancel / stop)
+and a shared outbox (ready / heartbeat / progress / result). A monitor task in
+the parent restarts workers that exit, and terminates and restarts workers
+whose heartbeat is older than `stale_after_s` (a hung or loop-blocking step);
+either way the task the worker was running fails with `WorkerError`.
+Workers inherit the parent's working directory, so report, artifact and log
+paths are unchanged.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import multiprocessing as mp
+import os
+import queue
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aegis.exceptions import WorkerError
+from aegis.schemas.api import LaunchResponse
+from aegis.schemas.launch import LaunchRequest
+from aegis.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_RUNNER = "aegis.web.routes_launch:run_launch"
+DEFAULT_INITIALIZER = "aegis.utils.tool_loader:import_all_tools"
+HEARTBEAT_INTERVAL_S = 2.0
+DEFAULT_STALE_AFTER_S = 120.0
+MAX_RESTART_BACKOFF_S = 30.0
+
+
+def _resolve(path: str) -> Callable[..., Any]:
+    """Imports 'package.module:attr'."""
+    module_name, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+# --- child side ---
+
+
+def _worker_main(
+    worker_id: int,
+    runner_path: str,
+    initializer_path: Optional[str],
+    inbox: "mp.Queue",
+    outbox: "mp.Queue",
+    heartbeat_s: float,
+) -> None:
+    """Entry point of a worker process."""
+    # Ctrl-C goes to the whole process group; let the parent decide on shutdown.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if initializer_path:
+        _resolve(initializer_path)()
+    runner = _resolve(runner_path)
+    asyncio.run(_worker_loop(worker_id, runner, inbox, outbox, heartbeat_s))
+
+
+async def _worker_loop(
+    worker_id: int,
+    runner: Callable[..., Awaitable[LaunchResponse]],
+    inbox: "mp.Queue",
+    outbox: "mp.Queue",
+    heartbeat_s: float,
+) -> None:
+    from aegis.agents.task_pool import progress_from_state
+    from aegis.utils.log_sinks import task_id_context
+
+    pid = os.getpid()
+    jobs: Dict[str, asyncio.Task] = {}
+
+    async def heartbeat() -> None:
+        # Runs on the worker's event loop, so a stale heartbeat also reveals a
+        # step that is blocking the loop.
+        while True:
+            outbox.put(("heartbeat", worker_id, pid, time.time()))
+            await asyncio.sleep(heartbeat_s)
+
+    async def run_job(task_id: str, payload_dict: Dict[str, Any]) -> None:
+        task_id_context.set(task_id)
+
+        async def on_update(snapshot: Dict[str, Any]) -> None:
+            outbox.put(("progress", worker_id, task_id, progress_from_state(snapshot)))
+
+        try:
+            payload = LaunchRequest.model_validate(payload_dict)
+            response = await runner(payload, task_id, on_update=on_update)
+            outbox.put(("result", worker_id, task_id, "ok", response.model_dump()))
+        except asyncio.CancelledError:
+            outbox.put(("result", worker_id, task_id, "cancelled", None))
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            outbox.put(
+                ("result", worker_id, task_id, "error", f"{e.__class__.__name__}: {detail}")
+            )
+        finally:
+            jobs.pop(task_id, None)
+
+    hb = asyncio.create_task(heartbeat())
+    outbox.put(("ready", worker_id, pid, time.time()))
+    while True:
+        msg = await asyncio.to_thread(inbox.get)
+        kind = msg[0]
+        if kind == "run":
+            _, task_id, payload_dict = msg
+            jobs[task_id] = asyncio.create_task(run_job(task_id, payload_dict))
+        elif kind == "cancel":
+            job = jobs.get(msg[1])
+            if job is not None:
+                job.cancel()
+        elif kind == "stop":
+            break
+    for job in list(jobs.values()):
+        job.cancel()
+    await asyncio.gather(*jobs.values(), return_exceptions=True)
+    hb.cancel()
+
+
+# --- parent side ---
+
+
+@dataclass
+class _Worker:
+    worker_id: int
+    process: Any = None
+    inbox: Any = None
+    pid: Optional[int] = None
+    current_task: Optional[str] = None
+    tasks_completed: int = 0
+    tasks_failed: int = 0
+    tasks_cancelled: int = 0
+    restarts: int = 0
+    started_at: float = field(default_factory=time.time)
+    last_heartbeat: Optional[float] = None
+    next_restart_at: float = 0.0
+
+
+class ProcessWorkerPool:
+    """Executes agent tasks in a fixed set of worker processes.
+
+    `run()` has the task-pool runner signature, so an instance can be passed
+    as `TaskPool(runner=pool.run)`.
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        runner_path: str = DEFAULT_RUNNER,
+        initializer_path: Optional[str] = DEFAULT_INITIALIZER,
+        heartbeat_s: float = HEARTBEAT_INTERVAL_S,
+        stale_after_s: float = DEFAULT_STALE_AFTER_S,
+    ):
+        """
+        :param num_workers: Number of worker processes (one task each at a time).
+        :param runner_path: 'module:function' executed in the worker for each task,
+                            called as `runner(payload, task_id, on_update=...)`.
+        :param initializer_path: Optional 'module:function' run once per worker
+                                 at startup (defaults to loading all tools).
+        :param heartbeat_s: Interval between worker heartbeats.
+        :param stale_after_s: A live worker whose last heartbeat (or start, if
+                              it has not sent one yet) is older than this is
+                              terminated and restarted.
+        """
+        self.num_workers = max(1, int(num_workers))
+        self.runner_path = runner_path
+        self.initializer_path = initializer_path
+        self.heartbeat_s = heartbeat_s
+        self.stale_after_s = max(float(stale_after_s), 2 * heartbeat_s)
+        # 'spawn' keeps workers free of the server's threads, sockets and loop.
+        self._ctx = mp.get_context("spawn")
+        self._workers: List[_Worker] = []
+        self._outbox: Any = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pump_thread: Optional[threading.Thread] = None
+        self._monitor: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    # --- lifecycle ---
+
+    async def start(self) -> None:
+        """Spawns the workers and starts the IPC pump and health monitor."""
+        if self._workers:
+            return
+        self._stopping = False
+        self._loop = asyncio.get_running_loop()
+        self._outbox = self._ctx.Queue()
+        self._idle = asyncio.Queue()
+        self._workers = [_Worker(worker_id=i) for i in range(self.num_workers)]
+        for worker in self._workers:
+            self._spawn(worker)
+            self._idle.put_nowait(worker.worker_id)
+        self._pump_thread = threading.Thread(
+            target=self._pump, name="aegis-worker-ipc", daemon=True
+        )
+        self._pump_thread.start()
+        self._monitor = asyncio.create_task(self._monitor_loop())
+        logger.info(f"Started {self.num_workers} agent worker process(es).")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Asks workers to stop, then terminates any that do not exit in time."""
+        if not self._workers:
+            return
+        self._stopping = True
+        if self._monitor is not None:
+            self._monitor.cancel()
+        for worker in self._workers:
+            try:
+                worker.inbox.put(("stop",))
+            except Exception:
+                pass
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            remaining = max(0.0, deadline - time.monotonic())
+            await asyncio.to_thread(worker.process.join, remaining)
+            if worker.process.is_alive():
+                logger.warning(f"Worker {worker.worker_id} did not stop; terminating.")
+                worker.process.terminate()
+                await asyncio.to_thread(worker.process.join, 2)
+        for entry in self._pending.values():
+            if not entry["future"].done():
+                entry["future"].set_exception(WorkerError("Worker pool stopped."))
+        self._pending.clear()
+        self._workers = []
+        if self._pump_thread is not None:
+            self._pump_thread.join(timeout=2)
+        logger.info("Agent worker processes stopped.")
+
+    def _spawn(self, worker: _Worker) -> None:
+        worker.inbox = self._ctx.Queue()
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                worker.worker_id,
+                self.runner_path,
+                self.initializer_path,
+                worker.inbox,
+                self._outbox,
+                self.heartbeat_s,
+            ),
+            name=f"aegis-agent-worker-{worker.worker_id}",
+            daemon=True,
+        )
+        worker.process.start()
+        worker.pid = worker.process.pid
+        worker.started_at = time.time()
+        worker.last_heartbeat = None
+
+    # --- task execution ---
+
+    async def run(
+        self,
+        payload: LaunchRequest,
+        task_id: str,
+        on_progress: Callable[[Dict[str, Any]], Awaitable[None]],
+    ) -> LaunchResponse:
+        """Runs one task on the next idle worker and returns its result.
+
+        Cancelling the awaiting coroutine cancels the task inside the worker.
+
+        :raises WorkerError: If the task failed or its worker died.
+        """
+        if not self._workers:
+            await self.start()
+        worker_id = await self._idle.get()  # type: ignore[union-attr]
+        worker = self._workers[worker_id]
+        future = self._loop.create_future()  # type: ignore[union-attr]
+        self._pending[task_id] = {
+            "future": future,
+            "on_progress": on_progress,
+            "worker_id": worker_id,
+        }
+        worker.current_task = task_id
+        worker.inbox.put(("run", task_id, payload.model_dump(mode="json")))
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # The worker reports back with a 'cancelled' result and is only
+            # marked idle then, so it is never handed two tasks at once.
+            try:
+                worker.inbox.put(("cancel", task_id))
+            except Exception:
+                pass
+            raise
+
+    def _pump(self) -> None:
+        """Forwards outbox messages to the event loop (runs in a thread)."""
+        while not self._stopping or self._pending:
+            try:
+                msg = self._outbox.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            try:
+                self._loop.call_soon_threadsafe(self._on_message, msg)  # type: ignore[union-attr]
+            except RuntimeError:
+                break  # loop closed
+
+    def _on_message(self, msg: tuple) -> None:
+        kind, worker_id = msg[0], msg[1]
+        if worker_id >= len(self._workers):
+            return
+        worker = self._workers[worker_id]
+        if kind in ("ready", "heartbeat"):
+            worker.pid = msg[2]
+            worker.last_heartbeat = time.time()
+        elif kind == "progress":
+            entry = self._pending.get(msg[2])
+            if entry is not None:
+                asyncio.ensure_future(self._relay_progress(msg[2], entry, msg[3]))
+        elif kind == "result":
+            self._on_result(worker, msg[2], msg[3], msg[4])
+
+    async def _relay_progress(
+        self, task_id: str, entry: Dict[str, Any], progress: Dict[str, Any]
+    ) -> None:
+        try:
+            await entry["on_progress"](progress)
+        except asyncio.CancelledError:
+            # The progress callback signals a cancel request this way.
+            if not entry["future"].done():
+                entry["future"].cancel()
+        except Exception as e:
+            logger.debug(f"Progress relay for task {task_id} failed: {e}")
+
+    def _on_result(self, worker: _Worker, task_id: str, outcome: str, data: Any) -> None:
+        entry = self._pending.pop(task_id, None)
+        if outcome == "ok":
+            worker.tasks_completed += 1
+        elif outcome == "cancelled":
+            worker.tasks_cancelled += 1
+        else:
+            worker.tasks_failed += 1
+        if worker.current_task == task_id:
+            worker.current_task = None
+            self._idle.put_nowait(worker.worker_id)  # type: ignore[union-attr]
+        if entry is None or entry["future"].done():
+            return
+        future = entry["future"]
+        if outcome == "ok":
+            future.set_result(LaunchResponse.model_validate(data))
+        elif outcome == "cancelled":
+            future.cancel()
+        else:
+            future.set_exception(WorkerError(data))
+
+    # --- health ---
+
+    async def _monitor_loop(self) -> None:
+        while not self._stopping:
+            await asyncio.sleep(self.heartbeat_s)
+            for worker in self._workers:
+                if self._stopping:
+                    break
+                reason = None
+                if worker.process.is_alive():
+                    reason = self._stale_reason(worker)
+                    if reason is None:
+                        continue
+                    await self._terminate(worker, reason)
+                elif time.time() < worker.next_restart_at:
+                    continue
+                self._handle_crash(worker, reason)
+
+    def _stale_reason(self, worker: _Worker) -> Optional[str]:
+        seen = worker.last_heartbeat or worker.started_at
+        age = time.time() - seen
+        if age <= self.stale_after_s:
+            return None
+        return f"sent no heartbeat for {age:.0f}s"
+
+    async def _terminate(self, worker: _Worker, reason: str) -> None:
+        logger.error(
+            f"Agent worker {worker.worker_id} (pid {worker.pid}) {reason}; terminating."
+        )
+        worker.process.terminate()
+        await asyncio.to_thread(worker.process.join, 5)
+        if worker.process.is_alive():
+            worker.process.kill()
+            await asyncio.to_thread(worker.process.join, 5)
+
+    def _handle_crash(self, worker: _Worker, reason: Optional[str] = None) -> None:
+        exitcode = worker.process.exitcode
+        reason = reason or f"exited with code {exitcode}"
+        logger.error(
+            f"Agent worker {worker.worker_id} (pid {worker.pid}) {reason}; restarting."
+        )
+        was_busy = worker.current_task is not None
+        if was_busy:
+            entry = self._pending.pop(worker.current_task, None)
+            worker.tasks_failed += 1
+            if entry is not None and not entry["future"].done():
+                entry["future"].set_exception(
+                    WorkerError(
+                        f"Worker {worker.worker_id} {reason} "
+                        f"while running task {worker.current_task}."
+                    )
+                )
+            worker.current_task = None
+        worker.restarts += 1
+        backoff = min(MAX_RESTART_BACKOFF_S, 0.5 * (2 ** min(worker.restarts, 6)))
+        worker.next_restart_at = time.time() + backoff
+        self._spawn(worker)
+        if was_busy:
+            # Idle workers are already waiting in the idle queue.
+            self._idle.put_nowait(worker.worker_id)  # type: ignore[union-attr]
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Reports health and task counts for every worker process."""
+        now = time.time()
+        out = []
+        for w in self._workers:
+            age = None if w.last_heartbeat is None else round(now - w.last_heartbeat, 3)
+            alive = bool(w.process is not None and w.process.is_alive())
+            out.append(
+                {
+                    "worker": f"process-{w.worker_id}",
+                    "pid": w.pid,
+                    "alive": alive,
+                    "healthy": alive and age is not None and age < 3 * self.heartbeat_s,
+                    "heartbeat_age_s": age,
+                    "current_task": w.current_task,
+                    "tasks_completed": w.tasks_completed,
+                    "tasks_failed": w.tasks_failed,
+                    "tasks_cancelled": w.tasks_cancelled,
+                    "restarts": w.restarts,
+                    "uptime_s": round(now - w.started_at, 3),
+                }
+            )
+        return out
@@ -1,6 +1,9 @@
 # aegis/agents/steps/decompose_task.py
 """
 Agent step for decomposing a high-level goal into a sequence of sub-goals.
+
+The planner may also declare which sub-goals depend on which; presets with an
+`execute_sub_goal_dag` node then run independent sub-goals concurrently.
 """
 from typing import Dict, Any, List
 
@@ -21,6 +24,45 @@ class SubGoalList(BaseModel):
         ...,
         description="A list of concise, actionable sub-goals that break down the user's main request.",
     )
+    depends_on: List[List[int]] = Field(
+        default_factory=list,
+        description="Optional. For each sub-goal, the 0-based indices of the sub-goals that must finish before it can start.",
+    )
+
+
+def normalize_dependencies(depends_on: List[List[int]], count: int) -> List[List[int]]:
+    """Cleans planner-declared dependencies.
+
+    Out-of-range and self references are dropped. If the declaration is empty,
+    has the wrong length, or contains a cycle, an empty list is returned,
+    which means "run the sub-goals in order".
+
+    :param depends_on: The raw `depends_on` lists from the planner.
+    :param count: The number of sub-goals.
+    :return: One sorted list of dependency indices per sub-goal, or [].
+    """
+    if not depends_on or len(depends_on) != count:
+        return []
+    deps = [
+        sorted({d for d in (entry or []) if isinstance(d, int) and 0 <= d < count and d != i})
+        for i, entry in enumerate(depends_on)
+    ]
+    # Kahn's algorithm: every node must be reachable in topological order.
+    indegree = [len(d) for d in deps]
+    ready = [i for i in range(count) if indegree[i] == 0]
+    seen = 0
+    while ready:
+        node = ready.pop()
+        seen += 1
+        for i in range(count):
+            if node in deps[i]:
+                indegree[i] -= 1
+                if indegree[i] == 0:
+                    ready.append(i)
+    if seen != count:
+        logger.warning("Sub-goal dependencies contain a cycle; running sub-goals in order.")
+        return []
+    return deps
 
 
 async def decompose_task(state: TaskState) -> Dict[str, Any]:
@@ -42,7 +84,9 @@ async def decompose_task(state: TaskState) -> Dict[str, Any]:
     {state.task_prompt}
 
     ## Required JSON Output Format
-    You MUST respond with a single JSON object containing a single key, "sub_goals", which is a list of strings. Do not add any other text, explanation, or markdown.
+    You MUST respond with a single JSON object containing the key "sub_goals", which is a list of strings. Do not add any other text, explanation, or markdown.
+
+    If some sub-goals are independent of each other (for example, the same check on several different hosts), you MAY add the key "depends_on": a list with one entry per sub-goal, each a list of the 0-based indices of the sub-goals it needs results from. Independent sub-goals can then run in parallel.
 
     ### Example
     ```json
@@ -51,7 +95,8 @@ async def decompose_task(state: TaskState) -> Dict[str, Any]:
         "First, discover all active services on the target machine.",
         "Second, analyze the configuration of the web server.",
         "Finally, generate a report summarizing the findings."
-      ]
+      ],
+      "depends_on": [[], [0], [0, 1]]
     }}
     ```
     """
@@ -66,15 +111,23 @@ async def decompose_task(state: TaskState) -> Dict[str, Any]:
         )
 
         sub_goals = sub_goal_model.sub_goals
+        deps = normalize_dependencies(sub_goal_model.depends_on, len(sub_goals))
         logger.info(f"Decomposed task into {len(sub_goals)} sub-goals.")
         for i, goal in enumerate(sub_goals):
-            logger.info(f"  - Sub-goal {i+1}: {goal}")
+            after = ""
+            if deps and deps[i]:
+                after = f" (after {', '.join(str(d + 1) for d in deps[i])})"
+            logger.info(f"  - Sub-goal {i+1}: {goal}{after}")
 
-        return {"sub_goals": sub_goals, "current_sub_goal_index": 0}
+        return {
+            "sub_goals": sub_goals,
+            "sub_goal_deps": deps,
+            "current_sub_goal_index": 0,
+        }
 
     except Exception as e:
         logger.error(
             f"Failed to decompose task. Error: {e}. Proceeding with flat planning."
         )
         # Fallback: if decomposition fails, just return an empty list and proceed.
-        return {"sub_goals": [], "current_sub_goal_index": 0}
+        return {"sub_goals": [], "sub_goal_deps": [], "current_sub_goal_index": 0}
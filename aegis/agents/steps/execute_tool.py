@@ -8,6 +8,8 @@ recording the results in a structured history entry.
 """
 
 import asyncio
+import contextvars
+import functools
 import inspect
 import json
 import time
@@ -31,11 +33,13 @@ from aegis.exceptions import (
 from aegis.registry import get_tool, ToolEntry
 from aegis.schemas.plan_output import AgentScratchpad
 from aegis.utils.config import get_config
+from aegis.utils import metrics
 from aegis.utils.llm_query import get_provider_for_profile
 from aegis.utils.logger import setup_logger
 from aegis.utils.replay_logger import log_replay_event
 from aegis.utils import provenance
 from aegis.utils.redact import redact_for_log
+from aegis.utils.step_timing import PhaseTimer
 from aegis.agents import goal_ops
 from aegis.utils.tracing import span
 
@@ -148,7 +152,11 @@ async def _run_tool(tool_func: Callable, input_data: Any, state: TaskState) -> A
         return await tool_func(**tool_kwargs)
     else:
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, lambda: tool_func(**tool_kwargs))
+        # Carry context (task id, active fault injector) into the worker thread.
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(
+            None, functools.partial(ctx.run, lambda: tool_func(**tool_kwargs))
+        )
 
 
 async def _check_guardrails(plan: AgentScratchpad, state: TaskState) -> Optional[str]:
@@ -342,6 +350,21 @@ async def _run_tool_with_error_handling(
 async def execute_tool(state: TaskState) -> Dict[str, Any]:
     """Orchestrates tool execution including guardrails, running, and history logging."""
     logger.info("🛠️  Step: Execute Tool")
+    started = time.perf_counter()
+    queue_ms = (time.time() - state.last_node_end) * 1000.0 if state.last_node_end else None
+    timer = PhaseTimer(state.pending_timings, state.last_node_end)
+    updated_state_dict = await _execute_tool(state, timer)
+    metrics.record_step("execute_tool", started, queue_ms)
+    # Every path appends exactly one new entry: attach this step's timings,
+    # including the planning phases carried over from reflect_and_plan.
+    if updated_state_dict.get("history"):
+        updated_state_dict["history"][-1].timings = timer.as_dict()
+    updated_state_dict["pending_timings"] = {}
+    updated_state_dict["last_node_end"] = time.time()
+    return updated_state_dict
+
+
+async def _execute_tool(state: TaskState, timer: PhaseTimer) -> Dict[str, Any]:
 
     # Apply per-task dry-run override if provided
     try:
@@ -416,9 +439,12 @@ async def execute_tool(state: TaskState) -> Dict[str, Any]:
     except Exception as dg_err:
         logger.error(f"Degeneracy guard check failed: {dg_err}. Continuing.")
 
-    # 1. Guardrails
+    # 1. Guardrails (timed as 'policy' together with the policy gate; an
+    # early return leaves the phase to be closed by execute_tool)
+    timer.begin("policy")
     rejection_reason = await _check_guardrails(plan, state)
     if rejection_reason:
+        metrics.POLICY_DENIALS.inc(tool=plan.tool_name)
         history_entry = HistoryEntry(
             plan=plan,
             observation=rejection_reason,
@@ -451,6 +477,7 @@ async def execute_tool(state: TaskState) -> Dict[str, Any]:
         )
 
         if decision.effect == "DENY":
+            metrics.POLICY_DENIALS.inc(tool=plan.tool_name)
             observation = f"[POLICY DENIED] {decision.reason}"
             status = "failure"
             log_replay_event(
@@ -604,16 +631,18 @@ async def execute_tool(state: TaskState) -> Dict[str, Any]:
 
     except Exception as _e:
         logger.error(f"Policy check error: {_e}. Failing open (allowing).")
+    timer.end()
 
     # 2. Log tool start (with redacted args only in logs)
-    logger.info(
-        f"Executing tool: `{plan.tool_name}`",
-        extra={
-            "event_type": "ToolStart",
-            "tool_name": plan.tool_name,
-            "tool_args": redact_for_log(plan.tool_args),  # REDACTED for logs
-        },
-    )
+    with timer.phase("logging"):
+        logger.info(
+            f"Executing tool: `{plan.tool_name}`",
+            extra={
+                "event_type": "ToolStart",
+                "tool_name": plan.tool_name,
+                "tool_args": redact_for_log(plan.tool_args),  # REDACTED for logs
+            },
+        )
 
     # 2. Handle special meta-action tools
     if plan.tool_name == "finish":
@@ -767,12 +796,25 @@ async def execute_tool(state: TaskState) -> Dict[str, Any]:
                 except Exception:
                     pass
 
-                with span("execute_tool", run_id=state.task_id, **_span_meta):
+                tool_started = time.perf_counter()
+                with timer.phase("tool"), span(
+                    "execute_tool", run_id=state.task_id, **_span_meta
+                ):
                     observation, status = await _run_tool_with_error_handling(
                         tool_entry, plan, state
                     )
+                metrics.TOOL_SECONDS.observe(
+                    time.perf_counter() - tool_started, tool=plan.tool_name, outcome=status
+                )
+                # State-aware tools (e.g. background jobs, sub-agents) may
+                # register handles in place.
+                if state.background_jobs:
+                    updated_state_dict["background_jobs"] = dict(state.background_jobs)
+                if state.subagents:
+                    updated_state_dict["subagents"] = dict(state.subagents)
 
     # 4. Log the ground truth for replay (keep as-is; replay is internal)
+    timer.begin("logging")
     log_replay_event(
         state.task_id,
         "TOOL_OUTPUT",
@@ -825,7 +867,7 @@ async def execute_tool(state: TaskState) -> Dict[str, Any]:
 
     updated_state_dict["history"].append(history_entry)
 
-    # 6. Provenance record (full fidelity; no redaction here)
+    # 6. Provenance record (full fidelity; no redaction here; still 'logging')
     try:
         _args = plan.tool_args or {}
         target_host = (
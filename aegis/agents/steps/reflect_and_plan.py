@@ -8,6 +8,7 @@ history, and uses the LLM to decide on the next action to take.
 """
 
 import json
+import time
 from typing import Dict, Any, List
 
 from pydantic import ValidationError, BaseModel, Field
@@ -17,9 +18,11 @@ from aegis.agents.task_state import TaskState
 from aegis.exceptions import PlannerError, ConfigurationError
 from aegis.registry import TOOL_REGISTRY
 from aegis.schemas.plan_output import AgentScratchpad
+from aegis.utils import metrics
 from aegis.utils.llm_query import get_provider_for_profile
 from aegis.utils.logger import setup_logger
 from aegis.utils.replay_logger import log_replay_event
+from aegis.utils.step_timing import PhaseTimer
 from aegis.utils.tracing import span
 
 logger = setup_logger(__name__)
@@ -83,7 +86,7 @@ async def _select_relevant_tools(
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ]
-        with span(
+        with metrics.llm_call_type("preselect"), span(
             "planner.preselect",
             run_id=state.task_id,
             ready_tools=len(tool_names_to_consider),
@@ -109,6 +112,8 @@ async def _select_relevant_tools(
 async def reflect_and_plan(state: TaskState) -> Dict[str, Any]:
     """Uses the configured backend provider to generate a validated plan."""
     logger.info("🤔 Step: Reflect and Plan")
+    started = time.perf_counter()
+    timer = PhaseTimer(last_node_end=state.last_node_end)
 
     if not state.runtime.backend_profile:
         raise ConfigurationError("Backend profile is not set.")
@@ -123,26 +128,29 @@ async def reflect_and_plan(state: TaskState) -> Dict[str, Any]:
 
         threshold = state.runtime.tool_selection_threshold or 20
         if len(available_tool_names) > threshold:
-            relevant_tool_names = await _select_relevant_tools(
-                state, available_tool_names
-            )
+            with timer.phase("preselect"):
+                relevant_tool_names = await _select_relevant_tools(
+                    state, available_tool_names
+                )
         else:
             relevant_tool_names = available_tool_names
 
         # Track allowed tools for telemetry
         allowed_tools = list(relevant_tool_names)
 
-        builder = PromptBuilder(state, relevant_tool_names, provider)
-        messages = await builder.build()
+        with timer.phase("prompt_build"):
+            builder = PromptBuilder(state, relevant_tool_names, provider)
+            messages = await builder.build()
 
-        logger.debug("--- Full Planning Prompt ---")
-        logger.debug(json.dumps(messages, indent=2))
-        logger.debug("--- End Planning Prompt ---")
+        with timer.phase("logging"):
+            logger.debug("--- Full Planning Prompt ---")
+            logger.debug(json.dumps(messages, indent=2))
+            logger.debug("--- End Planning Prompt ---")
 
-        log_replay_event(state.task_id, "PLANNER_INPUT", {"messages": messages})
+            log_replay_event(state.task_id, "PLANNER_INPUT", {"messages": messages})
 
         try:
-            with span(
+            with timer.phase("llm"), metrics.llm_call_type("plan"), span(
                 "planner.plan",
                 run_id=state.task_id,
                 ready_tools=len(allowed_tools),
@@ -167,7 +175,7 @@ async def reflect_and_plan(state: TaskState) -> Dict[str, Any]:
             )
 
             try:
-                with span(
+                with timer.phase("llm"), metrics.llm_call_type("repair"), span(
                     "planner.repair",
                     run_id=state.task_id,
                     ready_tools=len(allowed_tools),
@@ -184,12 +192,18 @@ async def reflect_and_plan(state: TaskState) -> Dict[str, Any]:
                 )
                 raise
 
-        log_replay_event(
-            state.task_id, "PLANNER_OUTPUT", {"plan": scratchpad.model_dump()}
-        )
+        with timer.phase("logging"):
+            log_replay_event(
+                state.task_id, "PLANNER_OUTPUT", {"plan": scratchpad.model_dump()}
+            )
         logger.info(f"✅ Plan generated: Calling tool `{scratchpad.tool_name}`")
         logger.debug(f"🤔 Thought: {scratchpad.thought}")
-        return {"latest_plan": scratchpad}
+        metrics.record_step("reflect_and_plan", started, timer.phases.get("queue"))
+        return {
+            "latest_plan": scratchpad,
+            "pending_timings": timer.as_dict(),
+            "last_node_end": time.time(),
+        }
 
     except (ValidationError, json.JSONDecodeError) as e:
         logger.error(f"Failed to parse or validate LLM plan output. Error: {e}")
@@ -0,0 +1,189 @@
+# aegis/agents/steps/sub_goal_dag.py
+"""
+Agent step that executes sub-goals as a dependency DAG.
+
+After `decompose_task`, this node runs every sub-goal in its own scoped
+plan -> execute loop. A sub-goal starts as soon as all sub-goals it depends
+on have completed, and up to `runtime.max_parallel_sub_goals` loops run at
+the same time. Each loop sees only its own history slice plus the results of
+its dependencies; when it finishes, its history entries (tagged with
+`sub_goal_index`) and a `SubGoalResult` are merged into the parent state.
+
+A sub-goal completes when its loop calls `advance_to_next_sub_goal` or
+`finish`; otherwise it fails, and sub-goals depending on it are skipped.
+Without declared dependencies the sub-goals run one after another, each
+still in its own scoped loop.
+
+Each loop numbers its steps from 0, so the `step_index` of a provenance
+record is only unique together with its `sub_goal_index`. Loops running in
+parallel append to the same `replay.jsonl`, so their events interleave;
+every event written inside a loop carries a top-level `sub_goal_index` (see
+`aegis.utils.log_sinks.sub_goal_context`). Replay containers still count
+steps by `PLANNER_INPUT` events in journal order, so a step of an indexed
+replay may hold events of another sub-goal that ran at the same time; filter
+by `sub_goal_index` to follow one sub-goal.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from aegis.agents.steps.check_termination import check_termination
+from aegis.agents.steps.decompose_task import normalize_dependencies
+from aegis.agents.steps.execute_tool import execute_tool
+from aegis.agents.steps.reflect_and_plan import reflect_and_plan
+from aegis.agents.task_state import HistoryEntry, SubGoalResult, TaskState
+from aegis.utils.log_sinks import sub_goal_context
+from aegis.utils.logger import setup_logger
+from aegis.utils.replay_logger import log_replay_event
+from aegis.utils.tracing import span
+
+logger = setup_logger(__name__)
+
+# Tools that end a scoped loop: its single sub-goal is done.
+_DONE_TOOLS = ("advance_to_next_sub_goal", "finish")
+
+
+def _scoped_prompt(state: TaskState, index: int, done: Dict[int, SubGoalResult]) -> str:
+    lines = [state.task_prompt, "", f"Focus only on this sub-goal: {state.sub_goals[index]}"]
+    prior = [done[d] for d in state.sub_goal_deps[index]] if state.sub_goal_deps else []
+    if prior:
+        lines.append("")
+        lines.append("Results of the sub-goals it depends on:")
+        lines.extend(f"- {r.goal}: {r.summary}" for r in prior)
+    return "\n".join(lines)
+
+
+async def _run_scoped(state: TaskState, index: int, prompt: str) -> List[HistoryEntry]:
+    """Runs one sub-goal's plan -> execute loop and returns its history slice."""
+    # Runs in its own asyncio task, so this context is private to the loop.
+    sub_goal_context.set(index)
+    scoped = state.model_copy(
+        update={
+            "task_prompt": prompt,
+            "sub_goals": [state.sub_goals[index]],
+            "sub_goal_deps": [],
+            "sub_goal_results": [],
+            "current_sub_goal_index": 0,
+            "history": [],
+            "latest_plan": None,
+        }
+    )
+    with span("sub_goal", run_id=state.task_id, sub_goal_index=index):
+        while True:
+            scoped = scoped.model_copy(update=await reflect_and_plan(scoped))
+            scoped = scoped.model_copy(update=await execute_tool(scoped))
+            last = scoped.history[-1] if scoped.history else None
+            if last is not None and last.plan.tool_name in _DONE_TOOLS:
+                break
+            if check_termination(scoped) != "continue":
+                break
+    return [entry.model_copy(update={"sub_goal_index": index}) for entry in scoped.history]
+
+
+def _result(index: int, goal: str, entries: List[HistoryEntry], started: float) -> SubGoalResult:
+    # Only an explicit "done" ends a sub-goal successfully; running out of
+    # steps, a failing last step or a request for human input do not.
+    last = entries[-1] if entries else None
+    completed = (
+        last is not None
+        and last.status == "success"
+        and last.plan.tool_name in _DONE_TOOLS
+        and (last.plan.tool_args or {}).get("status", "success") != "failure"
+    )
+    return SubGoalResult(
+        index=index,
+        goal=goal,
+        status="completed" if completed else "failed",
+        summary=last.observation if last is not None else "No steps were taken.",
+        steps=len(entries),
+        start_time=started,
+        end_time=time.time(),
+    )
+
+
+async def execute_sub_goal_dag(state: TaskState) -> Dict[str, Any]:
+    """Runs all sub-goals, concurrently where their dependencies allow.
+
+    :param state: The task state after decomposition.
+    :type state: TaskState
+    :return: The merged history, per-sub-goal results and final sub-goal index.
+    :rtype: dict
+    """
+    logger.info("🕸️  Step: Execute Sub-Goal DAG")
+    goals = state.sub_goals
+    count = len(goals)
+    if count == 0:
+        return {}
+
+    deps = normalize_dependencies(state.sub_goal_deps, count) or [
+        [i - 1] if i else [] for i in range(count)
+    ]
+    state = state.model_copy(update={"sub_goal_deps": deps})
+    limit = state.runtime.max_parallel_sub_goals or 1
+    done: Dict[int, SubGoalResult] = {r.index: r for r in state.sub_goal_results}
+    history = list(state.history)
+    running: Dict[asyncio.Task, tuple] = {}
+    logger.info(f"Scheduling {count} sub-goals with up to {limit} in parallel.")
+
+    def _ready() -> Optional[int]:
+        active = {i for i, _ in running.values()}
+        for i in range(count):
+            if i in done or i in active:
+                continue
+            if all(d in done for d in deps[i]):
+                return i
+        return None
+
+    try:
+        while True:
+            while len(running) < limit and (i := _ready()) is not None:
+                blocked = [d for d in deps[i] if done[d].status != "completed"]
+                if blocked:
+                    done[i] = SubGoalResult(
+                        index=i,
+                        goal=goals[i],
+                        status="skipped",
+                        summary=f"Skipped: sub-goal(s) {', '.join(str(d + 1) for d in blocked)} did not complete.",
+                    )
+                    logger.warning(f"Sub-goal {i + 1} skipped; dependencies did not complete.")
+                    continue
+                logger.info(f"▶️  Sub-goal {i + 1}/{count}: {goals[i]}")
+                task = asyncio.create_task(_run_scoped(state, i, _scoped_prompt(state, i, done)))
+                running[task] = (i, time.time())
+            if not running:
+                break
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                i, started = running.pop(task)
+                try:
+                    entries = task.result()
+                except Exception as e:
+                    logger.error(f"Sub-goal {i + 1} raised {e.__class__.__name__}: {e}")
+                    entries = []
+                    result = SubGoalResult(
+                        index=i,
+                        goal=goals[i],
+                        status="failed",
+                        summary=f"[ERROR] {e.__class__.__name__}: {e}",
+                        start_time=started,
+                        end_time=time.time(),
+                    )
+                else:
+                    result = _result(i, goals[i], entries, started)
+                history.extend(entries)
+                done[i] = result
+                logger.info(f"Sub-goal {i + 1} {result.status} after {result.steps} step(s).")
+                log_replay_event(state.task_id, "SUB_GOAL_RESULT", result.model_dump())
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    return {
+        "history": history,
+        "sub_goal_deps": deps,
+        "sub_goal_results": [done[i] for i in sorted(done)],
+        "current_sub_goal_index": count,
+    }
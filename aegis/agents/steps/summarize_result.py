@@ -12,7 +12,10 @@ from pathlib import Path
 from aegis.agents.task_state import TaskState
 from aegis.utils.logger import setup_logger
 from aegis.utils.memory_indexer import update_memory_index
+from aegis.utils.memory_profiling import memory_report
+from aegis.utils.profiling import profile_report
 from aegis.utils.provenance import generate_provenance_report
+from aegis.utils.step_timing import aggregate_timings, format_timings_markdown
 
 logger = setup_logger(__name__)
 
@@ -50,6 +53,15 @@ def summarize_result(state: TaskState) -> dict:
             )
             summary_lines.append("**Observation:**")
             summary_lines.append(f"```\n{str(entry.observation)}\n```\n")
+        latency = format_timings_markdown(aggregate_timings(state.history))
+        if latency:
+            summary_lines.append(latency)
+        cpu_profile = profile_report(state.task_id)
+        if cpu_profile:
+            summary_lines.append(cpu_profile)
+        memory_profile = memory_report(state.task_id)
+        if memory_profile:
+            summary_lines.append(memory_profile)
         summary_lines.append("---\n**End of Report.**")
         final_summary = "\n".join(summary_lines)
 
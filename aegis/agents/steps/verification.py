@@ -1,5 +1,6 @@
 # aegis/agents/steps/verification.py
 import json
+import time
 from typing import Dict, Any, Callable, Awaitable, Literal, List, cast
 
 from pydantic import BaseModel, Field, ValidationError
@@ -10,8 +11,10 @@ from aegis.agents.task_state import TaskState
 from aegis.exceptions import PlannerError, ConfigurationError
 from aegis.registry import get_tool
 from aegis.schemas.plan_output import AgentScratchpad
+from aegis.utils import metrics
 from aegis.utils.llm_query import get_provider_for_profile
 from aegis.utils.logger import setup_logger
+from aegis.utils.step_timing import PhaseTimer
 from aegis.utils.tracing import span
 from aegis.utils.replay_logger import log_replay_event
 
@@ -33,6 +36,25 @@ async def verify_outcome(state: TaskState) -> Dict[str, Any]:
     Verifies the outcome of the last executed tool using a structured LLM call.
     """
     logger.info("🔎 Step: Verify Outcome")
+    started = time.perf_counter()
+    timer = PhaseTimer(last_node_end=state.last_node_end)
+    with timer.phase("verification"):
+        update = await _verify_outcome(state)
+    metrics.record_step("verify_outcome", started, timer.phases.get("queue"))
+    if state.history:
+        history = update.get("history", state.history)
+        last = history[-1]
+        metrics.VERIFICATIONS.inc(outcome=last.verification_status or "unknown")
+        # Add this phase to a copy of the entry; checkpointed states may share it.
+        timings = dict(last.timings)
+        for phase, ms in timer.as_dict().items():
+            timings[phase] = round(timings.get(phase, 0.0) + ms, 3)
+        update["history"] = history[:-1] + [last.model_copy(update={"timings": timings})]
+    update["last_node_end"] = time.time()
+    return update
+
+
+async def _verify_outcome(state: TaskState) -> Dict[str, Any]:
     last_history_entry = state.history[-1]
     last_observation = last_history_entry.observation
     last_plan = state.latest_plan
@@ -91,7 +113,7 @@ async def verify_outcome(state: TaskState) -> Dict[str, Any]:
             raise ConfigurationError("Backend profile is not set in task state.")
 
         provider = get_provider_for_profile(state.runtime.backend_profile)
-        with span(
+        with metrics.llm_call_type("judge"), span(
             "verifier.judge",  # standardized span name
             run_id=state.task_id,
             tool=(
@@ -0,0 +1,216 @@
+# aegis/agents/steps/warmup.py
+"""
+Optional executor warmup step for the agent graph.
+
+When enabled via `runtime.warmup`, this node runs once at task start and
+primes the executors the task is likely to need so the first real tool call
+does not pay for cold imports, DNS resolution, kubeconfig parsing, or daemon
+handshakes. Targets are inferred from the task prompt (machine names from
+machines.yaml) and from the preset's tool allowlist (docker / kubernetes /
+redis tool families).
+
+Every probe is best-effort: probes run concurrently under a strict overall
+time budget, failures are recorded but never fail the task, and the cost of
+the warmup is reported separately from the agent's step history.
+"""
+
+import asyncio
+import socket
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from aegis.agents.task_state import TaskState
+from aegis.utils.logger import setup_logger
+from aegis.utils.replay_logger import log_replay_event
+from aegis.utils.tracing import span
+
+logger = setup_logger(__name__)
+
+DEFAULT_WARMUP_BUDGET_S = 5.0
+
+# Substrings of tool names that indicate which executor family a tool uses.
+_FAMILY_HINTS: Dict[str, Tuple[str, ...]] = {
+    "docker": ("docker",),
+    "kubernetes": ("kubernetes", "k8s", "kubectl", "pod"),
+    "redis": ("redis",),
+}
+
+
+def _infer_machine_targets(prompt: str) -> List[str]:
+    """Returns machine names from machines.yaml that are mentioned in the prompt.
+
+    :param prompt: The task prompt.
+    :type prompt: str
+    :return: A sorted list of machine names.
+    :rtype: List[str]
+    """
+    try:
+        from aegis.utils.machine_loader import _load_manifest_from_file
+
+        manifest = _load_manifest_from_file() or {}
+    except Exception as e:
+        logger.debug(f"Warmup: machine manifest unavailable: {e}")
+        return []
+    lowered = (prompt or "").lower()
+    return sorted(
+        name
+        for name in manifest
+        if isinstance(name, str) and name and name.lower() in lowered
+    )
+
+
+def _infer_executor_families(tool_names: List[str]) -> List[str]:
+    """Returns the executor families implied by a list of allowed tool names.
+
+    :param tool_names: The tool names from the runtime allowlist.
+    :type tool_names: List[str]
+    :return: A sorted list of family names (e.g. 'docker', 'redis').
+    :rtype: List[str]
+    """
+    families = set()
+    for tool_name in tool_names or []:
+        lowered = tool_name.lower()
+        for family, hints in _FAMILY_HINTS.items():
+            if any(h in lowered for h in hints):
+                families.add(family)
+    return sorted(families)
+
+
+def _probe_ssh(machine_name: str, timeout: float) -> None:
+    """Resolves the machine's address and opens a TCP connection to its SSH port."""
+    from aegis.utils.machine_loader import get_machine
+
+    manifest = get_machine(machine_name)
+    iface = manifest.interfaces[0] if manifest.interfaces else None
+    if iface is None:
+        raise ValueError(f"Machine '{machine_name}' has no network interface.")
+    port = iface.port or manifest.ssh_port or 22
+    socket.getaddrinfo(iface.address, port)
+    with socket.create_connection((iface.address, port), timeout=timeout):
+        pass
+
+
+def _probe_docker(_target: str, timeout: float) -> None:
+    """Connects to the Docker daemon (the executor pings on construction)."""
+    from aegis.executors.docker_exec import DockerExecutor
+
+    DockerExecutor(timeout=max(1, int(timeout)))
+
+
+def _probe_kubernetes(_target: str, _timeout: float) -> None:
+    """Loads kubeconfig and builds the API clients."""
+    from aegis.executors.kubernetes_exec import KubernetesExecutor
+
+    KubernetesExecutor()
+
+
+def _probe_redis(_target: str, timeout: float) -> None:
+    """Connects to the configured Redis service and issues a PING."""
+    from aegis.executors.redis_exec import RedisExecutor
+    from aegis.utils.config import get_config
+
+    url = (get_config().get("services") or {}).get("redis_url")
+    RedisExecutor(url=url, socket_timeout=timeout).ping()
+
+
+_PROBES: Dict[str, Callable[[str, float], None]] = {
+    "ssh": _probe_ssh,
+    "docker": _probe_docker,
+    "kubernetes": _probe_kubernetes,
+    "redis": _probe_redis,
+}
+
+
+async def _run_probe(kind: str, target: str, timeout: float) -> Dict[str, Any]:
+    """Runs a single probe in a worker thread and records its outcome.
+
+    :param kind: The executor family ('ssh', 'docker', 'kubernetes', 'redis').
+    :type kind: str
+    :param target: The probe target (machine name, or the family name).
+    :type target: str
+    :param timeout: Per-probe timeout in seconds.
+    :type timeout: float
+    :return: A dictionary describing the probe outcome.
+    :rtype: Dict[str, Any]
+    """
+    started = time.perf_counter()
+    result: Dict[str, Any] = {"kind": kind, "target": target, "ok": False}
+    try:
+        await asyncio.wait_for(
+            asyncio.to_thread(_PROBES[kind], target, timeout), timeout=timeout
+        )
+        result["ok"] = True
+    except asyncio.TimeoutError:
+        result["error"] = f"timed out after {timeout:.2f}s"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+async def warmup_executors(state: TaskState) -> Dict[str, Any]:
+    """Primes the executors this task is likely to use, within a strict budget.
+
+    This node is a no-op unless `runtime.warmup` is true. Probes run
+    concurrently and are bounded by `runtime.warmup_budget_s`; any probe that
+    has not finished when the budget expires is reported as timed out. No
+    probe failure is ever propagated.
+
+    :param state: The current state of the agent's task.
+    :type state: TaskState
+    :return: A dictionary with the `warmup` report to merge into the state.
+    :rtype: Dict[str, Any]
+    """
+    if not getattr(state.runtime, "warmup", None):
+        return {}
+
+    logger.info("🔥 Step: Warmup Executors")
+    budget = float(
+        getattr(state.runtime, "warmup_budget_s", None) or DEFAULT_WARMUP_BUDGET_S
+    )
+
+    targets: List[Tuple[str, str]] = [
+        ("ssh", name) for name in _infer_machine_targets(state.task_prompt)
+    ]
+    targets.extend(
+        (family, family)
+        for family in _infer_executor_families(state.runtime.tool_allowlist)
+    )
+
+    started = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    with span("warmup.executors", run_id=state.task_id, targets=len(targets)):
+        if targets:
+            tasks = [
+                asyncio.create_task(_run_probe(kind, target, budget))
+                for kind, target in targets
+            ]
+            done, pending = await asyncio.wait(tasks, timeout=budget)
+            for task in pending:
+                task.cancel()
+            for (kind, target), task in zip(targets, tasks):
+                if task in done and not task.cancelled():
+                    results.append(task.result())
+                else:
+                    results.append(
+                        {
+                            "kind": kind,
+                            "target": target,
+                            "ok": False,
+                            "error": f"budget of {budget:.2f}s exhausted",
+                            "duration_ms": round(budget * 1000, 2),
+                        }
+                    )
+
+    report = {
+        "budget_s": budget,
+        "total_ms": round((time.perf_counter() - started) * 1000, 2),
+        "targets": results,
+    }
+    warmed = sum(1 for r in results if r.get("ok"))
+    logger.info(
+        f"Warmup finished: {warmed}/{len(results)} targets ready in {report['total_ms']}ms.",
+        extra={"warmup": report},
+    )
+    log_replay_event(state.task_id, "WARMUP", report)
+    return {"warmup": report}
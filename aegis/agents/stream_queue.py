@@ -0,0 +1,605 @@
+# aegis/agents/stream_queue.py
+"""
+Distributed task execution over Redis Streams.
+
+With `task_queue.mode: redis`, a launch accepted by any API node is appended
+to a Redis Stream and executed by whichever worker node reads it first:
+
+- Workers join one consumer group and read with `XREADGROUP`, at most
+  `concurrency` tasks at a time per worker.
+- An entry is acknowledged (`XACK`) only after the task's terminal state has
+  been written, so a worker that dies mid-task leaves it pending. Other
+  workers reclaim pending entries idle for longer than `claim_idle_ms` with
+  `XAUTOCLAIM`; a live worker keeps its entries fresh by re-claiming them
+  while they run.
+- Status, progress and results live in a hash per task (`aegis:task:<id>`),
+  indexed by creation time, and have the same fields as the SQLite task
+  store, so `GET /api/tasks/{id}` works unchanged.
+
+Worker nodes run `python -m aegis.agents.stream_queue`. Each task runs under
+its own `task_id_context`, and reports land in the usual
+`reports/<task_id>/` layout on the executing node.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import time
+from typing import Any, Dict, List, Optional
+
+from aegis.exceptions import DuplicateTaskError, QueueFullError
+from aegis.schemas.launch import LaunchRequest
+from aegis.utils import task_store as ts
+from aegis.utils.log_sinks import task_id_context
+from aegis.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_NAMESPACE = "aegis"
+GROUP_NAME = "aegis-workers"
+DEFAULT_CLAIM_IDLE_MS = 60_000
+DEFAULT_BLOCK_MS = 2_000
+DEFAULT_RETENTION_S = 7 * 24 * 3600
+
+_JSON_FIELDS = ("payload", "progress", "result")
+_FLOAT_FIELDS = ("created_at", "started_at", "finished_at")
+
+
+class RedisTaskQueue:
+    """The Redis side of the distributed queue: stream, consumer group and task hashes.
+
+    Row dicts returned by `get()`/`list()` match `TaskStore`'s, so the task
+    routes work with either backend.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        namespace: str = DEFAULT_NAMESPACE,
+        group: str = GROUP_NAME,
+        max_attempts: int = 3,
+        retention_s: int = DEFAULT_RETENTION_S,
+        maxlen: int = 100_000,
+    ):
+        """
+        :param client: A redis-py client created with `decode_responses=True`
+                       (e.g. `RedisExecutor(url).client`).
+        :param namespace: Key prefix; the stream is `<namespace>:tasks:stream`,
+                          task hashes `<namespace>:task:<id>`.
+        :param group: Consumer group shared by all workers.
+        :param max_attempts: Deliveries after which a task is marked FAILED.
+        :param retention_s: How long finished task hashes are kept.
+        :param maxlen: Approximate cap on the stream length.
+        """
+        self.client = client
+        self.namespace = namespace
+        self.stream = f"{namespace}:tasks:stream"
+        self.index_key = f"{namespace}:tasks:index"
+        self.group = group
+        self.max_attempts = max_attempts
+        self.retention_s = retention_s
+        self.maxlen = maxlen
+        self.db_path = f"redis stream {self.stream}"
+
+    def _task_key(self, task_id: str) -> str:
+        return f"{self.namespace}:task:{task_id}"
+
+    def ensure_group(self) -> None:
+        """Creates the stream and consumer group if they do not exist."""
+        try:
+            self.client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    # --- producer side ---
+
+    def enqueue(self, task_id: str, payload: Dict[str, Any]) -> str:
+        """Creates the task hash and appends the task to the stream.
+
+        :return: The stream entry id.
+        :raises DuplicateTaskError: If the task id already exists.
+        """
+        key = self._task_key(task_id)
+        if not self.client.hsetnx(key, "status", ts.QUEUED):
+            raise DuplicateTaskError(f"Task id '{task_id}' already exists.")
+        now = time.time()
+        payload_json = json.dumps(payload, default=str)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hset(
+            key,
+            mapping={
+                "task_id": task_id,
+                "payload": payload_json,
+                "created_at": now,
+                "attempts": 0,
+                "cancel_requested": 0,
+            },
+        )
+        pipe.zadd(self.index_key, {task_id: now})
+        pipe.xadd(
+            self.stream,
+            {"task_id": task_id, "payload": payload_json},
+            maxlen=self.maxlen,
+            approximate=True,
+        )
+        return pipe.execute()[-1]
+
+    def count(self, *statuses: str) -> int:
+        """Counts tasks not yet acknowledged, i.e. waiting or in flight.
+
+        Acknowledged entries are deleted from the stream, so this is its length.
+        """
+        return int(self.client.xlen(self.stream))
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.hgetall(self._task_key(task_id))
+        return self._decode(raw) if raw else None
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Lists the most recent tasks, optionally filtered by status."""
+        end = -1 if status else max(0, int(limit) - 1)
+        rows: List[Dict[str, Any]] = []
+        for task_id in self.client.zrevrange(self.index_key, 0, end):
+            row = self.get(task_id)
+            if row is None:
+                self.client.zrem(self.index_key, task_id)  # hash expired
+                continue
+            if status and row["status"] != status:
+                continue
+            rows.append(row)
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def request_cancel(self, task_id: str) -> Optional[str]:
+        """Cancels a queued task outright, or flags a running one."""
+        key = self._task_key(task_id)
+        status = self.client.hget(key, "status")
+        if status is None:
+            return None
+        if status == ts.QUEUED:
+            self.client.hset(
+                key,
+                mapping={
+                    "status": ts.CANCELLED,
+                    "cancel_requested": 1,
+                    "finished_at": time.time(),
+                },
+            )
+            self.client.expire(key, self.retention_s)
+            return ts.CANCELLED
+        if status == ts.RUNNING:
+            self.client.hset(key, "cancel_requested", 1)
+        return status
+
+    # --- worker side ---
+
+    def mark_running(self, task_id: str, worker: str) -> int:
+        """Records a delivery of the task to `worker`.
+
+        :return: The attempt number of this delivery.
+        """
+        key = self._task_key(task_id)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hincrby(key, "attempts", 1)
+        pipe.hset(
+            key,
+            mapping={"status": ts.RUNNING, "started_at": time.time(), "worker": worker},
+        )
+        return int(pipe.execute()[0])
+
+    def update_progress(self, task_id: str, progress: Dict[str, Any]) -> bool:
+        """Stores progress; returns True if cancellation was requested."""
+        key = self._task_key(task_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hset(key, "progress", json.dumps(progress, default=str))
+        pipe.hget(key, "cancel_requested")
+        return pipe.execute()[1] in ("1", 1)
+
+    def finish(
+        self,
+        task_id: str,
+        status: str,
+        *,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        key = self._task_key(task_id)
+        mapping: Dict[str, Any] = {"status": status, "finished_at": time.time()}
+        if result is not None:
+            mapping["result"] = json.dumps(result, default=str)
+        if error is not None:
+            mapping["error"] = error
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, self.retention_s)
+        pipe.execute()
+
+    def release(self, task_id: str) -> None:
+        """Returns a task interrupted by a graceful worker shutdown to QUEUED."""
+        self.client.hset(self._task_key(task_id), "status", ts.QUEUED)
+
+    def ack(self, entry_id: str) -> None:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.xack(self.stream, self.group, entry_id)
+        pipe.xdel(self.stream, entry_id)
+        pipe.execute()
+
+    def read(self, consumer: str, count: int, block_ms: int) -> List[tuple]:
+        """Reads up to `count` new entries for `consumer`."""
+        resp = self.client.xreadgroup(
+            self.group, consumer, {self.stream: ">"}, count=count, block=block_ms
+        )
+        return [entry for _stream, entries in (resp or []) for entry in entries]
+
+    def reclaim(self, consumer: str, min_idle_ms: int, count: int) -> List[tuple]:
+        """Claims entries other consumers left pending for too long."""
+        resp = self.client.xautoclaim(
+            self.stream, self.group, consumer, min_idle_ms, start_id="0-0", count=count
+        )
+        # redis-py returns [next_id, entries] (plus deleted ids on Redis 7).
+        entries = resp[1] if resp else []
+        return [e for e in entries if e and e[1]]
+
+    def touch(self, consumer: str, entry_ids: List[str]) -> None:
+        """Resets the idle time of entries this consumer is still working on."""
+        if entry_ids:
+            self.client.xclaim(
+                self.stream, self.group, consumer, 0, entry_ids, justid=True
+            )
+
+    def consumers(self) -> List[Dict[str, Any]]:
+        try:
+            return list(self.client.xinfo_consumers(self.stream, self.group))
+        except Exception:
+            return []
+
+    @staticmethod
+    def _decode(raw: Dict[str, str]) -> Dict[str, Any]:
+        row: Dict[str, Any] = dict(raw)
+        for f in _JSON_FIELDS:
+            if row.get(f):
+                try:
+                    row[f] = json.loads(row[f])
+                except Exception:
+                    pass
+        for f in _FLOAT_FIELDS:
+            if row.get(f) not in (None, ""):
+                row[f] = float(row[f])
+        row["attempts"] = int(row.get("attempts") or 0)
+        row["cancel_requested"] = str(row.get("cancel_requested")) == "1"
+        return row
+
+
+class StreamWorker:
+    """Consumes tasks from a `RedisTaskQueue` with a per-worker concurrency cap."""
+
+    def __init__(
+        self,
+        queue: RedisTaskQueue,
+        consumer: Optional[str] = None,
+        *,
+        concurrency: int = 1,
+        runner: Optional[Any] = None,
+        claim_idle_ms: int = DEFAULT_CLAIM_IDLE_MS,
+        block_ms: int = DEFAULT_BLOCK_MS,
+    ):
+        """
+        :param queue: The shared task queue.
+        :param consumer: Unique consumer name (defaults to host:pid).
+        :param concurrency: Maximum tasks this worker runs at once.
+        :param runner: Task runner `(payload, task_id, on_progress)`; defaults
+                       to the in-process `/launch` logic.
+        :param claim_idle_ms: Pending entries idle this long are reclaimed.
+        :param block_ms: How long one XREADGROUP call waits for new entries.
+        """
+        from aegis.agents.task_pool import _default_runner
+
+        self.queue = queue
+        self.consumer = consumer or f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = max(1, int(concurrency))
+        self.runner = runner or _default_runner
+        self.claim_idle_ms = claim_idle_ms
+        self.block_ms = block_ms
+        self._jobs: Dict[str, asyncio.Task] = {}
+        self._entries: Dict[str, str] = {}
+        self._loop_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.stats = {"tasks_completed": 0, "tasks_failed": 0, "tasks_cancelled": 0}
+
+    @property
+    def started(self) -> bool:
+        return self._loop_task is not None and not self._loop_task.done()
+
+    async def start(self) -> None:
+        if self.started:
+            return
+        self._stopping = False
+        await asyncio.to_thread(self.queue.ensure_group)
+        self._loop_task = asyncio.create_task(self._run(), name=f"aegis-stream-{self.consumer}")
+        logger.info(
+            f"Stream worker '{self.consumer}' consuming {self.queue.stream} "
+            f"(concurrency {self.concurrency})."
+        )
+
+    async def stop(self) -> None:
+        """Stops consuming. Running tasks are released un-acked for reclaim."""
+        self._stopping = True
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+
+    def cancel_local(self, task_id: str) -> bool:
+        job = self._jobs.get(task_id)
+        if job is None or job.done():
+            return False
+        job.cancel()
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "worker": self.consumer,
+            "alive": self.started,
+            "concurrency": self.concurrency,
+            "current_tasks": sorted(self._jobs),
+            **self.stats,
+        }
+
+    async def _run(self) -> None:
+        last_touch = 0.0
+        while not self._stopping:
+            free = self.concurrency - len(self._jobs)
+            try:
+                now = time.monotonic()
+                if self._entries and now - last_touch > self.claim_idle_ms / 3000:
+                    await asyncio.to_thread(
+                        self.queue.touch, self.consumer, list(self._entries.values())
+                    )
+                    last_touch = now
+                if free <= 0:
+                    await asyncio.sleep(min(1.0, self.block_ms / 1000))
+                    continue
+                entries = await asyncio.to_thread(
+                    self.queue.reclaim, self.consumer, self.claim_idle_ms, free
+                )
+                if not entries:
+                    entries = await asyncio.to_thread(
+                        self.queue.read, self.consumer, free, self.block_ms
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[{self.consumer}] Stream read failed: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            for entry_id, fields in entries:
+                task_id = fields.get("task_id")
+                if not task_id or task_id in self._jobs:
+                    continue
+                self._entries[task_id] = entry_id
+                self._jobs[task_id] = asyncio.create_task(
+                    self._handle(entry_id, task_id, fields.get("payload") or "{}")
+                )
+
+    async def _handle(self, entry_id: str, task_id: str, payload_json: str) -> None:
+        # Runs in its own asyncio task, so this context is private to the job.
+        task_id_context.set(task_id)
+        q = self.queue
+        ack = True
+        try:
+            row = await asyncio.to_thread(q.get, task_id)
+            if row is None or row["status"] in ts.TERMINAL_STATUSES:
+                return  # cancelled while queued, or already finished elsewhere
+            attempt = await asyncio.to_thread(q.mark_running, task_id, self.consumer)
+            if attempt > q.max_attempts:
+                await asyncio.to_thread(
+                    q.finish,
+                    task_id,
+                    ts.FAILED,
+                    error=f"Abandoned after {attempt - 1} interrupted attempts.",
+                )
+                return
+            logger.info(f"[{self.consumer}] ▶️  Starting task {task_id} (attempt {attempt}).")
+
+            async def on_progress(progress: Dict[str, Any]) -> None:
+                try:
+                    cancel = await asyncio.to_thread(q.update_progress, task_id, progress)
+                except Exception as e:
+                    logger.debug(f"Failed to record progress for task {task_id}: {e}")
+                    return
+                if cancel:
+                    raise asyncio.CancelledError()
+
+            try:
+                payload = LaunchRequest.model_validate(json.loads(payload_json))
+                response = await self.runner(payload, task_id, on_progress)
+            except asyncio.CancelledError:
+                if self._stopping:
+                    # Leave the entry pending so another worker reclaims it.
+                    ack = False
+                    await asyncio.to_thread(q.release, task_id)
+                    return
+                self.stats["tasks_cancelled"] += 1
+                await asyncio.to_thread(q.finish, task_id, ts.CANCELLED)
+                logger.info(f"[{self.consumer}] ⏹️  Task {task_id} was cancelled.")
+                return
+            except Exception as e:
+                self.stats["tasks_failed"] += 1
+                detail = getattr(e, "detail", None) or str(e)
+                logger.error(f"[{self.consumer}] Task {task_id} failed: {detail}")
+                await asyncio.to_thread(
+                    q.finish, task_id, ts.FAILED, error=f"{e.__class__.__name__}: {detail}"
+                )
+                return
+            self.stats["tasks_completed"] += 1
+            status = response.status or ts.COMPLETED
+            await asyncio.to_thread(
+                q.finish, task_id, status, result=response.model_dump()
+            )
+            logger.info(f"[{self.consumer}] Task {task_id} finished with status {status}.")
+        except Exception as e:
+            # Redis trouble while bookkeeping: leave the entry for reclaim.
+            ack = False
+            logger.error(f"[{self.consumer}] Lost track of task {task_id}: {e}")
+        finally:
+            self._jobs.pop(task_id, None)
+            self._entries.pop(task_id, None)
+            # Never ack during shutdown: whatever state the task reached, a
+            # redelivery either finishes it or sees it is terminal and acks.
+            if ack and not self._stopping:
+                try:
+                    await asyncio.to_thread(q.ack, entry_id)
+                except Exception as e:
+                    logger.error(f"[{self.consumer}] Failed to ack {entry_id}: {e}")
+
+
+class RedisStreamPool:
+    """The task-pool interface used by the API when `task_queue.mode: redis`.
+
+    Submissions go to the stream; if `run_workers` is set this node also
+    consumes tasks itself.
+    """
+
+    mode = "redis"
+    process_pool = None
+
+    def __init__(
+        self,
+        queue: RedisTaskQueue,
+        *,
+        max_queued: int = 100,
+        worker: Optional[StreamWorker] = None,
+    ):
+        self.store = queue
+        self.max_queued = max(1, int(max_queued))
+        self.worker = worker
+        self._started = False
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    async def ensure_started(self) -> None:
+        if self._started:
+            return
+        await asyncio.to_thread(self.store.ensure_group)
+        if self.worker is not None:
+            await self.worker.start()
+        self._started = True
+
+    async def shutdown(self) -> None:
+        if self.worker is not None:
+            await self.worker.stop()
+        self._started = False
+
+    async def submit(self, task_id: str, payload: LaunchRequest) -> None:
+        pending = await asyncio.to_thread(self.store.count)
+        if pending >= self.max_queued:
+            raise QueueFullError(
+                f"Task queue is full ({pending}/{self.max_queued} pending); retry later."
+            )
+        await asyncio.to_thread(
+            self.store.enqueue, task_id, payload.model_dump(mode="json")
+        )
+
+    async def cancel(self, task_id: str) -> Optional[str]:
+        status = await asyncio.to_thread(self.store.request_cancel, task_id)
+        if self.worker is not None:
+            self.worker.cancel_local(task_id)
+        return status
+
+    def workers_status(self) -> List[Dict[str, Any]]:
+        """Reports every consumer in the group, plus local counters for this node."""
+        local = self.worker.status() if self.worker is not None else None
+        out = []
+        for c in self.store.consumers():
+            entry = {
+                "worker": c.get("name"),
+                "pending": c.get("pending"),
+                "idle_ms": c.get("idle"),
+            }
+            if local and c.get("name") == local["worker"]:
+                entry.update(local)
+            out.append(entry)
+        if local and not any(e["worker"] == local["worker"] for e in out):
+            out.append(local)
+        return out
+
+
+def build_queue(
+    cfg: Dict[str, Any], redis_url: Optional[str], max_attempts: int = 3
+) -> RedisTaskQueue:
+    """Creates a `RedisTaskQueue` from the `task_queue.redis` config section.
+
+    :param cfg: The `task_queue.redis` section.
+    :param redis_url: Fallback URL (`services.redis_url`) if the section has none.
+    :param max_attempts: Deliveries after which a task is marked FAILED.
+    """
+    from aegis.executors.redis_exec import RedisExecutor
+
+    url = cfg.get("url") or redis_url or "redis://localhost:6379/0"
+    # The socket timeout must outlast a blocking XREADGROUP.
+    client = RedisExecutor(url, socket_timeout=DEFAULT_BLOCK_MS / 1000 + 5).client
+    return RedisTaskQueue(
+        client,
+        namespace=cfg.get("namespace") or DEFAULT_NAMESPACE,
+        group=cfg.get("group") or GROUP_NAME,
+        max_attempts=max_attempts,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Runs a standalone stream worker node."""
+    parser = argparse.ArgumentParser(description="AEGIS Redis Streams task worker.")
+    parser.add_argument("--consumer", help="Unique consumer name (default host:pid).")
+    parser.add_argument("--concurrency", type=int, help="Max concurrent tasks.")
+    parser.add_argument("--redis-url", help="Overrides task_queue.redis.url.")
+    args = parser.parse_args(argv)
+
+    from aegis.utils.config import get_config
+    from aegis.utils.tool_loader import import_all_tools
+
+    config = get_config()
+    tq = config.get("task_queue") or {}
+    cfg = tq.get("redis") or {}
+    if args.redis_url:
+        cfg = {**cfg, "url": args.redis_url}
+    queue = build_queue(
+        cfg,
+        (config.get("services") or {}).get("redis_url"),
+        max_attempts=int(tq.get("max_attempts") or 3),
+    )
+    import_all_tools()
+    worker = StreamWorker(
+        queue,
+        args.consumer,
+        concurrency=args.concurrency or int(cfg.get("concurrency") or 1),
+        claim_idle_ms=int(cfg.get("claim_idle_ms") or DEFAULT_CLAIM_IDLE_MS),
+    )
+
+    async def _serve() -> None:
+        await worker.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await worker.stop()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        logger.info("Stream worker stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# aegis/agents/subagents.py
+"""
+In-process sub-agent execution.
+
+An orchestrating agent delegates sub-tasks to child agents that run as asyncio
+tasks on the parent's event loop, so several children can work concurrently
+and the parent can join them with a timeout. Compiled child graphs are cached
+per preset, so launching a child costs no config parsing or graph compilation
+after the first time.
+
+Every child gets its own task id (`<parent>-sub-<n>`), its own
+`task_id_context` and its own `reports/<task_id>/` directory. The parent
+records a `SubAgentHandle` per child in `TaskState.subagents` and a
+`subagent:<child>` entry in its provenance chain; the child's state carries
+`parent_task_id`.
+
+Cancelling a parent cancels its children: every task calls `finalize_task()`
+(which calls `cancel_children()`) when it ends for any reason, and children
+do the same for their own children.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from aegis.agents.task_lifecycle import finalize_task
+from aegis.agents.task_state import TaskState
+from aegis.schemas.agent import AgentConfig, AgentGraphConfig
+from aegis.schemas.subagent import SubAgentHandle
+from aegis.utils import metrics
+from aegis.utils import provenance
+from aegis.utils.log_sinks import sub_goal_context, task_id_context
+from aegis.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_MAX_CONCURRENT = 4
+
+# child task id -> running asyncio task / its handle; parent id -> child ids.
+_TASKS: Dict[str, asyncio.Task] = {}
+_HANDLES: Dict[str, SubAgentHandle] = {}
+_CHILDREN: Dict[str, List[str]] = {}
+_SLOTS: Dict[str, asyncio.Semaphore] = {}
+
+
+def _max_concurrent() -> int:
+    try:
+        from aegis.utils.config import get_config
+
+        cfg = get_config().get("subagents") or {}
+        return max(1, int(cfg.get("max_concurrent") or DEFAULT_MAX_CONCURRENT))
+    except Exception:
+        return DEFAULT_MAX_CONCURRENT
+
+
+@lru_cache(maxsize=16)
+def _compiled_preset(preset: str) -> Tuple[AgentConfig, Any]:
+    """Loads a preset and compiles its graph once per process.
+
+    Children run without a checkpointer: a child that asks for human input
+    ends PAUSED and its parent decides what to do next.
+    """
+    from aegis.agents.agent_graph import AgentGraph
+    from aegis.utils.config_loader import load_agent_config
+
+    config = load_agent_config(profile=preset)
+    graph = AgentGraph(
+        AgentGraphConfig(
+            state_type=config.state_type,
+            entrypoint=config.entrypoint,
+            nodes=config.nodes,
+            edges=config.edges,
+            condition_node=config.condition_node,
+            condition_map=config.condition_map,
+            middleware=config.middleware,
+            interrupt_nodes=config.interrupt_nodes,
+        )
+    ).build_graph()
+    return config, graph
+
+
+def get_handle(task_id: str) -> Optional[SubAgentHandle]:
+    """Returns the live handle of a child launched in this process, if any."""
+    return _HANDLES.get(task_id)
+
+
+async def launch(
+    parent: TaskState,
+    prompt: str,
+    *,
+    preset: str = "default",
+    backend_profile: Optional[str] = None,
+    iterations: Optional[int] = None,
+) -> SubAgentHandle:
+    """Starts a child agent in the background and returns its handle.
+
+    :param parent: The orchestrating task's state; the handle is recorded in it.
+    :param prompt: The sub-task prompt.
+    :param preset: The agent preset the child runs.
+    :param backend_profile: The child's backend; defaults to the parent's.
+    :param iterations: Optional step budget overriding the preset's.
+    :return: The child's handle (status RUNNING).
+    :raises ConfigurationError: If the preset cannot be loaded or compiled.
+    """
+    config, graph = _compiled_preset(preset)
+    runtime = config.runtime.model_copy(
+        update={"backend_profile": backend_profile or parent.runtime.backend_profile}
+    )
+    if iterations is not None:
+        runtime.iterations = iterations
+
+    child_id = f"{parent.task_id}-sub-{uuid.uuid4().hex[:8]}"
+    handle = SubAgentHandle(
+        task_id=child_id,
+        parent_task_id=parent.task_id,
+        prompt=prompt,
+        preset=preset,
+        backend_profile=runtime.backend_profile,
+    )
+    child_state = TaskState(
+        task_id=child_id,
+        task_prompt=prompt,
+        runtime=runtime,
+        parent_task_id=parent.task_id,
+    )
+    step_index = len(parent.history)
+    _HANDLES[child_id] = handle
+    _CHILDREN.setdefault(parent.task_id, []).append(child_id)
+    if parent.task_id not in _SLOTS:
+        _SLOTS[parent.task_id] = asyncio.Semaphore(_max_concurrent())
+    _TASKS[child_id] = asyncio.create_task(
+        _run_child(handle, graph, child_state, _SLOTS[parent.task_id], step_index),
+        name=f"aegis-subagent-{child_id}",
+    )
+    parent.subagents[child_id] = handle
+    try:
+        provenance.record_subagent(
+            run_id=parent.task_id,
+            child_run_id=child_id,
+            event="launched",
+            step_index=step_index,
+        )
+    except Exception:
+        pass
+    logger.info(f"🧩 Launched sub-agent {child_id} (preset '{preset}'): '{prompt[:50]}...'")
+    return handle
+
+
+async def _run_child(
+    handle: SubAgentHandle,
+    graph: Any,
+    state: TaskState,
+    slots: asyncio.Semaphore,
+    step_index: int,
+) -> None:
+    # Runs in its own asyncio task, so this context is private to the child.
+    # The child's records are its own, not part of the parent's sub-goal.
+    task_id_context.set(handle.task_id)
+    parent_sub_goal = sub_goal_context.get()
+    sub_goal_context.set(None)
+    start = time.time()
+    metrics.ACTIVE_TASKS.inc()
+    try:
+        async with slots:
+            final = TaskState(**await graph.ainvoke(state.model_dump()))
+        if final.history and final.history[-1].plan.tool_name == "ask_human_for_input":
+            handle.status = "PAUSED"
+            handle.summary = final.history[-1].observation
+        else:
+            handle.status = "COMPLETED"
+            handle.summary = final.final_summary
+    except asyncio.CancelledError:
+        handle.status = "CANCELLED"
+        raise
+    except Exception as e:
+        handle.status = "FAILED"
+        handle.error = f"{e.__class__.__name__}: {e}"
+        logger.error(f"Sub-agent {handle.task_id} failed: {handle.error}")
+    finally:
+        metrics.ACTIVE_TASKS.dec()
+        await finalize_task(handle.task_id)
+        handle.finished_at = time.time()
+        sub_goal_context.set(parent_sub_goal)
+        try:
+            provenance.record_subagent(
+                run_id=handle.parent_task_id,
+                child_run_id=handle.task_id,
+                event=handle.status.lower(),
+                step_index=step_index,
+                summary=handle.summary or handle.error,
+                duration_ms=int((handle.finished_at - start) * 1000),
+            )
+        except Exception:
+            pass
+        logger.info(f"Sub-agent {handle.task_id} finished with status {handle.status}.")
+
+
+def _select(parent_task_id: str, task_ids: Optional[List[str]]) -> List[str]:
+    owned = _CHILDREN.get(parent_task_id, [])
+    if task_ids is None:
+        return list(owned)
+    return [t for t in task_ids if t in owned]
+
+
+async def join(
+    parent: TaskState,
+    task_ids: Optional[List[str]] = None,
+    *,
+    timeout: Optional[float] = None,
+    cancel_on_timeout: bool = False,
+) -> List[SubAgentHandle]:
+    """Waits for children of `parent` to finish.
+
+    :param parent: The orchestrating task's state; its handles are refreshed.
+    :param task_ids: Children to wait for (default: all of the parent's).
+    :param timeout: Seconds to wait; children still running afterwards are
+                    reported as RUNNING (or cancelled, see below).
+    :param cancel_on_timeout: Cancel children that did not finish in time.
+    :return: The handles of the selected children, in launch order.
+    """
+    ids = _select(parent.task_id, task_ids)
+    pending = [_TASKS[t] for t in ids if t in _TASKS and not _TASKS[t].done()]
+    if pending:
+        _done, not_done = await asyncio.wait(pending, timeout=timeout)
+        if not_done and cancel_on_timeout:
+            for task in not_done:
+                task.cancel()
+            await asyncio.gather(*not_done, return_exceptions=True)
+    handles = [_HANDLES[t] for t in ids]
+    for h in handles:
+        parent.subagents[h.task_id] = h
+    return handles
+
+
+async def cancel(parent_task_id: str, task_ids: Optional[List[str]] = None) -> List[SubAgentHandle]:
+    """Cancels running children of a parent and waits for them to stop.
+
+    :return: The handles of the selected children.
+    """
+    ids = _select(parent_task_id, task_ids)
+    running = [_TASKS[t] for t in ids if t in _TASKS and not _TASKS[t].done()]
+    for task in running:
+        task.cancel()
+    await asyncio.gather(*running, return_exceptions=True)
+    return [_HANDLES[t] for t in ids]
+
+
+async def cancel_children(parent_task_id: str) -> None:
+    """Cancels every child of a finished (or cancelled) parent and forgets them."""
+    if parent_task_id not in _CHILDREN:
+        return
+    handles = await cancel(parent_task_id)
+    for h in handles:
+        _TASKS.pop(h.task_id, None)
+        _HANDLES.pop(h.task_id, None)
+    _CHILDREN.pop(parent_task_id, None)
+    _SLOTS.pop(parent_task_id, None)
+    if any(h.status == "CANCELLED" for h in handles):
+        logger.info(f"Cancelled unfinished sub-agents of task {parent_task_id}.")
@@ -0,0 +1,40 @@
+# aegis/agents/task_lifecycle.py
+"""
+End-of-task cleanup shared by every way a task runs.
+
+The web launch and resume routes, the shell's `task run` / `task resume` and
+sub-agent runs all call `finalize_task()` when a task ends for any reason,
+so per-task state added by one subsystem is released on every path.
+"""
+
+from __future__ import annotations
+
+from aegis.utils import memory_profiling
+from aegis.utils import profiling
+from aegis.utils import provenance
+from aegis.utils.log_sinks import flush_task_logs
+from aegis.utils.replay_logger import close_replay_journal
+from aegis.utils.timeline import flush_timeline
+
+
+async def finalize_task(task_id: str) -> None:
+    """Releases what a finished, failed, paused or cancelled task still holds.
+
+    Cancels its sub-agents, flushes and closes its log file and replay journal
+    (which syncs `on_task_end` durability and starts compaction of an indexed
+    replay container), writes its timeline, drops unreported memory and CPU
+    profiles, and flushes pending provenance records.
+
+    :param task_id: The task that ended.
+    :type task_id: str
+    """
+    # Imported here: subagents finalizes its own children through this module.
+    from aegis.agents import subagents
+
+    await subagents.cancel_children(task_id)
+    flush_task_logs(task_id)
+    close_replay_journal(task_id)
+    flush_timeline(task_id)
+    memory_profiling.release_task(task_id)
+    profiling.release_task(task_id)
+    provenance.flush()
@@ -0,0 +1,402 @@
+# aegis/agents/task_pool.py
+"""
+A bounded pool of asyncio workers that execute queued agent tasks.
+
+Launch requests submitted with `async_mode` are persisted in a `TaskStore`
+(SQLite) and picked up here by at most `max_workers` concurrent workers. While
+a graph runs, its worker publishes progress (steps taken, current sub-goal,
+last tool) into the store after every state update, and honours cancellation
+requests both from this process (`cancel()`) and from any other process that
+shares the same database file (via the `cancel_requested` flag).
+
+Each claimed task is leased to this pool's store; a background loop extends
+the leases of the tasks running here and re-queues tasks whose lease expired
+because their process crashed or hung (including at startup). Re-queued tasks
+restart from their initial state.
+
+With `task_queue.mode: process` the graphs themselves execute in separate
+worker processes (`aegis.agents.process_pool`); the asyncio workers here then
+only dispatch tasks and record their progress and results.
+
+With `task_queue.mode: redis` tasks are distributed across machines through a
+Redis Stream instead (`aegis.agents.stream_queue`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+
+from aegis.exceptions import QueueFullError
+from aegis.schemas.api import LaunchResponse
+from aegis.schemas.launch import LaunchRequest
+from aegis.utils import metrics
+from aegis.utils import task_store as ts
+from aegis.utils.log_sinks import task_id_context
+from aegis.utils.logger import setup_logger
+from aegis.utils.task_store import TaskStore
+
+if TYPE_CHECKING:
+    from aegis.agents.process_pool import ProcessWorkerPool
+
+logger = setup_logger(__name__)
+
+DEFAULT_DB_PATH = "reports/tasks.sqlite3"
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_QUEUED = 100
+
+Runner = Callable[..., Awaitable[LaunchResponse]]
+
+
+def _field(obj: Any, name: str, default: Any = None) -> Any:
+    """Reads `name` from a dict or an object (graph snapshots may hold either)."""
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def progress_from_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Extracts a small, JSON-friendly progress summary from a state snapshot.
+
+    :param state: A `TaskState` dump as emitted by the graph.
+    :type state: Dict[str, Any]
+    :return: Steps taken, iteration budget, current sub-goal and last tool.
+    :rtype: Dict[str, Any]
+    """
+    history = _field(state, "history") or []
+    sub_goals = _field(state, "sub_goals") or []
+    index = _field(state, "current_sub_goal_index", 0) or 0
+    last = history[-1] if history else None
+    last_plan = _field(last, "plan") if last is not None else None
+    return {
+        "steps_taken": len(history),
+        "iterations": _field(_field(state, "runtime"), "iterations"),
+        "current_sub_goal_index": index,
+        "current_sub_goal": sub_goals[index] if 0 <= index < len(sub_goals) else None,
+        "last_tool": _field(last_plan, "tool_name") if last_plan is not None else None,
+        "last_status": _field(last, "status") if last is not None else None,
+        "updated_at": time.time(),
+    }
+
+
+async def _default_runner(
+    payload: LaunchRequest,
+    task_id: str,
+    on_progress: Callable[[Dict[str, Any]], Awaitable[None]],
+) -> LaunchResponse:
+    # Imported lazily: the web layer depends on this module, not the reverse.
+    from aegis.web.routes_launch import run_launch
+
+    async def on_update(snapshot: Dict[str, Any]) -> None:
+        await on_progress(progress_from_state(snapshot))
+
+    return await run_launch(payload, task_id, on_update=on_update)
+
+
+class TaskPool:
+    """Runs tasks from a `TaskStore` on a fixed number of asyncio workers."""
+
+    def __init__(
+        self,
+        store: TaskStore,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+        runner: Optional[Runner] = None,
+        poll_interval: float = 2.0,
+        process_pool: Optional["ProcessWorkerPool"] = None,
+    ):
+        """
+        :param store: The durable task store to claim work from.
+        :param max_workers: Maximum number of graphs executing concurrently.
+        :param max_queued: Maximum number of QUEUED + RUNNING tasks accepted.
+        :param runner: Coroutine `(payload, task_id, on_progress) -> LaunchResponse`
+                       that executes one task and awaits `on_progress` with a
+                       progress dict after each step. Defaults to running the
+                       `/launch` logic in this process.
+        :param poll_interval: Seconds between store polls when idle, so tasks
+                              enqueued by another process are still picked up.
+        :param process_pool: If given, graphs execute in its worker processes
+                             and its lifecycle follows this pool's.
+        """
+        self.store = store
+        self.max_workers = max(1, int(max_workers))
+        self.max_queued = max(1, int(max_queued))
+        self.process_pool = process_pool
+        self.runner: Runner = runner or (
+            process_pool.run if process_pool is not None else _default_runner
+        )
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._stopping = False
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lease_task: Optional[asyncio.Task] = None
+
+    @property
+    def mode(self) -> str:
+        return "process" if self.process_pool is not None else "inline"
+
+    @property
+    def started(self) -> bool:
+        return bool(self._workers)
+
+    async def ensure_started(self) -> None:
+        """Recovers interrupted tasks and starts the workers (idempotent)."""
+        if self._workers:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(self.store.recover)
+        if self.process_pool is not None:
+            await self.process_pool.start()
+        self._stats = {
+            f"worker-{i}": {
+                "current_task": None,
+                "tasks_completed": 0,
+                "tasks_failed": 0,
+                "tasks_cancelled": 0,
+            }
+            for i in range(self.max_workers)
+        }
+        self._workers = [
+            asyncio.create_task(self._worker(f"worker-{i}"), name=f"aegis-task-worker-{i}")
+            for i in range(self.max_workers)
+        ]
+        self._lease_task = asyncio.create_task(self._lease_loop(), name="aegis-task-leases")
+        self._wakeup.set()
+        logger.info(
+            f"Task pool started with {self.max_workers} worker(s) on {self.store.db_path}."
+        )
+
+    async def shutdown(self) -> None:
+        """Stops the workers. Tasks still running stay RUNNING in the store with
+        their leases released, so `recover()` re-queues them on the next start."""
+        if not self._workers:
+            return
+        self._stopping = True
+        for job in list(self._running.values()):
+            job.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        if self._lease_task is not None:
+            self._lease_task.cancel()
+        await asyncio.gather(
+            *self._workers, *([self._lease_task] if self._lease_task else []),
+            return_exceptions=True,
+        )
+        self._workers = []
+        self._lease_task = None
+        self._running.clear()
+        try:
+            await asyncio.to_thread(self.store.release)
+        except Exception as e:
+            logger.warning(f"Failed to release task leases: {e}")
+        if self.process_pool is not None:
+            await self.process_pool.stop()
+        logger.info("Task pool stopped.")
+
+    async def submit(self, task_id: str, payload: LaunchRequest) -> None:
+        """Persists a task and wakes a worker.
+
+        :raises QueueFullError: If `max_queued` tasks are already pending.
+        :raises DuplicateTaskError: If the task id is already in use.
+        """
+        pending = await asyncio.to_thread(self.store.count, ts.QUEUED, ts.RUNNING)
+        if pending >= self.max_queued:
+            raise QueueFullError(
+                f"Task queue is full ({pending}/{self.max_queued} pending); retry later."
+            )
+        await asyncio.to_thread(
+            self.store.enqueue, task_id, payload.model_dump(mode="json")
+        )
+        self._wakeup.set()
+
+    async def cancel(self, task_id: str) -> Optional[str]:
+        """Cancels a queued task, or interrupts it if it is running here.
+
+        :return: The task's status after the request, or None if unknown.
+        """
+        status = await asyncio.to_thread(self.store.request_cancel, task_id)
+        job = self._running.get(task_id)
+        if job is not None and not job.done():
+            job.cancel()
+        return status
+
+    def workers_status(self) -> List[Dict[str, Any]]:
+        """Reports per-worker health and task counts.
+
+        In process mode these come from the worker processes (pid, heartbeat,
+        restarts); otherwise from the in-process asyncio workers.
+        """
+        if self.process_pool is not None:
+            return self.process_pool.status()
+        return [
+            {"worker": name, "alive": not task.done(), **self._stats.get(name, {})}
+            for name, task in zip(self._stats, self._workers)
+        ]
+
+    # --- workers ---
+
+    async def _lease_loop(self) -> None:
+        """Renews the leases of tasks running here and reclaims expired ones."""
+        interval = max(0.05, self.store.lease_s / 3)
+        while not self._stopping:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.store.heartbeat, list(self._running))
+                if await asyncio.to_thread(self.store.recover):
+                    self._wakeup.set()
+            except Exception as e:
+                logger.warning(f"Failed to renew task leases: {e}")
+
+    async def _worker(self, name: str) -> None:
+        while not self._stopping:
+            try:
+                row = await asyncio.to_thread(self.store.claim_next, name)
+            except Exception as e:
+                logger.error(f"[{name}] Failed to claim a task: {e}")
+                row = None
+            if row is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run_one(name, row)
+
+    async def _run_one(self, name: str, row: Dict[str, Any]) -> None:
+        task_id = row["task_id"]
+        logger.info(f"[{name}] ▶️  Starting queued task {task_id} (attempt {row['attempts']}).")
+        if row.get("started_at") and row.get("created_at"):
+            metrics.QUEUE_WAIT_SECONDS.observe(
+                max(0.0, row["started_at"] - row["created_at"]), queue="task"
+            )
+        try:
+            payload = LaunchRequest.model_validate(row["payload"])
+        except Exception as e:
+            await self._finish(task_id, ts.FAILED, error=f"Invalid payload: {e}")
+            return
+
+        stats = self._stats.setdefault(name, {})
+        stats["current_task"] = task_id
+        job = asyncio.create_task(self._execute(task_id, payload))
+        self._running[task_id] = job
+        try:
+            response = await job
+            status = response.status or ts.COMPLETED
+            await self._finish(task_id, status, result=response.model_dump())
+            stats["tasks_completed"] = stats.get("tasks_completed", 0) + 1
+            logger.info(f"[{name}] Task {task_id} finished with status {status}.")
+        except asyncio.CancelledError:
+            if self._stopping:
+                raise
+            await self._finish(task_id, ts.CANCELLED)
+            stats["tasks_cancelled"] = stats.get("tasks_cancelled", 0) + 1
+            logger.info(f"[{name}] ⏹️  Task {task_id} was cancelled.")
+        except Exception as e:
+            stats["tasks_failed"] = stats.get("tasks_failed", 0) + 1
+            detail = getattr(e, "detail", None) or str(e)
+            logger.error(f"[{name}] Task {task_id} failed: {e.__class__.__name__}: {detail}")
+            await self._finish(task_id, ts.FAILED, error=f"{e.__class__.__name__}: {detail}")
+        finally:
+            stats["current_task"] = None
+            self._running.pop(task_id, None)
+
+    async def _finish(self, task_id: str, status: str, **kwargs: Any) -> None:
+        if not await asyncio.to_thread(self.store.finish, task_id, status, **kwargs):
+            logger.warning(
+                f"Task {task_id} ended as {status} after its lease was lost; "
+                "the result was discarded."
+            )
+
+    async def _execute(self, task_id: str, payload: LaunchRequest) -> LaunchResponse:
+        # Runs in its own asyncio task, so this context is private to the job.
+        task_id_context.set(task_id)
+
+        async def on_progress(progress: Dict[str, Any]) -> None:
+            try:
+                cancel_requested = await asyncio.to_thread(
+                    self.store.update_progress, task_id, progress
+                )
+            except Exception as e:
+                logger.debug(f"Failed to record progress for task {task_id}: {e}")
+                return
+            if cancel_requested:
+                raise asyncio.CancelledError()
+
+        return await self.runner(payload, task_id, on_progress)
+
+
+_POOL: Optional[TaskPool] = None
+
+
+def get_task_pool() -> TaskPool:
+    """Returns the process-wide task pool, configured from `task_queue` in config.yaml."""
+    global _POOL
+    if _POOL is None:
+        try:
+            from aegis.utils.config import get_config
+
+            config = get_config()
+        except Exception:
+            config = {}
+        cfg = config.get("task_queue") or {}
+        mode = str(cfg.get("mode") or "inline").lower()
+        if mode == "redis":
+            _POOL = _build_stream_pool(cfg, config)  # type: ignore[assignment]
+            return _POOL  # type: ignore[return-value]
+        store = TaskStore(
+            cfg.get("db_path") or DEFAULT_DB_PATH,
+            max_attempts=int(cfg.get("max_attempts") or 3),
+            lease_s=float(cfg.get("lease_s") or ts.DEFAULT_LEASE_S),
+        )
+        max_workers = int(cfg.get("max_workers") or DEFAULT_MAX_WORKERS)
+        process_pool = None
+        if mode == "process":
+            from aegis.agents.process_pool import DEFAULT_STALE_AFTER_S, ProcessWorkerPool
+
+            process_pool = ProcessWorkerPool(
+                max_workers,
+                stale_after_s=float(cfg.get("worker_stale_s") or DEFAULT_STALE_AFTER_S),
+            )
+        _POOL = TaskPool(
+            store,
+            max_workers=max_workers,
+            max_queued=int(cfg.get("max_queued") or DEFAULT_MAX_QUEUED),
+            process_pool=process_pool,
+        )
+    return _POOL
+
+
+def _build_stream_pool(cfg: Dict[str, Any], config: Dict[str, Any]) -> Any:
+    from aegis.agents.stream_queue import (
+        DEFAULT_CLAIM_IDLE_MS,
+        RedisStreamPool,
+        StreamWorker,
+        build_queue,
+    )
+
+    rcfg = cfg.get("redis") or {}
+    queue = build_queue(
+        rcfg,
+        (config.get("services") or {}).get("redis_url"),
+        max_attempts=int(cfg.get("max_attempts") or 3),
+    )
+    worker = None
+    if rcfg.get("run_workers", True):
+        worker = StreamWorker(
+            queue,
+            rcfg.get("consumer"),
+            concurrency=int(
+                rcfg.get("concurrency") or cfg.get("max_workers") or DEFAULT_MAX_WORKERS
+            ),
+            claim_idle_ms=int(rcfg.get("claim_idle_ms") or DEFAULT_CLAIM_IDLE_MS),
+        )
+    return RedisStreamPool(
+        queue,
+        max_queued=int(cfg.get("max_queued") or DEFAULT_MAX_QUEUED),
+        worker=worker,
+    )
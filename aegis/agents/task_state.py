@@ -8,12 +8,14 @@ record of the agent's entire workflow.
 """
 
 import time
-from typing import List, Any, Optional, Literal
+from typing import List, Any, Optional, Literal, Dict
 
 from pydantic import BaseModel, Field
 
+from aegis.schemas.background_job import BackgroundJobHandle
 from aegis.schemas.plan_output import AgentScratchpad
 from aegis.schemas.runtime import RuntimeExecutionConfig
+from aegis.schemas.subagent import SubAgentHandle
 from aegis.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -36,6 +38,11 @@ class HistoryEntry(BaseModel):
     :vartype end_time: float
     :ivar duration_ms: The duration of the step in milliseconds.
     :vartype duration_ms: float
+    :ivar sub_goal_index: The sub-goal this step worked on, when sub-goals run as a DAG.
+    :vartype sub_goal_index: Optional[int]
+    :ivar timings: Milliseconds spent per phase of the step (planning, policy,
+        tool, verification, ...); see `aegis.utils.step_timing`.
+    :vartype timings: Dict[str, float]
     """
 
     plan: AgentScratchpad
@@ -45,6 +52,36 @@ class HistoryEntry(BaseModel):
     start_time: float = Field(default_factory=time.time)
     end_time: float = Field(default_factory=time.time)
     duration_ms: float = 0.0
+    sub_goal_index: Optional[int] = None
+    timings: Dict[str, float] = Field(default_factory=dict)
+
+
+class SubGoalResult(BaseModel):
+    """The outcome of one sub-goal executed by the sub-goal DAG step.
+
+    :ivar index: Position of the sub-goal in `TaskState.sub_goals`.
+    :vartype index: int
+    :ivar goal: The sub-goal text.
+    :vartype goal: str
+    :ivar status: 'completed', 'failed', 'skipped' (a dependency did not complete) or 'cancelled'.
+    :vartype status: Literal["completed", "failed", "skipped", "cancelled"]
+    :ivar summary: The last observation of the sub-goal's planning loop.
+    :vartype summary: str
+    :ivar steps: Number of history entries the sub-goal produced.
+    :vartype steps: int
+    :ivar start_time: The Unix timestamp when the sub-goal started.
+    :vartype start_time: Optional[float]
+    :ivar end_time: The Unix timestamp when the sub-goal finished.
+    :vartype end_time: Optional[float]
+    """
+
+    index: int
+    goal: str
+    status: Literal["completed", "failed", "skipped", "cancelled"]
+    summary: str = ""
+    steps: int = 0
+    start_time: Optional[float] = None
+    end_time: Optional[float] = None
 
 
 class TaskState(BaseModel):
@@ -63,6 +100,14 @@ class TaskState(BaseModel):
     :ivar human_feedback: Optional feedback provided by a human operator to resume a paused task.
     :ivar sub_goals: A list of high-level sub-goals decomposed from the main prompt.
     :ivar current_sub_goal_index: The index of the currently active sub-goal.
+    :ivar sub_goal_deps: Per sub-goal, the indices of the sub-goals it depends on.
+    :ivar sub_goal_results: Outcomes of sub-goals executed by the sub-goal DAG step.
+    :ivar warmup: The executor warmup report, kept separate from the step history.
+    :ivar background_jobs: Handles to remote background jobs, keyed by job id.
+    :ivar parent_task_id: The orchestrating task's id if this task is a sub-agent.
+    :ivar subagents: Handles to sub-agents launched by this task, keyed by task id.
+    :ivar pending_timings: Phases timed for the next step before its history entry exists.
+    :ivar last_node_end: Unix time at which the last timed node finished.
     """
 
     task_id: str
@@ -82,6 +127,40 @@ class TaskState(BaseModel):
     current_sub_goal_index: int = Field(
         0, description="The index of the currently active sub-goal."
     )
+    sub_goal_deps: List[List[int]] = Field(
+        default_factory=list,
+        description="Per sub-goal, the indices of the sub-goals it depends on (empty: run in order).",
+    )
+    sub_goal_results: List[SubGoalResult] = Field(
+        default_factory=list,
+        description="Outcomes of sub-goals executed by the sub-goal DAG step, in index order.",
+    )
+
+    warmup: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Executor warmup report (budget, total cost, per-target outcomes).",
+    )
+
+    background_jobs: Dict[str, BackgroundJobHandle] = Field(
+        default_factory=dict,
+        description="Handles to remote background jobs launched during this task, keyed by job id.",
+    )
+
+    parent_task_id: Optional[str] = Field(
+        None, description="The orchestrating task's id if this task is a sub-agent."
+    )
+    subagents: Dict[str, SubAgentHandle] = Field(
+        default_factory=dict,
+        description="Handles to sub-agents launched during this task, keyed by task id.",
+    )
+
+    pending_timings: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Phases timed for the next step (e.g. planning) before its history entry exists.",
+    )
+    last_node_end: Optional[float] = Field(
+        None, description="Unix time at which the last timed node finished."
+    )
 
     @property
     def steps_taken(self) -> int:
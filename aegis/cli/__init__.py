@@ -38,3 +38,5 @@ def register_all_cli_commands(app: cmd2.Cmd) -> None:
     safe_register("aegis.cli.http")
     safe_register("aegis.cli.gitlab")
     safe_register("aegis.cli.local")
+    safe_register("aegis.cli.provenance")
+    safe_register("aegis.cli.replay")
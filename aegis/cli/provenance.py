@@ -0,0 +1,62 @@
+# aegis/cli/provenance.py
+"""
+Provenance ledger CLI integration for AEGIS.
+
+Subcommands:
+  - verify : Verify the hash chain and Merkle checkpoints, segments in parallel
+
+This is a thin adapter over `aegis.utils.provenance.verify_ledger`.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import asdict
+
+import cmd2
+from cmd2 import Cmd2ArgumentParser, with_argparser, with_default_category
+
+from aegis.utils.provenance import format_verification, verify_ledger
+
+
+def _make_parser() -> Cmd2ArgumentParser:
+    p = Cmd2ArgumentParser(
+        prog="provenance",
+        description="Provenance ledger operations",
+        add_help=True,
+    )
+    sub = p.add_subparsers(dest="subcmd", required=True)
+
+    pv = sub.add_parser("verify", help="Verify the ledger and report the first break")
+    pv.add_argument("--path", help="Ledger path (defaults to the active ledger)")
+    pv.add_argument(
+        "--workers", type=int, help="Worker processes (default: one per CPU)"
+    )
+    pv.add_argument("--run-id", dest="run_id", help="Also count this run's entries")
+    pv.add_argument(
+        "--json", dest="json_out", action="store_true", help="Emit the result as JSON"
+    )
+    return p
+
+
+@with_default_category("Provenance")
+class ProvenanceCommandSet(cmd2.CommandSet):
+    @with_argparser(_make_parser())
+    def do_provenance(self, ns: cmd2.Statement) -> None:
+        a = ns
+
+        if a.subcmd == "verify":
+            result = verify_ledger(a.path, workers=a.workers, run_id=a.run_id)
+            setattr(self._cmd, "_last_exit_code", 0 if result.ok else 1)
+            if a.json_out:
+                self._cmd.poutput(json.dumps(asdict(result), ensure_ascii=False))
+            elif result.ok:
+                self._cmd.poutput(format_verification(result))
+            else:
+                self._cmd.perror(format_verification(result))
+            return
+
+        self._cmd.perror(f"Unknown subcommand: {a.subcmd}")
+
+
+def register(app: cmd2.Cmd) -> None:
+    app.add_command_set(ProvenanceCommandSet())
@@ -0,0 +1,98 @@
+# aegis/cli/replay.py
+"""
+Replay log CLI integration for AEGIS.
+
+Subcommands:
+  - convert : Build the indexed, compressed container from a replay.jsonl
+  - show    : Print the events of one step and/or type, using the index
+
+This is a thin adapter over `aegis.utils.replay_store`.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import cmd2
+from cmd2 import Cmd2ArgumentParser, with_argparser, with_default_category
+
+from aegis.exceptions import ReplayError
+from aegis.utils.replay_store import CONTAINER_FILE, convert_task, open_replay
+
+
+def _task_dir(task: str) -> Path:
+    path = Path(task)
+    return path if path.is_dir() else Path("reports") / task
+
+
+def _make_parser() -> Cmd2ArgumentParser:
+    p = Cmd2ArgumentParser(
+        prog="replay",
+        description="Replay log operations",
+        add_help=True,
+    )
+    sub = p.add_subparsers(dest="subcmd", required=True)
+
+    pc = sub.add_parser("convert", help="Convert a task's replay.jsonl to an indexed container")
+    pc.add_argument("task", help="Task ID or task reports directory")
+    pc.add_argument("--level", type=int, help="zstd level (default: replay.zstd_level)")
+    pc.add_argument(
+        "--remove-jsonl",
+        dest="remove_jsonl",
+        action="store_true",
+        help="Delete replay.jsonl after a successful conversion",
+    )
+
+    ps = sub.add_parser("show", help="Print replay events of one step and/or type")
+    ps.add_argument("task", help="Task ID or task reports directory")
+    ps.add_argument("--step", type=int, help="Only this step")
+    ps.add_argument("--event-type", dest="event_type", help="Only this event type")
+    ps.add_argument(
+        "--index", dest="index_only", action="store_true", help="List steps and event types only"
+    )
+    return p
+
+
+@with_default_category("Replay")
+class ReplayCommandSet(cmd2.CommandSet):
+    @with_argparser(_make_parser())
+    def do_replay(self, ns: cmd2.Statement) -> None:
+        a = ns
+        task_dir = _task_dir(a.task)
+        try:
+            if a.subcmd == "convert":
+                index = convert_task(
+                    task_dir, level=a.level, keep_jsonl=not a.remove_jsonl
+                )
+                info = json.loads(index.read_text(encoding="utf-8"))
+                self._cmd.poutput(
+                    f"Wrote {index.parent / CONTAINER_FILE}: {info['source']['events']} events, "
+                    f"{len(info['frames'])} frames, {info['container_bytes']} bytes "
+                    f"(from {info['source'].get('bytes', '?')} bytes)."
+                )
+                return
+
+            if a.subcmd == "show":
+                replay = open_replay(task_dir)
+                if replay is None:
+                    self._cmd.perror(f"No replay log in {task_dir}.")
+                    return
+                if a.index_only:
+                    for entry in replay.entries():
+                        if a.step is None or entry["step"] == a.step:
+                            self._cmd.poutput(
+                                f"{entry['step']:>4}  {entry['ts_iso']}  {entry['event_type']}"
+                            )
+                    return
+                for event in replay.iter_events(step=a.step, event_type=a.event_type):
+                    self._cmd.poutput(json.dumps(event, ensure_ascii=False, default=str))
+                return
+        except (ReplayError, OSError) as e:
+            self._cmd.perror(f"replay {a.subcmd} failed: {e}")
+            return
+
+        self._cmd.perror(f"Unknown subcommand: {a.subcmd}")
+
+
+def register(app: cmd2.Cmd) -> None:
+    app.add_command_set(ReplayCommandSet())
@@ -72,3 +72,38 @@ class PlannerError(AegisError):
     """
 
     pass
+
+
+class DuplicateTaskError(AegisError, ValueError):
+    """Raised when a task is submitted with an id that is already in use."""
+
+    pass
+
+
+class QueueFullError(AegisError):
+    """Raised when the background task queue has reached its configured capacity.
+
+    The API maps this to HTTP 429 so clients can back off and retry.
+    """
+
+    pass
+
+
+class WorkerError(AegisError):
+    """Raised when a task fails inside, or loses, an agent worker process.
+
+    The message carries the original exception class and text from the
+    worker, or the exit code if the worker process died.
+    """
+
+    pass
+
+
+class ReplayError(AegisError):
+    """Raised when a replay log cannot be written or read.
+
+    For example, when an indexed replay container does not match its index,
+    or when the optional `zstandard` package it needs is not installed.
+    """
+
+    pass
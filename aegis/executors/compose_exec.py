@@ -32,6 +32,7 @@ from aegis.schemas.tool_result import ToolResult
 from aegis.utils.dryrun import dry_run
 from aegis.utils.redact import redact_for_log
 from aegis.utils.exec_common import run_subprocess, now_ms as _now_ms
+from aegis.utils.sandbox import load_limits
 
 logger = setup_logger(__name__)
 
@@ -89,9 +90,19 @@ class ComposeExecutor:
         """
         self.project_dir = Path(project_dir) if project_dir else None
         self.default_timeout = int(default_timeout)
+        # Confines the compose CLI process (limits.sandbox). Containers are
+        # started by the Docker daemon; limit those in the compose file.
+        self.limits = load_limits()
+        self.last_resource_usage: Optional[Dict[str, Any]] = None
 
     # -------- internal helpers --------
 
+    def result_meta(self, meta: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """ToolResult meta with the last command's sandbox usage, if any."""
+        if not self.last_resource_usage:
+            return meta
+        return {**(meta or {}), "resources": self.last_resource_usage}
+
     def _base_cmd_candidates(self) -> List[List[str]]:
         """
         Return candidate argv prefixes to try, in order.
@@ -126,7 +137,9 @@ class ComposeExecutor:
                     text_mode=False,  # we will decode explicitly
                     cwd=str(self.project_dir) if self.project_dir else None,
                     env=env or None,
+                    limits=self.limits,
                 )
+                self.last_resource_usage = getattr(res, "resource_usage", None)
                 rc = res.returncode if res.returncode is not None else 1
                 out = res.stdout or b""
                 err = res.stderr or b""
@@ -463,8 +476,8 @@ class ComposeExecutorToolResultMixin:
                 latency_ms=_now_ms() - start,
                 meta={"preview": preview},
             )
+        exe = ComposeExecutor(project_dir=project_dir)
         try:
-            exe = ComposeExecutor(project_dir=project_dir)
             out = exe.up(
                 file=file,
                 profiles=profiles,
@@ -482,14 +495,14 @@ class ComposeExecutorToolResultMixin:
                 stdout=out,
                 exit_code=0,
                 latency_ms=_now_ms() - start,
-                meta={"project_name": project_name, "file": file},
+                meta=exe.result_meta({"project_name": project_name, "file": file}),
             )
         except Exception as e:
             return ToolResult.err_result(
                 error_type=_errtype(e),
                 stderr=str(e),
                 latency_ms=_now_ms() - start,
-                meta={"project_name": project_name, "file": file},
+                meta=exe.result_meta({"project_name": project_name, "file": file}),
             )
 
     def down_result(
@@ -523,8 +536,8 @@ class ComposeExecutorToolResultMixin:
                 latency_ms=_now_ms() - start,
                 meta={"preview": preview},
             )
+        exe = ComposeExecutor(project_dir=project_dir)
         try:
-            exe = ComposeExecutor(project_dir=project_dir)
             out = exe.down(
                 file=file,
                 volumes=volumes,
@@ -537,14 +550,14 @@ class ComposeExecutorToolResultMixin:
                 stdout=out,
                 exit_code=0,
                 latency_ms=_now_ms() - start,
-                meta={"project_name": project_name, "file": file},
+                meta=exe.result_meta({"project_name": project_name, "file": file}),
             )
         except Exception as e:
             return ToolResult.err_result(
                 error_type=_errtype(e),
                 stderr=str(e),
                 latency_ms=_now_ms() - start,
-                meta={"project_name": project_name, "file": file},
+                meta=exe.result_meta({"project_name": project_name, "file": file}),
             )
 
     def ps_result(
@@ -574,21 +587,21 @@ class ComposeExecutorToolResultMixin:
                 latency_ms=_now_ms() - start,
                 meta={"preview": preview},
             )
+        exe = ComposeExecutor(project_dir=project_dir)
         try:
-            exe = ComposeExecutor(project_dir=project_dir)
             out = exe.ps(file=file, project_name=project_name, timeout=timeout, env=env)
             return ToolResult.ok_result(
                 stdout=out,
                 exit_code=0,
                 latency_ms=_now_ms() - start,
-                meta={"project_name": project_name, "file": file},
+                meta=exe.result_meta({"project_name": project_name, "file": file}),
             )
         except Exception as e:
             return ToolResult.err_result(
                 error_type=_errtype(e),
                 stderr=str(e),
                 latency_ms=_now_ms() - start,
-                meta={"project_name": project_name, "file": file},
+                meta=exe.result_meta({"project_name": project_name, "file": file}),
             )
 
     def logs_result(
@@ -626,8 +639,8 @@ class ComposeExecutorToolResultMixin:
                 latency_ms=_now_ms() - start,
                 meta={"preview": preview},
             )
+        exe = ComposeExecutor(project_dir=project_dir)
         try:
-            exe = ComposeExecutor(project_dir=project_dir)
             out = exe.logs(
                 services=services,
                 file=file,
@@ -642,14 +655,14 @@ class ComposeExecutorToolResultMixin:
                 stdout=out,
                 exit_code=0,
                 latency_ms=_now_ms() - start,
-                meta={"project_name": project_name, "file": file},
+                meta=exe.result_meta({"project_name": project_name, "file": file}),
             )
         except Exception as e:
             return ToolResult.err_result(
                 error_type=_errtype(e),
                 stderr=str(e),
                 latency_ms=_now_ms() - start,
-                meta={"project_name": project_name, "file": file},
+                meta=exe.result_meta({"project_name": project_name, "file": file}),
             )
 
     def build_result(
@@ -681,8 +694,8 @@ class ComposeExecutorToolResultMixin:
                 latency_ms=_now_ms() - start,
                 meta={"preview": preview},
             )
+        exe = ComposeExecutor(project_dir=project_dir)
         try:
-            exe = ComposeExecutor(project_dir=project_dir)
             out = exe.build(
                 services=services,
                 no_cache=no_cache,
@@ -691,11 +704,17 @@ class ComposeExecutorToolResultMixin:
                 env=env,
             )
             return ToolResult.ok_result(
-                stdout=out, exit_code=0, latency_ms=_now_ms() - start
+                stdout=out,
+                exit_code=0,
+                latency_ms=_now_ms() - start,
+                meta=exe.result_meta(),
             )
         except Exception as e:
             return ToolResult.err_result(
-                error_type=_errtype(e), stderr=str(e), latency_ms=_now_ms() - start
+                error_type=_errtype(e),
+                stderr=str(e),
+                latency_ms=_now_ms() - start,
+                meta=exe.result_meta(),
             )
 
     def pull_result(
@@ -723,15 +742,21 @@ class ComposeExecutorToolResultMixin:
                 latency_ms=_now_ms() - start,
                 meta={"preview": preview},
             )
+        exe = ComposeExecutor(project_dir=project_dir)
         try:
-            exe = ComposeExecutor(project_dir=project_dir)
             out = exe.pull(services=services, timeout=timeout, env=env)
             return ToolResult.ok_result(
-                stdout=out, exit_code=0, latency_ms=_now_ms() - start
+                stdout=out,
+                exit_code=0,
+                latency_ms=_now_ms() - start,
+                meta=exe.result_meta(),
             )
         except Exception as e:
             return ToolResult.err_result(
-                error_type=_errtype(e), stderr=str(e), latency_ms=_now_ms() - start
+                error_type=_errtype(e),
+                stderr=str(e),
+                latency_ms=_now_ms() - start,
+                meta=exe.result_meta(),
             )
 
     def exec_result(
@@ -768,8 +793,8 @@ class ComposeExecutorToolResultMixin:
                 latency_ms=_now_ms() - start,
                 meta={"preview": preview},
             )
+        exe = ComposeExecutor(project_dir=project_dir)
         try:
-            exe = ComposeExecutor(project_dir=project_dir)
             out = exe.exec(
                 service,
                 command,
@@ -780,11 +805,17 @@ class ComposeExecutorToolResultMixin:
                 timeout=timeout,
             )
             return ToolResult.ok_result(
-                stdout=out, exit_code=0, latency_ms=_now_ms() - start
+                stdout=out,
+                exit_code=0,
+                latency_ms=_now_ms() - start,
+                meta=exe.result_meta(),
             )
         except Exception as e:
             return ToolResult.err_result(
-                error_type=_errtype(e), stderr=str(e), latency_ms=_now_ms() - start
+                error_type=_errtype(e),
+                stderr=str(e),
+                latency_ms=_now_ms() - start,
+                meta=exe.result_meta(),
             )
 
     def run_result(
@@ -819,17 +850,23 @@ class ComposeExecutorToolResultMixin:
                 latency_ms=_now_ms() - start,
                 meta={"preview": preview},
             )
+        exe = ComposeExecutor(project_dir=project_dir)
         try:
-            exe = ComposeExecutor(project_dir=project_dir)
             out = exe.run(
                 service, command, rm=rm, no_deps=no_deps, env=env, timeout=timeout
             )
             return ToolResult.ok_result(
-                stdout=out, exit_code=0, latency_ms=_now_ms() - start
+                stdout=out,
+                exit_code=0,
+                latency_ms=_now_ms() - start,
+                meta=exe.result_meta(),
             )
         except Exception as e:
             return ToolResult.err_result(
-                error_type=_errtype(e), stderr=str(e), latency_ms=_now_ms() - start
+                error_type=_errtype(e),
+                stderr=str(e),
+                latency_ms=_now_ms() - start,
+                meta=exe.result_meta(),
             )
 
 
@@ -4,7 +4,7 @@ Provides a client for executing local shell commands.
 """
 import shlex
 import subprocess
-from typing import Tuple, Optional
+from typing import Any, Dict, Tuple, Optional
 
 from aegis.exceptions import ToolExecutionError
 from aegis.utils.logger import setup_logger
@@ -14,6 +14,7 @@ from aegis.utils.redact import redact_for_log
 import time
 import re
 from aegis.utils.exec_common import run_subprocess as _safe_run_subprocess
+from aegis.utils.sandbox import ResourceLimits, load_limits
 
 logger = setup_logger(__name__)
 
@@ -59,14 +60,21 @@ def _sanitize_cli(command_str: str) -> str:
 class LocalExecutor:
     """A client for executing local shell commands consistently."""
 
-    def __init__(self, default_timeout: int = 120):
+    def __init__(
+        self, default_timeout: int = 120, limits: Optional[ResourceLimits] = None
+    ):
         """
         Initialize the LocalExecutor.
 
         :param default_timeout: Default timeout in seconds for subprocess commands.
         :type default_timeout: int
+        :param limits: CPU/memory/pids ceilings for launched commands. Defaults to
+                       `limits.sandbox` from config.yaml (unconfined if disabled).
+        :type limits: Optional[ResourceLimits]
         """
         self.default_timeout = default_timeout
+        self.limits = limits if limits is not None else load_limits()
+        self.last_resource_usage: Optional[Dict[str, Any]] = None
 
     def _run_subprocess(
         self, command_str: str, shell: bool, timeout: int
@@ -90,12 +98,20 @@ class LocalExecutor:
                 # If not using shell, tokenize so semantics remain the same
                 argv = shlex.split(command_str)
                 res = _safe_run_subprocess(
-                    argv, timeout=timeout, allow_shell=False, text_mode=True
+                    argv,
+                    timeout=timeout,
+                    allow_shell=False,
+                    text_mode=True,
+                    limits=self.limits,
                 )
             else:
                 # Caller explicitly requested shell semantics—opt in
                 res = _safe_run_subprocess(
-                    command_str, timeout=timeout, allow_shell=True, text_mode=True
+                    command_str,
+                    timeout=timeout,
+                    allow_shell=True,
+                    text_mode=True,
+                    limits=self.limits,
                 )
         except subprocess.TimeoutExpired as e:
             logger.error(
@@ -105,6 +121,8 @@ class LocalExecutor:
                 f"Local command timed out after {timeout} seconds"
             ) from e
 
+        self.last_resource_usage = res.resource_usage
+
         # Map back to prior tuple contract
         rc = res.returncode if res.returncode is not None else 1
         stdout = res.stdout.decode("utf-8", "replace")
@@ -195,20 +213,26 @@ class LocalExecutorToolResultMixin:
                 meta={"preview": preview},
             )
 
+        meta = {"command": _sanitize_cli(command), "shell": shell}
+        self.last_resource_usage = None
         try:
             out = self.run(command, timeout=timeout, shell=shell)
+            if self.last_resource_usage:
+                meta["resources"] = self.last_resource_usage
             return ToolResult.ok_result(
                 stdout=out,
                 exit_code=0,
                 latency_ms=_now_ms() - start,
-                meta={"command": _sanitize_cli(command), "shell": shell},
+                meta=meta,
             )
         except Exception as e:
+            if self.last_resource_usage:
+                meta["resources"] = self.last_resource_usage
             return ToolResult.err_result(
                 error_type=_error_type_from_exception(e),
                 stderr=str(e),
                 latency_ms=_now_ms() - start,
-                meta={"command": _sanitize_cli(command), "shell": shell},
+                meta=meta,
             )
 
 
@@ -18,6 +18,7 @@ from aegis.schemas.runtime import RuntimeExecutionConfig
 from aegis.utils.logger import setup_logger
 from aegis.utils.model_manifest_loader import get_formatter_hint
 from aegis.utils.prompt_formatter import format_prompt
+from aegis.utils.metrics import instrument_llm
 from aegis.utils.tracing import log_generation
 
 logger = setup_logger(__name__)
@@ -31,6 +32,7 @@ class KoboldcppProvider(BackendProvider):
     def __init__(self, config: KoboldcppBackendConfig):
         self.config = config
 
+    @instrument_llm("completion")
     async def get_completion(
         self, messages: List[Dict[str, Any]], runtime_config: RuntimeExecutionConfig
     ) -> str:
@@ -97,6 +99,7 @@ class KoboldcppProvider(BackendProvider):
         except httpx.RequestError as e:
             raise PlannerError(f"Network error while querying KoboldCPP: {e}") from e
 
+    @instrument_llm("structured")
     async def get_structured_completion(
         self,
         messages: List[Dict[str, Any]],
@@ -15,6 +15,7 @@ from aegis.providers.base import BackendProvider
 from aegis.schemas.backend import OllamaBackendConfig
 from aegis.schemas.runtime import RuntimeExecutionConfig
 from aegis.utils.logger import setup_logger
+from aegis.utils.metrics import instrument_llm
 from aegis.utils.tracing import log_generation
 
 logger = setup_logger(__name__)
@@ -31,6 +32,7 @@ class OllamaProvider(BackendProvider):
             f"OllamaProvider initialized with config: {config.model_dump_json()}"
         )
 
+    @instrument_llm("completion")
     async def get_completion(
         self,
         messages: List[Dict[str, Any]],
@@ -140,6 +142,7 @@ class OllamaProvider(BackendProvider):
         except httpx.RequestError as e:
             raise PlannerError(f"Network error while querying Ollama: {e}") from e
 
+    @instrument_llm("structured")
     async def get_structured_completion(
         self,
         messages: List[Dict[str, Any]],
@@ -14,6 +14,7 @@ from aegis.providers.base import BackendProvider
 from aegis.schemas.backend import OpenAIBackendConfig
 from aegis.schemas.runtime import RuntimeExecutionConfig
 from aegis.utils.logger import setup_logger
+from aegis.utils.metrics import instrument_llm
 from aegis.utils.tracing import log_generation
 
 try:
@@ -40,6 +41,7 @@ class OpenAIProvider(BackendProvider):
         else:
             self.structured_client = None
 
+    @instrument_llm("completion")
     async def get_completion(
         self, messages: List[Dict[str, Any]], runtime_config: RuntimeExecutionConfig
     ) -> str:
@@ -67,11 +69,13 @@ class OpenAIProvider(BackendProvider):
                 # prompt/messages
                 _prompt = locals().get("messages", None)
 
-                # output: handle pydantic/structured or plain dicts/strings
+                # output: handle pydantic/structured or plain dicts/strings.
+                # Bound methods are passed uncalled; log_generation only
+                # serializes them if a sink wants the output.
                 if hasattr(response, "model_dump_json"):
-                    _output = response.model_dump_json()  # type: ignore[attr-defined]
+                    _output = response.model_dump_json  # type: ignore[attr-defined]
                 elif hasattr(response, "model_dump"):
-                    _output = response.model_dump()  # type: ignore[attr-defined]
+                    _output = response.model_dump  # type: ignore[attr-defined]
                 else:
                     _output = getattr(response, "choices", None) or str(response)
 
@@ -103,6 +107,7 @@ class OpenAIProvider(BackendProvider):
             logger.exception("An unexpected error occurred while querying OpenAI.")
             raise PlannerError(f"Unexpected error during OpenAI query: {e}")
 
+    @instrument_llm("structured")
     async def get_structured_completion(
         self,
         messages: List[Dict[str, Any]],
@@ -11,6 +11,7 @@ from aegis.exceptions import PlannerError
 from aegis.providers.base import BackendProvider
 from aegis.schemas.plan_output import AgentScratchpad
 from aegis.schemas.runtime import RuntimeExecutionConfig
+from aegis.utils.metrics import instrument_llm
 from aegis.utils.tracing import log_generation
 
 
@@ -23,6 +24,7 @@ class ReplayProvider(BackendProvider):
         self.planner_outputs = planner_outputs
         self.call_count = 0
 
+    @instrument_llm("structured")
     async def get_structured_completion(
         self,
         messages: List[Dict[str, Any]],
@@ -77,6 +79,7 @@ class ReplayProvider(BackendProvider):
         except Exception:
             pass
 
+    @instrument_llm("completion")
     async def get_completion(
         self,
         messages: List[Dict[str, Any]],
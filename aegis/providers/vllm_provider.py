@@ -15,6 +15,7 @@ from aegis.providers.base import BackendProvider
 from aegis.schemas.backend import VllmBackendConfig
 from aegis.schemas.runtime import RuntimeExecutionConfig
 from aegis.utils.logger import setup_logger
+from aegis.utils.metrics import instrument_llm
 from aegis.utils.tracing import log_generation
 
 try:
@@ -35,6 +36,7 @@ class VllmProvider(BackendProvider):
     def __init__(self, config: VllmBackendConfig):
         self.config = config
 
+    @instrument_llm("completion")
     async def get_completion(
         self, messages: List[Dict[str, Any]], runtime_config: RuntimeExecutionConfig
     ) -> str:
@@ -91,10 +93,11 @@ class VllmProvider(BackendProvider):
                     _prompt = locals().get("messages", None)
                     _output = getattr(response, "choices", None) or str(response)
                     _usage = {}
-                    _u = getattr(response, "usage", None)
+                    # `response` is the raw HTTP response; usage is in its body.
+                    _u = (response.json().get("usage") or {}) if response.is_success else {}
                     for k in ("prompt_tokens", "completion_tokens", "total_tokens"):
-                        if hasattr(_u, k):
-                            _usage[k] = getattr(_u, k)
+                        if k in _u:
+                            _usage[k] = _u[k]
                     if os.getenv("AEGIS_TRACE_GENERATIONS", "1") != "0":
                         log_generation(
                             run_id=None,
@@ -131,6 +134,7 @@ class VllmProvider(BackendProvider):
         except httpx.RequestError as e:
             raise PlannerError(f"Network error while querying vLLM: {e}") from e
 
+    @instrument_llm("structured")
     async def get_structured_completion(
         self,
         messages: List[Dict[str, Any]],
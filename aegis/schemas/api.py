@@ -30,3 +30,27 @@ class LaunchResponse(BaseModel):
         default="COMPLETED",
         description="The final status of the task ('COMPLETED', 'PAUSED', etc.).",
     )
+    checkpoint_id: Optional[str] = Field(
+        default=None,
+        description="For a PAUSED task, the graph checkpoint that /resume continues from.",
+    )
+
+
+class TaskStatusResponse(BaseModel):
+    """Describes a background task submitted via `/launch?async_mode=true`."""
+
+    task_id: str
+    status: str = Field(
+        description="QUEUED, RUNNING, COMPLETED, PAUSED, FAILED, or CANCELLED."
+    )
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0
+    cancel_requested: bool = False
+    progress: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Latest progress snapshot: steps taken, current sub-goal, last tool.",
+    )
+    result: Optional[LaunchResponse] = None
+    error: Optional[str] = None
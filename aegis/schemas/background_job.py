@@ -0,0 +1,43 @@
+# aegis/schemas/background_job.py
+"""
+Pydantic schema for handles to background jobs launched on remote machines.
+
+A handle records everything needed to find a detached job again later: the
+remote paths of its pid file, exit-code file, and log file. Handles are stored
+in `TaskState.background_jobs` so they survive an interrupt/resume cycle.
+"""
+
+import time
+
+from pydantic import BaseModel, Field
+
+
+class BackgroundJobHandle(BaseModel):
+    """A durable reference to a detached job on a remote machine.
+
+    :ivar job_id: Unique identifier for the job.
+    :vartype job_id: str
+    :ivar machine_name: The machine (from machines.yaml) the job runs on.
+    :vartype machine_name: str
+    :ivar command: The command that was launched.
+    :vartype command: str
+    :ivar job_dir: Remote directory holding the job's bookkeeping files.
+    :vartype job_dir: str
+    :ivar pid_file: Remote path of the file containing the job's PID.
+    :vartype pid_file: str
+    :ivar exit_code_file: Remote path written with the exit code once the job ends.
+    :vartype exit_code_file: str
+    :ivar log_file: Remote path of the job's combined stdout/stderr.
+    :vartype log_file: str
+    :ivar started_at: Unix timestamp (controller clock) when the job was launched.
+    :vartype started_at: float
+    """
+
+    job_id: str
+    machine_name: str
+    command: str
+    job_dir: str
+    pid_file: str
+    exit_code_file: str
+    log_file: str
+    started_at: float = Field(default_factory=time.time)
@@ -16,12 +16,14 @@ from aegis.agents.steps.decompose_task import decompose_task
 from aegis.agents.steps.execute_tool import execute_tool
 from aegis.agents.steps.interaction import process_human_feedback
 from aegis.agents.steps.reflect_and_plan import reflect_and_plan
+from aegis.agents.steps.sub_goal_dag import execute_sub_goal_dag
 from aegis.agents.steps.summarize_result import summarize_result
 from aegis.agents.steps.verification import (
     remediate_plan,
     verify_outcome,
     route_after_verification,
 )
+from aegis.agents.steps.warmup import warmup_executors
 from aegis.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -48,6 +50,10 @@ AGENT_NODE_REGISTRY: Dict[str, Callable[..., Any]] = {
     "route_after_verification": route_after_verification,
     # The step that processes human feedback after an interruption.
     "process_human_feedback": process_human_feedback,
+    # The optional step that primes executors before the first plan.
+    "warmup_executors": warmup_executors,
+    # Runs decomposed sub-goals as a dependency DAG, independent ones in parallel.
+    "execute_sub_goal_dag": execute_sub_goal_dag,
 }
 
 logger.debug(
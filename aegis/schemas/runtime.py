@@ -106,6 +106,39 @@ class RuntimeExecutionConfig(BaseModel):
         description="Hard wall-clock timeout (seconds) for the entire task.",
     )
 
+    fault_profile: Optional[str] = Field(
+        None,
+        description="Path to a YAML fault-injection profile applied to executor and provider calls for this run.",
+    )
+
+    # --- executor warmup ---
+    warmup: Optional[bool] = Field(
+        None,
+        description="If true, probe the executors the task is likely to use before the first plan.",
+    )
+    warmup_budget_s: Optional[float] = Field(
+        None,
+        gt=0,
+        description="Strict overall time budget (seconds) for the warmup phase.",
+    )
+
+    # --- sub-goal scheduling ---
+    max_parallel_sub_goals: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Maximum number of independent sub-goals executed concurrently by the sub-goal DAG step.",
+    )
+
+    # --- diagnostics ---
+    cpu_profile: Optional[bool] = Field(
+        None,
+        description="If true, profile every graph node and save per-step pstats and collapsed-stack artifacts.",
+    )
+    memory_profile: Optional[bool] = Field(
+        None,
+        description="If true, record RSS and tracemalloc growth per graph node and snapshot the heap past a growth threshold.",
+    )
+
     class Config:
         extra = "ignore"
         populate_by_name = True
@@ -0,0 +1,51 @@
+# aegis/schemas/subagent.py
+"""
+Pydantic schema for handles to sub-agents launched by an orchestrating agent.
+
+Handles are stored in the parent's `TaskState.subagents` and are written to
+its provenance report, so the parent/child linkage of a run is auditable.
+"""
+
+import time
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+SubAgentStatus = Literal["RUNNING", "COMPLETED", "PAUSED", "FAILED", "CANCELLED"]
+
+
+class SubAgentHandle(BaseModel):
+    """A reference to a child agent run executing in the parent's process.
+
+    :ivar task_id: The child's task id (reports land in `reports/<task_id>/`).
+    :vartype task_id: str
+    :ivar parent_task_id: The task id of the agent that launched the child.
+    :vartype parent_task_id: str
+    :ivar prompt: The sub-task prompt.
+    :vartype prompt: str
+    :ivar preset: The agent preset the child runs.
+    :vartype preset: str
+    :ivar backend_profile: The backend profile the child uses.
+    :vartype backend_profile: Optional[str]
+    :ivar status: RUNNING, COMPLETED, PAUSED, FAILED or CANCELLED.
+    :vartype status: str
+    :ivar summary: The child's final summary, once it has finished.
+    :vartype summary: Optional[str]
+    :ivar error: The failure reason for FAILED children.
+    :vartype error: Optional[str]
+    :ivar started_at: Unix timestamp when the child was launched.
+    :vartype started_at: float
+    :ivar finished_at: Unix timestamp when the child finished.
+    :vartype finished_at: Optional[float]
+    """
+
+    task_id: str
+    parent_task_id: str
+    prompt: str
+    preset: str = "default"
+    backend_profile: Optional[str] = None
+    status: SubAgentStatus = "RUNNING"
+    summary: Optional[str] = None
+    error: Optional[str] = None
+    started_at: float = Field(default_factory=time.time)
+    finished_at: Optional[float] = None
@@ -6,7 +6,6 @@ This script initializes the FastAPI application, registers all API routes from
 the `aegis.web` module, loads all available tools into the registry, and starts
 the Uvicorn server. It is the main entry point for running AEGIS in web mode.
 """
-import asyncio
 import importlib
 import logging
 import os
@@ -19,13 +18,16 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
+from aegis.agents.task_pool import get_task_pool
 from aegis.exceptions import AegisError
 from aegis.registry import log_registry_contents
 from aegis.utils.config import get_config
 from aegis.utils.logger import setup_logger
+from aegis.utils.loop_watchdog import start_loop_watchdog, stop_loop_watchdog
 from aegis.utils.tool_loader import import_all_tools
 from aegis.web import router as api_router
-from aegis.web.routes_stream import WebSocketLogHandler, connected_clients
+from aegis.web.routes_metrics import router as metrics_router
+from aegis.web.routes_stream import WebSocketLogHandler, hub as log_hub
 
 # OpenTelemetry Imports
 from opentelemetry import trace
@@ -112,13 +114,18 @@ async def lifespan(app: FastAPI):
     else:
         logger.info("WebSocket log handler already attached.")
 
+    # Resume any tasks queued before a restart.
+    await get_task_pool().ensure_started()
+    start_loop_watchdog()
+
     yield
 
     # --- Shutdown Logic ---
     logger.info("--- AEGIS Application Shutdown ---")
-    logger.info(f"Closing {len(connected_clients)} active WebSocket connections...")
-    close_tasks = [client.close() for client in connected_clients]
-    await asyncio.gather(*close_tasks, return_exceptions=True)
+    await get_task_pool().shutdown()
+    await stop_loop_watchdog()
+    logger.info(f"Closing {len(log_hub.clients)} active WebSocket connections...")
+    await log_hub.close_all()
     logger.info("All WebSocket connections closed.")
 
 
@@ -143,6 +150,8 @@ async def aegis_exception_handler(request: Request, exc: AegisError):
 
 app.include_router(api_router, prefix="/api")
 logger.info("All API routes registered under the /api prefix.")
+# Registered before the UI mount at "/", which would otherwise shadow it.
+app.include_router(metrics_router)
 
 ui_path = "aegis/web/react_ui/dist"
 if os.path.exists(ui_path):
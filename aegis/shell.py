@@ -87,6 +87,16 @@ class AegisShell(cmd2.Cmd):
         nargs="?",
         help="Path to the task YAML file or a prompt string. Omit to see help.",
     )
+    parser_run.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile each graph node; pstats and flamegraph stacks go to the artifacts directory.",
+    )
+    parser_run.add_argument(
+        "--memory-profile",
+        action="store_true",
+        help="Record RSS and tracemalloc growth per graph node; heap snapshots go to the artifacts directory.",
+    )
 
     parser_resume = task_subparsers.add_parser(
         "resume",
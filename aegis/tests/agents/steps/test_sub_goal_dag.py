@@ -0,0 +1,137 @@
+# aegis/tests/agents/steps/test_sub_goal_dag.py
+"""
+Unit tests for the sub-goal DAG execution step and dependency normalization.
+"""
+import asyncio
+import time
+
+import pytest
+
+from aegis.agents.steps import sub_goal_dag
+from aegis.agents.steps.decompose_task import normalize_dependencies
+from aegis.agents.task_state import HistoryEntry, TaskState
+from aegis.schemas.plan_output import AgentScratchpad
+from aegis.schemas.runtime import RuntimeExecutionConfig
+from aegis.utils.log_sinks import sub_goal_context
+
+
+@pytest.fixture
+def fake_loop(monkeypatch):
+    """Replaces planning/execution: each sub-goal sleeps, then advances.
+
+    A sub-goal whose text contains 'fail' calls a failing tool instead, and
+    the prompts each scoped loop saw are recorded.
+    """
+    prompts = {}
+    active = {"now": 0, "max": 0}
+
+    async def fake_plan(state):
+        goal = state.sub_goals[0]
+        prompts[goal] = state.task_prompt
+        tool = "broken_tool" if "fail" in goal else "advance_to_next_sub_goal"
+        return {"latest_plan": AgentScratchpad(thought=goal, tool_name=tool, tool_args={})}
+
+    async def fake_execute(state):
+        active["now"] += 1
+        active["max"] = max(active["max"], active["now"])
+        await asyncio.sleep(0.1)
+        active["now"] -= 1
+        plan = state.latest_plan
+        entry = HistoryEntry(
+            plan=plan,
+            observation=f"did {plan.thought}",
+            status="failure" if plan.tool_name == "broken_tool" else "success",
+        )
+        return {"history": state.history + [entry]}
+
+    monkeypatch.setattr(sub_goal_dag, "reflect_and_plan", fake_plan)
+    monkeypatch.setattr(sub_goal_dag, "execute_tool", fake_execute)
+    monkeypatch.setattr(sub_goal_dag, "log_replay_event", lambda *a, **k: None)
+    return prompts, active
+
+
+def _state(goals, deps, parallel=4, iterations=2) -> TaskState:
+    return TaskState(
+        task_id="dag-test",
+        task_prompt="audit all hosts",
+        runtime=RuntimeExecutionConfig(
+            max_parallel_sub_goals=parallel, iterations=iterations
+        ),
+        sub_goals=goals,
+        sub_goal_deps=deps,
+    )
+
+
+def test_normalize_dependencies():
+    assert normalize_dependencies([], 3) == []
+    assert normalize_dependencies([[], [0]], 3) == []  # wrong length
+    assert normalize_dependencies([[1, 1, 7], [], [0, 2]], 3) == [[1], [], [0]]
+    assert normalize_dependencies([[1], [0]], 2) == []  # cycle
+
+
+@pytest.mark.asyncio
+async def test_independent_sub_goals_run_in_parallel(fake_loop):
+    prompts, active = fake_loop
+    state = _state(["scan host-a", "scan host-b", "scan host-c", "report"], [[], [], [], [0, 1, 2]])
+
+    started = time.monotonic()
+    update = await sub_goal_dag.execute_sub_goal_dag(state)
+    elapsed = time.monotonic() - started
+
+    assert active["max"] == 3
+    assert elapsed < 0.35  # three parallel sub-goals + the report, not four in series
+    results = update["sub_goal_results"]
+    assert [r.status for r in results] == ["completed"] * 4
+    assert update["current_sub_goal_index"] == 4
+    # Every history entry is tagged with its sub-goal; the report step ran last.
+    assert sorted(e.sub_goal_index for e in update["history"]) == [0, 1, 2, 3]
+    assert update["history"][-1].sub_goal_index == 3
+    # The dependent sub-goal sees its dependencies' results.
+    assert "did scan host-b" in prompts["report"]
+    assert "did scan host-a" not in prompts["scan host-b"]
+
+
+@pytest.mark.asyncio
+async def test_parallelism_limit_and_failure_skips_dependents(fake_loop):
+    _prompts, active = fake_loop
+    state = _state(
+        ["fail on host-a", "scan host-b", "scan host-c", "report"],
+        [[], [], [], [0, 1]],
+        parallel=2,
+    )
+
+    update = await sub_goal_dag.execute_sub_goal_dag(state)
+
+    assert active["max"] == 2
+    statuses = {r.index: r.status for r in update["sub_goal_results"]}
+    assert statuses == {0: "failed", 1: "completed", 2: "completed", 3: "skipped"}
+    # The failing sub-goal used its own step budget (iterations=2).
+    assert sum(1 for e in update["history"] if e.sub_goal_index == 0) == 2
+
+
+@pytest.mark.asyncio
+async def test_without_dependencies_sub_goals_run_in_order(fake_loop):
+    _prompts, active = fake_loop
+    state = _state(["first", "second"], [])
+
+    update = await sub_goal_dag.execute_sub_goal_dag(state)
+
+    assert active["max"] == 1
+    assert [e.sub_goal_index for e in update["history"]] == [0, 1]
+    assert update["sub_goal_deps"] == [[], [0]]
+
+
+@pytest.mark.asyncio
+async def test_each_scoped_loop_sets_its_sub_goal_context(fake_loop, monkeypatch):
+    seen = {}
+    plan = sub_goal_dag.reflect_and_plan
+
+    async def recording_plan(state):
+        seen[state.sub_goals[0]] = sub_goal_context.get()
+        return await plan(state)
+
+    monkeypatch.setattr(sub_goal_dag, "reflect_and_plan", recording_plan)
+    await sub_goal_dag.execute_sub_goal_dag(_state(["scan a", "scan b"], [[], []]))
+
+    assert seen == {"scan a": 0, "scan b": 1}
+    assert sub_goal_context.get() is None
@@ -74,3 +74,14 @@ def test_summarize_triggers_provenance_and_memory(
     summarize_result(populated_state)
     mock_gen_provenance.assert_called_once_with(populated_state)
     mock_update_memory.assert_called_once()
+
+
+def test_summarize_includes_latency_breakdown(populated_state: TaskState):
+    """Verify that step timings are rendered as a latency table."""
+    populated_state.history[0].timings = {"llm": 120.0, "tool": 30.0}
+    populated_state.history[1].timings = {"llm": 80.0}
+
+    summary = summarize_result(populated_state)["final_summary"]
+
+    assert "## Latency Breakdown" in summary
+    assert "| llm | 200.0 |" in summary
@@ -78,6 +78,18 @@ async def test_verify_outcome_main_tool_failed(mock_state_factory):
     assert result["history"][-1].verification_status == "failure"
 
 
+@pytest.mark.asyncio
+async def test_verify_outcome_returns_timings_on_a_copy(mock_state_factory):
+    """The verification time goes on the returned entry, not the state's."""
+    plan = AgentScratchpad(thought="test", tool_name="some_tool", tool_args={})
+    state = mock_state_factory(plan, "some output")
+    state.history[-1].timings = {"tool": 5.0}
+    result = await verify_outcome(state)
+    assert "verification" in result["history"][-1].timings
+    assert result["history"][-1].timings["tool"] == 5.0
+    assert state.history[-1].timings == {"tool": 5.0}
+
+
 @pytest.mark.asyncio
 @patch("aegis.agents.steps.verification._run_tool")
 @patch("aegis.agents.steps.verification.get_tool")
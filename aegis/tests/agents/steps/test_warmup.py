@@ -0,0 +1,90 @@
+# aegis/tests/agents/steps/test_warmup.py
+"""
+Unit tests for the warmup_executors agent step.
+"""
+import time
+
+import pytest
+
+from aegis.agents.steps import warmup
+from aegis.agents.steps.warmup import warmup_executors
+from aegis.agents.task_state import TaskState
+from aegis.schemas.runtime import RuntimeExecutionConfig
+
+
+@pytest.fixture
+def base_state() -> TaskState:
+    """Provides a TaskState with warmup enabled and a short budget."""
+    return TaskState(
+        task_id="test-warmup",
+        task_prompt="Check disk usage on web01 and restart the redis cache.",
+        runtime=RuntimeExecutionConfig(
+            warmup=True,
+            warmup_budget_s=0.5,
+            tool_allowlist=["run_remote_command", "redis_get", "docker_ps"],
+        ),
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_replay(monkeypatch):
+    """Prevents the step from writing replay files during tests."""
+    monkeypatch.setattr(warmup, "log_replay_event", lambda *a, **k: None)
+
+
+def test_infer_executor_families():
+    """Tool names map onto executor families by substring."""
+    families = warmup._infer_executor_families(
+        ["redis_get", "docker_ps", "list_k8s_pods", "get_local_ip"]
+    )
+    assert families == ["docker", "kubernetes", "redis"]
+
+
+@pytest.mark.asyncio
+async def test_disabled_is_noop(base_state: TaskState):
+    """The step must do nothing unless warmup is explicitly enabled."""
+    base_state.runtime.warmup = None
+    assert await warmup_executors(base_state) == {}
+
+
+@pytest.mark.asyncio
+async def test_warmup_reports_successes_and_failures(monkeypatch, base_state):
+    """Failing probes are recorded, never raised."""
+    monkeypatch.setattr(warmup, "_infer_machine_targets", lambda prompt: ["web01"])
+
+    def failing(target, timeout):
+        raise ConnectionRefusedError("nope")
+
+    monkeypatch.setitem(warmup._PROBES, "ssh", lambda target, timeout: None)
+    monkeypatch.setitem(warmup._PROBES, "docker", failing)
+    monkeypatch.setitem(warmup._PROBES, "redis", lambda target, timeout: None)
+
+    result = await warmup_executors(base_state)
+    report = result["warmup"]
+    outcomes = {(r["kind"], r["target"]): r for r in report["targets"]}
+
+    assert outcomes[("ssh", "web01")]["ok"] is True
+    assert outcomes[("redis", "redis")]["ok"] is True
+    assert outcomes[("docker", "docker")]["ok"] is False
+    assert "ConnectionRefusedError" in outcomes[("docker", "docker")]["error"]
+    assert report["total_ms"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_warmup_respects_budget(monkeypatch, base_state):
+    """A slow probe must not hold the task past the warmup budget."""
+    monkeypatch.setattr(warmup, "_infer_machine_targets", lambda prompt: [])
+    base_state.runtime.tool_allowlist = ["redis_get"]
+    base_state.runtime.warmup_budget_s = 0.1
+    monkeypatch.setitem(
+        warmup._PROBES, "redis", lambda target, timeout: time.sleep(1.0)
+    )
+
+    started = time.perf_counter()
+    result = await warmup_executors(base_state)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.9
+    (outcome,) = result["warmup"]["targets"]
+    assert outcome["ok"] is False
+    assert "timed out" in outcome["error"] or "budget" in outcome["error"]
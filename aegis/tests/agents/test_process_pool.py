@@ -0,0 +1,144 @@
+# aegis/tests/agents/test_process_pool.py
+"""
+Unit tests for the multi-process agent worker pool.
+
+The runners below are resolved by import path inside spawned workers.
+"""
+import asyncio
+import contextlib
+import os
+import time
+
+import pytest
+
+from aegis.agents.process_pool import ProcessWorkerPool
+from aegis.exceptions import WorkerError
+from aegis.schemas.api import LaunchResponse
+from aegis.schemas.launch import LaunchRequest
+from aegis.utils.log_sinks import task_id_context
+
+_HERE = "aegis.tests.agents.test_process_pool"
+
+
+async def echo_runner(payload, task_id, on_update):
+    await on_update({"history": [{"plan": {"tool_name": "echo"}, "status": "success"}]})
+    prompt = payload.task.prompt
+    if prompt == "crash":
+        os._exit(3)
+    if prompt == "boom":
+        raise ValueError("bad plan")
+    if prompt == "slow":
+        await asyncio.sleep(30)
+    if prompt == "hang":
+        time.sleep(30)  # blocks the worker's loop, so heartbeats stop
+    return LaunchResponse(
+        task_id=task_id,
+        summary=f"{prompt} from pid {os.getpid()} as {task_id_context.get()}",
+        history=[],
+    )
+
+
+def _payload(prompt: str) -> LaunchRequest:
+    return LaunchRequest(task={"prompt": prompt})
+
+
+@contextlib.asynccontextmanager
+async def running_pool(**kwargs):
+    p = ProcessWorkerPool(
+        2,
+        runner_path=f"{_HERE}:echo_runner",
+        initializer_path=None,
+        heartbeat_s=0.2,
+        **kwargs,
+    )
+    await p.start()
+    try:
+        yield p
+    finally:
+        await p.stop(timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_runs_tasks_in_worker_processes():
+    async with running_pool() as pool:
+        progress = []
+
+        async def on_progress(p):
+            progress.append(p)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                pool.run(_payload("a"), "t-a", on_progress),
+                pool.run(_payload("b"), "t-b", on_progress),
+            ),
+            timeout=60,
+        )
+        for res, tid in zip(results, ("t-a", "t-b")):
+            assert res.task_id == tid
+            assert f"as {tid}" in res.summary
+            assert f"pid {os.getpid()} " not in res.summary
+
+        await asyncio.sleep(0.1)
+        assert {p["last_tool"] for p in progress} == {"echo"}
+        status = pool.status()
+        assert sum(w["tasks_completed"] for w in status) == 2
+        assert all(w["alive"] for w in status)
+
+
+@pytest.mark.asyncio
+async def test_errors_and_crashes_are_reported_and_workers_restart():
+    async with running_pool() as pool:
+        async def ignore(_):
+            return None
+
+        with pytest.raises(WorkerError, match="ValueError: bad plan"):
+            await asyncio.wait_for(pool.run(_payload("boom"), "t-err", ignore), 60)
+
+        with pytest.raises(WorkerError, match="exited with code 3"):
+            await asyncio.wait_for(pool.run(_payload("crash"), "t-crash", ignore), 60)
+
+        # The crashed worker comes back and the pool keeps serving tasks.
+        res = await asyncio.wait_for(pool.run(_payload("after"), "t-ok", ignore), 60)
+        assert res.summary.startswith("after")
+        status = pool.status()
+        assert sum(w["restarts"] for w in status) == 1
+        assert sum(w["tasks_failed"] for w in status) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancellation_reaches_the_worker():
+    async with running_pool() as pool:
+        started = asyncio.Event()
+
+        async def on_progress(_):
+            started.set()
+
+        job = asyncio.create_task(pool.run(_payload("slow"), "t-slow", on_progress))
+        await asyncio.wait_for(started.wait(), 60)
+        job.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await job
+
+        for _ in range(100):
+            if sum(w["tasks_cancelled"] for w in pool.status()) == 1:
+                break
+            await asyncio.sleep(0.05)
+        assert sum(w["tasks_cancelled"] for w in pool.status()) == 1
+        assert all(w["current_task"] is None for w in pool.status())
+
+
+@pytest.mark.asyncio
+async def test_hung_worker_is_terminated_and_its_task_failed():
+    async with running_pool(stale_after_s=1.0) as pool:
+        async def ignore(_):
+            return None
+
+        with pytest.raises(WorkerError, match="sent no heartbeat"):
+            await asyncio.wait_for(pool.run(_payload("hang"), "t-hang", ignore), 60)
+
+        res = await asyncio.wait_for(pool.run(_payload("after"), "t-ok", ignore), 60)
+        assert res.summary.startswith("after")
+        status = pool.status()
+        assert sum(w["restarts"] for w in status) == 1
+        assert sum(w["tasks_failed"] for w in status) == 1
+        assert all(w["alive"] for w in status)
@@ -0,0 +1,165 @@
+# aegis/tests/agents/test_stream_queue.py
+"""
+Integration tests for the Redis Streams task queue.
+
+These need a real Redis (>= 6.2 for XAUTOCLAIM): a `redis-server` binary on
+PATH is started on a free port, otherwise `AEGIS_TEST_REDIS_URL` is used.
+Without either the tests are skipped.
+"""
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import time
+import uuid
+
+import pytest
+
+redis = pytest.importorskip("redis")
+
+from aegis.agents import stream_queue as sq  # noqa: E402
+from aegis.exceptions import DuplicateTaskError  # noqa: E402
+from aegis.schemas.api import LaunchResponse  # noqa: E402
+from aegis.schemas.launch import LaunchRequest  # noqa: E402
+from aegis.utils import task_store as ts  # noqa: E402
+from aegis.utils.log_sinks import task_id_context  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def redis_url(tmp_path_factory):
+    url = os.environ.get("AEGIS_TEST_REDIS_URL")
+    if url:
+        yield url
+        return
+    binary = shutil.which("redis-server")
+    if not binary:
+        pytest.skip("needs redis-server on PATH or AEGIS_TEST_REDIS_URL")
+    port = _free_port()
+    proc = subprocess.Popen(
+        [binary, "--port", str(port), "--save", "", "--appendonly", "no",
+         "--dir", str(tmp_path_factory.mktemp("redis"))],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"redis://127.0.0.1:{port}/0"
+    client = redis.Redis.from_url(url)
+    for _ in range(50):
+        try:
+            client.ping()
+            break
+        except redis.exceptions.ConnectionError:
+            time.sleep(0.1)
+    yield url
+    proc.terminate()
+    proc.wait(timeout=10)
+
+
+@pytest.fixture
+def queue(redis_url):
+    client = redis.Redis.from_url(redis_url, decode_responses=True)
+    suffix = uuid.uuid4().hex[:8]
+    q = sq.RedisTaskQueue(client, namespace=f"aegis-test-{suffix}")
+    q.ensure_group()
+    yield q
+    for key in client.scan_iter(f"{q.namespace}:*"):
+        client.delete(key)
+
+
+def _payload(prompt: str) -> LaunchRequest:
+    return LaunchRequest(task={"prompt": prompt})
+
+
+async def _runner(payload, task_id, on_progress):
+    await on_progress({"steps_taken": 1, "last_tool": "echo"})
+    if payload.task.prompt == "slow":
+        for _ in range(300):
+            await asyncio.sleep(0.05)
+            await on_progress({"steps_taken": 2})
+    if payload.task.prompt == "boom":
+        raise ValueError("bad plan")
+    return LaunchResponse(task_id=task_id, summary=f"ran as {task_id_context.get()}", history=[])
+
+
+async def _wait_status(q, task_id, statuses, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        row = q.get(task_id)
+        if row and row["status"] in statuses:
+            return row
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"task {task_id} stuck at {q.get(task_id)}")
+
+
+def test_enqueue_rejects_duplicates_and_lists(queue):
+    queue.enqueue("t-1", {"task": {"prompt": "a"}})
+    with pytest.raises(DuplicateTaskError):
+        queue.enqueue("t-1", {"task": {"prompt": "b"}})
+    row = queue.get("t-1")
+    assert row["status"] == ts.QUEUED
+    assert row["payload"]["task"]["prompt"] == "a"
+    assert queue.count() == 1
+    assert queue.request_cancel("t-1") == ts.CANCELLED
+    assert [r["task_id"] for r in queue.list(status=ts.CANCELLED)][:1] == ["t-1"]
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_tasks_and_acks(queue):
+    worker = sq.StreamWorker(queue, "w1", concurrency=2, runner=_runner, block_ms=100)
+    pool = sq.RedisStreamPool(queue, worker=worker)
+    await pool.ensure_started()
+    try:
+        await pool.submit("ok", _payload("hi"))
+        await pool.submit("bad", _payload("boom"))
+        ok = await _wait_status(queue, "ok", ts.TERMINAL_STATUSES)
+        bad = await _wait_status(queue, "bad", ts.TERMINAL_STATUSES)
+    finally:
+        await pool.shutdown()
+    assert ok["status"] == ts.COMPLETED
+    assert ok["result"]["summary"] == "ran as ok"
+    assert ok["progress"]["last_tool"] == "echo"
+    assert ok["worker"] == "w1"
+    assert bad["status"] == ts.FAILED and "bad plan" in bad["error"]
+    assert queue.count() == 0
+    assert any(w["worker"] == "w1" for w in pool.workers_status())
+
+
+@pytest.mark.asyncio
+async def test_cancel_running_task(queue):
+    worker = sq.StreamWorker(queue, "w1", runner=_runner, block_ms=100)
+    pool = sq.RedisStreamPool(queue, worker=worker)
+    await pool.ensure_started()
+    try:
+        await pool.submit("slow", _payload("slow"))
+        await _wait_status(queue, "slow", {ts.RUNNING})
+        # Cancel through the shared hash only, as another API node would.
+        queue.request_cancel("slow")
+        row = await _wait_status(queue, "slow", ts.TERMINAL_STATUSES)
+    finally:
+        await pool.shutdown()
+    assert row["status"] == ts.CANCELLED
+
+
+@pytest.mark.asyncio
+async def test_pending_entries_of_dead_worker_are_reclaimed(queue):
+    queue.enqueue("orphan", _payload("hi").model_dump(mode="json"))
+    # A worker reads the entry and dies before acknowledging it.
+    assert queue.read("dead", 1, 100)
+    queue.mark_running("orphan", "dead")
+
+    worker = sq.StreamWorker(queue, "w2", runner=_runner, claim_idle_ms=200, block_ms=100)
+    await worker.start()
+    try:
+        row = await _wait_status(queue, "orphan", ts.TERMINAL_STATUSES)
+    finally:
+        await worker.stop()
+    assert row["status"] == ts.COMPLETED
+    assert row["worker"] == "w2"
+    assert row["attempts"] == 2
+    assert queue.count() == 0
@@ -0,0 +1,140 @@
+# aegis/tests/agents/test_subagents.py
+"""
+Unit tests for the in-process sub-agent runner.
+
+A small fake graph stands in for compiled presets so the tests exercise
+launching, joining, timeouts and cancellation without an LLM backend.
+"""
+import asyncio
+
+import pytest
+
+from aegis.agents import subagents
+from aegis.agents.task_state import TaskState
+from aegis.schemas.agent import AgentConfig
+from aegis.schemas.runtime import RuntimeExecutionConfig
+from aegis.utils import provenance
+from aegis.utils.log_sinks import task_id_context
+
+
+class _FakeGraph:
+    def __init__(self):
+        self.seen_context = {}
+
+    async def ainvoke(self, state):
+        self.seen_context[state["task_id"]] = (
+            task_id_context.get(),
+            state["parent_task_id"],
+        )
+        prompt = state["task_prompt"]
+        if prompt.startswith("sleep"):
+            await asyncio.sleep(float(prompt.split()[1]))
+        if prompt == "boom":
+            raise ValueError("planner exploded")
+        return {**state, "final_summary": f"done: {prompt}"}
+
+
+@pytest.fixture
+def fake_graph(monkeypatch, tmp_path):
+    graph = _FakeGraph()
+    config = AgentConfig.model_construct(runtime=RuntimeExecutionConfig())
+    monkeypatch.setattr(subagents, "_compiled_preset", lambda preset: (config, graph))
+    monkeypatch.setattr(
+        provenance, "_ledger", provenance._Ledger(str(tmp_path / "ledger.jsonl"))
+    )
+    return graph
+
+
+def _parent(task_id="parent-1") -> TaskState:
+    return TaskState(
+        task_id=task_id,
+        task_prompt="orchestrate",
+        runtime=RuntimeExecutionConfig(backend_profile="parent_backend"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_children_run_concurrently_with_linkage(fake_graph, tmp_path):
+    parent = _parent()
+    a = await subagents.launch(parent, "sleep 0.2")
+    b = await subagents.launch(parent, "sleep 0.2")
+    started = asyncio.get_running_loop().time()
+    handles = await subagents.join(parent, timeout=5)
+    elapsed = asyncio.get_running_loop().time() - started
+
+    assert elapsed < 0.35  # the two children overlapped
+    assert [h.status for h in handles] == ["COMPLETED", "COMPLETED"]
+    assert handles[0].summary == "done: sleep 0.2"
+    assert set(parent.subagents) == {a.task_id, b.task_id}
+    assert a.backend_profile == "parent_backend"
+    # Each child runs under its own task id and knows its parent.
+    assert fake_graph.seen_context[a.task_id] == (a.task_id, "parent-1")
+
+    provenance.flush()
+    ledger = (tmp_path / "ledger.jsonl").read_text().splitlines()
+    assert sum(f'"subagent:{a.task_id}"' in line for line in ledger) == 2
+    await subagents.cancel_children(parent.task_id)
+
+
+@pytest.mark.asyncio
+async def test_join_timeout_and_failures(fake_graph):
+    parent = _parent()
+    slow = await subagents.launch(parent, "sleep 5")
+    bad = await subagents.launch(parent, "boom")
+
+    handles = await subagents.join(parent, timeout=0.2)
+    by_id = {h.task_id: h for h in handles}
+    assert by_id[slow.task_id].status == "RUNNING"
+    assert by_id[bad.task_id].status == "FAILED"
+    assert "planner exploded" in by_id[bad.task_id].error
+
+    (handle,) = await subagents.join(
+        parent, [slow.task_id], timeout=0.1, cancel_on_timeout=True
+    )
+    assert handle.status == "CANCELLED"
+    await subagents.cancel_children(parent.task_id)
+
+
+@pytest.mark.asyncio
+async def test_cancelling_parent_cancels_children(fake_graph):
+    parent = _parent()
+
+    async def orchestrator():
+        try:
+            await subagents.launch(parent, "sleep 5")
+            await subagents.join(parent)
+        finally:
+            await subagents.cancel_children(parent.task_id)
+
+    job = asyncio.create_task(orchestrator())
+    await asyncio.sleep(0.05)
+    (child,) = parent.subagents.values()
+    job.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await job
+    assert child.status == "CANCELLED"
+    assert subagents.get_handle(child.task_id) is None
+
+
+@pytest.mark.asyncio
+async def test_failed_child_releases_its_memory_profile(fake_graph, monkeypatch):
+    from aegis.utils import memory_profiling
+
+    async def failing_node(state):
+        raise ValueError("planner exploded")
+
+    class _ProfiledGraph:
+        async def ainvoke(self, state):
+            return await memory_profiling.memory_node("plan", failing_node)(state)
+
+    config = AgentConfig.model_construct(runtime=RuntimeExecutionConfig())
+    monkeypatch.setattr(
+        subagents, "_compiled_preset", lambda preset: (config, _ProfiledGraph())
+    )
+    parent = _parent()
+    child = await subagents.launch(parent, "profile me")
+    (handle,) = await subagents.join(parent, [child.task_id], timeout=5)
+
+    assert handle.status == "FAILED"
+    assert child.task_id not in memory_profiling._TASKS
+    await subagents.cancel_children(parent.task_id)
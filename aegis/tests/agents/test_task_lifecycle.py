@@ -0,0 +1,36 @@
+# aegis/tests/agents/test_task_lifecycle.py
+"""
+Unit tests for the end-of-task cleanup shared by web, shell and sub-agent runs.
+"""
+import pytest
+
+from aegis.agents import task_lifecycle
+from aegis.utils import memory_profiling, profiling, provenance, replay_logger
+from aegis.utils.replay_logger import ReplayJournal
+
+
+@pytest.mark.asyncio
+async def test_finalize_task_releases_every_per_task_resource(monkeypatch, tmp_path):
+    journal = ReplayJournal(durability="on_task_end")
+    monkeypatch.setattr(replay_logger, "_journal", journal)
+    monkeypatch.setattr(replay_logger, "_reports_dir", lambda: tmp_path)
+    monkeypatch.setattr(
+        provenance, "_ledger", provenance._Ledger(str(tmp_path / "ledger.jsonl"))
+    )
+    released = []
+    monkeypatch.setattr(memory_profiling, "release_task", released.append)
+    monkeypatch.setattr(profiling, "release_task", released.append)
+    monkeypatch.setattr(task_lifecycle, "flush_task_logs", released.append)
+
+    replay_logger.log_replay_event("t-1", "STEP", {"i": 1})
+    provenance.record_step(
+        run_id="t-1", step_index=0, tool="scan", tool_args={}, target_host=None,
+        interface=None, status="success", observation="ok", duration_ms=1,
+    )
+    assert len(journal._files) == 1
+
+    await task_lifecycle.finalize_task("t-1")
+
+    assert released == ["t-1", "t-1", "t-1"]
+    assert not journal._files
+    assert (tmp_path / "ledger.jsonl").read_text().count("\n") == 1
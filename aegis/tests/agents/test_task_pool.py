@@ -0,0 +1,178 @@
+# aegis/tests/agents/test_task_pool.py
+"""
+Unit tests for the background task worker pool.
+"""
+import asyncio
+
+import pytest
+
+from aegis.agents.task_pool import TaskPool, progress_from_state
+from aegis.exceptions import QueueFullError
+from aegis.schemas.api import LaunchResponse
+from aegis.schemas.launch import LaunchRequest
+from aegis.utils import task_store as ts
+from aegis.utils.log_sinks import task_id_context
+from aegis.utils.task_store import TaskStore
+
+
+def _payload(prompt: str = "do things") -> LaunchRequest:
+    return LaunchRequest(task={"prompt": prompt})
+
+
+async def _wait_for_status(store, task_id, statuses, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        row = store.get(task_id)
+        if row and row["status"] in statuses:
+            return row
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"task {task_id} never reached {statuses}: {store.get(task_id)}")
+
+
+def test_progress_from_state_reads_dicts_and_models():
+    state = {
+        "runtime": {"iterations": 10},
+        "sub_goals": ["scan", "report"],
+        "current_sub_goal_index": 1,
+        "history": [
+            {"plan": {"tool_name": "run_nmap"}, "status": "success"},
+            {"plan": {"tool_name": "write_report"}, "status": "failure"},
+        ],
+    }
+    progress = progress_from_state(state)
+    assert progress["steps_taken"] == 2
+    assert progress["iterations"] == 10
+    assert progress["current_sub_goal"] == "report"
+    assert progress["last_tool"] == "write_report"
+    assert progress["last_status"] == "failure"
+
+
+@pytest.mark.asyncio
+async def test_pool_runs_task_and_records_progress(tmp_path):
+    seen_context = {}
+
+    async def runner(payload, task_id, on_progress):
+        seen_context["task_id"] = task_id_context.get()
+        await on_progress({"steps_taken": 1, "last_tool": "echo"})
+        return LaunchResponse(task_id=task_id, summary=payload.task.prompt, history=[])
+
+    store = TaskStore(tmp_path / "tasks.sqlite3")
+    pool = TaskPool(store, max_workers=1, runner=runner, poll_interval=0.05)
+    await pool.ensure_started()
+    try:
+        await pool.submit("t1", _payload("hello"))
+        row = await _wait_for_status(store, "t1", ts.TERMINAL_STATUSES)
+    finally:
+        await pool.shutdown()
+
+    assert row["status"] == ts.COMPLETED
+    assert row["result"]["summary"] == "hello"
+    assert row["progress"]["last_tool"] == "echo"
+    assert seen_context["task_id"] == "t1"
+
+
+@pytest.mark.asyncio
+async def test_pool_bounds_concurrency_and_records_failures(tmp_path):
+    active = 0
+    peak = 0
+
+    async def runner(payload, task_id, on_progress):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        if payload.task.prompt == "boom":
+            raise RuntimeError("planner exploded")
+        return LaunchResponse(task_id=task_id, history=[])
+
+    store = TaskStore(tmp_path / "tasks.sqlite3")
+    pool = TaskPool(store, max_workers=2, runner=runner, poll_interval=0.05)
+    await pool.ensure_started()
+    try:
+        for i in range(4):
+            await pool.submit(f"t{i}", _payload("boom" if i == 3 else "ok"))
+        for i in range(4):
+            await _wait_for_status(store, f"t{i}", ts.TERMINAL_STATUSES)
+    finally:
+        await pool.shutdown()
+
+    assert peak == 2
+    assert store.get("t3")["status"] == ts.FAILED
+    assert "planner exploded" in store.get("t3")["error"]
+
+
+@pytest.mark.asyncio
+async def test_cancel_running_task(tmp_path):
+    started = asyncio.Event()
+
+    async def runner(payload, task_id, on_progress):
+        started.set()
+        await asyncio.sleep(30)
+        return LaunchResponse(task_id=task_id, history=[])
+
+    store = TaskStore(tmp_path / "tasks.sqlite3")
+    pool = TaskPool(store, max_workers=1, runner=runner, poll_interval=0.05)
+    await pool.ensure_started()
+    try:
+        await pool.submit("slow", _payload())
+        await asyncio.wait_for(started.wait(), 5)
+        assert await pool.cancel("slow") == ts.RUNNING
+        row = await _wait_for_status(store, "slow", {ts.CANCELLED})
+    finally:
+        await pool.shutdown()
+    assert row["cancel_requested"] is True
+
+
+@pytest.mark.asyncio
+async def test_queue_limit_and_restart_recovery(tmp_path):
+    path = tmp_path / "tasks.sqlite3"
+
+    async def never_runs(payload, task_id, on_progress):  # pragma: no cover
+        raise AssertionError("pool was not started")
+
+    pool = TaskPool(TaskStore(path), max_queued=1, runner=never_runs)
+    await pool.submit("q1", _payload())
+    with pytest.raises(QueueFullError):
+        await pool.submit("q2", _payload())
+
+    # A fresh pool over the same file (i.e. after a restart) runs the backlog.
+    async def runner(payload, task_id, on_progress):
+        return LaunchResponse(task_id=task_id, history=[])
+
+    store = TaskStore(path)
+    restarted = TaskPool(store, runner=runner, poll_interval=0.05)
+    await restarted.ensure_started()
+    try:
+        row = await _wait_for_status(store, "q1", ts.TERMINAL_STATUSES)
+    finally:
+        await restarted.shutdown()
+    assert row["status"] == ts.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_running_task_keeps_its_lease_against_other_processes(tmp_path):
+    path = tmp_path / "tasks.sqlite3"
+    release = asyncio.Event()
+
+    async def runner(payload, task_id, on_progress):
+        await release.wait()
+        return LaunchResponse(task_id=task_id, history=[])
+
+    store = TaskStore(path, lease_s=0.3)
+    pool = TaskPool(store, max_workers=1, runner=runner, poll_interval=0.05)
+    await pool.ensure_started()
+    try:
+        await pool.submit("long", _payload())
+        await _wait_for_status(store, "long", {ts.RUNNING})
+        # Outlive several lease periods; the pool keeps renewing it.
+        await asyncio.sleep(1.0)
+        other_process = TaskStore(path, lease_s=0.3)
+        assert other_process.recover() == 0
+        assert store.get("long")["owner"] == store.owner
+        release.set()
+        row = await _wait_for_status(store, "long", ts.TERMINAL_STATUSES)
+    finally:
+        await pool.shutdown()
+    assert row["status"] == ts.COMPLETED
+    assert row["attempts"] == 1
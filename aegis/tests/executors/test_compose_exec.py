@@ -145,3 +145,26 @@ def test_up_nonzero_exit_raises_with_stderr(monkeypatch):
         exe.up(services=["web"])
     assert "exit code 1" in str(ei.value).lower()
     assert "boom" in str(ei.value).lower()
+
+
+def test_compose_runs_under_sandbox_limits_and_reports_usage(monkeypatch, tmp_path: Path):
+    from aegis.utils.sandbox import ResourceLimits
+
+    limits = ResourceLimits(memory_max=1 << 30)
+    monkeypatch.setattr(cexec, "load_limits", lambda: limits)
+    monkeypatch.setattr(cexec.dry_run, "enabled", False)
+    seen = {}
+
+    def fake_run(argv, **kw):
+        seen["limits"] = kw.get("limits")
+        res = _FakeRes(rc=0, out=b"ok")
+        res.resource_usage = {"mechanism": "rlimit", "peak_memory_bytes": 1024}
+        return res
+
+    monkeypatch.setattr(cexec, "run_subprocess", fake_run, raising=True)
+
+    result = cexec.ComposeExecutor().ps_result(project_dir=tmp_path, project_name="proj")
+    assert seen["limits"] is limits
+    assert result.success
+    assert result.meta["resources"]["peak_memory_bytes"] == 1024
+    assert result.meta["project_name"] == "proj"
@@ -9,6 +9,7 @@ import psutil  # type: ignore
 import pytest
 
 from aegis.exceptions import ToolExecutionError
+from aegis.schemas.tool_result import ToolResult
 from aegis.tools.primitives.primitive_system import (
     kill_local_process,
     KillProcessInput,
@@ -31,12 +32,18 @@ def mock_subprocess_run_for_kill(monkeypatch):
 
 @pytest.fixture
 def mock_local_executor_run(monkeypatch):
-    """Fixture to mock LocalExecutor's run method."""
-    mock_run_method = MagicMock(return_value="mocked local command output")
-    # Patch the run method of the LocalExecutor class globally for tests in this module
-    # This assumes LocalExecutor is instantiated fresh in the tool.
-    # If LocalExecutor was a singleton or passed around, a different mock strategy might be needed.
-    monkeypatch.setattr("aegis.executors.local.LocalExecutor.run", mock_run_method)
+    """Fixture to mock LocalExecutor's run_result method."""
+    mock_run_method = MagicMock(
+        return_value=ToolResult.ok_result(
+            stdout="mocked local command output",
+            exit_code=0,
+            meta={"resources": {"mechanism": "rlimit", "peak_memory_bytes": 4096}},
+        )
+    )
+    # Patch the method on the class; the tool instantiates a fresh LocalExecutor.
+    monkeypatch.setattr(
+        "aegis.executors.local_exec.LocalExecutor.run_result", mock_run_method
+    )
     return mock_run_method
 
 
@@ -103,7 +110,7 @@ def test_kill_local_process_not_found(mock_subprocess_run_for_kill):
 
 
 def test_run_local_command_success(mock_local_executor_run):
-    """Verify run_local_command calls LocalExecutor.run and returns its output."""
+    """Verify run_local_command returns the command output as a string."""
     input_data = RunLocalCommandInput(command="ls -l", shell=True, timeout=30)
     result = run_local_command(input_data)
 
@@ -114,14 +121,17 @@ def test_run_local_command_success(mock_local_executor_run):
 
 
 def test_run_local_command_failure_propagates(mock_local_executor_run):
-    """Verify ToolExecutionError from LocalExecutor.run propagates."""
-    mock_local_executor_run.side_effect = ToolExecutionError(
-        "Executor failed for local command"
+    """Verify a failed command is raised as ToolExecutionError, with its usage."""
+    mock_local_executor_run.return_value = ToolResult.err_result(
+        error_type="Runtime",
+        stderr="Executor failed for local command",
+        meta={"resources": {"mechanism": "cgroup", "oom_killed": True}},
     )
     input_data = RunLocalCommandInput(command="failing_cmd")
 
-    with pytest.raises(ToolExecutionError, match="Executor failed for local command"):
+    with pytest.raises(ToolExecutionError, match="Executor failed for local command") as exc:
         run_local_command(input_data)
+    assert '"oom_killed": true' in str(exc.value)
 
 
 def test_get_local_memory_info(mock_psutil_memory):
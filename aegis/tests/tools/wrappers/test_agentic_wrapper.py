@@ -2,81 +2,135 @@
 """
 Unit tests for the agent-as-a-tool wrapper.
 """
-from unittest.mock import MagicMock
+import asyncio
+import json
 
 import pytest
-import requests
 
+from aegis.agents import subagents
+from aegis.agents.task_state import TaskState
 from aegis.exceptions import ToolExecutionError
+from aegis.schemas.agent import AgentConfig
+from aegis.schemas.runtime import RuntimeExecutionConfig
 from aegis.tools.wrappers.agentic import (
     dispatch_subtask_to_agent,
+    join_subagents,
+    launch_subagent,
     DispatchSubtaskInput,
+    JoinSubagentsInput,
+    LaunchSubagentInput,
 )
 
 
+class _FakeGraph:
+    async def ainvoke(self, state):
+        prompt = state["task_prompt"]
+        if prompt == "This will fail.":
+            raise RuntimeError("Sub-agent failed.")
+        if prompt == "This hangs.":
+            await asyncio.sleep(30)
+        return {**state, "final_summary": "Sub-agent completed successfully."}
+
+
 @pytest.fixture
-def mock_requests_post(monkeypatch):
-    """Mocks the requests.post call."""
-    mock = MagicMock()
-    monkeypatch.setattr(requests, "post", mock)
-    return mock
+def fake_presets(monkeypatch):
+    """Replaces preset compilation with a fake graph and records the preset used."""
+    used = []
+    config = AgentConfig.model_construct(runtime=RuntimeExecutionConfig())
+
+    def _compiled(preset):
+        used.append(preset)
+        return config, _FakeGraph()
 
+    monkeypatch.setattr(subagents, "_compiled_preset", _compiled)
+    return used
+
+
+def _parent() -> TaskState:
+    return TaskState(
+        task_id="orchestrator", task_prompt="p", runtime=RuntimeExecutionConfig()
+    )
 
-def test_dispatch_subtask_to_agent_success(mock_requests_post):
-    """Verify the tool correctly calls the launch API and returns the summary."""
-    mock_response = MagicMock()
-    mock_response.raise_for_status.return_value = None
-    mock_response.json.return_value = {"summary": "Sub-agent completed successfully."}
-    mock_requests_post.return_value = mock_response
 
+@pytest.mark.asyncio
+async def test_dispatch_subtask_to_agent_success(fake_presets):
+    """Verify the tool runs a child agent in-process and returns its summary."""
+    parent = _parent()
     input_data = DispatchSubtaskInput(
         prompt="Perform a sub-task.",
         preset="default",
         backend_profile="test_backend",
     )
 
-    result = dispatch_subtask_to_agent(input_data)
-
-    mock_requests_post.assert_called_once()
-    call_kwargs = mock_requests_post.call_args.kwargs
-    assert call_kwargs["url"] == "http://localhost:8000/api/launch"
-    assert call_kwargs["json"]["task"]["prompt"] == "Perform a sub-task."
-    assert call_kwargs["json"]["config"] == "default"
-    assert call_kwargs["json"]["execution"]["backend_profile"] == "test_backend"
+    result = await dispatch_subtask_to_agent(input_data, state=parent)
 
     assert result == "Sub-agent completed successfully."
+    assert fake_presets == ["default"]
+    (handle,) = parent.subagents.values()
+    assert handle.parent_task_id == "orchestrator"
+    assert handle.backend_profile == "test_backend"
+    assert handle.status == "COMPLETED"
+    await subagents.cancel_children(parent.task_id)
 
 
-def test_dispatch_subtask_to_agent_http_error(mock_requests_post):
-    """Verify that an HTTPError from the API call is raised as a ToolExecutionError."""
-    mock_response = MagicMock()
-    mock_response.json.return_value = {"detail": "Sub-agent failed."}
-    mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError(
-        response=mock_response
-    )
-    mock_requests_post.return_value = mock_response
-
+@pytest.mark.asyncio
+async def test_dispatch_subtask_to_agent_failure(fake_presets):
+    """Verify a failing child is raised as a ToolExecutionError."""
     input_data = DispatchSubtaskInput(
         prompt="This will fail.", preset="default", backend_profile="test_backend"
     )
 
     with pytest.raises(
-        ToolExecutionError, match="Sub-agent task failed: Sub-agent failed."
+        ToolExecutionError, match="Sub-agent task failed: RuntimeError: Sub-agent failed."
     ):
-        dispatch_subtask_to_agent(input_data)
+        await dispatch_subtask_to_agent(input_data)
 
 
-def test_dispatch_subtask_to_agent_network_error(mock_requests_post):
-    """Verify a network error is raised as a ToolExecutionError."""
-    mock_requests_post.side_effect = requests.exceptions.ConnectionError(
-        "Could not connect."
+@pytest.mark.asyncio
+async def test_dispatch_subtask_to_agent_timeout(fake_presets):
+    """Verify a child that overruns its timeout is cancelled and reported."""
+    input_data = DispatchSubtaskInput(
+        prompt="This hangs.",
+        preset="default",
+        backend_profile="test_backend",
+        timeout_s=0.1,
     )
 
-    input_data = DispatchSubtaskInput(
-        prompt="This will fail.", preset="default", backend_profile="test_backend"
+    with pytest.raises(ToolExecutionError, match="timed out"):
+        await dispatch_subtask_to_agent(input_data)
+
+
+@pytest.mark.asyncio
+async def test_launch_and_join_subagents(fake_presets):
+    """Verify several children can be launched and joined together."""
+    parent = _parent()
+    ids = []
+    for prompt in ("first", "second"):
+        out = await launch_subagent(LaunchSubagentInput(prompt=prompt), state=parent)
+        ids.append(json.loads(out)["task_id"])
+
+    joined = json.loads(
+        await join_subagents(JoinSubagentsInput(timeout_s=5), state=parent)
     )
 
-    with pytest.raises(
-        ToolExecutionError, match="Could not dispatch sub-task due to a network error"
+    assert [j["task_id"] for j in joined] == ids
+    assert all(j["status"] == "COMPLETED" for j in joined)
+    await subagents.cancel_children(parent.task_id)
+
+
+def test_waiting_tools_outlast_their_timeout_s():
+    """Verify the tool timeout never cuts a wait short of its timeout_s."""
+    import importlib
+
+    from aegis.registry import TOOL_REGISTRY
+    from aegis.tools.wrappers import agentic
+
+    # Other tests may have cleared the registry since the module was imported.
+    importlib.reload(agentic)
+    for name, model in (
+        ("dispatch_subtask_to_agent", agentic.DispatchSubtaskInput),
+        ("join_subagents", agentic.JoinSubagentsInput),
     ):
-        dispatch_subtask_to_agent(input_data)
+        limit = model.model_fields["timeout_s"].metadata
+        max_wait = next(m.le for m in limit if getattr(m, "le", None) is not None)
+        assert TOOL_REGISTRY[name].timeout > max_wait
@@ -22,6 +22,7 @@ from aegis.tools.wrappers.fuzz import (
     fuzz_tool_via_registry,
     FuzzToolRegistryInput,
 )
+from aegis.utils.sandbox import ResourceLimits
 
 
 # --- Tests for Helper ---
@@ -66,6 +67,22 @@ def test_fuzz_external_command(monkeypatch):
     assert result["summary"]["failures"] == 1
 
 
+def test_fuzz_external_command_runs_targets_in_the_sandbox(monkeypatch):
+    """Verify fuzz targets get the configured limits and report their usage."""
+    limits = ResourceLimits(memory_max=1 << 30)
+    monkeypatch.setattr("aegis.tools.wrappers.fuzz.load_limits", lambda: limits)
+    mock_run = MagicMock(
+        return_value=MagicMock(returncode=0, resource_usage={"mechanism": "rlimit"})
+    )
+    monkeypatch.setattr("aegis.tools.wrappers.fuzz.run_subprocess", mock_run)
+
+    input_data = FuzzExternalCommandInput(command="test_cmd {}", iterations=2)
+    result = fuzz_external_command(input_data)
+
+    assert all(c.kwargs["limits"] is limits for c in mock_run.call_args_list)
+    assert [r["resources"] for r in result["results"]] == [{"mechanism": "rlimit"}] * 2
+
+
 @patch("tempfile.NamedTemporaryFile")
 def test_fuzz_file_input(mock_temp_file, monkeypatch):
     """Verify fuzz_file_input creates and uses a temporary file."""
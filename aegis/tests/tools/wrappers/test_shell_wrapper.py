@@ -2,12 +2,22 @@
 """
 Unit tests for the high-level shell wrapper tools.
 """
+import json
 from unittest.mock import MagicMock
 
 import pytest
 
+from aegis.agents.task_state import TaskState
 from aegis.exceptions import ToolExecutionError
+from aegis.schemas.background_job import BackgroundJobHandle
+from aegis.schemas.runtime import RuntimeExecutionConfig
 from aegis.tools.wrappers.shell import (
+    BackgroundJobInput,
+    TailBackgroundJobLogInput,
+    WaitForBackgroundJobInput,
+    get_background_job_status,
+    tail_background_job_log,
+    wait_for_background_job,
     run_remote_background_command,
     RunRemoteBackgroundCommandInput,
     run_remote_python_snippet,
@@ -40,15 +50,109 @@ def test_run_remote_background_command_success(mock_ssh_executor_instance):
     input_data = RunRemoteBackgroundCommandInput(
         machine_name="test-host", command="long_script.sh --daemon"
     )
-    result = run_remote_background_command(input_data)
+    state = TaskState(
+        task_id="bg", task_prompt="p", runtime=RuntimeExecutionConfig()
+    )
+    result = run_remote_background_command(input_data, state=state)
+
+    mock_ssh_executor_instance.run.assert_called_once()
+    remote_cmd = mock_ssh_executor_instance.run.call_args[0][0]
+    assert "nohup sh -c" in remote_cmd
+    assert "long_script.sh --daemon" in remote_cmd
+    assert result.startswith(
+        "Successfully launched background command on test-host: long_script.sh --daemon"
+    )
+
+    handle = BackgroundJobHandle.model_validate_json(result.splitlines()[-1])
+    assert handle.machine_name == "test-host"
+    assert handle.pid_file in remote_cmd
+    assert handle.exit_code_file.startswith(handle.job_dir)
+    assert state.background_jobs[handle.job_id] == handle
+
+
+def test_get_background_job_status_parses_header(mock_ssh_executor_instance):
+    mock_ssh_executor_instance.run.return_value = "__AEGIS_JOB__ exited 3 4242 120"
+    result = json.loads(
+        get_background_job_status(
+            BackgroundJobInput(machine_name="test-host", job_id="abc123")
+        )
+    )
+    assert result["state"] == "exited"
+    assert result["exit_code"] == 3
+    assert result["pid"] == 4242
+    assert result["log_size"] == 120
+
+
+def test_wait_for_background_job_is_single_remote_call(mock_ssh_executor_instance):
+    mock_ssh_executor_instance.run.return_value = "__AEGIS_JOB__ running - 4242 10"
+    result = json.loads(
+        wait_for_background_job(
+            WaitForBackgroundJobInput(
+                machine_name="test-host", job_id="abc123", timeout_s=5
+            )
+        )
+    )
+    mock_ssh_executor_instance.run.assert_called_once()
+    assert mock_ssh_executor_instance.run.call_args.kwargs["timeout"] == 35
+    assert result["timed_out"] is True
+
 
-    mock_ssh_executor_instance.run.assert_called_once_with(
-        "nohup long_script.sh --daemon > /dev/null 2>&1 &"
+def test_wait_for_background_job_outlasts_its_ssh_call():
+    import importlib
+
+    from aegis.registry import TOOL_REGISTRY
+    from aegis.tools.wrappers import shell
+
+    # Other tests may have cleared the registry since the module was imported.
+    importlib.reload(shell)
+    assert TOOL_REGISTRY["wait_for_background_job"].timeout > shell.MAX_WAIT_S + 30
+
+
+def test_background_job_uses_the_persisted_handle_machine(
+    monkeypatch, mock_ssh_executor_instance
+):
+    handle = BackgroundJobHandle(
+        job_id="abc123",
+        machine_name="job-host",
+        command="sleep 100",
+        job_dir="/tmp/aegis-jobs/abc123",
+        pid_file="/tmp/aegis-jobs/abc123/pid",
+        exit_code_file="/tmp/aegis-jobs/abc123/exit_code",
+        log_file="/tmp/aegis-jobs/abc123/log",
     )
-    assert (
-        result
-        == "Successfully launched background command on test-host: long_script.sh --daemon"
+    state = TaskState(task_id="t", task_prompt="p", runtime=RuntimeExecutionConfig())
+    state.background_jobs["abc123"] = handle
+    get_machine = MagicMock()
+    monkeypatch.setattr("aegis.tools.wrappers.shell.get_machine", get_machine)
+    mock_ssh_executor_instance.run.return_value = "__AEGIS_JOB__ exited 0 4242 10"
+    wait_for_background_job(
+        WaitForBackgroundJobInput(machine_name="other-host", job_id="abc123"), state=state
     )
+    get_machine.assert_called_once_with("job-host")
+
+
+def test_tail_background_job_log_returns_next_offset(mock_ssh_executor_instance):
+    mock_ssh_executor_instance.run.return_value = (
+        "__AEGIS_JOB__ running - 4242 30\n__AEGIS_JOB___N 5\nhello"
+    )
+    result = json.loads(
+        tail_background_job_log(
+            TailBackgroundJobLogInput(
+                machine_name="test-host", job_id="abc123", offset=10, max_bytes=5
+            )
+        )
+    )
+    assert result["data"] == "hello"
+    assert result["offset"] == 10
+    assert result["next_offset"] == 15
+    assert result["log_size"] == 30
+
+
+def test_background_job_rejects_unsafe_job_id(mock_ssh_executor_instance):
+    with pytest.raises(ToolExecutionError):
+        get_background_job_status(
+            BackgroundJobInput(machine_name="test-host", job_id="x; rm -rf /")
+        )
 
 
 def test_run_script_if_absent_file_missing_and_success(mock_ssh_executor_instance):
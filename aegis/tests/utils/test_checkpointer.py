@@ -0,0 +1,139 @@
+# aegis/tests/utils/test_checkpointer.py
+"""
+Unit tests for the SQLite LangGraph checkpointer.
+"""
+from typing import List, Optional
+
+import pytest
+from langgraph.graph import StateGraph
+from pydantic import BaseModel, Field
+
+from aegis.utils.checkpointer import SQLiteCheckpointSaver, delete_checkpoints
+
+
+class ToyState(BaseModel):
+    log: List[str] = Field(default_factory=list)
+    feedback: Optional[str] = None
+    rounds: int = 0
+
+
+def _build(saver):
+    def plan(s):
+        return {"log": s.log + ["plan"], "rounds": s.rounds + 1}
+
+    def execute(s):
+        return {"log": s.log + ["execute"]}
+
+    def human(s):
+        return {"log": s.log + [f"human:{s.feedback}"], "feedback": None}
+
+    def summarize(s):
+        return {"log": s.log + ["summarize"]}
+
+    builder = StateGraph(ToyState)
+    for name, fn in [
+        ("plan", plan),
+        ("execute", execute),
+        ("human", human),
+        ("summarize", summarize),
+    ]:
+        builder.add_node(name, fn)
+    builder.set_entry_point("plan")
+    builder.add_edge("plan", "execute")
+    builder.add_edge("human", "plan")
+    builder.add_edge("summarize", "__end__")
+    builder.add_conditional_edges(
+        "execute",
+        lambda s: "interrupt" if s.rounds == 1 else "end",
+        {"interrupt": "human", "end": "summarize"},
+    )
+    return builder.compile(interrupt_before=["human"], checkpointer=saver)
+
+
+@pytest.mark.asyncio
+async def test_interrupt_and_resume_from_exact_checkpoint_after_restart(tmp_path):
+    db = tmp_path / "ckpt.sqlite3"
+    graph = _build(SQLiteCheckpointSaver(db))
+    config = {"configurable": {"thread_id": "t1"}, "metadata": {"aegis_profile": "toy"}}
+
+    paused = await graph.ainvoke(ToyState().model_dump(), config=config)
+    assert paused["log"] == ["plan", "execute"]
+    snapshot = await graph.aget_state({"configurable": {"thread_id": "t1"}})
+    assert snapshot.next == ("human",)
+    assert snapshot.metadata["aegis_profile"] == "toy"
+    checkpoint_id = snapshot.config["configurable"]["checkpoint_id"]
+
+    # A fresh saver over the same file stands in for a process restart.
+    saver = SQLiteCheckpointSaver(db)
+    resumed_graph = _build(saver)
+    saved = await saver.aget_tuple(
+        {"configurable": {"thread_id": "t1", "checkpoint_id": checkpoint_id}}
+    )
+    run_config = await resumed_graph.aupdate_state(saved.config, {"feedback": "yes"})
+    final = await resumed_graph.ainvoke(None, config=run_config)
+
+    assert final["log"] == [
+        "plan",
+        "execute",
+        "human:yes",
+        "plan",
+        "execute",
+        "summarize",
+    ]
+
+
+def test_put_only_writes_changed_channels(tmp_path):
+    saver = SQLiteCheckpointSaver(tmp_path / "ckpt.sqlite3")
+    base = {"configurable": {"thread_id": "t", "checkpoint_ns": ""}}
+    checkpoint = {
+        "v": 1,
+        "id": "0001",
+        "ts": "2024-01-01T00:00:00+00:00",
+        "channel_values": {"history": [1, 2], "prompt": "big prompt"},
+        "channel_versions": {"history": "1", "prompt": "1"},
+        "versions_seen": {},
+    }
+    cfg = saver.put(base, checkpoint, {"step": 0}, {"history": "1", "prompt": "1"})
+
+    second = {
+        **checkpoint,
+        "id": "0002",
+        "channel_values": {"history": [1, 2, 3], "prompt": "big prompt"},
+        "channel_versions": {"history": "2", "prompt": "1"},
+    }
+    saver.put(cfg, second, {"step": 1}, {"history": "2"})
+
+    with saver._cursor() as cur:
+        rows = cur.execute("SELECT channel, version FROM blobs ORDER BY channel, version").fetchall()
+    # 'prompt' was stored once and is shared by both checkpoints.
+    assert rows == [("history", "1"), ("history", "2"), ("prompt", "1")]
+
+    latest = saver.get_tuple({"configurable": {"thread_id": "t"}})
+    assert latest.checkpoint["id"] == "0002"
+    assert latest.checkpoint["channel_values"] == {"history": [1, 2, 3], "prompt": "big prompt"}
+    assert latest.parent_config["configurable"]["checkpoint_id"] == "0001"
+
+    first = saver.get_tuple({"configurable": {"thread_id": "t", "checkpoint_id": "0001"}})
+    assert first.checkpoint["channel_values"]["history"] == [1, 2]
+
+    listed = list(saver.list({"configurable": {"thread_id": "t"}}, limit=1))
+    assert [t.checkpoint["id"] for t in listed] == ["0002"]
+    before = list(saver.list(None, before={"configurable": {"checkpoint_id": "0002"}}))
+    assert [t.checkpoint["id"] for t in before] == ["0001"]
+
+    saver.delete_thread("t")
+    assert saver.get_tuple({"configurable": {"thread_id": "t"}}) is None
+
+
+@pytest.mark.asyncio
+async def test_delete_checkpoints_is_best_effort(tmp_path):
+    saver = SQLiteCheckpointSaver(tmp_path / "ckpt.sqlite3")
+    graph = _build(saver)
+    await graph.ainvoke(ToyState().model_dump(), config={"configurable": {"thread_id": "t1"}})
+    assert saver.get_tuple({"configurable": {"thread_id": "t1"}}) is not None
+
+    await delete_checkpoints(saver, "t1")
+    assert saver.get_tuple({"configurable": {"thread_id": "t1"}}) is None
+
+    saver.close()
+    await delete_checkpoints(saver, "t1")  # logged, not raised
@@ -0,0 +1,152 @@
+# aegis/tests/utils/test_fault_injection.py
+"""
+Unit tests for the deterministic fault-injection wrapper.
+"""
+import asyncio
+import json
+
+import pytest
+
+from aegis.exceptions import ConfigurationError, PlannerError, ToolExecutionError
+from aegis.utils import fault_injection as fi
+from aegis.utils import provenance
+from aegis.utils.fault_injection import FaultProfile, FaultRule
+
+
+class FakeSSH:
+    def run(self, command, timeout=None):
+        return "0123456789"
+
+    def run_with_rc(self, command, timeout=None):
+        return 0, "ok"
+
+
+class DelegatingSSH:
+    """Like SSHExecutor, whose run() calls run_with_rc()."""
+
+    def run(self, command, timeout=None):
+        return self.run_with_rc(command, timeout)[1]
+
+    def run_with_rc(self, command, timeout=None):
+        return 0, "ok"
+
+
+class FakeProvider:
+    async def get_completion(self, messages, runtime_config, raw_response=False):
+        return "completion"
+
+
+fi.wrap_class("ssh", FakeSSH, ("run", "run_with_rc"))
+fi.wrap_class("ssh", DelegatingSSH, ("run", "run_with_rc"))
+fi.wrap_class("provider", FakeProvider, ("get_completion",))
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch, tmp_path):
+    monkeypatch.setattr(fi, "_install", lambda: None)
+    monkeypatch.setattr("aegis.utils.replay_logger._reports_dir", lambda: tmp_path)
+    provenance.set_ledger_path(str(tmp_path / "ledger.jsonl"))
+    monkeypatch.delenv("AEGIS_FAULT_PROFILE", raising=False)
+    yield
+    fi.deactivate()
+
+
+def _profile(*rules, seed=1):
+    return FaultProfile(name="t", seed=seed, rules=list(rules))
+
+
+def test_no_active_injector_passes_through():
+    fi.deactivate()
+    assert FakeSSH().run("x") == "0123456789"
+
+
+def test_activate_without_profile_is_disabled():
+    assert fi.activate(None) is None
+    assert fi.active() is None
+
+
+def test_partial_and_error_code():
+    fi.activate(_profile(FaultRule(fault="partial", keep_fraction=0.3)), run_id="r1")
+    assert FakeSSH().run("x") == "012"
+
+    fi.activate(
+        _profile(FaultRule(targets=["ssh"], fault="error_code", codes=[255])),
+        run_id="r1",
+    )
+    assert FakeSSH().run_with_rc("x") == (255, "")
+    with pytest.raises(ToolExecutionError, match="exit code 255"):
+        FakeSSH().run("x")
+
+
+def test_timeout_and_reset_raise_target_errors():
+    fi.activate(_profile(FaultRule(targets=["ssh"], fault="timeout")), run_id="r1")
+    with pytest.raises(ToolExecutionError, match="timed out"):
+        FakeSSH().run("x")
+
+    fi.activate(_profile(FaultRule(targets=["provider"], fault="reset")), run_id="r1")
+    with pytest.raises(PlannerError, match="connection reset"):
+        asyncio.run(FakeProvider().get_completion([], None))
+
+
+def test_rules_filter_by_target_and_method():
+    fi.activate(
+        _profile(FaultRule(targets=["ssh"], methods=["run_with_rc"], fault="timeout")),
+        run_id="r1",
+    )
+    assert FakeSSH().run("x") == "0123456789"
+    assert asyncio.run(FakeProvider().get_completion([], None)) == "completion"
+
+
+def test_nested_intercepted_calls_are_rolled_once():
+    injector = fi.activate(_profile(FaultRule(fault="latency", latency_ms=0)), run_id="r1")
+    assert DelegatingSSH().run("x") == "ok"
+    assert [(f.method, f.call_no) for f in injector.injected] == [("run", 0)]
+    assert DelegatingSSH().run_with_rc("x") == (0, "ok")
+    assert [(f.method, f.call_no) for f in injector.injected][-1] == ("run_with_rc", 0)
+
+
+def test_decisions_are_seeded_and_reproducible():
+    rule = FaultRule(fault="error_code", probability=0.5, codes=[1, 2, 3])
+
+    def sequence(seed):
+        inj = fi.FaultInjector(_profile(rule, seed=seed), run_id=None, seed=seed)
+        out = []
+        for _ in range(40):
+            d = inj.decide("ssh", "run")
+            out.append(d.detail["code"] if d else None)
+        return out
+
+    assert sequence(7) == sequence(7)
+    assert sequence(7) != sequence(8)
+    assert any(v is None for v in sequence(7)) and any(v for v in sequence(7))
+
+
+def test_injected_faults_are_recorded_in_provenance(tmp_path):
+    inj = fi.activate(
+        _profile(FaultRule(fault="latency", latency_ms=1)), run_id="run-prov"
+    )
+    FakeSSH().run("x")
+    assert len(inj.injected) == 1
+
+    provenance.flush()
+    lines = (tmp_path / "ledger.jsonl").read_text().splitlines()
+    rec = json.loads(lines[-1])
+    assert rec["run_id"] == "run-prov"
+    assert rec["tool"] == "fault:ssh.run"
+    assert rec["status"] == "injected:latency"
+
+    replay = (tmp_path / "run-prov" / "replay.jsonl").read_text().splitlines()
+    event = json.loads(replay[-1])
+    assert event["event_type"] == "FAULT_INJECTED"
+    assert event["data"]["fault"] == "latency"
+
+
+def test_load_profile_validates(tmp_path):
+    bad = tmp_path / "bad.yaml"
+    bad.write_text("rules:\n  - fault: meteor_strike\n")
+    with pytest.raises(ConfigurationError):
+        fi.load_profile(bad)
+
+    good = tmp_path / "good.yaml"
+    good.write_text("name: g\nrules:\n  - fault: latency\n    latency_ms: [1, 5]\n")
+    assert fi.load_profile(good).rules[0].latency_ms == [1, 5]
@@ -4,11 +4,21 @@ Unit tests for the custom logging infrastructure.
 """
 import json
 import logging
+import subprocess
+import sys
+import threading
+import time
 from pathlib import Path
+from textwrap import dedent
 
 import pytest
 
-from aegis.utils.log_sinks import JsonlFileHandler, TaskIdFilter, task_id_context
+from aegis.utils.log_sinks import (
+    BufferedJsonlFileHandler,
+    JsonlFileHandler,
+    TaskIdFilter,
+    task_id_context,
+)
 
 
 @pytest.fixture
@@ -94,3 +104,167 @@ def test_jsonl_file_handler_no_task_id(setup_test_logger, tmp_path: Path):
     assert (
         len(log_files) == 0
     ), "Log file should not have been created without a task_id."
+
+
+def _buffered_logger(tmp_path: Path, **kwargs):
+    logger = logging.getLogger("test_buffered_logger")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.handlers.clear()
+    handler = BufferedJsonlFileHandler(logs_dir=str(tmp_path), **kwargs)
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def test_buffered_handler_batches_and_caches_files(tmp_path: Path):
+    """Verify records are written in batches with one open per task file."""
+    logger, handler = _buffered_logger(tmp_path, flush_interval_s=60, max_open_files=1)
+    try:
+        for i in range(10):
+            task_id_context.set("task-a" if i % 2 == 0 else "task-b")
+            logger.info(f"line {i}")
+        task_id_context.set(None)
+        # Nothing reaches disk until a flush (size/time/task end) happens.
+        assert not (tmp_path / "task-a.jsonl").exists()
+
+        assert handler.flush_task("task-a", timeout=5)
+        assert len((tmp_path / "task-a.jsonl").read_text().splitlines()) == 5
+        handler.flush()
+        lines = (tmp_path / "task-b.jsonl").read_text().splitlines()
+        assert lines == [f"line {i}" for i in range(1, 10, 2)]
+
+        stats = handler.stats()
+        assert stats["written"] == 10 and stats["dropped"] == 0
+        assert stats["opened"] == 2 and stats["open_files"] == 1
+    finally:
+        handler.close()
+        task_id_context.set(None)
+
+
+def test_buffered_handler_flushes_on_size(tmp_path: Path):
+    """Verify reaching flush_records writes without an explicit flush."""
+    logger, handler = _buffered_logger(tmp_path, flush_interval_s=60, flush_records=3)
+    try:
+        task_id_context.set("task-size")
+        for i in range(3):
+            logger.info(f"line {i}")
+        log_file = tmp_path / "task-size.jsonl"
+        for _ in range(100):
+            if log_file.exists() and len(log_file.read_text().splitlines()) == 3:
+                break
+            time.sleep(0.01)
+        assert len(log_file.read_text().splitlines()) == 3
+    finally:
+        handler.close()
+        task_id_context.set(None)
+
+
+@pytest.mark.parametrize("overflow", ["drop_new", "drop_oldest", "block"])
+def test_buffered_handler_overflow_policies(tmp_path: Path, overflow):
+    """Verify a full queue drops records per policy and counts them."""
+    logger, handler = _buffered_logger(
+        tmp_path, queue_size=2, flush_records=1, overflow=overflow, block_timeout_s=0.01
+    )
+    # Hold the writer on the first batch so the queue backs up.
+    stall = threading.Event()
+    original_write = handler._write
+
+    def slow_write(task_id, lines):
+        stall.wait(5)
+        original_write(task_id, lines)
+
+    handler._write = slow_write
+    try:
+        task_id_context.set("task-full")
+        logger.info("first")
+        time.sleep(0.05)  # let the writer pick it up and stall
+        for i in range(5):
+            logger.info(f"line {i}")
+        dropped = handler.stats()["dropped"]
+        assert dropped == 3
+        if overflow == "block":
+            assert handler.stats()["blocked"] == 3
+        stall.set()
+        handler.flush()
+        lines = (tmp_path / "task-full.jsonl").read_text().splitlines()
+        expected_tail = ["line 3", "line 4"] if overflow == "drop_oldest" else ["line 0", "line 1"]
+        assert lines == ["first"] + expected_tail
+    finally:
+        stall.set()
+        handler.close()
+        task_id_context.set(None)
+
+
+def test_drop_oldest_never_discards_flush_requests(tmp_path: Path):
+    """With only control items queued, drop_oldest drops the new line instead."""
+    logger, handler = _buffered_logger(
+        tmp_path, queue_size=2, flush_records=1, overflow="drop_oldest"
+    )
+    stall = threading.Event()
+    original_write = handler._write
+
+    def slow_write(task_id, lines):
+        stall.wait(5)
+        original_write(task_id, lines)
+
+    handler._write = slow_write
+    try:
+        task_id_context.set("task-ctl")
+        logger.info("first")
+        time.sleep(0.05)
+        handler.flush_task("task-ctl")
+        handler.flush_task("task-other")
+        started = time.monotonic()
+        logger.info("dropped")
+        assert time.monotonic() - started < 1.0
+        assert handler.stats()["dropped"] == 1
+        assert handler.stats()["queued"] == 2
+        stall.set()
+        handler.flush()
+        assert (tmp_path / "task-ctl.jsonl").read_text().splitlines() == ["first"]
+    finally:
+        stall.set()
+        handler.close()
+        task_id_context.set(None)
+
+
+def test_buffered_handler_rejects_unknown_policy(tmp_path: Path):
+    with pytest.raises(ValueError, match="overflow"):
+        BufferedJsonlFileHandler(logs_dir=str(tmp_path), overflow="lossy")
+
+
+def test_setup_logger_applies_config_yaml(tmp_path: Path):
+    """A fresh process picks up logging.level, logging.file_sink and paths.logs."""
+    (tmp_path / "config.yaml").write_text(
+        dedent(
+            """
+            logging:
+              level: debug
+              file_sink: {queue_size: 7, flush_records: 3}
+            paths: {logs: custom-logs}
+            """
+        )
+    )
+    script = dedent(
+        """
+        import json, logging
+        from aegis.utils.logger import setup_logger
+        setup_logger("probe")
+        root = logging.getLogger()
+        (sink,) = [h for h in root.handlers if hasattr(h, "queue_size")]
+        print(json.dumps([root.level, sink.queue_size, sink.flush_records, str(sink.logs_dir)]))
+        """
+    )
+    repo = Path(__file__).resolve().parents[3]
+    out = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=tmp_path,
+        env={"PYTHONPATH": str(repo), "PATH": ""},
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert out.returncode == 0, out.stderr
+    level, queue_size, flush_records, logs_dir = json.loads(out.stdout.splitlines()[-1])
+    assert (level, queue_size, flush_records) == (logging.DEBUG, 7, 3)
+    assert logs_dir.endswith("custom-logs")
@@ -0,0 +1,46 @@
+# aegis/tests/utils/test_loop_watchdog.py
+"""
+Unit tests for the event-loop lag watchdog.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from aegis.utils.loop_watchdog import LAG_BUCKETS_MS, LoopWatchdog
+
+
+def _blocking_tool_call(state, plan):
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_stall_is_captured_with_stack_and_attribution():
+    dog = LoopWatchdog(asyncio.get_running_loop(), interval_ms=10, threshold_ms=100)
+    dog.start()
+    try:
+        await asyncio.sleep(0.05)
+        _blocking_tool_call({"task_id": "t-lag"}, SimpleNamespace(tool_name="run_remote_command"))
+        await asyncio.sleep(0.05)
+    finally:
+        await dog.stop()
+
+    stats = dog.stats()
+    assert stats["stalls"] == 1
+    stall = stats["last_stall"]
+    assert stall["blocking_frame"].startswith("_blocking_tool_call (test_loop_watchdog.py:")
+    assert stall["tool"] == "run_remote_command" and stall["task_id"] == "t-lag"
+    assert stall["blocked_ms"] >= 100
+    assert stats["max_ms"] >= 250
+    assert stats["buckets"][-1] == ("+Inf", stats["count"])
+
+
+def test_histogram_buckets():
+    dog = LoopWatchdog(loop=None)
+    for lag in (1, 7, 7, 300, 10_000):
+        dog.observe(lag)
+    buckets = dict(dog.stats()["buckets"])
+    assert buckets[5] == 1 and buckets[10] == 3 and buckets[500] == 4
+    assert buckets["+Inf"] == 5 and len(buckets) == len(LAG_BUCKETS_MS) + 1
+    assert dog.stats()["max_ms"] == 10_000
@@ -0,0 +1,98 @@
+# aegis/tests/utils/test_memory_profiling.py
+"""
+Unit tests for per-step memory instrumentation of graph nodes.
+"""
+import inspect
+import tracemalloc
+
+import pytest
+
+from aegis.utils import artifact_manager, memory_profiling
+
+
+@pytest.fixture
+def artifacts(monkeypatch, tmp_path):
+    monkeypatch.setattr(artifact_manager, "ARTIFACT_DIR", tmp_path)
+    return tmp_path
+
+
+_KEEP = []
+
+
+def test_steps_are_recorded_and_reported(artifacts):
+    def grow(state):
+        _KEEP.append(bytearray(2 * 1024 * 1024))
+        return {}
+
+    wrapped = memory_profiling.memory_node("execute", grow)
+    assert inspect.signature(wrapped) == inspect.signature(grow)
+    for _ in range(2):
+        wrapped({"task_id": "t-mem", "history": [1, 2]})
+    assert tracemalloc.is_tracing()
+
+    steps = memory_profiling._TASKS["t-mem"].steps
+    assert [s["seq"] for s in steps] == [1, 2]
+    assert all(s["traced_delta_kb"] >= 2000 for s in steps)
+    assert steps[0]["history_len"] == 2
+    assert any("test_memory_profiling.py" in site for site, _ in steps[0]["top_sites_kb"])
+
+    report = memory_profiling.memory_report("t-mem")
+    assert report.startswith("## Memory Profile")
+    assert "| 1. execute |" in report and "| 2. execute |" in report
+    assert "Top 10 growing allocation sites" in report
+    # Records are released and tracemalloc stopped once reported.
+    assert memory_profiling.memory_report("t-mem") is None
+    assert not tracemalloc.is_tracing()
+    _KEEP.clear()
+
+
+@pytest.mark.asyncio
+async def test_threshold_writes_snapshot_artifacts(artifacts, monkeypatch):
+    monkeypatch.setattr(
+        memory_profiling,
+        "_profiling_settings",
+        lambda: {"memory_snapshot_threshold_mb": 1, "memory_nframes": 5},
+    )
+    rss = iter([100 * 1024 * 1024, 103 * 1024 * 1024])
+    monkeypatch.setattr(memory_profiling, "_rss", lambda: next(rss))
+
+    async def plan(state):
+        return {}
+
+    await memory_profiling.memory_node("plan", plan)({"task_id": "t-snap"})
+
+    dump = next(artifacts.glob("t-snap_memory_001_plan_*.tracemalloc"))
+    assert isinstance(tracemalloc.Snapshot.load(str(dump)), tracemalloc.Snapshot)
+    assert next(artifacts.glob("t-snap_memory_001_plan_*.txt")).read_text()
+    report = memory_profiling.memory_report("t-snap")
+    assert "| 1. plan | 103.0 | 3.0 |" in report
+    assert "Snapshots saved" in report
+
+
+def test_component_attribution():
+    def tb(*files):
+        # Traceback takes its frames most recent first.
+        return tracemalloc.Traceback(tuple((f, 1) for f in reversed(files)))
+
+    # Innermost frame last; the most recent matching frame decides.
+    provider = tb("/x/aegis/agents/steps/plan.py", "/x/aegis/providers/openai.py", "/py/json/decoder.py")
+    assert memory_profiling.component_of(provider) == "providers"
+    assert memory_profiling.component_of(tb("/x/aegis/agents/steps/plan.py", "/py/copy.py")) == "task_state"
+    assert memory_profiling.component_of(tb("/py/asyncio/events.py")) == "other"
+
+
+def test_release_task_drops_unreported_records(artifacts):
+    def fail(state):
+        raise RuntimeError("node failed")
+
+    wrapped = memory_profiling.memory_node("execute", fail)
+    with pytest.raises(RuntimeError):
+        wrapped({"task_id": "t-failed"})
+    # The run never reached summarize_result, so nothing reported it.
+    assert "t-failed" in memory_profiling._TASKS
+    assert tracemalloc.is_tracing()
+
+    memory_profiling.release_task("t-failed")
+    assert "t-failed" not in memory_profiling._TASKS
+    assert not tracemalloc.is_tracing()
+    memory_profiling.release_task("t-failed")  # idempotent
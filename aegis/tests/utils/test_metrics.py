@@ -0,0 +1,94 @@
+# aegis/tests/utils/test_metrics.py
+"""
+Unit tests for the Prometheus metrics registry and exposition format.
+"""
+import pytest
+
+from aegis.utils import metrics
+from aegis.utils.metrics import Counter, Gauge, Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram("t_seconds", "Test.", ("node",), buckets=(0.1, 1), register=False)
+    for value in (0.05, 0.5, 0.7, 3):
+        h.observe(value, node="execute_tool")
+
+    lines = h.render()
+    assert lines[:2] == ["# HELP t_seconds Test.", "# TYPE t_seconds histogram"]
+    assert 't_seconds_bucket{node="execute_tool",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{node="execute_tool",le="1"} 3' in lines
+    assert 't_seconds_bucket{node="execute_tool",le="+Inf"} 4' in lines
+    assert 't_seconds_sum{node="execute_tool"} 4.25' in lines
+    assert 't_seconds_count{node="execute_tool"} 4' in lines
+
+
+def test_counter_and_gauge():
+    c = Counter("t_denials", "Test.", ("tool",), register=False)
+    c.inc(tool="run_local_command")
+    c.inc(2, tool="run_local_command")
+    assert c.render()[:2] == [
+        "# HELP t_denials_total Test.",
+        "# TYPE t_denials_total counter",
+    ]
+    assert c.render()[-1] == 't_denials_total{tool="run_local_command"} 3'
+
+    g = Gauge("t_active", "Test.", register=False)
+    g.inc()
+    g.inc()
+    g.dec()
+    assert g.render()[-1] == "t_active 1"
+    g.set_function(lambda: 7)
+    assert g.render()[-1] == "t_active 7"
+
+
+def test_label_values_are_escaped():
+    c = Counter("t_esc", "Test.", ("tool",), register=False)
+    c.inc(tool='a"b\\c\nd')
+    assert c.render()[-1] == 't_esc_total{tool="a\\"b\\\\c\\nd"} 1'
+
+
+def test_cardinality_is_capped():
+    c = Counter("t_cap", "Test.", ("tool",), max_series=2, register=False)
+    for name in ("a", "b", "c", "d", "a"):
+        c.inc(tool=name)
+
+    series = c.render()[2:]
+    assert series == [
+        't_cap_total{tool="a"} 2',
+        't_cap_total{tool="b"} 1',
+        't_cap_total{tool="other"} 2',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_instrument_llm_labels_backend_and_call_type():
+    class _Provider:
+        config = type("Cfg", (), {"profile_name": "t_backend"})()
+
+        @metrics.instrument_llm("structured")
+        async def get_structured_completion(self):
+            metrics.record_llm_tokens({"prompt_tokens": 100, "completion_tokens": 20})
+            return "ok"
+
+    with metrics.llm_call_type("judge"):
+        assert await _Provider().get_structured_completion() == "ok"
+
+    text = metrics.render_metrics()
+    assert (
+        'aegis_llm_request_duration_seconds_count{backend="t_backend",call_type="judge",outcome="success"} 1'
+        in text
+    )
+    assert 'aegis_llm_prompt_tokens_sum{backend="t_backend"} 100' in text
+    assert 'aegis_llm_completion_tokens_count{backend="t_backend"} 1' in text
+
+
+def test_write_textfile(tmp_path):
+    metrics.POLICY_DENIALS.inc(tool="t_textfile")
+    out = metrics.write_textfile(str(tmp_path / "metrics" / "aegis.prom"))
+
+    assert out is not None
+    text = out.read_text()
+    assert 'aegis_policy_denials_total{tool="t_textfile"}' in text
+    assert "# TYPE aegis_policy_denials_total counter" in text
+    assert "# TYPE aegis_step_duration_seconds histogram" in text
+    assert list(out.parent.iterdir()) == [out]
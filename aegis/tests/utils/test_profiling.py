@@ -0,0 +1,89 @@
+# aegis/tests/utils/test_profiling.py
+"""
+Unit tests for per-step CPU profiling of graph nodes.
+"""
+import inspect
+import pstats
+import time
+
+import pytest
+
+from aegis.utils import artifact_manager, profiling
+
+
+@pytest.fixture
+def artifacts(monkeypatch, tmp_path):
+    monkeypatch.setattr(artifact_manager, "ARTIFACT_DIR", tmp_path)
+    return tmp_path
+
+
+def _busy_work(ms: float) -> int:
+    end = time.perf_counter() + ms / 1000.0
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+def test_sync_node_writes_pstats_and_collapsed_stacks(artifacts):
+    def plan_step(state):
+        _busy_work(40)
+        return {"ok": True}
+
+    wrapped = profiling.profile_node("plan", plan_step)
+    assert wrapped({"task_id": "t-sync"}) == {"ok": True}
+    assert inspect.signature(wrapped) == inspect.signature(plan_step)
+
+    pstats_file = next(artifacts.glob("t-sync_profile_001_plan_*.pstats"))
+    names = {func[2] for func in pstats.Stats(str(pstats_file)).stats}
+    assert "_busy_work" in names
+    collapsed = next(artifacts.glob("t-sync_profile_001_plan_*.collapsed")).read_text()
+    assert "_busy_work" in collapsed
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+
+    report = profiling.profile_report("t-sync", top_n=5)
+    assert "## CPU Profile" in report and "| 1. plan |" in report
+    assert "`_busy_work`" in report
+    # The merged stats are released once reported.
+    assert profiling.profile_report("t-sync") is None
+
+
+@pytest.mark.asyncio
+async def test_async_nodes_are_numbered_and_aggregated(artifacts):
+    async def execute(state):
+        _busy_work(5)
+        return {}
+
+    wrapped = profiling.profile_node("execute", execute)
+    assert inspect.iscoroutinefunction(wrapped)
+    for _ in range(2):
+        await wrapped({"task_id": "t-async"})
+
+    assert len(list(artifacts.glob("t-async_profile_00[12]_execute_*.pstats"))) == 2
+    report = profiling.profile_report("t-async")
+    assert "Profiled 2 node calls" in report
+
+
+def test_nested_node_on_same_thread_runs_unprofiled(artifacts):
+    inner = profiling.profile_node("inner", lambda state: "inner")
+    outer = profiling.profile_node("outer", lambda state: inner(state))
+
+    assert outer({"task_id": "t-nested"}) == "inner"
+    assert [p.name.split("_")[3] for p in artifacts.glob("*.pstats")] == ["outer"]
+    profiling.profile_report("t-nested")
+
+
+def test_release_task_drops_unreported_stats(artifacts):
+    def fail(state):
+        _busy_work(5)
+        raise RuntimeError("node failed")
+
+    with pytest.raises(RuntimeError):
+        profiling.profile_node("execute", fail)({"task_id": "t-failed"})
+    assert profiling._TASKS["t-failed"].stats is not None
+
+    profiling.release_task("t-failed")
+    assert "t-failed" not in profiling._TASKS
+    assert profiling.profile_report("t-failed") is None
+    # Per-step artifacts stay on disk.
+    assert next(artifacts.glob("t-failed_profile_001_execute_*.pstats"))
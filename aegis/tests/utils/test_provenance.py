@@ -12,6 +12,8 @@ import pytest
 from aegis.agents.task_state import HistoryEntry, TaskState
 from aegis.schemas.plan_output import AgentScratchpad
 from aegis.schemas.runtime import RuntimeExecutionConfig
+from aegis.utils import provenance
+from aegis.utils.log_sinks import sub_goal_context
 from aegis.utils.provenance import generate_provenance_report, _get_final_status
 
 
@@ -123,3 +125,142 @@ def test_generate_provenance_report(tmp_path: Path, sample_history: list[History
     finally:
         # Restore the original working directory
         os.chdir(original_cwd)
+
+
+def _record(i: int) -> dict:
+    return {
+        "run_id": "run-a" if i % 2 == 0 else "run-b",
+        "step_index": i,
+        "utc_ts": "2024-01-01T00:00:00+00:00",
+        "tool": "t",
+        "args_hash": "a",
+        "target_host": None,
+        "interface": None,
+        "status": "success",
+        "observation_hash": "o",
+        "duration_ms": i,
+    }
+
+
+def _fill_ledger(path: Path, entries: int, **kwargs) -> None:
+    ledger = provenance._Ledger(str(path), **kwargs)
+    for i in range(entries):
+        ledger.append(_record(i))
+    ledger.close()
+
+
+def test_ledger_batches_writes(tmp_path: Path):
+    """Records are chained at once but written only when a batch fills."""
+    path = tmp_path / "ledger.jsonl"
+    ledger = provenance._Ledger(str(path), batch_size=3, flush_interval_ms=60_000)
+    first = ledger.append(_record(0))
+    second = ledger.append(_record(1))
+    assert second.prev_hash == first.curr_hash
+    assert not path.exists()
+    ledger.append(_record(2))
+    assert len(path.read_text().splitlines()) == 3
+    ledger.close()
+
+
+def test_segmented_ledger_verifies_in_parallel(tmp_path: Path):
+    path = tmp_path / "ledger.jsonl"
+    _fill_ledger(path, 200, segment_max_bytes=8000, checkpoint_every=16, batch_size=7)
+
+    segments = provenance.segment_paths(str(path))
+    assert len(segments) > 3
+    assert segments[-1][1] == path  # the active segment keeps the configured name
+
+    result = provenance.verify_ledger(str(path), workers=2, run_id="run-a")
+    assert result.ok, result.first_break
+    assert result.entries == 200
+    assert result.run_entries == 100
+    assert result.checkpoints >= len(segments)
+
+    # A reopened ledger continues the chain and the segment numbering.
+    _fill_ledger(path, 10, segment_max_bytes=8000, checkpoint_every=16)
+    assert provenance.verify_ledger(str(path), workers=1).entries == 210
+    assert provenance.verify_ledger(str(path), workers=1).ok
+
+
+def test_verify_reports_first_break(tmp_path: Path):
+    path = tmp_path / "ledger.jsonl"
+    _fill_ledger(path, 120, segment_max_bytes=8000, checkpoint_every=16)
+    seq, second = provenance.segment_paths(str(path))[1]
+
+    lines = second.read_text().splitlines(keepends=True)
+    rec = json.loads(lines[4])
+    rec["status"] = "failure"
+    lines[4] = json.dumps(rec) + "\n"
+    second.write_text("".join(lines))
+
+    result = provenance.verify_ledger(str(path), workers=2)
+    assert not result.ok
+    assert result.first_break.segment == second.name
+    assert result.first_break.line == 5
+    assert "hash mismatch" in result.first_break.reason
+    assert result.first_break.run_id in ("run-a", "run-b")
+
+
+def test_verify_detects_truncated_segment(tmp_path: Path):
+    path = tmp_path / "ledger.jsonl"
+    _fill_ledger(path, 120, segment_max_bytes=8000, checkpoint_every=16)
+    _, first = provenance.segment_paths(str(path))[0]
+    lines = first.read_text().splitlines(keepends=True)
+    first.write_text("".join(lines[:-3]))
+
+    result = provenance.verify_ledger(str(path), workers=1)
+    assert not result.ok
+    assert result.first_break.segment == first.name
+
+
+def _append_from_process(path: str, worker: int, entries: int) -> None:
+    ledger = provenance._Ledger(
+        path, batch_size=5, segment_max_bytes=8000, checkpoint_every=16
+    )
+    for i in range(entries):
+        ledger.append({**_record(i), "run_id": f"proc-{worker}"})
+    ledger.close()
+
+
+@pytest.mark.skipif(provenance.fcntl is None, reason="needs POSIX file locks")
+def test_processes_sharing_a_ledger_keep_one_chain(tmp_path: Path):
+    import multiprocessing
+
+    path = str(tmp_path / "ledger.jsonl")
+    ctx = multiprocessing.get_context("fork")
+    procs = [
+        ctx.Process(target=_append_from_process, args=(path, w, 120)) for w in range(3)
+    ]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+
+    # Interleaved batches and rolls from all writers form a single valid chain.
+    assert len(provenance.segment_paths(path)) > 3
+    result = provenance.verify_ledger(path, workers=1, run_id="proc-1")
+    assert result.ok, result.first_break
+    assert result.entries == 360
+    assert result.run_entries == 120
+
+
+def test_records_carry_their_sub_goal_index(tmp_path: Path, monkeypatch):
+    path = tmp_path / "ledger.jsonl"
+    monkeypatch.setattr(provenance, "_ledger", provenance._Ledger(str(path)))
+    step = dict(
+        run_id="run-a", tool="scan", tool_args={}, target_host=None,
+        interface=None, status="success", observation="ok", duration_ms=1,
+    )
+    provenance.record_step(step_index=0, **step)
+    token = sub_goal_context.set(1)
+    try:
+        provenance.record_step(step_index=0, **step)
+    finally:
+        sub_goal_context.reset(token)
+    provenance._ledger.close()
+
+    # Parallel sub-goals share step indexes; sub_goal_index tells them apart.
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["sub_goal_index"] for r in lines] == [None, 1]
+    assert provenance.verify_ledger(str(path), workers=1).ok
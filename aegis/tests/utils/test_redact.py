@@ -0,0 +1,160 @@
+# aegis/tests/utils/test_redact.py
+"""
+Equivalence tests for the compiled redaction engine against the original
+pattern-by-pattern implementation.
+"""
+import random
+import re
+import string
+from collections import namedtuple
+from typing import Any, Mapping
+
+import pytest
+
+from aegis.utils import redact
+from aegis.utils.redact import KEY_PATTERNS, VALUE_PATTERNS, redact_for_log
+
+
+# --- the original implementation, kept as the reference ---
+
+
+def _ref_key(key: str) -> bool:
+    k = key.lower()
+    return any(p in k for p in KEY_PATTERNS)
+
+
+def _ref_value(val: Any) -> bool:
+    if not isinstance(val, str):
+        return False
+    s = val.strip()
+    if not s:
+        return False
+    return any(rx.search(s) for rx in VALUE_PATTERNS)
+
+
+def _ref_redact(obj: Any) -> Any:
+    try:
+        if isinstance(obj, Mapping):
+            out = {}
+            for k, v in obj.items():
+                if _ref_key(str(k)) or _ref_value(v):
+                    out[k] = redact._redact_primitive(v)
+                else:
+                    out[k] = _ref_redact(v)
+            return out
+        elif isinstance(obj, (list, tuple)):
+            t = type(obj)
+            return t(_ref_redact(x) for x in obj)
+        elif isinstance(obj, str):
+            return redact._redact_primitive(obj) if _ref_value(obj) else obj
+        else:
+            return obj
+    except Exception:
+        return redact.REDACTED
+
+
+Point = namedtuple("Point", "x y")
+
+EDGE_VALUES = [
+    "",
+    " ",
+    "short",
+    "Bearer abc",
+    "bearer   abc.def~+/==",
+    "  Bearer abcdefgh  ",
+    "Bearer abc def",
+    "eyJhbGciOi.eyJzdWIi.c2lnbmF0dXJl",
+    " eyJa.b.c\n",
+    "eyJa.b",
+    "A" * 23,
+    "A" * 24,
+    "a_b-c" * 5 + "\n",
+    " " + "x" * 30 + " ",
+    "x" * 30 + "!",
+    "!" + "x" * 30,
+    "token is " + "x" * 40,
+    "y" * 300,
+    " " + "z" * 300,
+    "multi\nline " + "q" * 400,
+    1,
+    None,
+    3.5,
+    b"bytes-value-that-is-long-enough",
+    Point("a" * 30, 2),
+]
+
+EDGE_KEYS = ["name", "Password", "X-Auth-Header", "cmd", 7, "sessionId", "path", "JWT"]
+
+
+def _random_payload(rng: random.Random, depth: int = 0) -> Any:
+    roll = rng.random()
+    if depth < 3 and roll < 0.3:
+        return {
+            rng.choice(EDGE_KEYS + ["".join(rng.choices(string.ascii_letters, k=6))]): _random_payload(
+                rng, depth + 1
+            )
+            for _ in range(rng.randint(0, 5))
+        }
+    if depth < 3 and roll < 0.45:
+        seq = [_random_payload(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+        return tuple(seq) if rng.random() < 0.3 else seq
+    if roll < 0.7:
+        return rng.choice(EDGE_VALUES)
+    alphabet = string.ascii_letters + string.digits + "_-.=+/~ \t\n!"
+    return "".join(rng.choices(alphabet, k=rng.choice([3, 8, 20, 24, 30, 300])))
+
+
+@pytest.mark.parametrize("value", EDGE_VALUES)
+def test_values_match_reference(value):
+    assert redact_for_log(value) == _ref_redact(value)
+    assert redact_for_log({"v": value}) == _ref_redact({"v": value})
+
+
+@pytest.mark.parametrize("key", EDGE_KEYS)
+def test_keys_match_reference(key):
+    payload = {key: {"inner": "A" * 30, "n": 1}}
+    assert redact_for_log(payload) == _ref_redact(payload)
+
+
+def test_random_payloads_match_reference():
+    rng = random.Random(1234)
+    for _ in range(2000):
+        payload = _random_payload(rng)
+        assert redact_for_log(payload) == _ref_redact(payload)
+
+
+def test_long_values_are_cached_by_content(monkeypatch):
+    redact.reload_patterns()
+    scans = []
+    scan = redact._scan_value
+    monkeypatch.setattr(redact, "_scan_value", lambda v: scans.append(v) or scan(v))
+    text = "observation " * 100
+    for _ in range(3):
+        assert redact_for_log({"observation": text}) == {"observation": text}
+    assert len(scans) == 1
+    # The cache keeps a digest of the value, not the value itself.
+    (key,) = redact._verdicts
+    assert key[0] == len(text) and text not in key
+
+
+def test_verdict_cache_is_bounded(monkeypatch):
+    redact.reload_patterns()
+    monkeypatch.setattr(redact, "CACHE_MAX_ENTRIES", 2)
+    for word in ("alpha ", "bravo ", "charlie "):
+        redact_for_log(word * 100)
+    assert len(redact._verdicts) == 2
+
+
+def test_reload_patterns_picks_up_new_patterns(monkeypatch):
+    monkeypatch.setattr(redact, "KEY_PATTERNS", KEY_PATTERNS + ["pin"])
+    monkeypatch.setattr(
+        redact, "VALUE_PATTERNS", VALUE_PATTERNS + [re.compile(r"^sk-[a-z0-9]{6}$")]
+    )
+    redact.reload_patterns()
+    try:
+        assert redact_for_log({"card_pin": 1234}) == {"card_pin": redact.REDACTED}
+        assert redact_for_log("sk-abc123") == "********(9)"
+    finally:
+        monkeypatch.undo()
+        redact.reload_patterns()
+    assert redact_for_log({"card_pin": 1234}) == {"card_pin": 1234}
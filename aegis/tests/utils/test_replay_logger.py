@@ -0,0 +1,170 @@
+# aegis/tests/utils/test_replay_logger.py
+"""
+Unit tests for the replay journal: durability modes, handle caching and
+torn-tail detection.
+"""
+import json
+import time
+
+import pytest
+
+from aegis.utils import replay_logger
+from aegis.utils.log_sinks import sub_goal_context
+from aegis.utils.replay_logger import ReplayJournal, read_replay_events
+
+
+@pytest.fixture
+def journal(monkeypatch, tmp_path):
+    def _make(**kwargs):
+        j = ReplayJournal(**kwargs)
+        monkeypatch.setattr(replay_logger, "_journal", j)
+        return j
+
+    monkeypatch.setattr(replay_logger, "_reports_dir", lambda: tmp_path)
+    return _make
+
+
+def test_events_are_visible_immediately_and_checksummed(journal, tmp_path):
+    journal(durability="on_task_end")
+    replay_logger.log_replay_event("run-1", "STEP", {"i": 1})
+    replay_logger.log_replay_event("run-1", "STEP", {"i": 2, "text": "héllo"})
+
+    path = tmp_path / "run-1" / "replay.jsonl"
+    raw = [json.loads(line) for line in path.read_text().splitlines()]
+    assert all(replay_logger.CRC_FIELD in r for r in raw)
+
+    events, skipped = read_replay_events(path)
+    assert skipped == 0
+    assert [e["data"]["i"] for e in events] == [1, 2]
+    assert replay_logger.CRC_FIELD not in events[0]
+    replay_logger.close_replay_journal("run-1")
+
+
+def test_batched_mode_group_commits(journal, monkeypatch):
+    j = journal(durability="batched", group_commit_ms=200)
+    synced = []
+    monkeypatch.setattr(replay_logger.os, "fsync", lambda fd: synced.append(fd))
+
+    for i in range(20):
+        replay_logger.log_replay_event("run-a", "STEP", {"i": i})
+        replay_logger.log_replay_event("run-b", "STEP", {"i": i})
+    time.sleep(0.5)
+
+    # 40 events in one window: one fsync per journal, not one per event.
+    assert len(synced) == 2
+    assert j.fsyncs == 2
+    j.close_all()
+
+
+def test_always_mode_fsyncs_every_event(journal, monkeypatch):
+    j = journal(durability="always")
+    synced = []
+    monkeypatch.setattr(replay_logger.os, "fsync", lambda fd: synced.append(fd))
+    for i in range(3):
+        replay_logger.log_replay_event("run-x", "STEP", {"i": i})
+    assert len(synced) == 3
+    j.close_all()
+
+
+def test_handles_are_cached_and_evicted(journal, tmp_path):
+    j = journal(durability="on_task_end", max_open_files=2)
+    for run in ("r1", "r2", "r1", "r3"):
+        replay_logger.log_replay_event(run, "STEP")
+    assert [p.parent.name for p in j._files] == ["r1", "r3"]
+    replay_logger.close_replay_journal("r1")
+    assert [p.parent.name for p in j._files] == ["r3"]
+    j.close_all()
+    assert len((tmp_path / "r1" / "replay.jsonl").read_text().splitlines()) == 2
+
+
+def test_read_detects_torn_and_corrupt_lines(tmp_path):
+    path = tmp_path / "replay.jsonl"
+    good = replay_logger._encode({"event_type": "A", "data": {}})
+    corrupt = good.replace('"A"', '"B"')
+    legacy = json.dumps({"event_type": "LEGACY", "data": {}}) + "\n"
+    path.write_text(good + corrupt + legacy + good[:-10])
+
+    events, skipped = read_replay_events(path)
+
+    assert [e["event_type"] for e in events] == ["A", "LEGACY"]
+    assert skipped == 2
+
+
+def test_planner_prompts_are_stored_as_message_blocks(journal, monkeypatch, tmp_path):
+    j = journal(durability="on_task_end")
+    monkeypatch.setattr(replay_logger, "_prompt_blocks", replay_logger.PromptBlocks())
+    monkeypatch.setattr(replay_logger, "_prompt_dedup", True)
+    system = {"role": "system", "content": "tools " * 500}
+    history = [{"role": "assistant", "content": f"plan {i}"} for i in range(12)]
+    prompts = [
+        [system, {"role": "user", "content": "Task: x"}] + history[max(0, i - 8) : i]
+        for i in range(12)
+    ]
+    for messages in prompts:
+        replay_logger.log_replay_event("run-p", "PLANNER_INPUT", {"messages": messages})
+    replay_logger.log_replay_event("run-p", "PLANNER_OUTPUT", {"plan": {"tool_name": "t"}})
+    j.close_all()
+
+    path = tmp_path / "run-p" / "replay.jsonl"
+    raw = [json.loads(line) for line in path.read_text().splitlines()]
+    assert "messages" not in raw[1]["data"]
+    # Each step writes only the message it adds to the prompt.
+    assert len(raw[0]["data"]["blocks"]) == 2
+    assert [len(r["data"]["blocks"]) for r in raw[1:12]] == [1] * 11
+    assert path.stat().st_size < len(json.dumps(prompts))
+
+    events, skipped = read_replay_events(path)
+    assert skipped == 0
+    assert [e["data"]["messages"] for e in events[:12]] == prompts
+    assert events[12]["data"] == {"plan": {"tool_name": "t"}}
+
+
+def test_unserializable_planner_input_is_still_logged(journal, monkeypatch, tmp_path):
+    j = journal(durability="on_task_end")
+    monkeypatch.setattr(replay_logger, "_prompt_blocks", replay_logger.PromptBlocks())
+    monkeypatch.setattr(replay_logger, "_prompt_dedup", True)
+    messages = [{"role": "user", "content": "hi"}]
+    replay_logger.log_replay_event(
+        "run-s", "PLANNER_INPUT", {"messages": messages, "x": object()}
+    )
+    j.close_all()
+
+    events, skipped = read_replay_events(tmp_path / "run-s" / "replay.jsonl")
+    assert skipped == 0
+    assert len(events) == 1 and isinstance(events[0]["data"], str)
+
+
+def test_closed_journal_rewrites_blocks(journal, monkeypatch, tmp_path):
+    journal(durability="on_task_end")
+    monkeypatch.setattr(replay_logger, "_prompt_blocks", replay_logger.PromptBlocks())
+    monkeypatch.setattr(replay_logger, "_prompt_dedup", True)
+    messages = [{"role": "system", "content": "s"}]
+    replay_logger.log_replay_event("run-r", "PLANNER_INPUT", {"messages": messages})
+    replay_logger.close_replay_journal("run-r")
+    replay_logger.log_replay_event("run-r", "PLANNER_INPUT", {"messages": messages})
+    replay_logger.close_replay_journal("run-r")
+
+    path = tmp_path / "run-r" / "replay.jsonl"
+    lines = path.read_text().splitlines()
+    assert [len(json.loads(line)["data"]["blocks"]) for line in lines] == [1, 1]
+    # The reopened journal's record carries its own blocks, so it survives
+    # losing the first record.
+    path.write_text(lines[0][:-5] + "\n" + lines[1] + "\n")
+    events, skipped = read_replay_events(path)
+    assert skipped == 1
+    assert events[0]["data"]["messages"] == messages
+
+
+def test_events_of_a_sub_goal_loop_carry_its_index(journal, tmp_path):
+    journal(durability="on_task_end")
+    replay_logger.log_replay_event("run-1", "STEP", {"i": 1})
+    token = sub_goal_context.set(2)
+    try:
+        replay_logger.log_replay_event("run-1", "STEP", {"i": 2})
+    finally:
+        sub_goal_context.reset(token)
+    replay_logger.close_replay_journal("run-1")
+
+    events, _ = read_replay_events(tmp_path / "run-1" / "replay.jsonl")
+    assert "sub_goal_index" not in events[0]
+    assert events[1]["sub_goal_index"] == 2
@@ -0,0 +1,143 @@
+# aegis/tests/utils/test_replay_store.py
+"""
+Unit tests for the indexed, compressed replay container.
+"""
+import pytest
+
+from aegis.exceptions import ReplayError
+from aegis.utils import replay_logger, replay_store
+from aegis.utils.replay_logger import ReplayJournal, read_replay_events
+from aegis.utils.replay_store import (
+    CONTAINER_FILE,
+    INDEX_FILE,
+    JSONL_FILE,
+    ReplayReader,
+    compact_replay,
+    convert_jsonl,
+    convert_task,
+    open_replay,
+)
+
+
+@pytest.fixture
+def journal(monkeypatch, tmp_path):
+    j = ReplayJournal(durability="on_task_end")
+    monkeypatch.setattr(replay_logger, "_journal", j)
+    monkeypatch.setattr(replay_logger, "_prompt_blocks", replay_logger.PromptBlocks())
+    monkeypatch.setattr(replay_logger, "_prompt_dedup", True)
+    monkeypatch.setattr(replay_logger, "_reports_dir", lambda: tmp_path)
+    monkeypatch.setattr(replay_store, "_replay_settings", lambda: {})
+    yield j
+    j.close_all()
+
+
+def _run_task(task_id, steps):
+    system = {"role": "system", "content": "tool catalog " * 200}
+    history = []
+    replay_logger.log_replay_event(task_id, "WARMUP", {"ok": True})
+    for i in range(steps):
+        replay_logger.log_replay_event(
+            task_id, "PLANNER_INPUT", {"messages": [system] + history[-8:]}
+        )
+        replay_logger.log_replay_event(
+            task_id, "PLANNER_OUTPUT", {"plan": {"tool_name": f"tool_{i}"}}
+        )
+        replay_logger.log_replay_event(
+            task_id, "TOOL_OUTPUT", {"observation": f"output {i} " * 50, "status": "success"}
+        )
+        history.append({"role": "tool", "content": f"output {i}"})
+    replay_logger.close_replay_journal(task_id)
+
+
+def test_random_access_reads_only_the_needed_frames(journal, tmp_path):
+    _run_task("t1", steps=20)
+    task_dir = tmp_path / "t1"
+    expected, _ = read_replay_events(task_dir / JSONL_FILE)
+
+    convert_jsonl(task_dir / JSONL_FILE)
+
+    reader = ReplayReader(task_dir)
+    assert reader.steps() == list(range(20))
+    assert reader.entries()[0] == {
+        "step": 0, "event_type": "WARMUP", "ts_iso": expected[0]["ts_iso"]
+    }
+    assert reader.frames_read == 0
+
+    step_events = reader.events(step=12)
+    assert [e["event_type"] for e in step_events] == [
+        "PLANNER_INPUT", "PLANNER_OUTPUT", "TOOL_OUTPUT"
+    ]
+    assert step_events == expected[37:40]
+    # Step 12's prompt reuses message blocks first written in earlier steps.
+    assert 1 < reader.frames_read < 20
+
+    plans = reader.events(event_type="PLANNER_OUTPUT")
+    assert [p["data"]["plan"]["tool_name"] for p in plans] == [f"tool_{i}" for i in range(20)]
+    assert list(reader.iter_events()) == expected
+    assert (task_dir / CONTAINER_FILE).stat().st_size < (task_dir / JSONL_FILE).stat().st_size
+
+
+def test_compaction_merges_a_resumed_task(journal, tmp_path):
+    _run_task("t2", steps=3)
+    task_dir = tmp_path / "t2"
+    assert compact_replay(task_dir) == task_dir / INDEX_FILE
+    assert not (task_dir / JSONL_FILE).exists()
+
+    # Resuming appends a new journal; readers see it as a tail.
+    resumed = [{"role": "user", "content": "go on"}]
+    replay_logger.log_replay_event("t2", "PLANNER_INPUT", {"messages": resumed})
+    replay_logger.log_replay_event("t2", "TOOL_OUTPUT", {"observation": "resumed"})
+    replay_logger.close_replay_journal("t2")
+    reader = open_replay(task_dir)
+    assert reader.indexed
+    assert reader.steps() == [0, 1, 2, 3]
+    assert [e["data"].get("observation") for e in reader.events(step=3)] == [None, "resumed"]
+
+    compact_replay(task_dir)
+    merged = ReplayReader(task_dir)
+    assert not (task_dir / JSONL_FILE).exists()
+    assert len(merged.entries()) == 1 + 3 * 3 + 2
+    assert merged.events(step=3)[0]["data"]["messages"] == resumed
+
+
+def test_journal_growing_after_conversion_is_read_once(journal, tmp_path):
+    _run_task("t5", steps=2)
+    task_dir = tmp_path / "t5"
+    convert_task(task_dir)
+    assert (task_dir / JSONL_FILE).exists()
+
+    more = [{"role": "user", "content": "more"}]
+    replay_logger.log_replay_event("t5", "PLANNER_INPUT", {"messages": more})
+    replay_logger.close_replay_journal("t5")
+    expected, _ = read_replay_events(task_dir / JSONL_FILE)
+
+    reader = open_replay(task_dir)
+    assert reader.steps() == [0, 1, 2]
+    assert list(reader.iter_events()) == expected
+
+    convert_task(task_dir, keep_jsonl=False)
+    assert not (task_dir / JSONL_FILE).exists()
+    merged = ReplayReader(task_dir)
+    assert merged.index["jsonl_offset"] == 0
+    assert list(merged.iter_events()) == expected
+
+
+def test_open_replay_falls_back_to_jsonl(journal, tmp_path):
+    _run_task("t3", steps=2)
+    reader = open_replay(tmp_path / "t3")
+    assert not reader.indexed
+    assert [e["event_type"] for e in reader.events(step=1)] == [
+        "PLANNER_INPUT", "PLANNER_OUTPUT", "TOOL_OUTPUT"
+    ]
+    assert open_replay(tmp_path / "missing") is None
+
+
+def test_mismatched_container_is_rejected(journal, tmp_path):
+    _run_task("t4", steps=2)
+    task_dir = tmp_path / "t4"
+    convert_jsonl(task_dir / JSONL_FILE)
+    with open(task_dir / CONTAINER_FILE, "ab") as f:
+        f.write(b"junk")
+
+    with pytest.raises(ReplayError):
+        ReplayReader(task_dir)
@@ -0,0 +1,189 @@
+# tests/utils/test_sandbox.py
+import sys
+
+import pytest
+
+import aegis.utils.exec_common as exec_common
+from aegis.executors.local_exec import LocalExecutor
+from aegis.utils import sandbox as sandbox_mod
+from aegis.utils.sandbox import ResourceLimits, Sandbox, parse_size
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        (None, None),
+        (1024, 1024),
+        ("512", 512),
+        ("512M", 512 * 1024 * 1024),
+        ("2GiB", 2 * 1024**3),
+        ("1.5k", 1536),
+        ("lots", None),
+    ],
+)
+def test_parse_size(value, expected):
+    assert parse_size(value) == expected
+
+
+def _fake_cgroup_root(tmp_path):
+    root = tmp_path / "aegis.slice"
+    root.mkdir()
+    (root / "cgroup.controllers").write_text("cpuset cpu io memory pids\n")
+    (root / "cgroup.subtree_control").write_text("")
+    return root
+
+
+def test_cgroup_sandbox_writes_limits_and_reads_usage(tmp_path):
+    root = _fake_cgroup_root(tmp_path)
+    limits = ResourceLimits(
+        cpu_max=0.5, memory_max=64 << 20, pids_max=32, cgroup_root=str(root)
+    )
+    box = Sandbox(limits, task_id="t/1", timeout=10)
+    assert box.mechanism == "cgroup"
+
+    leaf = box._leaf
+    assert leaf.parent == root
+    assert leaf.name.startswith("aegis-t_1-")
+    assert (leaf / "cpu.max").read_text() == "50000 100000"
+    assert (leaf / "memory.max").read_text() == str(64 << 20)
+    assert (leaf / "pids.max").read_text() == "32"
+    assert "+memory" in (root / "cgroup.subtree_control").read_text()
+
+    # Simulate the kernel's accounting files after the child exits.
+    (leaf / "cpu.stat").write_text("usage_usec 3000\nuser_usec 2000\nsystem_usec 1000\n")
+    (leaf / "memory.peak").write_text("4096\n")
+    (leaf / "memory.events").write_text("low 0\nhigh 0\nmax 0\noom 0\noom_kill 0\n")
+
+    usage = box.finish().to_dict()
+    assert usage["mechanism"] == "cgroup"
+    assert usage["cpu_user_ms"] == 2.0
+    assert usage["cpu_system_ms"] == 1.0
+    assert usage["peak_memory_bytes"] == 4096
+    assert usage["oom_killed"] is False
+
+
+def test_task_scope_applies_limits_to_shared_parent(tmp_path):
+    root = _fake_cgroup_root(tmp_path)
+    limits = ResourceLimits(pids_max=8, scope="task", cgroup_root=str(root))
+    box = Sandbox(limits, task_id="abc")
+    task_dir = root / "aegis-task-abc"
+    assert box._leaf.parent == task_dir
+    assert (task_dir / "pids.max").read_text() == "8"
+    assert not (box._leaf / "pids.max").exists()
+    box.finish()
+
+
+def test_falls_back_to_rlimit_without_delegated_cgroup(tmp_path):
+    limits = ResourceLimits(
+        memory_max=1 << 30, cgroup_root=str(tmp_path / "does-not-exist")
+    )
+    box = Sandbox(limits, timeout=5)
+    assert box.mechanism == "rlimit"
+    wrapped = box.wrap(["true"])
+    assert wrapped[:2] == ["/bin/sh", "-c"] and wrapped[-1] == "true"
+    assert f"ulimit -v {1 << 20}" in wrapped[2]
+    box.finish()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="POSIX rlimits")
+def test_rlimit_shim_enforces_memory_limit():
+    limits = ResourceLimits(memory_max=256 << 20, cgroup_root=None)
+    res = exec_common.run_subprocess(
+        [sys.executable, "-c", "b = bytearray(600 << 20)"], timeout=30, limits=limits
+    )
+    assert res.returncode != 0
+    assert b"MemoryError" in res.stderr
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="POSIX shell")
+def test_cgroup_shim_joins_leaf_before_exec(tmp_path, monkeypatch):
+    root = _fake_cgroup_root(tmp_path)
+    seen = {}
+    finish = Sandbox.finish
+
+    def record_then_finish(self, rusage=None):
+        seen["procs"] = (self._leaf / "cgroup.procs").read_text().strip()
+        return finish(self, rusage)
+
+    monkeypatch.setattr(Sandbox, "finish", record_then_finish)
+    res = exec_common.run_subprocess(
+        "echo $((6 * 7))",
+        allow_shell=True,
+        timeout=30,
+        limits=ResourceLimits(pids_max=16, cgroup_root=str(root)),
+    )
+    assert res.stdout.strip() == b"42"
+    assert res.resource_usage["mechanism"] == "cgroup"
+    assert seen["procs"] == "0"
+
+
+def test_cleanup_waits_for_killed_cgroup_to_empty(tmp_path):
+    import threading
+
+    leaf = tmp_path / "leaf"
+    leaf.mkdir()
+    events = leaf / "cgroup.events"
+    events.write_text("populated 1\nfrozen 0\n")
+    timer = threading.Timer(0.1, events.write_text, args=("populated 0\nfrozen 0\n",))
+    timer.start()
+    sandbox_mod._wait_unpopulated(leaf, timeout=5)
+    assert "populated 0" in events.read_text()
+    timer.join()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="POSIX rlimits")
+def test_run_subprocess_reports_usage_with_rlimit(tmp_path):
+    limits = ResourceLimits(
+        cpu_max=1.0, memory_max=1 << 30, pids_max=4096, cgroup_root=None
+    )
+    res = exec_common.run_subprocess(
+        [sys.executable, "-c", "print(sum(range(100000)))"],
+        timeout=30,
+        limits=limits,
+    )
+    assert res.returncode == 0
+    assert res.stdout.strip() == b"4999950000"
+    assert res.resource_usage["mechanism"] == "rlimit"
+    assert res.resource_usage["cpu_user_ms"] >= 0
+    assert res.resource_usage["peak_memory_bytes"] > 0
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="POSIX rlimits")
+def test_rlimit_usage_is_per_command():
+    import subprocess
+
+    # A large earlier child must not show up as this command's peak memory.
+    subprocess.run([sys.executable, "-c", "b = bytearray(300 << 20)"], check=True)
+    res = exec_common.run_subprocess(
+        [sys.executable, "-c", "pass"],
+        timeout=30,
+        limits=ResourceLimits(memory_max=1 << 30, cgroup_root=None),
+    )
+    assert 0 < res.resource_usage["peak_memory_bytes"] < 200 << 20
+
+
+def test_run_subprocess_without_limits_has_no_usage(monkeypatch):
+    class FakeCP:
+        returncode = 0
+        stdout = b"ok"
+        stderr = b""
+
+    def fake_run(argv, **kwargs):
+        assert "preexec_fn" not in kwargs
+        return FakeCP()
+
+    monkeypatch.setattr(exec_common.subprocess, "run", fake_run, raising=True)
+    res = exec_common.run_subprocess(["echo", "ok"], timeout=1)
+    assert res.resource_usage is None
+
+
+def test_local_executor_attaches_resources_to_toolresult(monkeypatch):
+    from aegis.utils.dryrun import dry_run
+
+    # Other tests (test_dryrun.py) may leave dry-run mode switched on.
+    monkeypatch.setattr(dry_run, "enabled", False)
+    monkeypatch.setattr(sandbox_mod, "_cgroup_usable", lambda root: False)
+    exe = LocalExecutor(default_timeout=30, limits=ResourceLimits(memory_max=1 << 30))
+    result = exe.run_result(f"{sys.executable} -c \"print('hi')\"")
+    assert result.success
+    assert result.meta["resources"]["mechanism"] == "rlimit"
@@ -0,0 +1,48 @@
+# aegis/tests/utils/test_step_timing.py
+"""
+Unit tests for the per-step latency breakdown helpers.
+"""
+import time
+
+from aegis.utils.step_timing import (
+    PhaseTimer,
+    aggregate_timings,
+    format_timings_markdown,
+)
+
+
+def test_phase_timer_books_phases_and_queue_gap():
+    timer = PhaseTimer({"llm": 5.0}, last_node_end=time.time() - 0.02)
+    with timer.phase("policy"):
+        time.sleep(0.005)
+    timer.begin("tool")
+    time.sleep(0.005)
+    timer.begin("logging")  # ends "tool"
+    timings = timer.as_dict()
+
+    assert timings["llm"] == 5.0
+    assert timings["queue"] >= 15.0
+    assert timings["policy"] >= 4.0 and timings["tool"] >= 4.0
+    assert "logging" in timings
+    # as_dict closed the open phase, so a second call adds nothing.
+    assert timer.as_dict() == timings
+
+
+def test_aggregate_and_markdown():
+    history = [
+        {"timings": {"llm": 30.0, "tool": 10.0, "custom": 1.0}},
+        {"timings": {"llm": 10.0, "queue": 2.0}},
+        {"timings": {}},
+    ]
+    breakdown = aggregate_timings(history)
+
+    assert breakdown["steps"] == 3
+    assert breakdown["total_ms"] == 53.0
+    assert list(breakdown["phases"]) == ["queue", "llm", "tool", "custom"]
+    llm = breakdown["phases"]["llm"]
+    assert llm == {"total_ms": 40.0, "mean_ms": 13.333, "max_ms": 30.0, "share": 0.7547}
+
+    markdown = format_timings_markdown(breakdown)
+    assert markdown.startswith("## Latency Breakdown")
+    assert "| llm | 40.0 | 13.3 | 30.0 | 75.5% |" in markdown
+    assert format_timings_markdown(aggregate_timings([])) is None
@@ -0,0 +1,148 @@
+# aegis/tests/utils/test_task_store.py
+"""
+Unit tests for the SQLite-backed durable task store.
+"""
+import pytest
+
+from aegis.exceptions import DuplicateTaskError
+from aegis.utils import task_store as ts
+from aegis.utils.task_store import TaskStore
+
+
+@pytest.fixture
+def store(tmp_path) -> TaskStore:
+    return TaskStore(tmp_path / "tasks.sqlite3", max_attempts=2)
+
+
+def test_enqueue_and_claim_in_fifo_order(store):
+    store.enqueue("a", {"task": {"prompt": "first"}})
+    store.enqueue("b", {"task": {"prompt": "second"}})
+
+    claimed = store.claim_next("w0")
+    assert claimed["task_id"] == "a"
+    assert claimed["status"] == ts.RUNNING
+    assert claimed["attempts"] == 1
+    assert claimed["payload"] == {"task": {"prompt": "first"}}
+    assert store.claim_next("w1")["task_id"] == "b"
+    assert store.claim_next("w2") is None
+    assert store.count(ts.RUNNING) == 2
+
+
+def test_progress_finish_and_get(store):
+    store.enqueue("a", {})
+    store.claim_next("w0")
+    assert store.update_progress("a", {"steps_taken": 3}) is False
+    assert store.finish("a", ts.COMPLETED, result={"task_id": "a", "history": []})
+
+    row = store.get("a")
+    assert row["status"] == ts.COMPLETED
+    assert row["progress"] == {"steps_taken": 3}
+    assert row["result"]["task_id"] == "a"
+    assert row["finished_at"] >= row["started_at"]
+    assert store.get("missing") is None
+
+
+def test_cancel_queued_and_running(store):
+    store.enqueue("running", {})
+    store.enqueue("queued", {})
+    store.claim_next("w0")
+
+    # A running task is only flagged; the worker sees it on its next update.
+    assert store.request_cancel("running") == ts.RUNNING
+    assert store.update_progress("running", {}) is True
+    # A queued task is cancelled outright and never claimed.
+    assert store.request_cancel("queued") == ts.CANCELLED
+    assert store.claim_next("w1") is None
+    assert store.request_cancel("missing") is None
+
+
+def test_recover_requeues_until_max_attempts(tmp_path):
+    path = tmp_path / "tasks.sqlite3"
+    # lease_s=0: the claim's lease has expired by the time anyone looks at it.
+    store = TaskStore(path, max_attempts=2, lease_s=0)
+    store.enqueue("a", {})
+    store.claim_next("w0")
+
+    # Simulate a restart: a new store instance over the same file.
+    restarted = TaskStore(path, max_attempts=2, lease_s=0)
+    assert restarted.recover() == 1
+    assert restarted.get("a")["status"] == ts.QUEUED
+
+    restarted.claim_next("w0")
+    assert restarted.recover() == 0
+    row = restarted.get("a")
+    assert row["status"] == ts.FAILED
+    assert "interruptions" in row["error"]
+
+
+def test_finish_is_fenced_by_the_lease(tmp_path):
+    path = tmp_path / "tasks.sqlite3"
+    stale = TaskStore(path, lease_s=0)
+    stale.enqueue("a", {})
+    stale.claim_next("w0")
+
+    # The lease lapsed; another worker re-queued and claimed the task.
+    fresh = TaskStore(path, lease_s=60)
+    assert fresh.recover() == 1
+    fresh.claim_next("w1")
+
+    assert stale.finish("a", ts.FAILED, error="late") is False
+    assert fresh.get("a")["status"] == ts.RUNNING
+    assert fresh.finish("a", ts.COMPLETED, result={"ok": True}) is True
+    assert stale.finish("a", ts.FAILED) is False
+    assert fresh.get("a")["result"] == {"ok": True}
+
+
+def test_recover_leaves_live_leases_alone(tmp_path):
+    path = tmp_path / "tasks.sqlite3"
+    running_here = TaskStore(path, lease_s=60)
+    elsewhere = TaskStore(path, lease_s=60)
+    running_here.enqueue("a", {})
+    claimed = running_here.claim_next("w0")
+    assert claimed["owner"] == running_here.owner
+    assert claimed["lease_expires_at"] > claimed["started_at"]
+
+    # Another process sharing the file must not steal a task that is still leased.
+    assert elsewhere.recover() == 0
+    assert elsewhere.get("a")["status"] == ts.RUNNING
+    # Only the owner can renew the lease.
+    assert elsewhere.heartbeat(["a"]) == 0
+    assert running_here.heartbeat(["a"]) == 1
+
+    # A released (or lapsed) lease is reclaimed by whoever recovers next.
+    assert running_here.release() == 1
+    assert elsewhere.recover() == 1
+    row = elsewhere.get("a")
+    assert row["status"] == ts.QUEUED
+    assert row["owner"] is None
+
+
+def test_old_database_files_gain_lease_columns(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "tasks.sqlite3"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE tasks (task_id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+        "payload TEXT NOT NULL, created_at REAL NOT NULL, started_at REAL, "
+        "finished_at REAL, attempts INTEGER NOT NULL DEFAULT 0, "
+        "cancel_requested INTEGER NOT NULL DEFAULT 0, worker TEXT, progress TEXT, "
+        "result TEXT, error TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO tasks (task_id, status, payload, created_at, attempts) "
+        "VALUES ('old', 'RUNNING', '{}', 0, 1)"
+    )
+    conn.commit()
+    conn.close()
+
+    # Rows claimed before leases existed count as expired.
+    store = TaskStore(path)
+    assert store.recover() == 1
+    assert store.claim_next("w0")["owner"] == store.owner
+
+
+def test_duplicate_task_id_is_rejected(store):
+    store.enqueue("a", {})
+    with pytest.raises(DuplicateTaskError):
+        store.enqueue("a", {})
@@ -0,0 +1,88 @@
+# aegis/tests/utils/test_timeline.py
+"""
+Unit tests for the per-task run timeline.
+"""
+import inspect
+import json
+
+import pytest
+
+from aegis.utils import timeline, tracing
+from aegis.utils.replay_logger import close_replay_journal, log_replay_event
+
+
+@pytest.fixture
+def reports(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, "_RECORDER", tracing.SpanRecorder(exporters=[]))
+    monkeypatch.setattr(timeline, "_reports_dir", lambda: tmp_path)
+    return tmp_path
+
+
+def test_nodes_nest_spans_and_flush_to_file(reports):
+    def plan(state):
+        with tracing.span("planner.plan", run_id=state["task_id"], model="m"):
+            pass
+        with tracing.span("wrapper.docker.run", image="nginx"):
+            pass
+        return {}
+
+    wrapped = timeline.timeline_node("plan", plan)
+    assert inspect.signature(wrapped) == inspect.signature(plan)
+    wrapped({"task_id": "t-1"})
+
+    # Still buffered: served live, nothing on disk yet.
+    live = timeline.build_timeline("t-1", reports)
+    assert not (reports / "t-1" / timeline.TIMELINE_FILE).exists()
+    timeline.flush_timeline("t-1")
+    lines = (reports / "t-1" / timeline.TIMELINE_FILE).read_text().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == [
+        "planner.plan",
+        "wrapper.docker.run",
+        "node.plan",
+    ]
+
+    data = timeline.build_timeline("t-1", reports)
+    assert data == live
+    rows = [(s["name"], s["kind"], s["depth"]) for s in data["spans"]]
+    assert rows == [
+        ("node.plan", "node", 0),
+        ("planner.plan", "llm", 1),
+        ("wrapper.docker.run", "tool", 1),
+    ]
+    node = data["spans"][0]
+    assert node["start_ms"] == 0.0 and node["attrs"] == {"node": "plan"}
+    assert all(s["end_ms"] <= node["end_ms"] for s in data["spans"])
+    assert data["counts"] == {"node": 1, "llm": 1, "tool": 1}
+
+
+@pytest.mark.asyncio
+async def test_async_node_and_replay_markers(reports, monkeypatch):
+    monkeypatch.setattr("aegis.utils.replay_logger._reports_dir", lambda: reports)
+
+    async def execute(state):
+        with tracing.span("execute_tool", run_id=state["task_id"], tool="ls"):
+            log_replay_event(state["task_id"], "TOOL_OUTPUT", {"ok": True})
+        return {}
+
+    await timeline.timeline_node("execute", execute)({"task_id": "t-2"})
+    close_replay_journal("t-2")
+    timeline.flush_timeline("t-2")
+
+    data = timeline.build_timeline("t-2", reports)
+    assert [s["name"] for s in data["spans"]] == ["node.execute", "execute_tool"]
+    assert data["spans"][1]["attrs"]["tool"] == "ls"
+    assert [m["event_type"] for m in data["markers"]] == ["TOOL_OUTPUT"]
+    assert 0 <= data["markers"][0]["at_ms"] <= data["duration_ms"]
+
+
+def test_buffer_is_written_when_full_and_unknown_task_is_none(reports, monkeypatch):
+    monkeypatch.setitem(timeline._SETTINGS, "buffer_spans", 2)
+    for i in range(3):
+        with tracing.span(f"sub_goal.{i}", run_id="t-3"):
+            pass
+
+    on_disk = (reports / "t-3" / timeline.TIMELINE_FILE).read_text().splitlines()
+    assert len(on_disk) == 2
+    assert len(timeline.build_timeline("t-3", reports)["spans"]) == 3
+    timeline.flush_timeline("t-3")
+    assert timeline.build_timeline("missing", reports) is None
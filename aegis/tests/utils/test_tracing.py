@@ -0,0 +1,139 @@
+# aegis/tests/utils/test_tracing.py
+"""
+Unit tests for the span recorder: ring buffer, sampling, export and the
+bounded Langfuse trace cache.
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from aegis.utils import tracing
+
+
+@pytest.fixture
+def recorder(monkeypatch, tmp_path):
+    def _make(**kwargs):
+        kwargs.setdefault("exporters", ["file"])
+        kwargs.setdefault("file_path", str(tmp_path / "spans.jsonl"))
+        kwargs.setdefault("export_interval_ms", 60_000)
+        rec = tracing.SpanRecorder(**kwargs)
+        monkeypatch.setattr(tracing, "_RECORDER", rec)
+        return rec
+
+    return _make
+
+
+def _exported(path: Path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_ring_buffer_is_bounded_and_links_parents(recorder):
+    rec = recorder(ring_size=3, exporters=[])
+    with tracing.span("outer", run_id="run-1"):
+        with tracing.span("inner"):
+            pass
+    for i in range(3):
+        with tracing.span(f"extra.{i}", run_id="run-2"):
+            pass
+
+    assert [s.name for s in tracing.recent_spans()] == ["extra.0", "extra.1", "extra.2"]
+    assert rec.counters["recorded"] == 5
+
+    rec = recorder(exporters=[])
+    with tracing.span("outer", run_id="run-1"):
+        with tracing.span("inner"):
+            pass
+    inner, outer = tracing.recent_spans(run_id="run-1")
+    assert inner.parent_id == outer.span_id
+    assert inner.run_id == "run-1"  # inherited from the enclosing span
+    assert outer.parent_id is None
+
+
+def test_tail_sampling_keeps_errors_and_slow_spans(recorder, tmp_path, monkeypatch):
+    rec = recorder(sample_rate=0.0, slow_ms=50)
+    clock = iter([0, 10_000_000, 0, 80_000_000, 0, 1_000_000])
+    monkeypatch.setattr(tracing.time, "time_ns", lambda: next(clock))
+
+    with tracing.span("fast", run_id="r"):
+        pass
+    with tracing.span("slow", run_id="r"):
+        pass
+    with pytest.raises(ValueError):
+        with tracing.span("boom", run_id="r"):
+            raise ValueError("bad")
+    monkeypatch.undo()
+    rec.flush()
+
+    spans = _exported(tmp_path / "spans.jsonl")
+    assert [s["name"] for s in spans] == ["slow", "boom"]
+    assert spans[1]["status"] == "error" and "ValueError" in spans[1]["error"]
+    assert len(rec.ring) == 3  # the ring keeps unsampled spans too
+
+
+def test_head_sampling_is_per_trace(recorder):
+    rec = recorder(sample_rate=0.5)
+    decisions = {run: rec.head_sampled(run) for run in (f"run-{i}" for i in range(200))}
+    assert all(rec.head_sampled(run) == kept for run, kept in decisions.items())
+    assert 40 < sum(decisions.values()) < 160
+
+
+def test_export_redacts_and_batches(recorder, tmp_path):
+    rec = recorder(export_batch_size=2)
+    for i in range(3):
+        with tracing.span("wrapper.http.get", run_id="r", url="x", api_key="sk-123"):
+            pass
+    rec.flush()
+
+    spans = _exported(tmp_path / "spans.jsonl")
+    assert len(spans) == 3
+    assert spans[0]["attrs"]["api_key"] != "sk-123"
+    assert spans[0]["trace_id"] == spans[1]["trace_id"]
+
+    payload = tracing._otlp_payload(spans)
+    otlp_span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert len(otlp_span["traceId"]) == 32 and len(otlp_span["spanId"]) == 16
+    assert {"key": "aegis.run_id", "value": {"stringValue": "r"}} in otlp_span["attributes"]
+
+
+def test_trace_cache_is_bounded():
+    cache = tracing._LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert "b" not in cache and "a" in cache and len(cache) == 2
+
+
+def test_log_generation_skips_payload_work_without_a_sink(monkeypatch):
+    redacted = []
+    monkeypatch.setattr(tracing, "redact_for_log", lambda obj: redacted.append(obj) or obj)
+    monkeypatch.setattr(tracing, "_LF", False)
+    monkeypatch.setattr(tracing, "_LOG_GENERATION_PAYLOADS", False)
+    built = []
+
+    tracing.log_generation(
+        run_id="r", model="m", prompt="p" * 10_000, output=lambda: built.append(1) or "out"
+    )
+    assert redacted == [] and built == []
+
+    records = []
+    monkeypatch.setattr(tracing, "_LOG_GENERATION_PAYLOADS", True)
+    monkeypatch.setattr(tracing.logger, "info", lambda msg, extra: records.append(extra))
+    tracing.log_generation(run_id="r", model="m", prompt="hi", output=lambda: "out")
+    assert records[0]["prompt"] == "hi" and records[0]["output"] == "out"
+    assert redacted == ["hi", "out"]
+
+
+def test_export_is_skipped_when_no_exporter_would_emit(recorder, monkeypatch):
+    rec = recorder(exporters=["log", "otlp"], otlp_endpoint=None)
+    monkeypatch.setattr(rec, "otlp_endpoint", None)
+    monkeypatch.setattr(tracing.logger, "isEnabledFor", lambda level: False)
+    converted = []
+    monkeypatch.setattr(tracing.SpanRecord, "to_dict", lambda self: converted.append(self) or {})
+
+    with tracing.span("quiet", run_id="r", prompt="x" * 1000):
+        pass
+    rec.flush()
+    assert converted == []
+    assert rec.counters["exported"] == 0
@@ -86,3 +86,73 @@ def test_get_provenance_malformed(mock_reports_dir):
     response = client.get("/api/artifacts/task-003/provenance")
     assert response.status_code == 500
     assert "Error reading or parsing" in response.json()["detail"]
+
+
+def test_get_timings_artifact(tmp_path: Path, monkeypatch):
+    """Test that the timings endpoint returns per-step phases and their aggregate."""
+    task_dir = tmp_path / "task-t"
+    task_dir.mkdir()
+    events = [
+        {"step": 1, "tool_name": "a", "duration_ms": 10, "timings": {"llm": 30.0, "tool": 10.0}},
+        {"step": 2, "tool_name": "b", "duration_ms": 5, "timings": {"llm": 10.0}},
+    ]
+    (task_dir / "provenance.json").write_text(json.dumps({"events": events}))
+    monkeypatch.setattr("aegis.web.routes_artifacts.REPORTS_DIR", tmp_path)
+
+    response = client.get("/api/artifacts/task-t/timings")
+    assert response.status_code == 200
+    data = response.json()
+    assert [s["timings"] for s in data["steps"]] == [e["timings"] for e in events]
+    assert data["breakdown"]["phases"]["llm"]["total_ms"] == 40.0
+
+    assert client.get("/api/artifacts/missing/timings").status_code == 404
+
+
+def test_get_task_timeline(tmp_path: Path, monkeypatch):
+    """Test that the timeline endpoint nests spans and reports offsets."""
+    task_dir = tmp_path / "task-t"
+    task_dir.mkdir()
+    spans = [
+        {"name": "node.plan", "kind": "node", "span_id": "a", "parent_id": None,
+         "start_ns": 1_000_000, "end_ns": 9_000_000, "status": "success", "attrs": {}},
+        {"name": "planner.plan", "kind": "llm", "span_id": "b", "parent_id": "a",
+         "start_ns": 2_000_000, "end_ns": 8_000_000, "status": "success", "attrs": {}},
+    ]
+    (task_dir / "timeline.jsonl").write_text("".join(json.dumps(s) + "\n" for s in spans))
+    monkeypatch.setattr("aegis.web.routes_artifacts.REPORTS_DIR", tmp_path)
+
+    response = client.get("/api/reports/task-t/timeline")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["duration_ms"] == 8.0
+    assert [(s["name"], s["depth"], s["start_ms"]) for s in data["spans"]] == [
+        ("node.plan", 0, 0.0),
+        ("planner.plan", 1, 1.0),
+    ]
+
+    assert client.get("/api/reports/missing/timeline").status_code == 404
+
+
+def test_get_replay_steps(tmp_path: Path, monkeypatch):
+    """Test that the replay endpoints list steps and filter events by step."""
+    task_dir = tmp_path / "task-r"
+    task_dir.mkdir()
+    events = [
+        {"ts_iso": "t0", "event_type": "WARMUP", "data": {}},
+        {"ts_iso": "t1", "event_type": "PLANNER_INPUT", "data": {"messages": []}},
+        {"ts_iso": "t2", "event_type": "PLANNER_OUTPUT", "data": {"plan": {"tool_name": "a"}}},
+        {"ts_iso": "t3", "event_type": "PLANNER_INPUT", "data": {"messages": []}},
+        {"ts_iso": "t4", "event_type": "PLANNER_OUTPUT", "data": {"plan": {"tool_name": "b"}}},
+    ]
+    (task_dir / "replay.jsonl").write_text("".join(json.dumps(e) + "\n" for e in events))
+    monkeypatch.setattr("aegis.web.routes_artifacts.REPORTS_DIR", tmp_path)
+
+    index = client.get("/api/reports/task-r/replay/index").json()
+    assert index["indexed"] is False
+    assert [len(s["events"]) for s in index["steps"]] == [3, 2]
+
+    response = client.get("/api/reports/task-r/replay?step=1&event_type=PLANNER_OUTPUT")
+    assert response.status_code == 200
+    assert [e["data"]["plan"]["tool_name"] for e in response.json()["events"]] == ["b"]
+
+    assert client.get("/api/reports/missing/replay/index").status_code == 404
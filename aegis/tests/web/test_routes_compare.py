@@ -2,6 +2,7 @@
 """
 Unit tests for the report comparison API route.
 """
+import json
 from pathlib import Path
 
 import pytest
@@ -73,3 +74,25 @@ def test_compare_reports_file_not_found(mock_compare_reports):
 
     assert response.status_code == 404
     assert "Summary for task 'non-existent-task' not found" in response.json()["detail"]
+
+
+def test_compare_steps(tmp_path: Path, monkeypatch):
+    """Test that one replay step is diffed across two tasks."""
+    for task_id, tool in (("run-a", "list_files"), ("run-b", "read_file")):
+        task_dir = tmp_path / task_id
+        task_dir.mkdir()
+        events = [
+            {"ts_iso": "t", "event_type": "PLANNER_INPUT", "data": {"messages": []}},
+            {"ts_iso": "t", "event_type": "PLANNER_OUTPUT", "data": {"tool_name": tool}},
+        ]
+        (task_dir / "replay.jsonl").write_text("".join(json.dumps(e) + "\n" for e in events))
+    monkeypatch.setattr("aegis.web.routes_compare.REPORTS_DIR", tmp_path)
+
+    response = client.post("/api/compare_steps", json={"task_ids": ["run-a", "run-b"], "step": 0})
+    assert response.status_code == 200
+    diff = response.json()["diff"]
+    assert '-  "tool_name": "list_files"' in diff
+    assert '+  "tool_name": "read_file"' in diff
+
+    response = client.post("/api/compare_steps", json={"task_ids": ["run-a", "missing"], "step": 0})
+    assert response.status_code == 404
@@ -94,3 +94,44 @@ def test_launch_task_planner_error(mock_load_agent_config, mock_agent_graph):
     assert response.status_code == 500
     assert "Agent Execution Failed" in response.json()["detail"]
     assert "LLM returned malformed JSON" in response.json()["detail"]
+
+
+def test_launch_task_async_mode_enqueues(monkeypatch, mock_agent_graph):
+    """Test that async mode enqueues the task and returns immediately."""
+    pool = MagicMock()
+    pool.ensure_started = AsyncMock()
+    pool.submit = AsyncMock()
+    monkeypatch.setattr("aegis.agents.task_pool.get_task_pool", lambda: pool)
+
+    payload = {"task": {"prompt": "Run later", "task_id": "bg-1"}, "config": "default"}
+
+    response = client.post("/api/launch?async_mode=true", json=payload)
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "QUEUED"
+    assert response.json()["task_id"] == "bg-1"
+    pool.submit.assert_awaited_once()
+    mock_agent_graph.assert_not_awaited()
+
+
+def test_finished_task_checkpoints_are_deleted(
+    monkeypatch, mock_load_agent_config, mock_agent_graph
+):
+    """A task that ends without pausing cannot be resumed, so its checkpoints go."""
+    checkpointer = MagicMock()
+    checkpointer.adelete_thread = AsyncMock()
+    monkeypatch.setattr("aegis.web.routes_launch.get_checkpointer", lambda: checkpointer)
+    mock_agent_graph.return_value = {"final_summary": "done", "history": []}
+
+    payload = {"task": {"prompt": "Finish", "task_id": "ckpt-1"}, "config": "default"}
+    response = client.post("/api/launch", json=payload)
+
+    assert response.status_code == 200
+    checkpointer.adelete_thread.assert_awaited_once_with("ckpt-1")
+
+    # A failed run is not resumable either.
+    checkpointer.adelete_thread.reset_mock()
+    mock_agent_graph.side_effect = PlannerError("LLM returned malformed JSON")
+    payload["task"]["task_id"] = "ckpt-2"
+    assert client.post("/api/launch", json=payload).status_code == 500
+    checkpointer.adelete_thread.assert_awaited_once_with("ckpt-2")
@@ -0,0 +1,22 @@
+# aegis/tests/web/test_routes_metrics.py
+"""
+Unit tests for the Prometheus scrape endpoint.
+"""
+from fastapi.testclient import TestClient
+
+from aegis.serve_dashboard import app
+from aegis.utils import metrics
+
+client = TestClient(app)
+
+
+def test_metrics_endpoint_serves_exposition_format():
+    metrics.TOOL_SECONDS.observe(0.2, tool="t_route", outcome="success")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'aegis_tool_duration_seconds_count{tool="t_route",outcome="success"}' in response.text
+    assert "# TYPE aegis_active_tasks gauge" in response.text
+    assert "aegis_websocket_clients " in response.text
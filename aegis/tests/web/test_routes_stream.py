@@ -1,40 +1,57 @@
 # aegis/tests/web/test_routes_stream.py
 """
-Unit tests for the WebSocket log streaming API route.
+Unit tests for the WebSocket log streaming API route and its fan-out hub.
 """
+import asyncio
+import logging
+
 import pytest
 from fastapi.testclient import TestClient
 
 from aegis.serve_dashboard import app
-from aegis.web.routes_stream import connected_clients, broadcast_log
+from aegis.web.routes_stream import LogHub, broadcast_log, hub
 
 client = TestClient(app)
 
 
+class _SlowSocket:
+    """Stands in for a WebSocket whose sends can be held back."""
+
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.closed = False
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.closed = True
+
+
 def test_websocket_connection():
     """Verify that a client can connect and disconnect successfully."""
-    # Ensure the list is empty before the test
-    connected_clients.clear()
-    assert len(connected_clients) == 0
+    hub.clients.clear()
 
-    # After connecting, the client should be in the list
-    assert len(connected_clients) == 1
+    with client.websocket_connect("/api/ws/logs"):
+        # After connecting, the client should be registered with the hub
+        assert len(hub.clients) == 1
 
     # After the 'with' block exits, the client should be disconnected and removed
-    assert len(connected_clients) == 0
+    assert len(hub.clients) == 0
 
 
 @pytest.mark.asyncio
 async def test_websocket_broadcast():
     """Verify that a connected client receives broadcasted messages."""
-    connected_clients.clear()
+    hub.clients.clear()
 
     with client.websocket_connect("/api/ws/logs") as websocket:
-        # Broadcast a test message
         test_message = "Hello, WebSocket!"
         await broadcast_log(test_message)
 
-        # Check if the client received the message
         received_data = websocket.receive_text()
         assert received_data == test_message
 
@@ -42,18 +59,81 @@ async def test_websocket_broadcast():
 @pytest.mark.asyncio
 async def test_multiple_clients_receive_broadcast():
     """Verify that all connected clients receive the same broadcast message."""
-    connected_clients.clear()
+    hub.clients.clear()
 
     with client.websocket_connect("/api/ws/logs") as websocket1:
         with client.websocket_connect("/api/ws/logs") as websocket2:
-            assert len(connected_clients) == 2
+            assert len(hub.clients) == 2
 
             test_message = "Broadcast to all!"
             await broadcast_log(test_message)
 
-            # Check both clients
-            received1 = websocket1.receive_text()
-            received2 = websocket2.receive_text()
+            assert websocket1.receive_text() == test_message
+            assert websocket2.receive_text() == test_message
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_filter_by_task_and_level():
+    """Verify that each client only receives records it subscribed to."""
+    log_hub = LogHub()
+    all_logs, task_a, warnings = _SlowSocket(), _SlowSocket(), _SlowSocket()
+    log_hub.add(all_logs)
+    log_hub.add(task_a, task_ids={"a"})
+    log_hub.add(warnings, level=logging.WARNING)
+
+    log_hub.publish("a-info", "a", logging.INFO)
+    log_hub.publish("b-warn", "b", logging.WARNING)
+    await asyncio.sleep(0.05)
+
+    assert all_logs.sent == ["a-info", "b-warn"]
+    assert task_a.sent == ["a-info"]
+    assert warnings.sent == ["b-warn"]
+    await log_hub.close_all()
+
 
-            assert received1 == test_message
-            assert received2 == test_message
+@pytest.mark.asyncio
+async def test_slow_client_drops_oldest_without_blocking_others():
+    """Verify that a stalled client only loses its own oldest messages."""
+    log_hub = LogHub(queue_size=3, policy="drop_oldest")
+    slow, fast = _SlowSocket(), _SlowSocket()
+    slow.gate.clear()
+    slow_client = log_hub.add(slow)
+    log_hub.add(fast)
+    await asyncio.sleep(0)
+    # The slow sender is now stuck in its first send.
+    log_hub.publish("m0")
+    await asyncio.sleep(0.01)
+
+    for i in range(1, 8):
+        log_hub.publish(f"m{i}")
+        await asyncio.sleep(0.001)
+
+    assert fast.sent == [f"m{i}" for i in range(8)]
+    assert slow_client.dropped == 4
+    slow.gate.set()
+    await asyncio.sleep(0.05)
+    assert slow.sent == ["m0", "m5", "m6", "m7"]
+    await log_hub.close_all()
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_and_coalescing():
+    """Verify repeated records are coalesced and overflowing clients are dropped."""
+    log_hub = LogHub(queue_size=2, policy="disconnect")
+    socket = _SlowSocket()
+    socket.gate.clear()
+    log_hub.add(socket)
+    await asyncio.sleep(0)
+
+    key = ("t", logging.INFO, "aegis", "retrying")
+    for _ in range(5):
+        log_hub.publish("retrying", "t", logging.INFO, key)
+    await asyncio.sleep(0.01)
+    assert len(log_hub.clients) == 1
+    assert log_hub.clients[0].coalesced == 4
+
+    for i in range(3):
+        log_hub.publish(f"other {i}")
+    await asyncio.sleep(0.01)
+    assert log_hub.clients == []
+    assert socket.closed
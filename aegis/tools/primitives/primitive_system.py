@@ -7,6 +7,7 @@ system, including running shell commands, killing processes, and gathering
 basic hardware and system statistics.
 """
 
+import json
 import subprocess
 from typing import Optional, List, Dict, Any
 
@@ -181,6 +182,9 @@ def run_local_command(input_data: RunLocalCommandInput) -> str:
     Raises ToolExecutionError if the command returns a non-zero exit code or
     if other subprocess exceptions occur.
 
+    With `limits.sandbox` enabled, the command's peak memory and CPU time are
+    logged (and appended to the error on failure).
+
     :param input_data: An object containing the command string to execute and shell/timeout options.
     :type input_data: RunLocalCommandInput
     :return: The combined stdout and stderr from the executed command if successful.
@@ -189,9 +193,18 @@ def run_local_command(input_data: RunLocalCommandInput) -> str:
     """
     logger.info(f"Tool 'run_local_command' called for: {input_data.command}")
     executor = LocalExecutor()
-    return executor.run(
+    result = executor.run_result(
         command=input_data.command, shell=input_data.shell, timeout=input_data.timeout
     )
+    resources = (result.meta or {}).get("resources")
+    if not result.success:
+        message = result.stderr or "Local command failed."
+        if resources:
+            message = f"{message} [resources: {json.dumps(resources)}]"
+        raise ToolExecutionError(message)
+    if resources:
+        logger.info("Local command resource usage", extra={"resources": resources})
+    return result.stdout or ""
 
 
 @register_tool(
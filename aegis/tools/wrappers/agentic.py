@@ -3,16 +3,26 @@
 Wrapper tools for agent-to-agent communication, delegation, and meta-actions.
 """
 import json
+import uuid
+from typing import Any, Dict, List, Optional
 
-import httpx
 from pydantic import BaseModel, Field
 
-from aegis.exceptions import ToolExecutionError
-from aegis.registry import register_tool
+from aegis.agents import subagents
+from aegis.agents.task_state import TaskState
+from aegis.exceptions import AegisError, ToolExecutionError
+from aegis.registry import tool
+from aegis.schemas.runtime import RuntimeExecutionConfig
+from aegis.schemas.subagent import SubAgentHandle
 from aegis.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Longest wait on sub-agents, and the extra time the tool call gets on top of
+# it so the tool's own timeout handling runs before runtime.tool_timeout.
+MAX_SUBAGENT_WAIT_S = 3600
+_WAIT_SLACK_S = 30
+
 
 class DispatchSubtaskInput(BaseModel):
     """Input for dispatching a sub-task to another specialized agent.
@@ -23,6 +33,8 @@ class DispatchSubtaskInput(BaseModel):
     :vartype preset: str
     :ivar backend_profile: The backend profile for the sub-agent to use.
     :vartype backend_profile: str
+    :ivar timeout_s: Seconds to wait for the sub-agent before cancelling it.
+    :vartype timeout_s: float
     """
 
     prompt: str = Field(
@@ -35,49 +47,201 @@ class DispatchSubtaskInput(BaseModel):
     backend_profile: str = Field(
         ..., description="The backend profile for the sub-agent to use."
     )
+    timeout_s: float = Field(
+        900,
+        gt=0,
+        le=MAX_SUBAGENT_WAIT_S,
+        description="Seconds to wait for the sub-agent before cancelling it.",
+    )
+
+
+def _require_state(state: Optional[TaskState], tool: str) -> TaskState:
+    if state is None:
+        raise ToolExecutionError(f"'{tool}' must be called from within an agent task.")
+    return state
+
+
+def _handle_view(handle: SubAgentHandle) -> Dict[str, Any]:
+    return handle.model_dump(
+        include={"task_id", "status", "summary", "error", "started_at", "finished_at"}
+    )
 
 
-@register_tool(
-    name="dispatch_subtask_to_agent",
-    input_model=DispatchSubtaskInput,
-    description="Delegates a specific, self-contained sub-task to a specialized agent and returns its final summary. Use this for complex tasks that can be broken down.",
+@tool(
+    "dispatch_subtask_to_agent",
+    DispatchSubtaskInput,
+    timeout=MAX_SUBAGENT_WAIT_S + _WAIT_SLACK_S,
+    description="Delegates a specific, self-contained sub-task to a specialized agent and returns its final summary. Use this for complex tasks that can be broken down. Delegate a complex sub-task to a specialist agent.",
     category="agentic",
     tags=["agent", "delegation", "subtask", "wrapper"],
     safe_mode=True,  # The tool itself is safe; safety of the sub-task is governed by its own context.
-    purpose="Delegate a complex sub-task to a specialist agent.",
 )
-async def dispatch_subtask_to_agent(input_data: DispatchSubtaskInput) -> str:
+async def dispatch_subtask_to_agent(
+    input_data: DispatchSubtaskInput, state: Optional[TaskState] = None
+) -> str:
     """
-    Invokes another AEGIS agent via the API to perform a sub-task.
+    Runs a sub-task on a child agent in this process and waits for its summary.
+
+    The child is cancelled if it does not finish within `timeout_s`. To run
+    several children at once, use `launch_subagent` and `join_subagents`.
     """
     logger.info(
         f"Dispatching sub-task to agent with preset '{input_data.preset}': '{input_data.prompt[:50]}...'"
     )
-    launch_url = "http://localhost:8000/api/launch"
-    payload = {
-        "task": {"prompt": input_data.prompt},
-        "config": input_data.preset,
-        "execution": {"backend_profile": input_data.backend_profile},
-    }
+    parent = state or TaskState(
+        task_id=f"adhoc-{uuid.uuid4().hex[:8]}",
+        task_prompt=input_data.prompt,
+        runtime=RuntimeExecutionConfig(),
+    )
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(launch_url, json=payload, timeout=900)
-            response.raise_for_status()
-            result = response.json()
-            summary = result.get("summary", "Sub-agent did not provide a summary.")
-            logger.info(
-                f"Sub-task completed successfully. Returning summary to orchestrator."
-            )
-            return summary
-    except httpx.HTTPStatusError as e:
-        error_detail = e.response.json().get("detail", e.response.text)
-        logger.error(f"Sub-agent task failed with HTTP error: {error_detail}")
-        raise ToolExecutionError(f"Sub-agent task failed: {error_detail}")
-    except httpx.RequestError as e:
-        logger.error(f"Failed to connect to the AEGIS API for sub-task: {e}")
+        handle = await subagents.launch(
+            parent,
+            input_data.prompt,
+            preset=input_data.preset,
+            backend_profile=input_data.backend_profile,
+        )
+        (handle,) = await subagents.join(
+            parent, [handle.task_id], timeout=input_data.timeout_s, cancel_on_timeout=True
+        )
+    except AegisError as e:
+        raise ToolExecutionError(f"Could not dispatch sub-task: {e}") from e
+    finally:
+        if state is None:
+            await subagents.cancel_children(parent.task_id)
+    if handle.status == "CANCELLED":
         raise ToolExecutionError(
-            f"Could not dispatch sub-task due to a network error: {e}"
+            f"Sub-agent task timed out after {input_data.timeout_s:g}s and was cancelled."
         )
+    if handle.status == "FAILED":
+        logger.error(f"Sub-agent task failed: {handle.error}")
+        raise ToolExecutionError(f"Sub-agent task failed: {handle.error}")
+    logger.info("Sub-task completed successfully. Returning summary to orchestrator.")
+    return handle.summary or "Sub-agent did not provide a summary."
+
+
+class LaunchSubagentInput(BaseModel):
+    """Input for starting a sub-agent without waiting for it.
+
+    :ivar prompt: The natural language prompt for the sub-task.
+    :vartype prompt: str
+    :ivar preset: The agent preset to use for the sub-task.
+    :vartype preset: str
+    :ivar backend_profile: The backend profile for the sub-agent (default: the caller's).
+    :vartype backend_profile: Optional[str]
+    """
+
+    prompt: str = Field(
+        ..., description="The natural language prompt for the sub-task."
+    )
+    preset: str = Field(
+        "default", description="The agent preset to use for the sub-task."
+    )
+    backend_profile: Optional[str] = Field(
+        None, description="The backend profile for the sub-agent (default: the caller's)."
+    )
+
+
+@tool(
+    "launch_subagent",
+    LaunchSubagentInput,
+    description="Starts a sub-agent on a self-contained sub-task in the background and returns its task id immediately. Launch several, then collect them with join_subagents.",
+    category="agentic",
+    tags=["agent", "delegation", "subtask", "concurrent"],
+    safe_mode=True,
+)
+async def launch_subagent(
+    input_data: LaunchSubagentInput, state: Optional[TaskState] = None
+) -> str:
+    """Starts a child agent and returns its handle as JSON."""
+    parent = _require_state(state, "launch_subagent")
+    try:
+        handle = await subagents.launch(
+            parent,
+            input_data.prompt,
+            preset=input_data.preset,
+            backend_profile=input_data.backend_profile,
+        )
+    except AegisError as e:
+        raise ToolExecutionError(f"Could not launch sub-agent: {e}") from e
+    return json.dumps(_handle_view(handle))
+
+
+class JoinSubagentsInput(BaseModel):
+    """Input for waiting on sub-agents.
+
+    :ivar task_ids: Sub-agent task ids to wait for (default: all launched by this task).
+    :vartype task_ids: Optional[List[str]]
+    :ivar timeout_s: Seconds to wait before returning.
+    :vartype timeout_s: float
+    :ivar cancel_on_timeout: Cancel sub-agents still running when the timeout elapses.
+    :vartype cancel_on_timeout: bool
+    """
+
+    task_ids: Optional[List[str]] = Field(
+        None,
+        description="Sub-agent task ids to wait for (default: all launched by this task).",
+    )
+    timeout_s: float = Field(
+        300, gt=0, le=MAX_SUBAGENT_WAIT_S, description="Seconds to wait before returning."
+    )
+    cancel_on_timeout: bool = Field(
+        False, description="Cancel sub-agents still running when the timeout elapses."
+    )
+
+
+@tool(
+    "join_subagents",
+    JoinSubagentsInput,
+    timeout=MAX_SUBAGENT_WAIT_S + _WAIT_SLACK_S,
+    description="Waits (up to a timeout) for sub-agents started with launch_subagent and returns each one's status and summary.",
+    category="agentic",
+    tags=["agent", "delegation", "subtask", "concurrent"],
+    safe_mode=True,
+)
+async def join_subagents(
+    input_data: JoinSubagentsInput, state: Optional[TaskState] = None
+) -> str:
+    """Waits for child agents and returns their handles as a JSON list."""
+    parent = _require_state(state, "join_subagents")
+    handles = await subagents.join(
+        parent,
+        input_data.task_ids,
+        timeout=input_data.timeout_s,
+        cancel_on_timeout=input_data.cancel_on_timeout,
+    )
+    return json.dumps([_handle_view(h) for h in handles])
+
+
+class CancelSubagentsInput(BaseModel):
+    """Input for cancelling sub-agents.
+
+    :ivar task_ids: Sub-agent task ids to cancel (default: all launched by this task).
+    :vartype task_ids: Optional[List[str]]
+    """
+
+    task_ids: Optional[List[str]] = Field(
+        None,
+        description="Sub-agent task ids to cancel (default: all launched by this task).",
+    )
+
+
+@tool(
+    "cancel_subagents",
+    CancelSubagentsInput,
+    description="Cancels running sub-agents started with launch_subagent.",
+    category="agentic",
+    tags=["agent", "delegation", "subtask", "concurrent"],
+    safe_mode=True,
+)
+async def cancel_subagents(
+    input_data: CancelSubagentsInput, state: Optional[TaskState] = None
+) -> str:
+    """Cancels child agents and returns their handles as a JSON list."""
+    parent = _require_state(state, "cancel_subagents")
+    handles = await subagents.cancel(parent.task_id, input_data.task_ids)
+    for h in handles:
+        parent.subagents[h.task_id] = h
+    return json.dumps([_handle_view(h) for h in handles])
 
 
 class ReviseGoalInput(BaseModel):
@@ -97,14 +261,13 @@ class ReviseGoalInput(BaseModel):
     )
 
 
-@register_tool(
-    name="revise_goal",
-    input_model=ReviseGoalInput,
-    description="Revises the original task prompt if it is found to be flawed, impossible, or suboptimal. Use this to self-correct your high-level objective.",
+@tool(
+    "revise_goal",
+    ReviseGoalInput,
+    description="Revises the original task prompt if it is found to be flawed, impossible, or suboptimal. Use this to self-correct your high-level objective. Revise the current main goal to a new one.",
     category="agentic",
     tags=["agent", "planning", "meta"],
     safe_mode=True,
-    purpose="Revise the current main goal to a new one.",
 )
 def revise_goal(input_data: ReviseGoalInput) -> str:
     """
@@ -119,14 +282,13 @@ class AdvanceToNextSubGoalInput(BaseModel):
     pass
 
 
-@register_tool(
-    name="advance_to_next_sub_goal",
-    input_model=AdvanceToNextSubGoalInput,
-    description="Marks the current sub-goal as complete and advances the focus to the next sub-goal in the high-level plan. Call this ONLY when the current sub-goal is fully achieved.",
+@tool(
+    "advance_to_next_sub_goal",
+    AdvanceToNextSubGoalInput,
+    description="Marks the current sub-goal as complete and advances the focus to the next sub-goal in the high-level plan. Call this ONLY when the current sub-goal is fully achieved. Advance to the next sub-goal in the plan.",
     category="agentic",
     tags=["agent", "planning", "meta", "sub-goal"],
     safe_mode=True,
-    purpose="Advance to the next sub-goal in the plan.",
 )
 def advance_to_next_sub_goal(input_data: AdvanceToNextSubGoalInput) -> str:
     """
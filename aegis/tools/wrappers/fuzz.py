@@ -27,6 +27,7 @@ from aegis.registry import ToolEntry, register_tool, get_tool
 from aegis.schemas.emoji import EMOJI_SET
 from aegis.utils.logger import setup_logger
 from aegis.utils.exec_common import run_subprocess
+from aegis.utils.sandbox import load_limits
 
 logger = setup_logger(__name__)
 
@@ -162,6 +163,12 @@ def generate_payload(mode: str, max_len: int) -> str:
 # === Tools ===
 
 
+def _resources(exec_res: Any) -> Dict[str, Any]:
+    """The run's sandbox usage as a result field, if the sandbox is enabled."""
+    usage = getattr(exec_res, "resource_usage", None)
+    return {"resources": usage} if usage else {}
+
+
 @register_tool(
     name="fuzz_external_command",
     input_model=FuzzExternalCommandInput,
@@ -189,6 +196,8 @@ def fuzz_external_command(input_data: FuzzExternalCommandInput) -> Dict[str, Any
 
     logger.info(f"Starting external command fuzzing for: {input_data.command}")
     results: List[Dict[str, Any]] = []
+    # Fuzz targets are what the sandbox is for: cap each run (limits.sandbox).
+    limits = load_limits()
     for i in range(input_data.iterations):
         payload = generate_payload(input_data.mode, input_data.max_length)
         cmd = input_data.command.replace("{}", payload)
@@ -196,7 +205,11 @@ def fuzz_external_command(input_data: FuzzExternalCommandInput) -> Dict[str, Any
             # Execute with central helper
             if input_data.allow_shell:
                 exec_res = run_subprocess(
-                    cmd, timeout=5, allow_shell=True, text_mode=True
+                    cmd,
+                    timeout=5,
+                    allow_shell=True,
+                    text_mode=True,
+                    limits=limits,
                 )
             else:
                 # Safe path: '{}' must be a standalone argv token
@@ -207,7 +220,11 @@ def fuzz_external_command(input_data: FuzzExternalCommandInput) -> Dict[str, Any
                     )
                 tokens = [payload if t == "{}" else t for t in tokens]
                 exec_res = run_subprocess(
-                    tokens, timeout=5, allow_shell=False, text_mode=True
+                    tokens,
+                    timeout=5,
+                    allow_shell=False,
+                    text_mode=True,
+                    limits=limits,
                 )
             results.append(
                 {
@@ -216,6 +233,7 @@ def fuzz_external_command(input_data: FuzzExternalCommandInput) -> Dict[str, Any
                     "returncode": exec_res.returncode,
                     "stdout": exec_res.stdout_text(),
                     "stderr": exec_res.stderr_text(),
+                    **_resources(exec_res),
                 }
             )
         except subprocess.TimeoutExpired:
@@ -275,6 +293,7 @@ def fuzz_file_input(input_data: FuzzFileInputInput) -> Dict[str, Any]:
 
     logger.info(f"Starting file input fuzzing for: {input_data.command_template}")
     results: List[Dict[str, Any]] = []
+    limits = load_limits()
 
     for i in range(input_data.iterations):
         content = generate_payload(input_data.file_mode, input_data.max_length)
@@ -298,7 +317,11 @@ def fuzz_file_input(input_data: FuzzFileInputInput) -> Dict[str, Any]:
             # Execute with central helper
             if input_data.allow_shell:
                 exec_res = run_subprocess(
-                    cmd, timeout=10, allow_shell=True, text_mode=True
+                    cmd,
+                    timeout=10,
+                    allow_shell=True,
+                    text_mode=True,
+                    limits=limits,
                 )
             else:
                 tokens = shlex.split(input_data.command_template)
@@ -308,7 +331,11 @@ def fuzz_file_input(input_data: FuzzFileInputInput) -> Dict[str, Any]:
                     )
                 tokens = [tmp_file_name if t == "{}" else t for t in tokens]
                 exec_res = run_subprocess(
-                    tokens, timeout=10, allow_shell=False, text_mode=True
+                    tokens,
+                    timeout=10,
+                    allow_shell=False,
+                    text_mode=True,
+                    limits=limits,
                 )
             results.append(
                 {
@@ -319,6 +346,7 @@ def fuzz_file_input(input_data: FuzzFileInputInput) -> Dict[str, Any]:
                     "returncode": exec_res.returncode,
                     "stdout": exec_res.stdout_text(),
                     "stderr": exec_res.stderr_text(),
+                    **_resources(exec_res),
                 }
             )
         except subprocess.TimeoutExpired:
@@ -7,18 +7,35 @@ running commands in the background or conditionally executing scripts based
 on the state of the remote system.
 """
 
+import json
+import os
 import shlex
+import uuid
+from typing import Any, Dict, Optional
 
 from pydantic import BaseModel, Field
 
+from aegis.agents.task_state import TaskState
+from aegis.exceptions import ToolExecutionError
 from aegis.executors.ssh_exec import SSHExecutor
-from aegis.registry import register_tool
+from aegis.registry import tool
+from aegis.schemas.background_job import BackgroundJobHandle
 from aegis.schemas.common_inputs import MachineTargetInput
 from aegis.utils.logger import setup_logger
 from aegis.utils.machine_loader import get_machine
 
 logger = setup_logger(__name__)
 
+# Remote directory under which each background job gets its own bookkeeping dir.
+REMOTE_JOBS_ROOT = os.getenv("AEGIS_REMOTE_JOBS_ROOT", "/tmp/aegis-jobs")
+
+# Marker line separating the status header from log data in remote output.
+_HEADER_MARK = "__AEGIS_JOB__"
+
+# Longest server-side wait, and the extra time the SSH call gets on top of it.
+MAX_WAIT_S = 3600
+_WAIT_SLACK_S = 30
+
 
 class RunScriptIfAbsentInput(MachineTargetInput):
     """Input model for conditionally running a remote script.
@@ -50,6 +67,55 @@ class RunRemoteBackgroundCommandInput(MachineTargetInput):
     command: str = Field(description="Shell command to run in the background.")
 
 
+class BackgroundJobInput(MachineTargetInput):
+    """Input model for tools that operate on an existing background job.
+
+    :ivar job_id: The job id returned by `run_remote_background_command`.
+    :vartype job_id: str
+    """
+
+    job_id: str = Field(
+        description="The job id returned by run_remote_background_command."
+    )
+
+
+class WaitForBackgroundJobInput(BackgroundJobInput):
+    """Input model for waiting on a background job.
+
+    :ivar timeout_s: Maximum number of seconds to wait on the remote side.
+    :vartype timeout_s: int
+    """
+
+    timeout_s: int = Field(
+        60, ge=1, le=MAX_WAIT_S, description="Maximum number of seconds to wait."
+    )
+
+
+class TailBackgroundJobLogInput(BackgroundJobInput):
+    """Input model for incrementally reading a background job's log.
+
+    :ivar offset: Byte offset to start reading from (use the previous next_offset).
+    :vartype offset: int
+    :ivar max_bytes: Maximum number of bytes to return.
+    :vartype max_bytes: int
+    """
+
+    offset: int = Field(0, ge=0, description="Byte offset to start reading from.")
+    max_bytes: int = Field(
+        16384, ge=1, le=1048576, description="Maximum number of bytes to return."
+    )
+
+
+class KillBackgroundJobInput(BackgroundJobInput):
+    """Input model for terminating a background job.
+
+    :ivar signal: The signal name to send (e.g. TERM, KILL, INT).
+    :vartype signal: str
+    """
+
+    signal: str = Field("TERM", description="Signal name to send (TERM, KILL, INT).")
+
+
 class RunRemotePythonSnippetInput(MachineTargetInput):
     """Input model for running a Python snippet on a remote host.
 
@@ -60,41 +126,302 @@ class RunRemotePythonSnippetInput(MachineTargetInput):
     code: str = Field(description="Python code to run remotely using 'python3 -c'.")
 
 
-@register_tool(
-    name="run_remote_background_command",
-    input_model=RunRemoteBackgroundCommandInput,
+def _job_handle(
+    machine_name: str, job_id: str, command: str = ""
+) -> BackgroundJobHandle:
+    """Builds the handle for a job id using the standard remote layout."""
+    job_dir = f"{REMOTE_JOBS_ROOT}/{job_id}"
+    return BackgroundJobHandle(
+        job_id=job_id,
+        machine_name=machine_name,
+        command=command,
+        job_dir=job_dir,
+        pid_file=f"{job_dir}/pid",
+        exit_code_file=f"{job_dir}/exit_code",
+        log_file=f"{job_dir}/output.log",
+    )
+
+
+def _resolve_handle(
+    input_data: BackgroundJobInput, state: Optional[TaskState]
+) -> BackgroundJobHandle:
+    """Prefers the handle persisted in the task state, else derives it from the id."""
+    if state is not None and input_data.job_id in state.background_jobs:
+        return state.background_jobs[input_data.job_id]
+    if not all(c.isalnum() or c in "-_" for c in input_data.job_id):
+        raise ToolExecutionError(f"Invalid background job id: {input_data.job_id!r}")
+    return _job_handle(input_data.machine_name, input_data.job_id)
+
+
+def _status_script(handle: BackgroundJobHandle) -> str:
+    """Shell snippet printing `<marker> <state> <exit_code|-> <pid|-> <log_size>`."""
+    pid_f = shlex.quote(handle.pid_file)
+    exit_f = shlex.quote(handle.exit_code_file)
+    log_f = shlex.quote(handle.log_file)
+    return (
+        f"pid=$(cat {pid_f} 2>/dev/null || echo -); "
+        f"size=$(wc -c 2>/dev/null < {log_f} || echo 0); "
+        f"if [ -s {exit_f} ]; then st=exited; rc=$(cat {exit_f}); "
+        f'elif [ "$pid" != - ] && kill -0 "$pid" 2>/dev/null; then st=running; rc=-; '
+        f'elif [ "$pid" = - ]; then st=unknown; rc=-; '
+        f"else st=lost; rc=-; fi; "
+        f'echo "{_HEADER_MARK} $st $rc $pid $size"'
+    )
+
+
+def _parse_status(handle: BackgroundJobHandle, output: str) -> Dict[str, Any]:
+    """Parses the status header emitted by `_status_script`."""
+    for line in reversed(output.splitlines()):
+        if line.startswith(_HEADER_MARK):
+            parts = line.split()
+            if len(parts) == 5:
+                _, state_, rc, pid, size = parts
+                return {
+                    "job_id": handle.job_id,
+                    "machine_name": handle.machine_name,
+                    "state": state_,
+                    "exit_code": int(rc) if rc.lstrip("-").isdigit() else None,
+                    "pid": int(pid) if pid.isdigit() else None,
+                    "log_size": int(size) if size.isdigit() else 0,
+                    "log_file": handle.log_file,
+                }
+    raise ToolExecutionError(
+        f"Unexpected status output for job {handle.job_id}: {output[-200:]!r}"
+    )
+
+
+@tool(
+    "run_remote_background_command",
+    RunRemoteBackgroundCommandInput,
     tags=["system", "remote", "ssh", "background", "wrapper"],
-    description="Run a background command remotely using nohup.",
+    description="Run a background command remotely and return a job handle (id, pid, exit-code and log files).",
     safe_mode=True,
-    purpose="Launch persistent background processes on remote machines.",
     category="system",
 )
-def run_remote_background_command(input_data: RunRemoteBackgroundCommandInput) -> str:
-    """Runs a command in the background on a remote host using nohup.
+def run_remote_background_command(
+    input_data: RunRemoteBackgroundCommandInput, state: Optional[TaskState] = None
+) -> str:
+    """Runs a command in the background on a remote host and returns a job handle.
+
+    The command is detached with `setsid nohup` (when `setsid` is available)
+    and its combined output goes to a per-job log file. When it exits, its
+    status is written atomically to the exit-code file. Use the
+    `get_background_job_status`, `wait_for_background_job`,
+    `tail_background_job_log` and `kill_background_job` tools with the
+    returned job id.
 
     :param input_data: An object containing machine name and the command.
     :type input_data: RunRemoteBackgroundCommandInput
-    :return: The output from the SSH command (usually empty for nohup success).
+    :param state: The current task state; the handle is persisted into it.
+    :type state: Optional[TaskState]
+    :return: A confirmation message followed by the job handle as JSON.
     :rtype: str
     """
     machine = get_machine(input_data.machine_name)
     executor = SSHExecutor(machine)
-    # The `&` ensures it runs in the background. nohup prevents it from being killed on session exit.
-    wrapped_command = f"nohup {input_data.command} > /dev/null 2>&1 &"
-    # executor.run() returns output on success or raises ToolExecutionError
-    # For nohup like this, stdout/stderr are redirected, so output is usually empty.
-    # We'll return a confirmation message.
+
+    handle = _job_handle(
+        input_data.machine_name, uuid.uuid4().hex[:12], input_data.command
+    )
+    exit_f = shlex.quote(handle.exit_code_file)
+    # The command runs in a subshell so an explicit `exit` still reaches the
+    # bookkeeping line, which records the status via temp file + mv so readers
+    # never see a partially written exit code.
+    job_script = (
+        f"(\n{input_data.command}\n)\n"
+        f"rc=$?; echo $rc > {exit_f}.tmp && mv {exit_f}.tmp {exit_f}"
+    )
+    wrapped_command = (
+        f"mkdir -p {shlex.quote(handle.job_dir)} && "
+        f"S=$(command -v setsid || true); "
+        f"$S nohup sh -c {shlex.quote(job_script)} "
+        f"> {shlex.quote(handle.log_file)} 2>&1 < /dev/null & "
+        f"echo $! > {shlex.quote(handle.pid_file)}"
+    )
+    # executor.run() raises ToolExecutionError on failure; output is redirected.
     executor.run(wrapped_command)
-    return f"Successfully launched background command on {input_data.machine_name}: {input_data.command}"
+
+    if state is not None:
+        state.background_jobs[handle.job_id] = handle
+    return (
+        f"Successfully launched background command on {input_data.machine_name}: "
+        f"{input_data.command}\n{handle.model_dump_json()}"
+    )
+
+
+@tool(
+    "get_background_job_status",
+    BackgroundJobInput,
+    tags=["system", "remote", "ssh", "background", "wrapper"],
+    description="Report whether a remote background job is running, exited (with exit code), or lost.",
+    safe_mode=True,
+    category="system",
+)
+def get_background_job_status(
+    input_data: BackgroundJobInput, state: Optional[TaskState] = None
+) -> str:
+    """Returns the current status of a remote background job.
+
+    :param input_data: An object containing the machine name and job id.
+    :type input_data: BackgroundJobInput
+    :param state: The current task state, used to look up the persisted handle.
+    :type state: Optional[TaskState]
+    :return: A JSON object with state, exit_code, pid, and log_size.
+    :rtype: str
+    """
+    handle = _resolve_handle(input_data, state)
+    executor = SSHExecutor(get_machine(handle.machine_name))
+    output = executor.run(_status_script(handle))
+    return json.dumps(_parse_status(handle, output))
+
+
+@tool(
+    "wait_for_background_job",
+    WaitForBackgroundJobInput,
+    # Outlast the SSH call for the longest wait, so the remote status is
+    # returned instead of the generic runtime.tool_timeout.
+    timeout=MAX_WAIT_S + 2 * _WAIT_SLACK_S,
+    tags=["system", "remote", "ssh", "background", "wrapper"],
+    description="Block (server-side) until a remote background job exits or the timeout elapses, then report its status.",
+    safe_mode=True,
+    category="system",
+)
+def wait_for_background_job(
+    input_data: WaitForBackgroundJobInput, state: Optional[TaskState] = None
+) -> str:
+    """Waits on the remote host for a background job to finish.
+
+    The wait loop runs entirely on the remote machine inside one SSH session,
+    so waiting costs a single tool call rather than repeated plan/execute
+    polling cycles.
+
+    :param input_data: An object containing the machine name, job id and timeout.
+    :type input_data: WaitForBackgroundJobInput
+    :param state: The current task state, used to look up the persisted handle.
+    :type state: Optional[TaskState]
+    :return: A JSON object with the final (or current, on timeout) status.
+    :rtype: str
+    """
+    handle = _resolve_handle(input_data, state)
+    executor = SSHExecutor(get_machine(handle.machine_name))
+    pid_f = shlex.quote(handle.pid_file)
+    exit_f = shlex.quote(handle.exit_code_file)
+    wait_script = (
+        f"end=$(( $(date +%s) + {int(input_data.timeout_s)} )); "
+        f"while [ ! -s {exit_f} ] && kill -0 $(cat {pid_f} 2>/dev/null || echo 0) 2>/dev/null "
+        f"&& [ $(date +%s) -lt $end ]; do sleep 1; done; "
+        + _status_script(handle)
+    )
+    output = executor.run(wait_script, timeout=int(input_data.timeout_s) + _WAIT_SLACK_S)
+    status = _parse_status(handle, output)
+    status["timed_out"] = status["state"] == "running"
+    return json.dumps(status)
+
+
+@tool(
+    "tail_background_job_log",
+    TailBackgroundJobLogInput,
+    tags=["system", "remote", "ssh", "background", "logs", "wrapper"],
+    description="Read a remote background job's log incrementally from a byte offset; returns data and next_offset.",
+    safe_mode=True,
+    category="system",
+)
+def tail_background_job_log(
+    input_data: TailBackgroundJobLogInput, state: Optional[TaskState] = None
+) -> str:
+    """Returns new log output for a background job starting at `offset`.
+
+    The log size is sampled first and exactly `min(max_bytes, size - offset)`
+    bytes are returned, so `next_offset` is exact even while the job keeps
+    writing.
+
+    :param input_data: An object containing the machine name, job id, offset and size cap.
+    :type input_data: TailBackgroundJobLogInput
+    :param state: The current task state, used to look up the persisted handle.
+    :type state: Optional[TaskState]
+    :return: A JSON object with offset, next_offset, log_size, state and data.
+    :rtype: str
+    """
+    handle = _resolve_handle(input_data, state)
+    executor = SSHExecutor(get_machine(handle.machine_name))
+    log_f = shlex.quote(handle.log_file)
+    offset = int(input_data.offset)
+    tail_script = (
+        _status_script(handle)
+        + f"; n=$(( $size - {offset} )); [ $n -lt 0 ] && n=0; "
+        f"[ $n -gt {int(input_data.max_bytes)} ] && n={int(input_data.max_bytes)}; "
+        f'echo "{_HEADER_MARK}_N $n"; '
+        f'[ $n -gt 0 ] && tail -c +{offset + 1} {log_f} | head -c $n; true'
+    )
+    output = executor.run(tail_script)
+
+    head, sep, rest = output.partition(f"{_HEADER_MARK}_N ")
+    if not sep:
+        raise ToolExecutionError(
+            f"Unexpected tail output for job {handle.job_id}: {output[-200:]!r}"
+        )
+    status = _parse_status(handle, head)
+    count_str, _, data = rest.partition("\n")
+    count = int(count_str) if count_str.strip().isdigit() else 0
+    return json.dumps(
+        {
+            "job_id": handle.job_id,
+            "state": status["state"],
+            "exit_code": status["exit_code"],
+            "offset": offset,
+            "next_offset": offset + count,
+            "log_size": status["log_size"],
+            "data": data,
+        }
+    )
+
+
+@tool(
+    "kill_background_job",
+    KillBackgroundJobInput,
+    tags=["system", "remote", "ssh", "background", "wrapper"],
+    description="Send a signal to a remote background job (its whole process group when possible).",
+    safe_mode=False,
+    category="system",
+)
+def kill_background_job(
+    input_data: KillBackgroundJobInput, state: Optional[TaskState] = None
+) -> str:
+    """Sends a signal to a remote background job and reports its status.
+
+    :param input_data: An object containing the machine name, job id and signal.
+    :type input_data: KillBackgroundJobInput
+    :param state: The current task state, used to look up the persisted handle.
+    :type state: Optional[TaskState]
+    :return: A JSON object with the job status after signalling.
+    :rtype: str
+    """
+    sig = input_data.signal.upper().removeprefix("SIG")
+    if not sig.isalnum():
+        raise ToolExecutionError(f"Invalid signal name: {input_data.signal!r}")
+    handle = _resolve_handle(input_data, state)
+    executor = SSHExecutor(get_machine(handle.machine_name))
+    pid_f = shlex.quote(handle.pid_file)
+    kill_script = (
+        f"pid=$(cat {pid_f} 2>/dev/null) && "
+        f'(kill -{sig} -- -"$pid" 2>/dev/null || kill -{sig} "$pid" 2>/dev/null); '
+        f"sleep 1; " + _status_script(handle)
+    )
+    output = executor.run(kill_script)
+    status = _parse_status(handle, output)
+    status["signal"] = sig
+    return json.dumps(status)
 
 
-@register_tool(
-    name="run_remote_python_snippet",
-    input_model=RunRemotePythonSnippetInput,
+@tool(
+    "run_remote_python_snippet",
+    RunRemotePythonSnippetInput,
     tags=["system", "remote", "ssh", "python", "wrapper"],
-    description="Run a short Python snippet remotely using 'python3 -c'.",
+    description=(
+        "Run a short Python snippet remotely using 'python3 -c'. "
+        "Quick remote introspection or scripting using Python."
+    ),
     safe_mode=False,
-    purpose="Quick remote introspection or scripting using Python.",
     category="system",
 )
 def run_remote_python_snippet(input_data: RunRemotePythonSnippetInput) -> str:
@@ -111,13 +438,15 @@ def run_remote_python_snippet(input_data: RunRemotePythonSnippetInput) -> str:
     return executor.run(remote_command)
 
 
-@register_tool(
-    name="run_script_if_absent",
-    input_model=RunScriptIfAbsentInput,
+@tool(
+    "run_script_if_absent",
+    RunScriptIfAbsentInput,
     tags=["ssh", "conditional", "script", "wrapper"],
-    description="Upload and run a script only if a given file is absent.",
+    description=(
+        "Upload and run a script only if a given file is absent. "
+        "Conditionally execute a script if a given file is missing."
+    ),
     safe_mode=True,
-    purpose="Conditionally execute a script if a given file is missing",
     category="system",
 )
 def run_script_if_absent(input_data: RunScriptIfAbsentInput) -> str:
@@ -0,0 +1,460 @@
+# aegis/utils/checkpointer.py
+"""
+LangGraph checkpointers for durable pause/resume.
+
+`SQLiteCheckpointSaver` stores graph checkpoints in a local SQLite file so a
+task interrupted for human input can be resumed from its exact checkpoint
+without Redis. Channel values are stored as separate blobs keyed by channel
+version, and each super-step only writes the channels whose version changed
+(LangGraph passes these as `new_versions`); a checkpoint row itself holds only
+the small version map. A changed channel is still written in full, and
+`history` changes at every step, so each checkpoint re-serializes the whole
+history; what is saved is the unchanged channels (prompt, runtime config,
+sub-goals, ...). Loading a checkpoint reads every channel.
+
+Checkpoints are only needed to resume a paused task, so `run_launch` only
+passes a checkpointer to graphs with `interrupt_nodes` (the only ones that stop
+at a resumable checkpoint), and `run_launch` and `/resume` delete a task's
+thread (`delete_checkpoints`) once it ends without pausing.
+
+`get_checkpointer()` returns the process-wide saver configured under
+`checkpointing` in config.yaml: `sqlite` (default), `redis` (requires the
+optional `langgraph-checkpoint-redis` package and Redis Stack), or `none`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from aegis.exceptions import ConfigurationError
+from aegis.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_DB_PATH = "reports/checkpoints.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id     TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_id     TEXT,
+    type          TEXT NOT NULL,
+    checkpoint    BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata      BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id     TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel       TEXT NOT NULL,
+    version       TEXT NOT NULL,
+    type          TEXT NOT NULL,
+    blob          BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id     TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id       TEXT NOT NULL,
+    idx           INTEGER NOT NULL,
+    channel       TEXT NOT NULL,
+    type          TEXT NOT NULL,
+    value         BLOB,
+    task_path     TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """A LangGraph checkpoint saver backed by a local SQLite file.
+
+    One connection is shared and guarded by a lock; the async methods run the
+    synchronous ones in a worker thread so the event loop is never blocked on
+    disk I/O.
+    """
+
+    def __init__(self, db_path: str | Path = DEFAULT_DB_PATH, **kwargs: Any):
+        """
+        :param db_path: Path to the SQLite file, or ':memory:'.
+        """
+        super().__init__(**kwargs)
+        self.db_path = str(db_path)
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None
+        )
+        self._lock = threading.RLock()
+        with self._cursor() as cur:
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute("PRAGMA synchronous=NORMAL")
+            cur.executescript(_SCHEMA)
+
+    @contextmanager
+    def _cursor(self, transaction: bool = False) -> Iterator[sqlite3.Cursor]:
+        with self._lock:
+            cur = self._conn.cursor()
+            try:
+                if transaction:
+                    cur.execute("BEGIN")
+                yield cur
+                if transaction:
+                    cur.execute("COMMIT")
+            except BaseException:
+                if transaction:
+                    cur.execute("ROLLBACK")
+                raise
+            finally:
+                cur.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # --- helpers ---
+
+    def _load_blobs(
+        self, cur: sqlite3.Cursor, thread_id: str, ns: str, versions: ChannelVersions
+    ) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        for channel, version in versions.items():
+            row = cur.execute(
+                "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND channel = ? AND version = ?",
+                (thread_id, ns, channel, str(version)),
+            ).fetchone()
+            if row is None or row[0] == "empty":
+                continue
+            values[channel] = self.serde.loads_typed((row[0], row[1]))
+        return values
+
+    def _load_writes(
+        self, cur: sqlite3.Cursor, thread_id: str, ns: str, checkpoint_id: str
+    ) -> list:
+        rows = cur.execute(
+            "SELECT task_id, channel, type, value FROM writes WHERE thread_id = ? "
+            "AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_path, task_id, idx",
+            (thread_id, ns, checkpoint_id),
+        ).fetchall()
+        return [(t, c, self.serde.loads_typed((ty, v))) for t, c, ty, v in rows]
+
+    def _to_tuple(self, cur: sqlite3.Cursor, row: Tuple) -> CheckpointTuple:
+        thread_id, ns, checkpoint_id, parent_id, ctype, cblob, mtype, mblob = row
+        checkpoint: Checkpoint = self.serde.loads_typed((ctype, cblob))
+        checkpoint = {
+            **checkpoint,
+            "channel_values": self._load_blobs(
+                cur, thread_id, ns, checkpoint["channel_versions"]
+            ),
+        }
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=checkpoint,
+            metadata=self.serde.loads_typed((mtype, mblob)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=self._load_writes(cur, thread_id, ns, checkpoint_id),
+        )
+
+    # --- sync API ---
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: Tuple = (thread_id, ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._cursor() as cur:
+            row = cur.execute(query, params).fetchone()
+            return self._to_tuple(cur, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_id, type, checkpoint, "
+            "metadata_type, metadata FROM checkpoints"
+        )
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            ns = config["configurable"].get("checkpoint_ns")
+            if ns is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._cursor() as cur:
+            rows = cur.execute(query, params).fetchall()
+            remaining = limit
+            for row in rows:
+                tup = self._to_tuple(cur, row)
+                if filter and not all(
+                    tup.metadata.get(k) == v for k, v in filter.items()
+                ):
+                    continue
+                if remaining is not None:
+                    if remaining <= 0:
+                        break
+                    remaining -= 1
+                yield tup
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values: Dict[str, Any] = stored.pop("channel_values")  # type: ignore[misc]
+        ctype, cblob = self.serde.dumps_typed(stored)
+        mtype, mblob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._cursor(transaction=True) as cur:
+            # Only channels that changed in this super-step get a new blob.
+            for channel, version in new_versions.items():
+                btype, blob = (
+                    self.serde.dumps_typed(values[channel])
+                    if channel in values
+                    else ("empty", None)
+                )
+                cur.execute(
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                    (thread_id, ns, channel, str(version), btype, blob),
+                )
+            cur.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    ctype,
+                    cblob,
+                    mtype,
+                    mblob,
+                ),
+            )
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special writes (errors, interrupts, resumes) replace earlier ones;
+        # regular task writes are kept from the first attempt.
+        verb = (
+            "INSERT OR REPLACE"
+            if all(w[0] in WRITES_IDX_MAP for w in writes)
+            else "INSERT OR IGNORE"
+        )
+        with self._cursor(transaction=True) as cur:
+            for idx, (channel, value) in enumerate(writes):
+                vtype, vblob = self.serde.dumps_typed(value)
+                cur.execute(
+                    f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        ns,
+                        checkpoint_id,
+                        task_id,
+                        WRITES_IDX_MAP.get(channel, idx),
+                        channel,
+                        vtype,
+                        vblob,
+                        task_path,
+                    ),
+                )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._cursor(transaction=True) as cur:
+            for table in ("checkpoints", "blobs", "writes"):
+                cur.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # --- async API ---
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+async def delete_checkpoints(checkpointer: BaseCheckpointSaver, thread_id: str) -> None:
+    """Deletes a task's checkpoints once it can no longer be resumed.
+
+    Best effort: a failure is logged and the rows are left behind.
+
+    :param checkpointer: The saver the task ran with.
+    :type checkpointer: BaseCheckpointSaver
+    :param thread_id: The task's checkpoint thread (its task id).
+    :type thread_id: str
+    """
+    try:
+        await checkpointer.adelete_thread(thread_id)
+    except Exception as e:
+        logger.warning(f"Failed to delete checkpoints of task {thread_id}: {e}")
+
+
+_CHECKPOINTER: Optional[BaseCheckpointSaver] = None
+_CHECKPOINTER_LOADED = False
+
+
+def _build_redis_checkpointer(url: str) -> BaseCheckpointSaver:
+    try:
+        from langgraph.checkpoint.redis.aio import AsyncRedisSaver
+    except ImportError as e:
+        raise ConfigurationError(
+            "checkpointing.backend 'redis' requires the 'langgraph-checkpoint-redis' package."
+        ) from e
+    return AsyncRedisSaver(redis_url=url)
+
+
+def get_checkpointer() -> Optional[BaseCheckpointSaver]:
+    """Returns the process-wide checkpointer configured under `checkpointing`.
+
+    :return: A checkpoint saver, or None if checkpointing is disabled.
+    :rtype: Optional[BaseCheckpointSaver]
+    :raises ConfigurationError: If the configured backend cannot be created.
+    """
+    global _CHECKPOINTER, _CHECKPOINTER_LOADED
+    if _CHECKPOINTER_LOADED:
+        return _CHECKPOINTER
+    try:
+        from aegis.utils.config import get_config
+
+        config = get_config()
+        cfg = config.get("checkpointing") or {}
+        redis_url = (config.get("services") or {}).get("redis_url")
+    except Exception:
+        cfg, redis_url = {}, None
+
+    backend = str(cfg.get("backend") or "sqlite").lower()
+    if backend in ("none", "off", "false"):
+        _CHECKPOINTER = None
+    elif backend == "sqlite":
+        _CHECKPOINTER = SQLiteCheckpointSaver(cfg.get("db_path") or DEFAULT_DB_PATH)
+    elif backend == "redis":
+        _CHECKPOINTER = _build_redis_checkpointer(
+            cfg.get("redis_url") or redis_url or "redis://localhost:6379/0"
+        )
+    else:
+        raise ConfigurationError(f"Unknown checkpointing backend: '{backend}'")
+    _CHECKPOINTER_LOADED = True
+    logger.info(f"Graph checkpointing backend: {backend}")
+    return _CHECKPOINTER
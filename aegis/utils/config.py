@@ -10,6 +10,7 @@ Minimal config loader with caching and gentle fallbacks.
 
 from __future__ import annotations
 
+import logging
 import os
 from pathlib import Path
 from typing import Any, Dict
@@ -19,9 +20,9 @@ try:
 except Exception:
     yaml = None
 
-from aegis.utils.logger import setup_logger
-
-logger = setup_logger(__name__)
+# setup_logger reads this module's config, so a plain stdlib logger is used
+# here to keep the import one-way.
+logger = logging.getLogger(__name__)
 
 _CONFIG_CACHE: Dict[str, Any] | None = None
 
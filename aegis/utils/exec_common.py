@@ -4,9 +4,13 @@ from __future__ import annotations
 import os
 import shlex
 import subprocess
+import threading
 import time
 from dataclasses import dataclass
-from typing import List, Optional, Sequence, Union, Tuple, Dict
+from typing import Any, List, Optional, Sequence, Union, Tuple, Dict
+
+from aegis.utils.log_sinks import task_id_context
+from aegis.utils.sandbox import ResourceLimits, Sandbox
 
 __all__ = [
     "now_ms",
@@ -39,6 +43,7 @@ class ExecResult:
     timed_out: bool
     truncated_stdout: bool
     truncated_stderr: bool
+    resource_usage: Optional[Dict[str, Any]] = None
 
     def stdout_text(self, encoding: str = "utf-8", errors: str = "replace") -> str:
         return self.stdout.decode(encoding, errors)
@@ -103,6 +108,47 @@ def _coerce_to_bytes(buf: object) -> bytes:
 # ---- Main runner -----------------------------------------------------------
 
 
+def _run_with_rusage(
+    popen_cmd: Sequence[str], reaped: List[Any], **kwargs: Any
+) -> subprocess.CompletedProcess:
+    """Like subprocess.run(capture_output=True), appending the child's rusage to `reaped`.
+
+    The pipes are drained on helper threads and the child is reaped here with
+    os.wait4, so Popen never waits on it; its returncode is set from the status.
+    """
+    timeout = kwargs.pop("timeout", None)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    proc = subprocess.Popen(
+        popen_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs
+    )
+    output: Dict[str, bytes] = {}
+
+    def _drain(name: str, stream: Any) -> None:
+        with stream:
+            output[name] = stream.read()
+
+    readers = [
+        threading.Thread(target=_drain, args=(name, stream), daemon=True)
+        for name, stream in (("stdout", proc.stdout), ("stderr", proc.stderr))
+    ]
+    for t in readers:
+        t.start()
+    for t in readers:
+        t.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+    timed_out = any(t.is_alive() for t in readers)
+    if timed_out:
+        proc.kill()
+        for t in readers:
+            t.join()
+    _, status, rusage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    reaped.append(rusage)
+    stdout, stderr = output.get("stdout", b""), output.get("stderr", b"")
+    if timed_out:
+        raise subprocess.TimeoutExpired(popen_cmd, timeout, output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(popen_cmd, proc.returncode, stdout, stderr)
+
+
 def run_subprocess(
     cmd: Union[str, Sequence[str]],
     *,
@@ -112,6 +158,7 @@ def run_subprocess(
     allow_shell: bool = False,
     max_output_bytes: Optional[int] = 1_000_000,
     text_mode: bool = False,
+    limits: Optional[ResourceLimits] = None,
 ) -> ExecResult:
     """
     Execute a command with safe defaults:
@@ -129,6 +176,9 @@ def run_subprocess(
         allow_shell: if True and cmd is str, executes via /bin/sh -c with basic guardrails.
         max_output_bytes: per-stream cap for stdout/stderr (None to disable).
         text_mode: if True, normalize to utf-8 text then back to bytes before truncation.
+        limits: optional CPU/memory/pids ceilings. The child is confined in a transient
+                cgroup v2 (or via setrlimit when delegation is unavailable) and the
+                observed usage is returned in ExecResult.resource_usage.
 
     Returns:
         ExecResult with normalized data.
@@ -159,17 +209,38 @@ def run_subprocess(
         argv_for_record = list(cmd)
         popen_cmd = argv_for_record
 
+    sandbox: Optional[Sandbox] = None
+    if limits is not None and not limits.is_empty():
+        sandbox = Sandbox(limits, task_id=task_id_context.get(), timeout=timeout)
+        # The shim confines the child before exec; shell commands run under it
+        # as an explicit /bin/sh -c.
+        popen_cmd = sandbox.wrap(["/bin/sh", "-c", cmd] if shell else list(popen_cmd))
+        shell = False
+    resource_usage: Optional[Dict[str, Any]] = None
+    reaped: List[Any] = []
+
     try:
-        proc = subprocess.run(
-            popen_cmd,
-            shell=shell,
-            cwd=cwd,
-            env=run_env,
-            input=None,
-            capture_output=True,
-            timeout=timeout,
-            check=False,
-        )
+        if sandbox is not None and sandbox.mechanism == "rlimit":
+            # Reap with wait4: RUSAGE_CHILDREN would mix in every other child.
+            proc = _run_with_rusage(
+                popen_cmd,
+                reaped,
+                shell=shell,
+                cwd=cwd,
+                env=run_env,
+                timeout=timeout,
+            )
+        else:
+            proc = subprocess.run(
+                popen_cmd,
+                shell=shell,
+                cwd=cwd,
+                env=run_env,
+                input=None,
+                capture_output=True,
+                timeout=timeout,
+                check=False,
+            )
         ended = now_ms()
         out = _coerce_to_bytes(proc.stdout)
         err = _coerce_to_bytes(proc.stderr)
@@ -186,6 +257,9 @@ def run_subprocess(
     except Exception:
         ended = now_ms()
         raise
+    finally:
+        if sandbox is not None:
+            resource_usage = sandbox.finish(reaped[0] if reaped else None).to_dict()
 
     duration = ended - started
 
@@ -209,4 +283,5 @@ def run_subprocess(
         timed_out=timed_out,
         truncated_stdout=out_was_trunc,
         truncated_stderr=err_was_trunc,
+        resource_usage=resource_usage,
     )
@@ -0,0 +1,451 @@
+# aegis/utils/fault_injection.py
+"""
+Deterministic fault injection for executors and LLM providers.
+
+Failure paths (policy breaker cooldowns, remediation, degeneracy detection,
+retry budgets) are hard to exercise without breaking real machines. When a run
+is launched with a fault profile (`runtime.fault_profile`, or the
+`AEGIS_FAULT_PROFILE` environment variable as a process-wide default), calls
+into `SSHExecutor`, `DockerExecutor`, `HttpExecutor`, `RedisExecutor` and the
+backend providers are intercepted and may be delayed or fail according to the
+profile's rules.
+
+Profile format (YAML)::
+
+    name: flaky-network
+    seed: 1234                 # falls back to runtime.seed, then 0
+    rules:
+      - targets: [ssh, http]   # ssh | docker | http | redis | provider | "*"
+        methods: [run]         # optional; default is every wrapped method
+        probability: 0.1
+        fault: latency         # latency | timeout | reset | partial | error_code
+        latency_ms: [200, 1500]
+      - targets: [ssh]
+        probability: 0.05
+        fault: error_code
+        codes: [1, 255]
+
+Rules are evaluated in order and at most one fault is injected per call.
+Only the outermost intercepted call is rolled: `SSHExecutor.run` delegates to
+`run_with_rc`, and that inner call falls straight through.
+Decisions are seeded per (target, method, call number), so a given profile and
+seed reproduce the same fault sequence for the same sequence of calls, even
+when calls to different targets interleave.
+
+Every injected fault is appended to the provenance ledger and emitted as a
+`FAULT_INJECTED` replay event. Interception is installed lazily on the first
+activation; when no injector is active the wrappers fall straight through.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union
+
+import yaml
+from pydantic import BaseModel, Field, ValidationError
+
+from aegis.exceptions import ConfigurationError, PlannerError, ToolExecutionError
+from aegis.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+FaultKind = Literal["latency", "timeout", "reset", "partial", "error_code"]
+
+# Methods intercepted per target. `*_result` wrappers are left alone because
+# they delegate to these, so faults surface through them as error results.
+_TARGETS: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {
+    "ssh": (
+        "aegis.executors.ssh_exec",
+        "SSHExecutor",
+        ("run", "run_with_rc", "upload", "download", "check_file_exists"),
+    ),
+    "docker": (
+        "aegis.executors.docker_exec",
+        "DockerExecutor",
+        (
+            "pull_image",
+            "run_container",
+            "stop_container",
+            "exec_in_container",
+            "copy_to_container",
+            "copy_from_container",
+        ),
+    ),
+    "http": ("aegis.executors.http_exec", "HttpExecutor", ("request_sync", "arequest")),
+    "redis": (
+        "aegis.executors.redis_exec",
+        "RedisExecutor",
+        ("ping", "get", "set", "delete", "keys", "hgetall", "expire", "eval"),
+    ),
+}
+_PROVIDER_MODULES = (
+    "aegis.providers.openai_provider",
+    "aegis.providers.vllm_provider",
+    "aegis.providers.ollama_provider",
+    "aegis.providers.koboldcpp_provider",
+    "aegis.providers.replay_provider",
+)
+_PROVIDER_METHODS = ("get_completion", "get_structured_completion")
+
+
+class FaultRule(BaseModel):
+    """A single fault-injection rule from a profile."""
+
+    targets: List[str] = Field(default_factory=lambda: ["*"])
+    methods: Optional[List[str]] = None
+    probability: float = Field(1.0, ge=0.0, le=1.0)
+    fault: FaultKind
+    latency_ms: Union[int, List[int]] = Field(
+        500, description="Fixed delay, or [min, max] for a uniform draw."
+    )
+    after_ms: int = Field(
+        0, ge=0, description="Delay before a timeout/reset is raised."
+    )
+    keep_fraction: float = Field(0.5, ge=0.0, le=1.0)
+    codes: List[int] = Field(default_factory=lambda: [1])
+
+    def matches(self, target: str, method: str) -> bool:
+        if "*" not in self.targets and target not in self.targets:
+            return False
+        return self.methods is None or method in self.methods
+
+
+class FaultProfile(BaseModel):
+    """A named, seeded set of fault rules."""
+
+    name: str = "unnamed"
+    seed: Optional[int] = None
+    rules: List[FaultRule] = Field(default_factory=list)
+
+
+def load_profile(path: Union[str, Path]) -> FaultProfile:
+    """Loads and validates a fault profile from YAML.
+
+    :param path: Path to the profile file.
+    :type path: Union[str, Path]
+    :return: The validated profile.
+    :rtype: FaultProfile
+    :raises ConfigurationError: If the file is missing or invalid.
+    """
+    p = Path(path)
+    if not p.is_file():
+        raise ConfigurationError(f"Fault profile not found: {p}")
+    try:
+        data = yaml.safe_load(p.read_text(encoding="utf-8")) or {}
+        return FaultProfile.model_validate(data)
+    except (yaml.YAMLError, ValidationError) as e:
+        raise ConfigurationError(f"Invalid fault profile '{p}': {e}") from e
+
+
+class InjectedFault:
+    """Describes one fault decision (kept for the run's fault log)."""
+
+    __slots__ = ("target", "method", "call_no", "fault", "detail")
+
+    def __init__(
+        self, target: str, method: str, call_no: int, fault: str, detail: Dict[str, Any]
+    ):
+        self.target = target
+        self.method = method
+        self.call_no = call_no
+        self.fault = fault
+        self.detail = detail
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "target": self.target,
+            "method": self.method,
+            "call_no": self.call_no,
+            "fault": self.fault,
+            **self.detail,
+        }
+
+
+class FaultInjector:
+    """Makes seeded fault decisions for one run and records what it injected."""
+
+    def __init__(self, profile: FaultProfile, *, run_id: Optional[str], seed: int):
+        self.profile = profile
+        self.run_id = run_id
+        self.seed = seed
+        self.injected: List[InjectedFault] = []
+        self._counters: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def decide(self, target: str, method: str) -> Optional[InjectedFault]:
+        """Returns the fault to inject for this call, or None."""
+        with self._lock:
+            key = (target, method)
+            call_no = self._counters.get(key, 0)
+            self._counters[key] = call_no + 1
+        rng = random.Random(f"{self.seed}:{target}:{method}:{call_no}")
+        for idx, rule in enumerate(self.profile.rules):
+            roll = rng.random()
+            if not rule.matches(target, method) or roll >= rule.probability:
+                continue
+            detail: Dict[str, Any] = {"rule": idx}
+            if rule.fault == "latency":
+                lat = rule.latency_ms
+                if isinstance(lat, list) and len(lat) == 2:
+                    detail["latency_ms"] = rng.randint(min(lat), max(lat))
+                else:
+                    detail["latency_ms"] = int(lat[0] if isinstance(lat, list) else lat)
+            elif rule.fault in ("timeout", "reset"):
+                detail["after_ms"] = rule.after_ms
+            elif rule.fault == "partial":
+                detail["keep_fraction"] = rule.keep_fraction
+            elif rule.fault == "error_code":
+                detail["code"] = rng.choice(rule.codes or [1])
+            return InjectedFault(target, method, call_no, rule.fault, detail)
+        return None
+
+    def record(self, fault: InjectedFault) -> None:
+        """Appends an injected fault to the run's log, provenance and replay."""
+        self.injected.append(fault)
+        logger.warning(
+            f"Injected {fault.fault} into {fault.target}.{fault.method} (call #{fault.call_no})",
+            extra={"event_type": "FaultInjected", **fault.to_dict()},
+        )
+        try:
+            from aegis.utils import provenance
+            from aegis.utils.replay_logger import log_replay_event
+
+            provenance.record_fault(
+                run_id=self.run_id or "session",
+                fault_index=len(self.injected) - 1,
+                target=fault.target,
+                method=fault.method,
+                fault=fault.fault,
+                detail={"profile": self.profile.name, "seed": self.seed, **fault.detail},
+            )
+            log_replay_event(
+                self.run_id,
+                "FAULT_INJECTED",
+                {"profile": self.profile.name, "seed": self.seed, **fault.to_dict()},
+            )
+        except Exception as e:
+            logger.debug(f"Failed to record injected fault: {e}")
+
+
+_ACTIVE: contextvars.ContextVar[Optional[FaultInjector]] = contextvars.ContextVar(
+    "aegis_fault_injector", default=None
+)
+# Set while an intercepted call runs, so methods that delegate to other
+# intercepted methods are rolled (and counted) once.
+_IN_CALL: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "aegis_fault_in_call", default=False
+)
+_INSTALLED = False
+_INSTALL_LOCK = threading.Lock()
+
+
+def active() -> Optional[FaultInjector]:
+    """Returns the fault injector active in the current context, if any."""
+    return _ACTIVE.get()
+
+
+def activate(
+    profile: Union[str, Path, FaultProfile, None],
+    *,
+    run_id: Optional[str] = None,
+    seed: Optional[int] = None,
+) -> Optional[FaultInjector]:
+    """Enables fault injection for the current context (i.e. the current run).
+
+    Falls back to the `AEGIS_FAULT_PROFILE` environment variable when no
+    profile is given. Tasks and threads started from this context (graph
+    nodes, tools run in executors) inherit the injector.
+
+    :param profile: A profile path or an already-loaded profile.
+    :param run_id: The task id faults are attributed to.
+    :param seed: Seed used when the profile does not define one.
+    :return: The active injector, or None if no profile is configured.
+    :raises ConfigurationError: If the profile cannot be loaded.
+    """
+    profile = profile or os.getenv("AEGIS_FAULT_PROFILE") or None
+    if profile is None:
+        _ACTIVE.set(None)
+        return None
+    prof = profile if isinstance(profile, FaultProfile) else load_profile(profile)
+    eff_seed = prof.seed if prof.seed is not None else (seed or 0)
+    injector = FaultInjector(prof, run_id=run_id, seed=eff_seed)
+    _install()
+    _ACTIVE.set(injector)
+    logger.warning(
+        f"Fault injection enabled: profile '{prof.name}' (seed={eff_seed}, rules={len(prof.rules)})"
+    )
+    return injector
+
+
+def deactivate() -> None:
+    """Disables fault injection for the current context."""
+    _ACTIVE.set(None)
+
+
+# --- applying faults ---
+
+
+def _error_cls(target: str) -> type:
+    return PlannerError if target == "provider" else ToolExecutionError
+
+
+def _truncate(value: Any, fraction: float) -> Any:
+    if isinstance(value, (str, bytes)):
+        return value[: int(len(value) * fraction)]
+    if isinstance(value, tuple) and len(value) == 2 and isinstance(value[1], str):
+        return (value[0], _truncate(value[1], fraction))
+    try:
+        import httpx
+
+        if isinstance(value, httpx.Response):
+            return httpx.Response(
+                value.status_code,
+                content=_truncate(value.content, fraction),
+                headers={
+                    k: v for k, v in value.headers.items() if k.lower() != "content-length"
+                },
+                request=value.request,
+            )
+    except Exception:
+        pass
+    return value
+
+
+def _error_code_result(
+    fault: InjectedFault, args: Tuple[Any, ...], kwargs: Dict[str, Any]
+) -> Any:
+    code = fault.detail["code"]
+    if fault.target == "ssh" and fault.method == "run_with_rc":
+        return (code, "")
+    if fault.target == "http":
+        import httpx
+
+        method = kwargs.get("method", args[0] if args else "GET")
+        url = kwargs.get("url", args[1] if len(args) > 1 else "http://fault.invalid/")
+        try:
+            req = httpx.Request(str(method).upper(), url)
+        except Exception:
+            req = httpx.Request(str(method).upper(), "http://fault.invalid/")
+        return httpx.Response(code, content=b"", request=req)
+    raise _error_cls(fault.target)(
+        f"[FAULT-INJECTED] {fault.target}.{fault.method} failed with exit code {code}"
+    )
+
+
+def _raise_for(fault: InjectedFault) -> None:
+    cls = _error_cls(fault.target)
+    if fault.fault == "timeout":
+        raise cls(f"[FAULT-INJECTED] {fault.target}.{fault.method} timed out")
+    raise cls(f"[FAULT-INJECTED] {fault.target}.{fault.method}: connection reset by peer")
+
+
+def _wrap_sync(target: str, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    def _apply_sync(injector, fault, self, args, kwargs):
+        if fault is None:
+            return func(self, *args, **kwargs)
+        injector.record(fault)
+        if fault.fault == "latency":
+            time.sleep(fault.detail["latency_ms"] / 1000.0)
+            return func(self, *args, **kwargs)
+        if fault.fault in ("timeout", "reset"):
+            time.sleep(fault.detail["after_ms"] / 1000.0)
+            _raise_for(fault)
+        if fault.fault == "partial":
+            return _truncate(func(self, *args, **kwargs), fault.detail["keep_fraction"])
+        return _error_code_result(fault, args, kwargs)
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        injector = _ACTIVE.get()
+        if injector is None or _IN_CALL.get():
+            return func(self, *args, **kwargs)
+        token = _IN_CALL.set(True)
+        try:
+            return _apply_sync(injector, injector.decide(target, name), self, args, kwargs)
+        finally:
+            _IN_CALL.reset(token)
+
+    wrapper.__aegis_fault_wrapped__ = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+def _wrap_async(target: str, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    async def _apply_async(injector, fault, self, args, kwargs):
+        if fault is None:
+            return await func(self, *args, **kwargs)
+        injector.record(fault)
+        if fault.fault == "latency":
+            await asyncio.sleep(fault.detail["latency_ms"] / 1000.0)
+            return await func(self, *args, **kwargs)
+        if fault.fault in ("timeout", "reset"):
+            await asyncio.sleep(fault.detail["after_ms"] / 1000.0)
+            _raise_for(fault)
+        if fault.fault == "partial":
+            return _truncate(
+                await func(self, *args, **kwargs), fault.detail["keep_fraction"]
+            )
+        return _error_code_result(fault, args, kwargs)
+
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        injector = _ACTIVE.get()
+        if injector is None or _IN_CALL.get():
+            return await func(self, *args, **kwargs)
+        token = _IN_CALL.set(True)
+        try:
+            return await _apply_async(
+                injector, injector.decide(target, name), self, args, kwargs
+            )
+        finally:
+            _IN_CALL.reset(token)
+
+    wrapper.__aegis_fault_wrapped__ = True  # type: ignore[attr-defined]
+    return wrapper
+
+
+def wrap_class(target: str, cls: type, methods: Tuple[str, ...]) -> None:
+    """Installs fault interception on `methods` of `cls` (idempotent)."""
+    for name in methods:
+        func = cls.__dict__.get(name)
+        if func is None or getattr(func, "__aegis_fault_wrapped__", False):
+            continue
+        wrap = _wrap_async if inspect.iscoroutinefunction(func) else _wrap_sync
+        setattr(cls, name, wrap(target, name, func))
+
+
+def _install() -> None:
+    global _INSTALLED
+    with _INSTALL_LOCK:
+        if _INSTALLED:
+            return
+        import importlib
+
+        for target, (module, cls_name, methods) in _TARGETS.items():
+            try:
+                cls = getattr(importlib.import_module(module), cls_name)
+                wrap_class(target, cls, methods)
+            except Exception as e:
+                logger.debug(f"Fault injection: cannot wrap {module}.{cls_name}: {e}")
+        for module in _PROVIDER_MODULES:
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                logger.debug(f"Fault injection: cannot import {module}: {e}")
+        try:
+            from aegis.providers.base import BackendProvider
+
+            for cls in BackendProvider.__subclasses__():
+                wrap_class("provider", cls, _PROVIDER_METHODS)
+        except Exception as e:
+            logger.debug(f"Fault injection: cannot wrap providers: {e}")
+        _INSTALLED = True
+
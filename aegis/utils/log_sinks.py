@@ -5,12 +5,22 @@ Custom logging components for the AEGIS framework.
 This module provides specialized logging Sinks (Handlers) and Filters to create
 a unified event bus. It enables structured, context-aware logging that can be
 routed to multiple destinations (console, file, UI) from a single log call.
+
+`JsonlFileHandler` writes every record synchronously. `BufferedJsonlFileHandler`
+moves file I/O off the calling thread: records are formatted where they are
+logged, queued on a bounded queue and written in batches by a background
+thread that keeps an LRU of open per-task files.
 """
 import contextvars
 import json
 import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, TextIO
 
 # A context variable to hold the current task_id. This allows loggers
 # anywhere in the call stack to access the task_id without it being
@@ -19,6 +29,13 @@ task_id_context: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
     "task_id", default=None
 )
 
+# The sub-goal a scoped loop of `execute_sub_goal_dag` is working on, so
+# replay events and provenance records of sub-goals running side by side can
+# be told apart. None outside such a loop.
+sub_goal_context: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "sub_goal_index", default=None
+)
+
 
 class TaskIdFilter(logging.Filter):
     """
@@ -77,3 +94,289 @@ class JsonlFileHandler(logging.Handler):
                 f.write(json_log_string + "\n")
         except Exception:
             self.handleError(record)
+
+
+# Overflow policies of BufferedJsonlFileHandler when its queue is full.
+OVERFLOW_POLICIES = ("block", "drop_new", "drop_oldest")
+
+# Queue item that asks the writer to flush (one task or everything).
+_FLUSH = object()
+_STOP = object()
+
+
+class BufferedJsonlFileHandler(JsonlFileHandler):
+    """
+    A `JsonlFileHandler` that batches writes through a background thread.
+
+    `emit` only formats the record and puts the line on a bounded queue. The
+    writer thread appends lines to per-task buffers and writes them out when
+    `flush_records` lines are pending, every `flush_interval_s` seconds, and
+    when a task ends (`flush_task`). Open files are cached in an LRU of at most
+    `max_open_files` handles, so a busy task pays one `open()` per eviction
+    rather than one per record.
+
+    When the queue is full, `overflow` decides what happens: 'block' waits up
+    to `block_timeout_s` for space and then drops the record, 'drop_new' drops
+    it immediately, and 'drop_oldest' discards the oldest queued line to make
+    room (flush requests are kept; with nothing else queued it drops the new
+    line). Dropped records are counted in `stats()`, never raised.
+    """
+
+    def __init__(
+        self,
+        logs_dir: str,
+        max_open_files: int = 64,
+        queue_size: int = 10000,
+        flush_records: int = 256,
+        flush_interval_s: float = 1.0,
+        overflow: str = "block",
+        block_timeout_s: float = 0.05,
+    ):
+        """Initializes the handler; the writer thread starts on first use.
+
+        :param logs_dir: The directory where log files will be stored.
+        :type logs_dir: str
+        :param max_open_files: Size of the LRU of open per-task files.
+        :type max_open_files: int
+        :param queue_size: Lines that may wait for the writer thread.
+        :type queue_size: int
+        :param flush_records: Pending lines that trigger a write.
+        :type flush_records: int
+        :param flush_interval_s: Longest time a line waits before it is written.
+        :type flush_interval_s: float
+        :param overflow: One of 'block', 'drop_new' or 'drop_oldest'.
+        :type overflow: str
+        :param block_timeout_s: Longest wait for queue space with 'block'.
+        :type block_timeout_s: float
+        :raises ValueError: If `overflow` is not a known policy.
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy '{overflow}'; expected one of {OVERFLOW_POLICIES}."
+            )
+        super().__init__(logs_dir)
+        self.max_open_files = max(1, max_open_files)
+        self.queue_size = max(1, queue_size)
+        self.flush_records = max(1, flush_records)
+        self.flush_interval_s = flush_interval_s
+        self.overflow = overflow
+        self.block_timeout_s = block_timeout_s
+        self._counters: Dict[str, int] = dict.fromkeys(
+            ("enqueued", "written", "dropped", "blocked", "batches", "opened", "evicted", "errors"),
+            0,
+        )
+        self._files: "OrderedDict[str, TextIO]" = OrderedDict()
+        self._start_lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._closed = False
+
+    # --- producer side (any thread) ---
+
+    def _ensure_writer(self) -> queue.Queue:
+        # A forked child inherits the queue but not the thread: start afresh.
+        if self._pid == os.getpid() and self._thread is not None:
+            return self._queue
+        with self._start_lock:
+            if self._pid != os.getpid() or self._thread is None:
+                self._queue = queue.Queue(maxsize=self.queue_size)
+                self._files = OrderedDict()
+                self._thread = threading.Thread(
+                    target=self._run, name="aegis-jsonl-writer", daemon=True
+                )
+                self._pid = os.getpid()
+                self._thread.start()
+        return self._queue
+
+    def emit(self, record: logging.LogRecord):
+        """Formats the record and queues it for the writer thread.
+
+        :param record: The log record to be emitted.
+        :type record: logging.LogRecord
+        """
+        task_id = getattr(record, "task_id", None)
+        if not task_id or self._closed:
+            return
+        try:
+            line = self.format(record)
+            self._put((task_id, line))
+        except Exception:
+            self.handleError(record)
+
+    def _put(self, item: tuple) -> None:
+        q = self._ensure_writer()
+        try:
+            q.put_nowait(item)
+            self._counters["enqueued"] += 1
+            return
+        except queue.Full:
+            pass
+        if self.overflow == "block":
+            self._counters["blocked"] += 1
+            try:
+                q.put(item, timeout=self.block_timeout_s)
+                self._counters["enqueued"] += 1
+            except queue.Full:
+                self._counters["dropped"] += 1
+        elif self.overflow == "drop_oldest" and self._discard_oldest_line(q):
+            try:
+                q.put_nowait(item)
+                self._counters["enqueued"] += 1
+            except queue.Full:
+                # Another producer took the slot; fall back to drop_new.
+                self._counters["dropped"] += 1
+        else:
+            self._counters["dropped"] += 1
+
+    def _discard_oldest_line(self, q: queue.Queue) -> bool:
+        # Removes the oldest log line in place, leaving flush and stop
+        # requests where they are; False if the queue holds only those.
+        with q.mutex:
+            for i, queued in enumerate(q.queue):
+                if queued[0] is not _FLUSH and queued[0] is not _STOP:
+                    del q.queue[i]
+                    q.not_full.notify()
+                    self._counters["dropped"] += 1
+                    return True
+        return False
+
+    def _control(self, kind: object, task_id: Optional[str], timeout: Optional[float]) -> bool:
+        # Returns False if the request could not be queued or did not finish
+        # within `timeout`; with timeout=None it does not wait for the writer.
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        try:
+            # Control items are never dropped, so they wait for queue space.
+            self._queue.put((kind, task_id, done), timeout=5.0)
+        except queue.Full:
+            return False
+        return True if timeout is None else done.wait(timeout)
+
+    def flush_task(self, task_id: str, timeout: Optional[float] = None) -> bool:
+        """Writes the task's pending lines and closes its file.
+
+        Call this when a task ends. With `timeout=None` (the default) the call
+        only queues the request and returns at once; otherwise it waits up to
+        `timeout` seconds for the write to finish.
+
+        :param task_id: The task whose log file should be flushed and closed.
+        :type task_id: str
+        :param timeout: Seconds to wait for completion, or None to not wait.
+        :type timeout: Optional[float]
+        :return: False if the flush did not complete in time, True otherwise.
+        :rtype: bool
+        """
+        return self._control(_FLUSH, task_id, timeout)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Blocks until every queued line has been written to disk.
+
+        :param timeout: Longest time to wait for the writer thread.
+        :type timeout: float
+        """
+        if not self._closed:
+            self._control(_FLUSH, None, timeout)
+
+    def close(self) -> None:
+        """Writes everything that is queued, closes all files and stops the writer."""
+        if not self._closed:
+            self._closed = True
+            if self._control(_STOP, None, 5.0) and self._thread is not None:
+                self._thread.join(timeout=1.0)
+        super().close()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the handler's counters.
+
+        :return: Lines enqueued, written and dropped, emits that had to wait
+            for queue space, write batches, files opened and evicted from the
+            LRU, write errors, plus the current queue depth and open files.
+        :rtype: Dict[str, int]
+        """
+        out = dict(self._counters)
+        out["queued"] = self._queue.qsize() if self._queue is not None else 0
+        out["open_files"] = len(self._files)
+        return out
+
+    # --- writer thread ---
+
+    def _run(self) -> None:
+        buffers: Dict[str, List[str]] = {}
+        pending = 0
+        deadline = time.monotonic() + self.flush_interval_s
+        q = self._queue
+        while True:
+            try:
+                item = q.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is not None and item[0] is not _FLUSH and item[0] is not _STOP:
+                buffers.setdefault(item[0], []).append(item[1])
+                pending += 1
+                if pending < self.flush_records:
+                    if time.monotonic() < deadline:
+                        continue
+            if item is not None and item[0] is _FLUSH and item[1] is not None:
+                self._write(item[1], buffers.pop(item[1], []))
+                self._close_file(item[1])
+                pending = sum(len(b) for b in buffers.values())
+                item[2].set()
+                continue
+            for task_id in list(buffers):
+                self._write(task_id, buffers.pop(task_id))
+            pending = 0
+            deadline = time.monotonic() + self.flush_interval_s
+            if item is not None and item[0] is _STOP:
+                for task_id in list(self._files):
+                    self._close_file(task_id)
+                item[2].set()
+                return
+            if item is not None and item[0] is _FLUSH:
+                item[2].set()
+
+    def _write(self, task_id: str, lines: List[str]) -> None:
+        if not lines:
+            return
+        try:
+            f = self._files.get(task_id)
+            if f is None:
+                if len(self._files) >= self.max_open_files:
+                    _, oldest = self._files.popitem(last=False)
+                    oldest.close()
+                    self._counters["evicted"] += 1
+                f = (self.logs_dir / f"{task_id}.jsonl").open("a", encoding="utf-8")
+                self._counters["opened"] += 1
+                self._files[task_id] = f
+            else:
+                self._files.move_to_end(task_id)
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            self._counters["written"] += len(lines)
+            self._counters["batches"] += 1
+        except Exception:
+            # Counted in stats(); logging from the log writer would recurse.
+            self._counters["errors"] += 1
+            self._close_file(task_id)
+
+    def _close_file(self, task_id: str) -> None:
+        f = self._files.pop(task_id, None)
+        if f is not None:
+            try:
+                f.close()
+            except Exception:
+                pass
+
+
+def flush_task_logs(task_id: str, timeout: Optional[float] = None) -> None:
+    """Flushes and closes a finished task's log file on all buffered sinks.
+
+    :param task_id: The task that ended.
+    :type task_id: str
+    :param timeout: Seconds to wait for each sink, or None to not wait.
+    :type timeout: Optional[float]
+    """
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, BufferedJsonlFileHandler):
+            handler.flush_task(task_id, timeout=timeout)
@@ -14,7 +14,11 @@ from typing import Any, MutableMapping
 from pythonjsonlogger import json
 
 from aegis.utils.config import get_config
-from aegis.utils.log_sinks import JsonlFileHandler, TaskIdFilter
+from aegis.utils.log_sinks import (
+    BufferedJsonlFileHandler,
+    JsonlFileHandler,
+    TaskIdFilter,
+)
 
 _LOGGING_CONFIGURED = False
 
@@ -98,8 +102,13 @@ def setup_logger(
 
         # Configure file handler to write structured logs to per-task files
         try:
-            logs_dir = get_config().get("paths", {}).get("logs", "logs")
-            file_handler = JsonlFileHandler(logs_dir=logs_dir)
+            config = get_config()
+            logs_dir = config.get("paths", {}).get("logs", "logs")
+            sink_cfg = dict(config.get("logging", {}).get("file_sink") or {})
+            if sink_cfg.pop("mode", "buffered") == "sync":
+                file_handler = JsonlFileHandler(logs_dir=logs_dir)
+            else:
+                file_handler = BufferedJsonlFileHandler(logs_dir=logs_dir, **sink_cfg)
             file_formatter = json.JsonFormatter(
                 "%(asctime)s %(name)s %(levelname)s %(task_id)s %(message)s %(extra_data)s"
             )
@@ -107,7 +116,8 @@ def setup_logger(
             root_logger.addHandler(file_handler)
             # Use a a low-level logger call here to avoid recursion if it's the first log
             root_logger.debug(
-                f"Root logger configured. Level: {log_level_name}. Handlers: Console (JSON), JSONL File."
+                f"Root logger configured. Level: {log_level_name}. Handlers: Console (JSON), "
+                f"JSONL File ({file_handler.__class__.__name__})."
             )
         except Exception as e:
             root_logger.error(f"Failed to configure JSONL file logger: {e}")
@@ -0,0 +1,265 @@
+# aegis/utils/loop_watchdog.py
+"""
+Event-loop lag watchdog.
+
+A heartbeat task sleeps `interval_ms` on the event loop and measures how late
+it wakes up. That lateness is the loop lag: the time other callbacks kept the
+loop busy. Lags are kept as a running histogram (`LAG_BUCKETS_MS`) with
+count, sum and maximum, which `stats()` returns for the API and metrics.
+
+A monitor thread watches the heartbeat. Once the loop has not come back for
+`threshold_ms`, it captures the loop thread's stack while the blocking call
+is still running. It then logs a `LoopBlocked` warning with the stack and with
+the graph node, tool and task found on it. Each stall is reported once; the
+lag it caused is logged (`LoopLag`) when the loop resumes.
+
+Start it from the loop to watch (`start_loop_watchdog`); the dashboard does
+this at startup and the shell for each task it runs.
+
+Config (config.yaml `loop_watchdog`): enabled, interval_ms, threshold_ms,
+stack_depth.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from aegis.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Upper bounds (ms) of the lag histogram buckets; the last bucket is +Inf.
+LAG_BUCKETS_MS: Tuple[float, ...] = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _watchdog_settings() -> Dict[str, Any]:
+    try:
+        from aegis.utils.config import get_config
+
+        return dict(get_config().get("loop_watchdog") or {})
+    except Exception:
+        return {}
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def attribute_stack(frame: Any, depth: int = 30) -> Dict[str, Any]:
+    """Walks a stack outward and finds what was running on it.
+
+    :param frame: The innermost frame (e.g. from `sys._current_frames()`).
+    :type frame: FrameType
+    :param depth: Maximum number of frames to list.
+    :type depth: int
+    :return: ``{"stack": [innermost first], "node", "tool", "task_id"}``.
+        `node` is the first agent step module on the stack and `tool` the
+        first tool wrapper, or the `tool_name` of the plan being executed.
+    :rtype: Dict[str, Any]
+    """
+    stack: List[str] = []
+    found: Dict[str, Any] = {"node": None, "tool": None, "task_id": None}
+    while frame is not None:
+        if len(stack) < depth:
+            stack.append(_frame_label(frame))
+        filename = frame.f_code.co_filename.replace("\\", "/")
+        if found["tool"] is None and "/aegis/tools/" in filename:
+            found["tool"] = frame.f_code.co_name
+        if found["node"] is None and "/aegis/agents/steps/" in filename:
+            found["node"] = os.path.splitext(os.path.basename(filename))[0]
+        try:
+            local_vars = frame.f_locals
+        except Exception:
+            local_vars = {}
+        if found["tool"] is None:
+            plan = local_vars.get("plan")
+            tool_name = getattr(plan, "tool_name", None) or local_vars.get("tool_name")
+            if isinstance(tool_name, str):
+                found["tool"] = tool_name
+        if found["task_id"] is None:
+            state = local_vars.get("state")
+            task_id = state.get("task_id") if isinstance(state, dict) else getattr(state, "task_id", None)
+            if isinstance(task_id, str):
+                found["task_id"] = task_id
+        frame = frame.f_back
+    return {"stack": stack, **found}
+
+
+class LoopWatchdog:
+    """Measures the lag of one event loop and reports what blocks it.
+
+    :param loop: The loop to watch; its heartbeat task runs on it.
+    :type loop: asyncio.AbstractEventLoop
+    :param interval_ms: Heartbeat period.
+    :type interval_ms: float
+    :param threshold_ms: Lag past which a stall is reported with its stack.
+    :type threshold_ms: float
+    :param stack_depth: Frames included in a stall report.
+    :type stack_depth: int
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        interval_ms: float = 100.0,
+        threshold_ms: float = 250.0,
+        stack_depth: int = 30,
+    ):
+        self.loop = loop
+        self.interval_s = max(0.001, interval_ms / 1000.0)
+        self.threshold_s = max(0.001, threshold_ms / 1000.0)
+        self.stack_depth = stack_depth
+        self.buckets = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self.stalls = 0
+        self.last_stall: Optional[Dict[str, Any]] = None
+        self._beat = 0
+        self._beat_at = time.monotonic()
+        self._reported_beat = -1
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Starts the heartbeat and monitor; call from the watched loop."""
+        self._loop_thread = threading.get_ident()
+        self._beat_at = time.monotonic()
+        self._task = self.loop.create_task(self._heartbeat(), name="aegis-loop-watchdog")
+        self._monitor = threading.Thread(target=self._watch, name="aegis-loop-monitor", daemon=True)
+        self._monitor.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def observe(self, lag_ms: float) -> None:
+        """Adds one lag sample to the histogram."""
+        lag_ms = max(0.0, lag_ms)
+        self.count += 1
+        self.sum_ms += lag_ms
+        self.last_ms = lag_ms
+        self.max_ms = max(self.max_ms, lag_ms)
+        for i, bound in enumerate(LAG_BUCKETS_MS):
+            if lag_ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    async def _heartbeat(self) -> None:
+        while not self._stop.is_set():
+            start = time.monotonic()
+            await asyncio.sleep(self.interval_s)
+            now = time.monotonic()
+            lag_s = now - start - self.interval_s
+            self.observe(lag_s * 1000.0)
+            if self._reported_beat == self._beat:
+                logger.warning(
+                    f"Event loop was blocked for {lag_s * 1000.0:.0f}ms.",
+                    extra={"event_type": "LoopLag", "lag_ms": round(lag_s * 1000.0, 1), **(self.last_stall or {})},
+                )
+            self._beat += 1
+            self._beat_at = now
+
+    def _watch(self) -> None:
+        poll_s = min(self.interval_s, self.threshold_s) / 2.0
+        while not self._stop.wait(poll_s):
+            if self.loop.is_closed():
+                return
+            beat = self._beat
+            overdue = time.monotonic() - self._beat_at - self.interval_s
+            if overdue >= self.threshold_s and self._reported_beat != beat:
+                self._reported_beat = beat
+                self._report_stall(overdue)
+
+    def _report_stall(self, overdue_s: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return
+        info = attribute_stack(frame, self.stack_depth)
+        self.stalls += 1
+        self.last_stall = {
+            "blocked_ms": round(overdue_s * 1000.0, 1),
+            "node": info["node"],
+            "tool": info["tool"],
+            "task_id": info["task_id"],
+            "blocking_frame": info["stack"][0] if info["stack"] else None,
+        }
+        logger.warning(
+            f"Event loop blocked for {overdue_s * 1000.0:.0f}ms+ in "
+            f"{self.last_stall['blocking_frame']} "
+            f"(node={info['node']}, tool={info['tool']}, task={info['task_id']}).",
+            extra={"event_type": "LoopBlocked", **self.last_stall, "stack": info["stack"]},
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Lag histogram (cumulative counts per bucket bound) and stall info."""
+        cumulative, running = [], 0
+        for bound, n in zip(list(LAG_BUCKETS_MS) + ["+Inf"], self.buckets):
+            running += n
+            cumulative.append((bound, running))
+        return {
+            "interval_ms": self.interval_s * 1000.0,
+            "threshold_ms": self.threshold_s * 1000.0,
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "mean_ms": round(self.sum_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_ms": round(self.last_ms, 3),
+            "buckets": cumulative,
+            "stalls": self.stalls,
+            "last_stall": self.last_stall,
+        }
+
+
+_WATCHDOGS: Dict[int, LoopWatchdog] = {}
+
+
+def start_loop_watchdog() -> Optional[LoopWatchdog]:
+    """Starts a watchdog on the running loop, once per loop.
+
+    :return: The loop's watchdog, or None if disabled in config.
+    :rtype: Optional[LoopWatchdog]
+    """
+    cfg = _watchdog_settings()
+    if cfg.get("enabled", True) is False:
+        return None
+    loop = asyncio.get_running_loop()
+    dog = _WATCHDOGS.get(id(loop))
+    if dog is None or dog.loop is not loop:
+        dog = LoopWatchdog(
+            loop,
+            interval_ms=float(cfg.get("interval_ms") or 100),
+            threshold_ms=float(cfg.get("threshold_ms") or 250),
+            stack_depth=int(cfg.get("stack_depth") or 30),
+        )
+        dog.start()
+        _WATCHDOGS[id(loop)] = dog
+    return dog
+
+
+async def stop_loop_watchdog() -> None:
+    """Stops the running loop's watchdog, if any."""
+    dog = _WATCHDOGS.pop(id(asyncio.get_running_loop()), None)
+    if dog is not None:
+        await dog.stop()
+
+
+def loop_lag_stats() -> List[Dict[str, Any]]:
+    """Stats of every running watchdog (normally one per process)."""
+    return [dog.stats() for dog in _WATCHDOGS.values() if not dog.loop.is_closed()]
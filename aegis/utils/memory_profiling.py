@@ -0,0 +1,392 @@
+# aegis/utils/memory_profiling.py
+"""
+Opt-in per-step memory instrumentation of agent graph nodes.
+
+A run that sets `runtime.memory_profile` (or `task run --memory-profile` in
+the shell) gets a graph whose nodes are wrapped by `memory_node`. For each
+node call it records:
+
+- RSS before and after the call (psutil);
+- the tracemalloc growth since the previous step, by allocation site and by
+  component (`COMPONENTS`: task state and graph, providers, executors,
+  tools, RAG/FAISS, tracing and logging);
+- the size of the task state the node received (history length and
+  serialized size).
+
+Each step is logged as a `MemoryStep` record and attached to a `memory.step`
+span. When RSS has grown by `memory_snapshot_threshold_mb` since the task's
+first step, and again after each further threshold, the full tracemalloc
+snapshot is saved as artifacts:
+
+- `<task>_memory_<seq>_<node>_<ts>.tracemalloc`: load with
+  `tracemalloc.Snapshot.load(path)`.
+- `<task>_memory_<seq>_<node>_<ts>.txt`: the top allocation tracebacks.
+
+`memory_report` appends a per-task summary to summary.md.
+
+tracemalloc is started by the first instrumented step and stopped when no
+instrumented task is left, so it only sees allocations made in between. A
+task's records are dropped when its report is written or, at the latest,
+when its run ends (`release_task`, called by `run_launch`, `/resume` and
+sub-agents whether the run finished, paused, failed or was cancelled); a
+resumed task is profiled afresh. tracemalloc is process-wide: tasks profiled
+concurrently see each other's allocations. Native memory (FAISS indexes, C extensions) is not traced and
+only shows up in RSS. Taking snapshots costs time proportional to the number
+of live allocation sites, so only enable this to investigate growth.
+
+Config (config.yaml `profiling`): memory_nframes, memory_top_n,
+memory_snapshot_threshold_mb.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import tempfile
+import threading
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aegis.utils.logger import setup_logger
+from aegis.utils.tracing import span
+
+try:
+    import psutil
+
+    _PROCESS: Optional[Any] = psutil.Process()
+except Exception:  # pragma: no cover - psutil is a core requirement
+    _PROCESS = None
+
+logger = setup_logger(__name__)
+
+_MB = 1024 * 1024
+
+# Component -> path fragments. An allocation belongs to the component of the
+# most recent frame in its traceback that matches one of these.
+COMPONENTS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("rag", ("faiss", "sentence_transformers", "/wrappers/rag.py", "/utils/memory_indexer.py")),
+    ("providers", ("/aegis/providers/", "/openai/", "/httpx/", "/httpcore/")),
+    ("executors", ("/aegis/executors/", "/paramiko/", "/docker/", "/kubernetes/", "/redis/")),
+    ("tools", ("/aegis/tools/",)),
+    (
+        "tracing",
+        (
+            "/utils/tracing.py",
+            "/utils/log_sinks.py",
+            "/utils/replay_logger.py",
+            "/utils/timeline.py",
+            "/langfuse/",
+        ),
+    ),
+    ("task_state", ("/aegis/agents/", "/langgraph/")),
+)
+
+
+def _profiling_settings() -> Dict[str, Any]:
+    try:
+        from aegis.utils.config import get_config
+
+        return dict(get_config().get("profiling") or {})
+    except Exception:
+        return {}
+
+
+def _rss() -> Optional[int]:
+    try:
+        return _PROCESS.memory_info().rss if _PROCESS is not None else None
+    except Exception:
+        return None
+
+
+def component_of(traceback: tracemalloc.Traceback) -> str:
+    """Returns the `COMPONENTS` entry an allocation traceback belongs to."""
+    for frame in reversed(traceback):
+        filename = frame.filename.replace("\\", "/")
+        for component, fragments in COMPONENTS:
+            if any(f in filename for f in fragments):
+                return component
+    return "other"
+
+
+class _TaskMemory:
+    """Per-task baseline, last snapshot and step records."""
+
+    def __init__(self, threshold_bytes: int):
+        self.seq = 0
+        self.threshold = threshold_bytes
+        self.baseline_rss: Optional[int] = None
+        self.next_dump_at: Optional[int] = None
+        self.last: Optional[tracemalloc.Snapshot] = None
+        self.steps: List[Dict[str, Any]] = []
+        self.components: Dict[str, int] = {}
+        self.sites: Dict[str, int] = {}
+        self.snapshots: List[str] = []
+
+
+_TASKS: Dict[str, _TaskMemory] = {}
+_TASKS_LOCK = threading.Lock()
+_STARTED_TRACING = False
+
+
+def _ensure_tracing() -> None:
+    global _STARTED_TRACING
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(int(_profiling_settings().get("memory_nframes") or 25))
+        _STARTED_TRACING = True
+
+
+def _task_id_of(state: Any) -> Optional[str]:
+    if isinstance(state, dict):
+        return state.get("task_id")
+    return getattr(state, "task_id", None)
+
+
+def _state_size(state: Any) -> Tuple[int, Optional[int]]:
+    history = state.get("history") if isinstance(state, dict) else getattr(state, "history", None)
+    try:
+        size = len(state.model_dump_json()) if hasattr(state, "model_dump_json") else None
+    except Exception:
+        size = None
+    return len(history or ()), size
+
+
+def _get_task(task_id: str) -> Tuple[_TaskMemory, int]:
+    with _TASKS_LOCK:
+        mem = _TASKS.get(task_id)
+        if mem is None:
+            _ensure_tracing()
+            threshold_mb = float(_profiling_settings().get("memory_snapshot_threshold_mb") or 512)
+            mem = _TASKS[task_id] = _TaskMemory(int(threshold_mb * _MB))
+            mem.last = tracemalloc.take_snapshot()
+        mem.seq += 1
+        return mem, mem.seq
+
+
+def _diff(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, top_n: int):
+    """Growth by component and the top growing allocation sites."""
+    components: Dict[str, int] = {}
+    sites: Dict[str, int] = {}
+    for stat in after.compare_to(before, "traceback"):
+        if not stat.size_diff:
+            continue
+        component = component_of(stat.traceback)
+        components[component] = components.get(component, 0) + stat.size_diff
+        frame = stat.traceback[-1]
+        site = f"{frame.filename}:{frame.lineno}"
+        sites[site] = sites.get(site, 0) + stat.size_diff
+    top = sorted(sites.items(), key=lambda kv: kv[1], reverse=True)[:top_n]
+    return components, top
+
+
+def _record_step(
+    task_id: str, mem: _TaskMemory, seq: int, node_id: str, rss_before: Optional[int], state: Any
+) -> Dict[str, Any]:
+    after = tracemalloc.take_snapshot()
+    rss_after = _rss()
+    top_n = int(_profiling_settings().get("memory_top_n") or 10)
+    components, top = _diff(mem.last, after, top_n) if mem.last is not None else ({}, [])
+    history_len, state_bytes = _state_size(state)
+    step = {
+        "seq": seq,
+        "node": node_id,
+        "rss_mb": round(rss_after / _MB, 1) if rss_after is not None else None,
+        "rss_delta_mb": (
+            round((rss_after - rss_before) / _MB, 2)
+            if rss_after is not None and rss_before is not None
+            else None
+        ),
+        "traced_delta_kb": round(sum(components.values()) / 1024, 1),
+        "components_kb": {k: round(v / 1024, 1) for k, v in components.items()},
+        "top_sites_kb": [(site, round(size / 1024, 1)) for site, size in top],
+        "history_len": history_len,
+        "state_kb": round(state_bytes / 1024, 1) if state_bytes is not None else None,
+    }
+    with _TASKS_LOCK:
+        mem.last = after
+        mem.steps.append(step)
+        for k, v in components.items():
+            mem.components[k] = mem.components.get(k, 0) + v
+        for site, size in top:
+            mem.sites[site] = mem.sites.get(site, 0) + size
+        current = rss_after if rss_after is not None else tracemalloc.get_traced_memory()[0]
+        if mem.baseline_rss is None:
+            mem.baseline_rss = rss_before if rss_before is not None else current
+            mem.next_dump_at = mem.baseline_rss + mem.threshold
+        dump = current >= mem.next_dump_at
+        if dump:
+            mem.next_dump_at = current + mem.threshold
+    if dump:
+        try:
+            mem.snapshots += [str(p) for p in _save_snapshot(task_id, seq, node_id, after)]
+        except Exception as e:
+            logger.warning(f"Failed to save memory snapshot for node '{node_id}': {e}")
+    return step
+
+
+def _save_snapshot(
+    task_id: str, seq: int, node_id: str, snapshot: tracemalloc.Snapshot
+) -> List[Path]:
+    from aegis.utils.artifact_manager import save_artifact
+
+    tool = f"memory_{seq:03d}_{node_id}"
+    saved = []
+    with tempfile.TemporaryDirectory(prefix="aegis-memory-") as tmp:
+        dump_path = Path(tmp) / f"{tool}.tracemalloc"
+        snapshot.dump(str(dump_path))
+        text_path = Path(tmp) / f"{tool}.txt"
+        lines = []
+        for stat in snapshot.statistics("traceback")[:25]:
+            lines.append(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks")
+            lines += [f"    {line}" for line in stat.traceback.format()]
+        text_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        for path in (dump_path, text_path):
+            saved.append(save_artifact(path, task_id, tool))
+    logger.warning(
+        f"Memory growth threshold crossed at step {seq} ({node_id}); snapshot saved.",
+        extra={"event_type": "MemorySnapshot", "artifacts": [str(p) for p in saved]},
+    )
+    return saved
+
+
+def _finish(
+    task_id: str,
+    mem: _TaskMemory,
+    seq: int,
+    node_id: str,
+    rss_before: Optional[int],
+    state: Any,
+    attrs: Dict[str, Any],
+) -> None:
+    with _TASKS_LOCK:
+        if _TASKS.get(task_id) is not mem:
+            # Reported (and released) while this node ran, e.g. by summarize_result.
+            return
+    try:
+        step = _record_step(task_id, mem, seq, node_id, rss_before, state)
+        attrs.update(
+            {k: step[k] for k in ("seq", "rss_mb", "rss_delta_mb", "traced_delta_kb", "history_len", "state_kb")}
+        )
+        logger.info(
+            f"Memory after '{node_id}': RSS {step['rss_mb']} MB "
+            f"({step['rss_delta_mb']:+} MB), traced {step['traced_delta_kb']:+} KB"
+            if step["rss_delta_mb"] is not None
+            else f"Memory after '{node_id}': traced {step['traced_delta_kb']:+} KB",
+            extra={"event_type": "MemoryStep", **step},
+        )
+    except Exception as e:
+        logger.warning(f"Memory instrumentation failed for node '{node_id}': {e}")
+
+
+def memory_node(node_id: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wraps a graph node so each call's memory growth is recorded.
+
+    :param node_id: The node's id in the graph, used in records and artifacts.
+    :type node_id: str
+    :param func: The node function (sync or async).
+    :type func: Callable[..., Any]
+    :return: A wrapper with the same signature.
+    :rtype: Callable[..., Any]
+    """
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(state: Any, *args: Any, **kwargs: Any) -> Any:
+            task_id = _task_id_of(state) or "session"
+            mem, seq = _get_task(task_id)
+            rss_before = _rss()
+            with span("memory.step", run_id=task_id, node=node_id) as attrs:
+                try:
+                    return await func(state, *args, **kwargs)
+                finally:
+                    _finish(task_id, mem, seq, node_id, rss_before, state, attrs)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(state: Any, *args: Any, **kwargs: Any) -> Any:
+        task_id = _task_id_of(state) or "session"
+        mem, seq = _get_task(task_id)
+        rss_before = _rss()
+        with span("memory.step", run_id=task_id, node=node_id) as attrs:
+            try:
+                return func(state, *args, **kwargs)
+            finally:
+                _finish(task_id, mem, seq, node_id, rss_before, state, attrs)
+
+    return wrapper
+
+
+def _release(task_id: str) -> Optional[_TaskMemory]:
+    global _STARTED_TRACING
+    with _TASKS_LOCK:
+        mem = _TASKS.pop(task_id, None)
+        if not _TASKS and _STARTED_TRACING:
+            tracemalloc.stop()
+            _STARTED_TRACING = False
+    return mem
+
+
+def release_task(task_id: str) -> None:
+    """Drops a task's records without reporting them.
+
+    Called when a run ends for any reason, so a task that fails, pauses or is
+    cancelled before `summarize_result` does not keep its snapshots (or
+    tracemalloc) alive. A no-op for tasks already reported or never
+    instrumented.
+
+    :param task_id: The task whose records to drop.
+    :type task_id: str
+    """
+    _release(task_id)
+
+
+def memory_report(task_id: str, top_n: Optional[int] = None) -> Optional[str]:
+    """Returns a markdown section summarizing a task's memory growth.
+
+    The task's records are released afterwards, and tracemalloc is stopped
+    if it was started here and no other instrumented task is left. Returns
+    None if the task was not instrumented.
+
+    :param task_id: The task to report.
+    :type task_id: str
+    :param top_n: Number of allocation sites to list; defaults to
+        `profiling.memory_top_n`.
+    :type top_n: Optional[int]
+    :return: The markdown section, or None.
+    :rtype: Optional[str]
+    """
+    mem = _release(task_id)
+    if mem is None or not mem.steps:
+        return None
+    if top_n is None:
+        top_n = int(_profiling_settings().get("memory_top_n") or 10)
+
+    last = mem.steps[-1]
+    lines = ["## Memory Profile"]
+    if mem.baseline_rss is not None and last["rss_mb"] is not None:
+        peak = max(s["rss_mb"] for s in mem.steps if s["rss_mb"] is not None)
+        lines.append(
+            f"RSS {mem.baseline_rss / _MB:.1f} MB at the first step, {last['rss_mb']:.1f} MB "
+            f"after the last ({len(mem.steps)} node calls, peak {peak:.1f} MB).\n"
+        )
+    lines += [
+        "| Node | RSS (MB) | RSS Δ (MB) | Traced Δ (KB) | History | State (KB) |",
+        "|---|---:|---:|---:|---:|---:|",
+    ]
+    for s in mem.steps:
+        lines.append(
+            f"| {s['seq']}. {s['node']} | {s['rss_mb']} | {s['rss_delta_mb']} "
+            f"| {s['traced_delta_kb']} | {s['history_len']} | {s['state_kb']} |"
+        )
+    if mem.components:
+        lines += ["\n**Traced growth by component:**\n", "| Component | KB |", "|---|---:|"]
+        for component, size in sorted(mem.components.items(), key=lambda kv: kv[1], reverse=True):
+            lines.append(f"| {component} | {size / 1024:.1f} |")
+    sites = sorted(mem.sites.items(), key=lambda kv: kv[1], reverse=True)[:top_n]
+    if sites:
+        lines += [f"\n**Top {top_n} growing allocation sites:**\n", "| Site | KB |", "|---|---:|"]
+        lines += [f"| `{site}` | {size / 1024:.1f} |" for site, size in sites]
+    if mem.snapshots:
+        lines.append(f"\nSnapshots saved after crossing the growth threshold: {len(mem.snapshots)} files in the artifacts directory.")
+    return "\n".join(lines) + "\n"
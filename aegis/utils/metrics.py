@@ -0,0 +1,431 @@
+# aegis/utils/metrics.py
+"""
+Prometheus metrics for agent, LLM and tool performance.
+
+A small in-process registry of counters, gauges and histograms that renders
+the Prometheus text exposition format (0.0.4). The dashboard serves it at
+`GET /metrics`. Shell runs have no HTTP server, so they write the same text
+to a node_exporter textfile collector file (`write_textfile`, and
+periodically via `start_textfile_writer`).
+
+Label cardinality is bounded: each metric keeps at most `max_series` label
+combinations, and further combinations are counted under a series whose
+labels are all "other". Label values are things like node names, tool names,
+backend profiles and outcomes, never task ids or free text.
+
+Usage:
+    from aegis.utils import metrics
+
+    metrics.TOOL_SECONDS.observe(0.42, tool="run_local_command", outcome="success")
+
+Config (config.yaml `metrics`): max_series, textfile_path,
+textfile_interval_s.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextvars
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from aegis.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+
+
+def _metrics_settings() -> Dict[str, Any]:
+    try:
+        from aegis.utils.config import get_config
+
+        return dict(get_config().get("metrics") or {})
+    except Exception:
+        return {}
+
+
+_SETTINGS = _metrics_settings()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        max_series: Optional[int] = None,
+        register: bool = True,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.max_series = int(max_series or _SETTINGS.get("max_series") or 200)
+        self._series: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if register:
+            REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        key = tuple(str(labels.get(n) if labels.get(n) is not None else "") for n in self.labelnames)
+        if key not in self._series and len(self._series) >= self.max_series:
+            return ("other",) * len(self.labelnames)
+        return key
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    """A monotonically increasing count (exposed as `<name>_total`)."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def _header(self) -> List[str]:
+        # HELP and TYPE name the sample family, which carries the suffix.
+        name = f"{self.name}_total"
+        return [f"# HELP {name} {self.documentation}", f"# TYPE {name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = list(self._series.items())
+        return self._header() + [
+            f"{self.name}_total{_format_labels(self.labelnames, k)} {_format_value(v)}"
+            for k, v in series
+        ]
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, or is read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._series[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Reads the (unlabelled) value from `function` at render time."""
+        self._function = function
+
+    def render(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return self._header() + [f"{self.name} {_format_value(self._function())}"]
+            except Exception:
+                return []
+        with self._lock:
+            series = list(self._series.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in series
+        ]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, *args: Any, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            key = self._key(labels)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(k, (list(v[0]), v[1], v[2])) for k, v in self._series.items()]
+        lines = self._header()
+        for key, (counts, total, count) in series:
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                running += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {running}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+# Callables returning extra exposition lines (e.g. metrics kept elsewhere).
+COLLECTORS: List[Callable[[], List[str]]] = []
+
+
+STEP_SECONDS = Histogram(
+    "aegis_step_duration_seconds", "Duration of agent graph steps.", ("node",)
+)
+LLM_SECONDS = Histogram(
+    "aegis_llm_request_duration_seconds",
+    "Duration of LLM requests.",
+    ("backend", "call_type", "outcome"),
+)
+LLM_PROMPT_TOKENS = Histogram(
+    "aegis_llm_prompt_tokens", "Prompt tokens per LLM request.", ("backend",), buckets=TOKEN_BUCKETS
+)
+LLM_COMPLETION_TOKENS = Histogram(
+    "aegis_llm_completion_tokens",
+    "Completion tokens per LLM request.",
+    ("backend",),
+    buckets=TOKEN_BUCKETS,
+)
+TOOL_SECONDS = Histogram(
+    "aegis_tool_duration_seconds", "Duration of tool calls.", ("tool", "outcome")
+)
+POLICY_DENIALS = Counter(
+    "aegis_policy_denials", "Tool calls denied by guardrails or policy.", ("tool",)
+)
+VERIFICATIONS = Counter(
+    "aegis_verification_outcomes", "Outcomes of step verification.", ("outcome",)
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "aegis_queue_wait_seconds",
+    "Time spent waiting: 'task' from enqueue to start, 'step' between graph nodes.",
+    ("queue",),
+)
+ACTIVE_TASKS = Gauge("aegis_active_tasks", "Agent tasks currently running in this process.")
+WEBSOCKET_CLIENTS = Gauge("aegis_websocket_clients", "Connected log-stream WebSocket clients.")
+
+
+_LLM_CALL_TYPE: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "aegis_llm_call_type", default=None
+)
+# Backend profile of the provider call in progress; `tracing.log_generation`
+# uses it to label the token counts it records.
+_LLM_BACKEND: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "aegis_llm_backend", default=None
+)
+
+
+@contextmanager
+def llm_call_type(call_type: str) -> Iterator[None]:
+    """Labels the LLM requests made inside the block with `call_type`."""
+    token = _LLM_CALL_TYPE.set(call_type)
+    try:
+        yield
+    finally:
+        _LLM_CALL_TYPE.reset(token)
+
+
+def record_llm_tokens(usage: Any, backend: Optional[str] = None) -> None:
+    """Observes prompt/completion token counts from a usage dict or object.
+
+    :param usage: e.g. ``{"prompt_tokens": 812, "completion_tokens": 64}``.
+    :type usage: Any
+    :param backend: Backend label; defaults to that of the provider call in progress.
+    :type backend: Optional[str]
+    """
+    if not usage:
+        return
+    backend = backend or _LLM_BACKEND.get() or "unknown"
+    get = usage.get if isinstance(usage, dict) else lambda k: getattr(usage, k, None)
+    for key, metric in (("prompt_tokens", LLM_PROMPT_TOKENS), ("completion_tokens", LLM_COMPLETION_TOKENS)):
+        value = get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            metric.observe(value, backend=backend)
+
+
+def instrument_llm(method: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorates an async provider method to time it per backend profile.
+
+    The backend label is the provider's profile name and the call type the
+    one set with `llm_call_type`, or `method`. Token counts are recorded by
+    `tracing.log_generation`, or here for structured results that carry the
+    raw response (instructor-based providers).
+
+    :param method: Fallback call type, e.g. "completion" or "structured".
+    :type method: str
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        async def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            backend = getattr(getattr(self, "config", None), "profile_name", None) or (
+                type(self).__name__.replace("Provider", "").lower()
+            )
+            call_type = _LLM_CALL_TYPE.get() or method
+            token = _LLM_BACKEND.set(backend)
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await func(self, *args, **kwargs)
+                outcome = "success"
+                raw = getattr(result, "_raw_response", None)
+                if raw is not None:
+                    record_llm_tokens(getattr(raw, "usage", None), backend)
+                return result
+            finally:
+                LLM_SECONDS.observe(
+                    time.perf_counter() - start, backend=backend, call_type=call_type, outcome=outcome
+                )
+                _LLM_BACKEND.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+def render_metrics() -> str:
+    """Renders every registered metric in the Prometheus text format."""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    for collector in COLLECTORS:
+        try:
+            lines += collector()
+        except Exception as e:
+            logger.debug(f"Metrics collector failed: {e}")
+    return "\n".join(lines) + "\n"
+
+
+def _loop_lag_lines() -> List[str]:
+    from aegis.utils.loop_watchdog import loop_lag_stats
+
+    stats = loop_lag_stats()
+    if not stats:
+        return []
+    name = "aegis_event_loop_lag_seconds"
+    lines = [f"# HELP {name} Event-loop heartbeat lag.", f"# TYPE {name} histogram"]
+    s = stats[0]
+    for bound, cumulative in s["buckets"]:
+        le = "+Inf" if bound == "+Inf" else _format_value(bound / 1000.0)
+        lines.append(f'{name}_bucket{{le="{le}"}} {cumulative}')
+    lines.append(f"{name}_sum {_format_value(s['sum_ms'] / 1000.0)}")
+    lines.append(f"{name}_count {s['count']}")
+    lines += [
+        "# HELP aegis_event_loop_stalls_total Event-loop stalls past the watchdog threshold.",
+        "# TYPE aegis_event_loop_stalls_total counter",
+        f"aegis_event_loop_stalls_total {s['stalls']}",
+    ]
+    return lines
+
+
+COLLECTORS.append(_loop_lag_lines)
+
+
+def write_textfile(path: Optional[str] = None) -> Optional[Path]:
+    """Atomically writes the metrics to a textfile collector file.
+
+    :param path: Target file; defaults to `metrics.textfile_path`.
+    :type path: Optional[str]
+    :return: The written path, or None if no path is configured or the write failed.
+    :rtype: Optional[Path]
+    """
+    target = path or _SETTINGS.get("textfile_path")
+    if not target:
+        return None
+    try:
+        out = Path(target)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+        tmp.write_text(render_metrics(), encoding="utf-8")
+        os.replace(tmp, out)
+        return out
+    except Exception as e:
+        logger.warning(f"Failed to write metrics textfile '{target}': {e}")
+        return None
+
+
+_WRITER: Optional[threading.Thread] = None
+
+
+def start_textfile_writer() -> None:
+    """Writes the textfile every `metrics.textfile_interval_s` and at exit."""
+    global _WRITER
+    if _WRITER is not None or not _SETTINGS.get("textfile_path"):
+        return
+    interval = float(_SETTINGS.get("textfile_interval_s") or 15)
+
+    def _loop() -> None:
+        while True:
+            time.sleep(interval)
+            write_textfile()
+
+    _WRITER = threading.Thread(target=_loop, name="aegis-metrics-textfile", daemon=True)
+    _WRITER.start()
+    atexit.register(write_textfile)
+
+
+def record_step(node: str, started: float, queue_ms: Optional[float] = None) -> None:
+    """Observes a graph step's duration and the queue wait before it.
+
+    :param node: The node name.
+    :type node: str
+    :param started: `time.perf_counter()` at the start of the step.
+    :type started: float
+    :param queue_ms: The step's ``queue`` phase (see `step_timing`), if any.
+    :type queue_ms: Optional[float]
+    """
+    STEP_SECONDS.observe(time.perf_counter() - started, node=node)
+    if queue_ms is not None:
+        QUEUE_WAIT_SECONDS.observe(queue_ms / 1000.0, queue="step")
@@ -0,0 +1,264 @@
+# aegis/utils/profiling.py
+"""
+Opt-in per-step CPU profiling of agent graph nodes.
+
+A run that sets `runtime.cpu_profile` (or `task run --profile` in the shell)
+gets a graph whose nodes are wrapped by `profile_node`. Each node call runs
+under cProfile while a sampling thread records the stacks of the thread the
+node runs on. Both results are saved through the artifact store:
+
+- `<task>_profile_<seq>_<node>_<ts>.pstats`: load with `pstats.Stats(path)` or
+  snakeviz.
+- `<task>_profile_<seq>_<node>_<ts>.collapsed`: folded stacks for
+  flamegraph.pl or speedscope.
+
+The stats are also merged per task, and `summarize_result` appends the top-N
+hot functions to summary.md (`profile_report`). The merged stats are dropped
+when they are reported or, at the latest, when the run ends (`release_task`),
+so failed, cancelled and paused runs do not keep them.
+
+Graphs built without profiling are not wrapped at all, so runs that do not
+opt in pay nothing. cProfile is per thread: an async node also records the
+coroutines of other tasks that run on the event loop while it awaits, and a
+node that starts while another node is profiled on the same thread runs
+unprofiled.
+
+Config (config.yaml `profiling`): sample_interval_ms, top_n.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import functools
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from aegis.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+def _profiling_settings() -> Dict[str, Any]:
+    try:
+        from aegis.utils.config import get_config
+
+        return dict(get_config().get("profiling") or {})
+    except Exception:
+        return {}
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval."""
+
+    def __init__(self, thread_id: int, interval_s: float):
+        super().__init__(name="aegis-profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while not self._done.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            parts = []
+            while frame is not None:
+                code = frame.f_code
+                parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if parts:
+                self.stacks[";".join(reversed(parts))] += 1
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+
+class _TaskProfile:
+    """Merged stats and artifact list for one task."""
+
+    def __init__(self):
+        self.seq = 0
+        self.stats: Optional[pstats.Stats] = None
+        self.steps: List[Dict[str, Any]] = []
+
+
+_TASKS: Dict[str, _TaskProfile] = {}
+_TASKS_LOCK = threading.Lock()
+_ACTIVE = threading.local()
+
+
+class _Session:
+    __slots__ = ("task_id", "node_id", "seq", "profiler", "sampler", "start")
+
+    def __init__(self, task_id: str, node_id: str, seq: int):
+        self.task_id = task_id
+        self.node_id = node_id
+        self.seq = seq
+        interval_ms = float(_profiling_settings().get("sample_interval_ms") or 5)
+        self.profiler = cProfile.Profile()
+        self.sampler = _StackSampler(threading.get_ident(), max(0.001, interval_ms / 1000.0))
+        self.start = time.perf_counter()
+
+
+def _task_id_of(state: Any) -> Optional[str]:
+    if isinstance(state, dict):
+        return state.get("task_id")
+    return getattr(state, "task_id", None)
+
+
+def _start(node_id: str, state: Any) -> Optional[_Session]:
+    if getattr(_ACTIVE, "on", False):
+        return None
+    task_id = _task_id_of(state) or "session"
+    with _TASKS_LOCK:
+        prof = _TASKS.setdefault(task_id, _TaskProfile())
+        prof.seq += 1
+        seq = prof.seq
+    session = _Session(task_id, node_id, seq)
+    _ACTIVE.on = True
+    session.sampler.start()
+    session.profiler.enable()
+    return session
+
+
+def _finish(session: _Session) -> None:
+    session.profiler.disable()
+    wall_ms = (time.perf_counter() - session.start) * 1000.0
+    _ACTIVE.on = False
+    session.sampler.stop()
+    try:
+        artifacts = _save_artifacts(session)
+        with _TASKS_LOCK:
+            prof = _TASKS.setdefault(session.task_id, _TaskProfile())
+            if prof.stats is None:
+                prof.stats = pstats.Stats(session.profiler)
+            else:
+                prof.stats.add(session.profiler)
+            prof.steps.append(
+                {
+                    "seq": session.seq,
+                    "node": session.node_id,
+                    "wall_ms": round(wall_ms, 1),
+                    "artifacts": [str(p) for p in artifacts],
+                }
+            )
+    except Exception as e:
+        logger.warning(f"Failed to save CPU profile for node '{session.node_id}': {e}")
+
+
+def _save_artifacts(session: _Session) -> List[Path]:
+    from aegis.utils.artifact_manager import save_artifact
+
+    tool = f"profile_{session.seq:03d}_{session.node_id}"
+    saved = []
+    with tempfile.TemporaryDirectory(prefix="aegis-profile-") as tmp:
+        pstats_path = Path(tmp) / f"{tool}.pstats"
+        session.profiler.dump_stats(str(pstats_path))
+        collapsed_path = Path(tmp) / f"{tool}.collapsed"
+        collapsed_path.write_text(
+            "".join(f"{stack} {count}\n" for stack, count in session.sampler.stacks.items()),
+            encoding="utf-8",
+        )
+        for path in (pstats_path, collapsed_path):
+            saved.append(save_artifact(path, session.task_id, tool))
+    return saved
+
+
+def profile_node(node_id: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wraps a graph node so each call is profiled and saved as artifacts.
+
+    :param node_id: The node's id in the graph, used in artifact names.
+    :type node_id: str
+    :param func: The node function (sync or async).
+    :type func: Callable[..., Any]
+    :return: A wrapper with the same signature.
+    :rtype: Callable[..., Any]
+    """
+    if asyncio.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(state: Any, *args: Any, **kwargs: Any) -> Any:
+            session = _start(node_id, state)
+            if session is None:
+                return await func(state, *args, **kwargs)
+            try:
+                return await func(state, *args, **kwargs)
+            finally:
+                _finish(session)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(state: Any, *args: Any, **kwargs: Any) -> Any:
+        session = _start(node_id, state)
+        if session is None:
+            return func(state, *args, **kwargs)
+        try:
+            return func(state, *args, **kwargs)
+        finally:
+            _finish(session)
+
+    return wrapper
+
+
+def release_task(task_id: str) -> None:
+    """Drops a task's merged stats without reporting them.
+
+    Called when a run ends for any reason. The per-step artifacts are kept.
+
+    :param task_id: The task whose stats to drop.
+    :type task_id: str
+    """
+    with _TASKS_LOCK:
+        _TASKS.pop(task_id, None)
+
+
+def profile_report(task_id: str, top_n: Optional[int] = None) -> Optional[str]:
+    """Returns a markdown section with the task's hottest functions.
+
+    The task's merged stats are released afterwards. Returns None if the task
+    was not profiled.
+
+    :param task_id: The task whose profiles to report.
+    :type task_id: str
+    :param top_n: Number of functions to list; defaults to `profiling.top_n`.
+    :type top_n: Optional[int]
+    :return: The markdown section, or None.
+    :rtype: Optional[str]
+    """
+    with _TASKS_LOCK:
+        prof = _TASKS.pop(task_id, None)
+    if prof is None or prof.stats is None:
+        return None
+    if top_n is None:
+        top_n = int(_profiling_settings().get("top_n") or 20)
+
+    rows = sorted(prof.stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+    lines = [
+        "## CPU Profile",
+        f"Profiled {len(prof.steps)} node calls "
+        f"({sum(s['wall_ms'] for s in prof.steps) / 1000.0:.2f}s wall). "
+        "Per-step `.pstats` and `.collapsed` files are in the artifacts directory.\n",
+        "| Node | Wall (ms) |",
+        "|---|---:|",
+    ]
+    lines += [f"| {s['seq']}. {s['node']} | {s['wall_ms']:.1f} |" for s in prof.steps]
+    lines += [
+        f"\n**Top {top_n} functions by own time:**\n",
+        "| Function | Calls | Own (ms) | Cumulative (ms) |",
+        "|---|---:|---:|---:|",
+    ]
+    for (filename, line, name), (_, calls, own, cumulative, _) in rows[:top_n]:
+        where = f"{os.path.basename(filename)}:{line}" if line else filename
+        lines.append(
+            f"| `{name}` ({where}) | {calls} | {own * 1000:.1f} | {cumulative * 1000:.1f} |"
+        )
+    return "\n".join(lines) + "\n"
@@ -5,9 +5,26 @@ Tamper-evident provenance ledger (hash-chained JSONL).
 Each appended step is recorded as a JSON object with a `curr_hash` derived from:
     SHA256(prev_hash || canonical_json_without_hashes)
 
+Records are written in batches and the ledger is split into segments with
+Merkle checkpoints (see `_Ledger`), so `verify_ledger` can check segments in
+parallel. Processes sharing a ledger serialize their writes through a lock
+file and extend one chain:
+
+    python -m aegis.utils.provenance verify [--path P] [--workers N] [--run-id ID]
+
+A per-task, human-readable report (`reports/<task_id>/provenance.json`) is
+written at the end of each run by `generate_provenance_report`.
+
+Records written inside a scoped sub-goal loop carry its `sub_goal_index`;
+those loops number their steps from 0, so parallel sub-goals of one run can
+share a `step_index` (see aegis.agents.steps.sub_goal_dag).
+
 Environment:
     - AEGIS_PROVENANCE_PATH: target file path (default: ./provenance.log.jsonl)
 
+Config (config.yaml `provenance`): batch_size, flush_interval_ms,
+segment_max_bytes, checkpoint_every.
+
 Usage:
     from aegis.utils import provenance
     provenance.record_step(
@@ -25,14 +42,33 @@ Usage:
 
 from __future__ import annotations
 
+import argparse
+import atexit
 import os
 import io
 import json
 import hashlib
+import sys
 import threading
-from dataclasses import dataclass, asdict
+import time
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict, field
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from multiprocessing import get_context
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from aegis.utils.log_sinks import sub_goal_context
+from aegis.utils.step_timing import aggregate_timings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX: no inter-process locking
+    fcntl = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from aegis.agents.task_state import TaskState
 
 
 def _utc_now_iso() -> str:
@@ -63,52 +99,213 @@ class StepRecord:
     duration_ms: int
     prev_hash: str
     curr_hash: str
+    sub_goal_index: Optional[int] = None
+
+
+def _merkle_root(leaves: List[str]) -> str:
+    """Root of a binary Merkle tree over hex hashes (odd nodes are promoted)."""
+    if not leaves:
+        return _sha256("")
+    level = [bytes.fromhex(h) for h in leaves]
+    while len(level) > 1:
+        nxt = [
+            hashlib.sha256(level[i] + level[i + 1]).digest()
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level = nxt
+    return level[0].hex()
+
+
+def segment_paths(path: str) -> List[Tuple[int, Path]]:
+    """
+    Return the ledger's segments in chain order as (sequence, path).
+
+    Rolled segments are named `<stem>.<seq:06d><suffix>` next to the active
+    segment, which keeps the configured path and the next sequence number.
+    """
+    base = Path(path)
+    rolled = []
+    for p in base.parent.glob(f"{base.stem}.{'[0-9]' * 6}{base.suffix}"):
+        rolled.append((int(p.name[len(base.stem) + 1 : len(base.stem) + 7]), p))
+    rolled.sort()
+    active_seq = rolled[-1][0] + 1 if rolled else 1
+    if base.exists():
+        rolled.append((active_seq, base))
+    return rolled
+
+
+def checkpoint_path(path: str) -> Path:
+    """Return the Merkle checkpoint file that accompanies a ledger."""
+    base = Path(path)
+    return base.with_name(f"{base.stem}.checkpoints{base.suffix}")
+
+
+def lock_path(path: str) -> Path:
+    """Return the lock file that serializes writers sharing a ledger."""
+    base = Path(path)
+    return base.with_name(f"{base.stem}.lock")
+
+
+def _chain(prev_hash: str, unsigned: Dict[str, Any]) -> StepRecord:
+    # Hash every field the written line will carry, defaults included.
+    step = StepRecord(**unsigned, prev_hash=prev_hash, curr_hash="")  # type: ignore[arg-type]
+    material = {k: v for k, v in asdict(step).items() if k != "curr_hash"}
+    step.curr_hash = _sha256(_canonical_json(material))
+    return step
+
+
+def _ledger_settings() -> Dict[str, Any]:
+    try:
+        from aegis.utils.config import get_config
+
+        return dict(get_config().get("provenance") or {})
+    except Exception:
+        return {}
 
 
 class _Ledger:
-    """Append-only JSONL ledger with a rolling hash chain."""
+    """
+    Append-only JSONL ledger with a rolling hash chain.
+
+    Records are chained as they are appended, but written in batches: when
+    `batch_size` records are pending, every `flush_interval_ms` (background
+    thread), on `flush()` and at exit. The active segment rolls to
+    `<stem>.<seq>.jsonl` once it would exceed `segment_max_bytes`. Every
+    `checkpoint_every` records, and when a segment rolls, a Merkle checkpoint
+    over the covered records is appended to `<stem>.checkpoints.jsonl`, so each
+    segment can be verified on its own (see `verify_ledger`).
 
-    def __init__(self, path: Optional[str] = None):
+    Several processes may share one ledger. Writing a batch, checkpointing and
+    rolling all happen under an exclusive lock on `<stem>.lock`, which also
+    holds the hash of the last record written. A writer that finds another
+    process's tail there reloads the tail from disk and re-chains its pending
+    records onto it, so the hashes returned by `append()` are provisional
+    until the batch is written.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        *,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[float] = None,
+        segment_max_bytes: Optional[int] = None,
+        checkpoint_every: Optional[int] = None,
+    ):
+        cfg = _ledger_settings()
         self.path = path or os.getenv("AEGIS_PROVENANCE_PATH", "provenance.log.jsonl")
-        # In-memory tail hash; also recovered lazily from file when needed
+        self.batch_size = max(1, int(batch_size or cfg.get("batch_size") or 64))
+        self.flush_interval_s = (
+            flush_interval_ms or cfg.get("flush_interval_ms") or 200
+        ) / 1000.0
+        self.segment_max_bytes = int(
+            segment_max_bytes or cfg.get("segment_max_bytes") or 8 * 1024 * 1024
+        )
+        self.checkpoint_every = max(
+            1, int(checkpoint_every or cfg.get("checkpoint_every") or 256)
+        )
+        # Hash of the last record on disk, as of this process's last look.
         self._tail_hash: str = "GENESIS"
+        # Hash of the last appended record, pending ones included.
+        self._chain_tail: str = "GENESIS"
         self._tail_loaded = False
         self._lock = threading.Lock()
+        self._lock_fd: Optional[int] = None
+        self._lock_pid = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_checkpoints: List[str] = []
+        self._fh: Optional[io.TextIOWrapper] = None
+        self._seg_seq = 1
+        self._seg_bytes = 0
+        self._seg_lines = 0
+        # Records of the active segment not yet covered by a checkpoint.
+        self._leaves: List[str] = []
+        self._leaves_start = 0
+        self._leaves_prev = "GENESIS"
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
 
     def _ensure_tail_loaded(self) -> None:
         if self._tail_loaded:
             return
+        with self._file_lock():
+            self._load_tail_locked()
+        if not self._pending:
+            self._chain_tail = self._tail_hash
+
+    def _load_tail_locked(self) -> None:
         self._tail_loaded = True
+        self._tail_hash = "GENESIS"
+        self._seg_seq = 1
+        self._seg_bytes = 0
+        self._seg_lines = 0
+        self._leaves = []
+        self._leaves_start = 0
+        self._leaves_prev = "GENESIS"
+        self._pending_checkpoints = []
         try:
-            if not os.path.exists(self.path):
+            segments = segment_paths(self.path)
+            base = Path(self.path)
+            rolled = [s for s in segments if s[1] != base]
+            self._seg_seq = rolled[-1][0] + 1 if rolled else 1
+            if rolled:
+                last = _read_last_line(rolled[-1][1])
+                if last:
+                    self._tail_hash = json.loads(last).get("curr_hash", "GENESIS")
+            self._leaves_prev = self._tail_hash
+            if not base.exists():
                 return
-            last_line = None
-            with open(self.path, "rb") as f:
-                # Efficiently read last non-empty line
-                f.seek(0, os.SEEK_END)
-                pos = f.tell()
-                buf = bytearray()
-                while pos > 0:
-                    pos -= 1
-                    f.seek(pos)
-                    ch = f.read(1)
-                    if ch == b"\n":
-                        if buf:
-                            break
-                        continue
-                    buf.extend(ch)
-                if buf:
-                    last_line = bytes(reversed(buf)).decode("utf-8", "ignore")
-            if last_line:
-                obj = json.loads(last_line)
-                self._tail_hash = obj.get("curr_hash", "GENESIS")
+            # The active segment is bounded by segment_max_bytes, so reading it
+            # once to restore the uncheckpointed tail is cheap.
+            covered = 0
+            cp = checkpoint_path(self.path)
+            if cp.exists():
+                with open(cp, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            c = json.loads(line)
+                        except ValueError:
+                            continue
+                        if c.get("segment") == self._seg_seq:
+                            covered = int(c["start_line"]) + int(c["count"])
+            hashes: List[str] = []
+            with open(base, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        hashes.append(json.loads(line).get("curr_hash", "GENESIS"))
+            self._seg_bytes = base.stat().st_size
+            self._seg_lines = len(hashes)
+            if hashes:
+                self._tail_hash = hashes[-1]
+            self._leaves = hashes[covered:]
+            self._leaves_start = covered
+            self._leaves_prev = hashes[covered - 1] if covered else self._leaves_prev
         except Exception:
             # Fail open: keep GENESIS
             self._tail_hash = "GENESIS"
 
+    @contextmanager
+    def _file_lock(self) -> Iterator[Optional[int]]:
+        """Holds the inter-process lock; yields its fd (None without fcntl)."""
+        if fcntl is None:
+            yield None
+            return
+        if self._lock_fd is None or self._lock_pid != os.getpid():
+            # A forked child must not share its parent's lock (flock locks
+            # belong to the open file, which fork duplicates).
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._lock_fd = os.open(lock_path(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+            self._lock_pid = os.getpid()
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield self._lock_fd
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
     def _open_for_append(self):
         os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
-        # Use text mode with explicit utf-8 and line buffering
         return open(self.path, "a", encoding="utf-8")
 
     def append(self, rec: Dict[str, Any]) -> StepRecord:
@@ -119,29 +316,160 @@ class _Ledger:
             unsigned = {
                 k: v for k, v in rec.items() if k not in ("prev_hash", "curr_hash")
             }
-            prev_hash = self._tail_hash
-            material = _canonical_json({"prev_hash": prev_hash, **unsigned})
-            curr_hash = _sha256(material)
+            step = _chain(self._chain_tail, unsigned)
+            self._pending.append(unsigned)
+            self._chain_tail = step.curr_hash
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+            else:
+                self._ensure_flusher()
+            return step
 
-            full = {
-                **unsigned,
-                "prev_hash": prev_hash,
-                "curr_hash": curr_hash,
-            }
-            step = StepRecord(**full)  # type: ignore[arg-type]
+    def flush(self) -> None:
+        """Write all pending records and checkpoints."""
+        with self._lock:
+            self._flush_locked()
 
-            # Append line
-            try:
-                with self._open_for_append() as fh:
-                    fh.write(_canonical_json(asdict(step)))
-                    fh.write("\n")
-                    fh.flush()
-                self._tail_hash = curr_hash
-            except Exception:
-                # If write fails, do not update in-memory tail
-                pass
+    def close(self) -> None:
+        """Flush and close the active segment; the ledger stays usable."""
+        with self._lock:
+            self._closed = True
+            self._flush_locked()
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            if self._lock_fd is not None and self._lock_pid == os.getpid():
+                os.close(self._lock_fd)
+            self._lock_fd = None
 
-            return step
+    # --- internals (callers hold self._lock) ---
+
+    def _flush_locked(self) -> bool:
+        if not self._pending:
+            return True
+        try:
+            with self._file_lock() as lock_fd:
+                self._sync_tail_locked(lock_fd)
+                for unsigned in self._pending:
+                    self._write_record_locked(unsigned)
+                self._write_out_locked()
+                if lock_fd is not None:
+                    os.ftruncate(lock_fd, 0)
+                    os.pwrite(lock_fd, self._tail_hash.encode("ascii"), 0)
+        except Exception:
+            # Keep the records pending; the next flush reloads the tail from
+            # disk and retries them.
+            self._tail_loaded = False
+            if self._fh is not None:
+                try:
+                    self._fh.close()
+                except Exception:
+                    pass
+                self._fh = None
+            return False
+        self._pending.clear()
+        self._chain_tail = self._tail_hash
+        return True
+
+    def _sync_tail_locked(self, lock_fd: Optional[int]) -> None:
+        """Reloads the tail if another process has written since we last did."""
+        shared = os.pread(lock_fd, 128, 0).decode("ascii", "ignore") if lock_fd is not None else ""
+        if self._tail_loaded and (not shared or shared == self._tail_hash):
+            return
+        if self._fh is not None:
+            # The other writer may have rolled our open file into a segment.
+            self._fh.close()
+            self._fh = None
+        self._load_tail_locked()
+
+    def _write_record_locked(self, unsigned: Dict[str, Any]) -> None:
+        step = _chain(self._tail_hash, unsigned)
+        line = _canonical_json(asdict(step)) + "\n"
+        size = len(line.encode("utf-8"))
+        if self._seg_lines and self._seg_bytes + size > self.segment_max_bytes:
+            self._roll_locked()
+        if self._fh is None:
+            self._fh = self._open_for_append()
+        self._fh.write(line)
+        self._tail_hash = step.curr_hash
+        self._seg_bytes += size
+        self._seg_lines += 1
+        self._leaves.append(step.curr_hash)
+        if len(self._leaves) >= self.checkpoint_every:
+            self._checkpoint_locked()
+
+    def _write_out_locked(self) -> None:
+        if self._fh is not None:
+            self._fh.flush()
+        if self._pending_checkpoints:
+            with open(checkpoint_path(self.path), "a", encoding="utf-8") as fh:
+                fh.write("".join(self._pending_checkpoints))
+            self._pending_checkpoints.clear()
+
+    def _checkpoint_locked(self) -> None:
+        if not self._leaves:
+            return
+        checkpoint = {
+            "segment": self._seg_seq,
+            "start_line": self._leaves_start,
+            "count": len(self._leaves),
+            "prev_hash": self._leaves_prev,
+            "end_hash": self._leaves[-1],
+            "merkle_root": _merkle_root(self._leaves),
+            "utc_ts": _utc_now_iso(),
+        }
+        self._pending_checkpoints.append(_canonical_json(checkpoint) + "\n")
+        self._leaves_start += len(self._leaves)
+        self._leaves_prev = self._leaves[-1]
+        self._leaves = []
+
+    def _roll_locked(self) -> None:
+        self._checkpoint_locked()
+        self._write_out_locked()
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        base = Path(self.path)
+        try:
+            os.replace(base, base.with_name(f"{base.stem}.{self._seg_seq:06d}{base.suffix}"))
+        except OSError:
+            return
+        self._seg_seq += 1
+        self._seg_bytes = 0
+        self._seg_lines = 0
+        self._leaves_start = 0
+
+    def _ensure_flusher(self) -> None:
+        self._closed = False
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="aegis-provenance-flush", daemon=True
+            )
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            time.sleep(self.flush_interval_s)
+            with self._lock:
+                self._flush_locked()
+
+
+def _read_last_line(path: Path) -> Optional[str]:
+    # Efficiently read last non-empty line
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = bytearray()
+        while pos > 0:
+            pos -= 1
+            f.seek(pos)
+            ch = f.read(1)
+            if ch == b"\n":
+                if buf:
+                    break
+                continue
+            buf.extend(ch)
+    return bytes(reversed(buf)).decode("utf-8", "ignore") if buf else None
 
 
 # Singleton ledger
@@ -151,9 +479,18 @@ _ledger = _Ledger()
 def set_ledger_path(path: str) -> None:
     """Override the ledger file path programmatically (optional)."""
     global _ledger
+    _ledger.close()
     _ledger = _Ledger(path)
 
 
+def flush() -> None:
+    """Write any batched ledger records now (e.g. when a task ends)."""
+    _ledger.flush()
+
+
+atexit.register(lambda: _ledger.flush())
+
+
 def record_step(
     *,
     run_id: str,
@@ -183,5 +520,346 @@ def record_step(
         "observation_hash": observation_hash,
         "duration_ms": duration_ms,
         # prev_hash/curr_hash are set inside append()
+        "sub_goal_index": sub_goal_context.get(),
     }
     return _ledger.append(rec)
+
+
+def record_fault(
+    *,
+    run_id: str,
+    fault_index: int,
+    target: str,
+    method: str,
+    fault: str,
+    detail: Dict[str, Any] | None,
+) -> StepRecord:
+    """
+    Append an injected fault to the ledger (see aegis.utils.fault_injection).
+
+    Faults share the step record shape so the hash chain stays uniform: the
+    tool is `fault:<target>.<method>`, the status is `injected:<kind>`, and the
+    fault parameters are hashed in place of tool arguments.
+    """
+    detail = detail or {}
+    rec = {
+        "run_id": run_id,
+        "step_index": fault_index,
+        "utc_ts": _utc_now_iso(),
+        "tool": f"fault:{target}.{method}",
+        "args_hash": _sha256(_canonical_json(detail)),
+        "target_host": None,
+        "interface": None,
+        "status": f"injected:{fault}",
+        "observation_hash": _sha256(""),
+        "duration_ms": int(detail.get("latency_ms") or detail.get("after_ms") or 0),
+        "sub_goal_index": sub_goal_context.get(),
+    }
+    return _ledger.append(rec)
+
+
+def record_subagent(
+    *,
+    run_id: str,
+    child_run_id: str,
+    event: str,
+    step_index: int,
+    summary: Optional[str] = None,
+    duration_ms: int = 0,
+) -> StepRecord:
+    """
+    Append a sub-agent lifecycle event to the parent's chain.
+
+    The tool is `subagent:<child_run_id>` and the status `subagent:<event>`
+    (launched, completed, failed, cancelled, ...), so the parent/child link is
+    readable without the child's own records, which carry the child's run id.
+    """
+    rec = {
+        "run_id": run_id,
+        "step_index": step_index,
+        "utc_ts": _utc_now_iso(),
+        "tool": f"subagent:{child_run_id}",
+        "args_hash": _sha256(_canonical_json({"child_run_id": child_run_id})),
+        "target_host": None,
+        "interface": None,
+        "status": f"subagent:{event}",
+        "observation_hash": _sha256(summary or ""),
+        "duration_ms": duration_ms,
+        "sub_goal_index": sub_goal_context.get(),
+    }
+    return _ledger.append(rec)
+
+
+def _get_final_status(state: "TaskState") -> str:
+    """Derives SUCCESS / FAILURE / PARTIAL / NO_ACTION from the task history."""
+    if not state.history:
+        return "NO_ACTION"
+    last = state.history[-1]
+    if last.plan.tool_name == "finish":
+        status = str((last.plan.tool_args or {}).get("status", "success")).upper()
+        return status if status in ("SUCCESS", "FAILURE", "PARTIAL") else "PARTIAL"
+    return "FAILURE" if last.status == "failure" else "PARTIAL"
+
+
+def generate_provenance_report(state: "TaskState") -> Optional[Path]:
+    """
+    Write `reports/<task_id>/provenance.json` for a finished task.
+
+    :return: The report path, or None if it could not be written.
+    """
+    report = {
+        "task_id": state.task_id,
+        "task_prompt": state.task_prompt,
+        "final_status": _get_final_status(state),
+        "parent_task_id": getattr(state, "parent_task_id", None),
+        "subagents": [
+            h.model_dump() for h in (getattr(state, "subagents", None) or {}).values()
+        ],
+        "events": [
+            {
+                "step": i + 1,
+                "thought": entry.plan.thought,
+                "tool_name": entry.plan.tool_name,
+                "tool_args": entry.plan.tool_args,
+                "observation": entry.observation,
+                "status": entry.status,
+                "verification_status": entry.verification_status,
+                "start_time": entry.start_time,
+                "end_time": entry.end_time,
+                "duration_ms": entry.duration_ms,
+                "timings": getattr(entry, "timings", None) or {},
+            }
+            for i, entry in enumerate(state.history)
+        ],
+        "latency_breakdown": aggregate_timings(state.history),
+    }
+    path = Path("reports") / state.task_id / "provenance.json"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+    except Exception:
+        return None
+    return path
+
+
+# --- verification ---
+
+# Below this total ledger size, verify_ledger(workers=None) stays in-process.
+_PARALLEL_VERIFY_MIN_BYTES = 32 * 1024 * 1024
+
+
+@dataclass
+class LedgerBreak:
+    """The first place where a ledger fails verification."""
+
+    segment: str
+    line: int
+    index: int
+    run_id: Optional[str]
+    reason: str
+
+
+@dataclass
+class LedgerVerification:
+    """Outcome of `verify_ledger`."""
+
+    ok: bool
+    segments: int
+    entries: int
+    checkpoints: int
+    first_break: Optional[LedgerBreak] = None
+    run_entries: Optional[int] = None
+    duration_ms: int = 0
+    details: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _verify_segment(
+    path: str, ranges: List[Tuple[int, int]], run_id: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Verify one segment on its own (runs in a worker process).
+
+    Rehashes every record, checks the chain inside the segment and computes
+    the Merkle root of each checkpointed `(start_line, count)` range.
+    """
+    hashes: List[str] = []
+    first_prev: Optional[str] = None
+    breaks: List[Tuple[int, str, Optional[str]]] = []
+    run_entries = 0
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line_no, line in enumerate(f):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+                unsigned = {
+                    k: v for k, v in rec.items() if k not in ("prev_hash", "curr_hash")
+                }
+                prev_hash, curr_hash = rec["prev_hash"], rec["curr_hash"]
+            except (ValueError, KeyError, AttributeError, TypeError):
+                reason = "torn tail" if not line.endswith("\n") else "unparseable record"
+                breaks.append((line_no, reason, None))
+                break
+            if run_id is not None and rec.get("run_id") == run_id:
+                run_entries += 1
+            if first_prev is None:
+                first_prev = prev_hash
+            elif prev_hash != hashes[-1]:
+                breaks.append((line_no, "prev_hash does not match previous record", rec.get("run_id")))
+                break
+            material = _canonical_json({"prev_hash": prev_hash, **unsigned})
+            if _sha256(material) != curr_hash:
+                breaks.append((line_no, "record hash mismatch (modified record)", rec.get("run_id")))
+                break
+            hashes.append(curr_hash)
+    roots = []
+    for start, count in ranges:
+        if start + count > len(hashes):
+            roots.append(None)
+            continue
+        try:
+            roots.append(_merkle_root(hashes[start : start + count]))
+        except ValueError:
+            roots.append("")
+    return {
+        "count": len(hashes),
+        "first_prev": first_prev,
+        "last_hash": hashes[-1] if hashes else None,
+        "breaks": breaks,
+        "roots": roots,
+        "run_entries": run_entries,
+    }
+
+
+def verify_ledger(
+    path: Optional[str] = None,
+    *,
+    workers: Optional[int] = None,
+    run_id: Optional[str] = None,
+) -> LedgerVerification:
+    """
+    Verify a (segmented) ledger, checking segments in parallel.
+
+    Each segment is rehashed independently in a worker process and its
+    records are compared against the Merkle checkpoints recorded for it;
+    the segments are then stitched together by their boundary hashes. Tail
+    truncation is detected when a checkpoint covers records that are gone.
+
+    :param path: Ledger path (defaults to the active ledger's path).
+    :param workers: Worker processes (default: one per CPU for ledgers over
+        32 MiB, else in-process), capped by the number of segments.
+    :param run_id: Also count the entries recorded for this run.
+    :return: The verification result with the first break, if any.
+    """
+    started = time.monotonic()
+    path = path or _ledger.path
+    if path == _ledger.path:
+        _ledger.flush()
+    segments = segment_paths(path)
+    checkpoints: Dict[int, List[Dict[str, Any]]] = {}
+    cp = checkpoint_path(path)
+    if cp.exists():
+        with open(cp, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    c = json.loads(line)
+                    checkpoints.setdefault(int(c["segment"]), []).append(c)
+                except (ValueError, KeyError, TypeError):
+                    continue
+    jobs = [
+        (
+            str(p),
+            [(int(c["start_line"]), int(c["count"])) for c in checkpoints.get(seq, [])],
+            run_id,
+        )
+        for seq, p in segments
+    ]
+    if workers is None:
+        # Process start-up costs more than rehashing a small ledger.
+        total = sum(p.stat().st_size for _, p in segments)
+        workers = (os.cpu_count() or 1) if total >= _PARALLEL_VERIFY_MIN_BYTES else 1
+    workers = min(max(1, workers), max(1, len(jobs)))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as ex:
+            results = list(ex.map(_verify_segment, *zip(*jobs)))
+    else:
+        results = [_verify_segment(*job) for job in jobs]
+
+    verdict = LedgerVerification(
+        ok=True,
+        segments=len(segments),
+        entries=sum(r["count"] for r in results),
+        checkpoints=sum(len(v) for v in checkpoints.values()),
+        run_entries=sum(r["run_entries"] for r in results) if run_id is not None else None,
+    )
+    offset = 0
+    prev_last = "GENESIS"
+    for (seq, seg_path), result in zip(segments, results):
+        found: List[Tuple[int, str, Optional[str]]] = list(result["breaks"])
+        if result["first_prev"] is not None and result["first_prev"] != prev_last:
+            found.append((0, "chain does not continue from the previous segment", None))
+        for c, root in zip(checkpoints.get(seq, []), result["roots"]):
+            if root is None:
+                found.append((result["count"], f"records missing: checkpoint covers lines {c['start_line'] + 1}-{c['start_line'] + c['count']}", None))
+            elif root != c.get("merkle_root"):
+                found.append((int(c["start_line"]), "Merkle checkpoint mismatch", None))
+        verdict.details.append(
+            {"segment": seg_path.name, "entries": result["count"], "ok": not found}
+        )
+        if found and verdict.first_break is None:
+            line_no, reason, rid = min(found, key=lambda b: b[0])
+            verdict.ok = False
+            verdict.first_break = LedgerBreak(
+                segment=seg_path.name,
+                line=line_no + 1,
+                index=offset + line_no,
+                run_id=rid,
+                reason=reason,
+            )
+        offset += result["count"]
+        prev_last = result["last_hash"] or prev_last
+    verdict.duration_ms = int((time.monotonic() - started) * 1000)
+    return verdict
+
+
+def format_verification(result: LedgerVerification) -> str:
+    """Render a verification result for the terminal."""
+    lines = [
+        f"Segments: {result.segments}  Entries: {result.entries}  "
+        f"Checkpoints: {result.checkpoints}  ({result.duration_ms} ms)"
+    ]
+    if result.run_entries is not None:
+        lines.append(f"Entries for run: {result.run_entries}")
+    if result.ok:
+        lines.append("OK: hash chain and checkpoints verified.")
+    else:
+        b = result.first_break
+        lines.append(
+            f"BROKEN at {b.segment}:{b.line} (entry #{b.index})"
+            + (f" run {b.run_id}" if b.run_id else "")
+            + f": {b.reason}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point: `python -m aegis.utils.provenance verify`."""
+    parser = argparse.ArgumentParser(description="AEGIS provenance ledger tools.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    v = sub.add_parser("verify", help="Verify the ledger's hash chain and checkpoints")
+    v.add_argument("--path", default=None, help="Ledger path (default: AEGIS_PROVENANCE_PATH)")
+    v.add_argument("--workers", type=int, default=None, help="Worker processes")
+    v.add_argument("--run-id", dest="run_id", default=None, help="Also count this run's entries")
+    v.add_argument("--json", dest="json_out", action="store_true", help="Emit JSON")
+    args = parser.parse_args(argv)
+
+    result = verify_ledger(args.path, workers=args.workers, run_id=args.run_id)
+    if args.json_out:
+        print(json.dumps(asdict(result), ensure_ascii=False))
+    else:
+        print(format_verification(result))
+    return 0 if result.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,13 +13,18 @@ Usage:
 
 Notes:
 - This is **for logs only**. Do NOT use it to mutate/strip data used by the agent.
-- Redaction is best-effort and opinionated; expand PATTERNS as needed.
+- Redaction is best-effort and opinionated; expand PATTERNS as needed (call
+  `reload_patterns()` if you change them at runtime).
 """
 
 from __future__ import annotations
 
+import hashlib
 import re
-from typing import Any, Dict, Mapping, Sequence
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Sequence, Tuple
 
 # Case-insensitive key substrings that imply sensitive values
 KEY_PATTERNS = [
@@ -55,19 +60,93 @@ VALUE_PATTERNS = [
 
 REDACTED = "********"
 
-
+# Every VALUE_PATTERN is anchored at the start of the stripped string, begins
+# with one of these characters and needs at least this many of them. Strings
+# failing either check are skipped without running a regex; keep these in step
+# with VALUE_PATTERNS.
+VALUE_MIN_LEN = 8
+VALUE_FIRST_CHARS = frozenset(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-"
+)
+
+# Strings at least this long have their verdict cached by content, so the same
+# prompt or observation redacted several times per step is only scanned once.
+# The cache is keyed on length and digest and never holds the strings.
+CACHE_MIN_LEN = 256
+CACHE_MAX_ENTRIES = 1024
+
+_verdicts: "OrderedDict[Tuple[int, bytes], bool]" = OrderedDict()
+_verdicts_lock = threading.Lock()
+
+_KEY_RX: "re.Pattern[str]"
+_VALUE_RX: "re.Pattern[str]"
+
+
+def _compile() -> None:
+    """Build the combined key and value patterns from the pattern lists."""
+    global _KEY_RX, _VALUE_RX
+    _KEY_RX = re.compile("|".join(re.escape(p) for p in KEY_PATTERNS))
+    # One alternation; each branch keeps its own case sensitivity.
+    _VALUE_RX = re.compile(
+        "|".join(
+            f"(?{'i' if rx.flags & re.IGNORECASE else ''}:{rx.pattern})"
+            for rx in VALUE_PATTERNS
+        )
+    )
+
+
+def reload_patterns() -> None:
+    """Recompile after KEY_PATTERNS or VALUE_PATTERNS were changed at runtime."""
+    _compile()
+    _looks_sensitive_key.cache_clear()
+    with _verdicts_lock:
+        _verdicts.clear()
+
+
+@lru_cache(maxsize=4096)
 def _looks_sensitive_key(key: str) -> bool:
-    k = key.lower()
-    return any(p in k for p in KEY_PATTERNS)
+    return _KEY_RX.search(key.lower()) is not None
+
+
+def _scan_value(val: str) -> bool:
+    if len(val) < VALUE_MIN_LEN:
+        return False
+    first = val[0]
+    if first not in VALUE_FIRST_CHARS:
+        if not first.isspace():
+            return False
+        val = val.strip()
+        if len(val) < VALUE_MIN_LEN or val[0] not in VALUE_FIRST_CHARS:
+            return False
+    elif val[-1].isspace():
+        val = val.rstrip()
+    return _VALUE_RX.search(val) is not None
+
+
+def _long_value_is_sensitive(val: str) -> bool:
+    digest = hashlib.blake2b(
+        val.encode("utf-8", "surrogatepass"), digest_size=16
+    ).digest()
+    key = (len(val), digest)
+    with _verdicts_lock:
+        verdict = _verdicts.get(key)
+        if verdict is not None:
+            _verdicts.move_to_end(key)
+            return verdict
+    verdict = _scan_value(val)
+    with _verdicts_lock:
+        _verdicts[key] = verdict
+        if len(_verdicts) > CACHE_MAX_ENTRIES:
+            _verdicts.popitem(last=False)
+    return verdict
 
 
 def _looks_sensitive_value(val: Any) -> bool:
     if not isinstance(val, str):
         return False
-    s = val.strip()
-    if not s:
-        return False
-    return any(rx.search(s) for rx in VALUE_PATTERNS)
+    if len(val) >= CACHE_MIN_LEN:
+        return _long_value_is_sensitive(val)
+    return _scan_value(val)
 
 
 def _redact_primitive(val: Any) -> Any:
@@ -80,6 +159,10 @@ def _redact_primitive(val: Any) -> Any:
     return REDACTED
 
 
+def _redact_str(val: str) -> str:
+    return _redact_primitive(val) if _looks_sensitive_value(val) else val
+
+
 def redact_for_log(obj: Any) -> Any:
     """
     Return a structurally similar object with sensitive material masked.
@@ -88,23 +171,31 @@ def redact_for_log(obj: Any) -> Any:
     - Sequence: recurse each element.
     - String: redact if it matches sensitive value patterns; else pass through.
     - Everything else: pass through.
+
+    Each value is visited once: keys are matched against one combined pattern
+    (with a per-key cache) and strings against another.
     """
     try:
-        if isinstance(obj, Mapping):
+        if isinstance(obj, str):
+            return _redact_str(obj)
+        elif isinstance(obj, Mapping):
             out: Dict[str, Any] = {}
             for k, v in obj.items():
-                if _looks_sensitive_key(str(k)) or _looks_sensitive_value(v):
+                if _looks_sensitive_key(str(k)):
                     out[k] = _redact_primitive(v)
+                elif isinstance(v, str):
+                    out[k] = _redact_str(v)
                 else:
                     out[k] = redact_for_log(v)
             return out
         elif isinstance(obj, (list, tuple)):
             t = type(obj)
             return t(redact_for_log(x) for x in obj)
-        elif isinstance(obj, str):
-            return _redact_primitive(obj) if _looks_sensitive_value(obj) else obj
         else:
             return obj
     except Exception:
         # Fail-open, best effort: return a generic token if anything goes sideways
         return REDACTED
+
+
+_compile()
@@ -1,25 +1,61 @@
-# aegis/utils/replay_logger.py
 """
 Replay/event logger for AEGIS.
 
 - Writes newline-delimited JSON records to: reports/<run_id>/replay.jsonl
 - Creates directories on demand.
-- Uses flush + fsync for durability (best effort; never raises).
+- Keeps one open handle per task (LRU) and makes events durable according to
+  `replay.durability` in config.yaml:
+    * always      - flush + fsync after every event (the old behaviour)
+    * batched     - group commit: a background thread fsyncs every journal
+                    written to within the last `group_commit_ms`, so one
+                    fsync covers all events queued in that window (default)
+    * on_task_end - fsync only when the task's journal is closed
+  Every event is written to the OS immediately, so readers always see it; the
+  modes only differ in when it survives a machine crash.
+- Each record carries a CRC32 of its JSON body, so a torn tail left by a crash
+  is detected and skipped by `read_replay_events`.
+- Chat messages in event data (`data.messages`, e.g. PLANNER_INPUT) are
+  stored as content-addressed blocks: each distinct message is written once
+  per journal, and events list the digests of their messages
+  (`messages_ref`) plus only the blocks not written before (`blocks`).
+  Consecutive planner prompts share the system prompt and most of the
+  history, so a journal grows with the new messages per step instead of the
+  whole prompt. `read_replay_events` restores `data.messages` exactly.
+  Disable with `replay.prompt_dedup: false`.
+- Events logged inside a scoped sub-goal loop (`execute_sub_goal_dag`) carry
+  a top-level `sub_goal_index`; loops that run in parallel interleave their
+  events in the journal.
 - Tolerates non-JSON-serializable payloads by stringifying.
+- Best effort: never raises.
 """
 
 from __future__ import annotations
 
+import atexit
+import hashlib
 import json
 import os
+import threading
+import zlib
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Set, TextIO, Tuple
 from datetime import datetime, timezone
 
+from aegis.utils.log_sinks import sub_goal_context
 from aegis.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+DURABILITY_MODES = ("always", "batched", "on_task_end")
+
+# Name of the per-record checksum field.
+CRC_FIELD = "crc32"
+
+# Fields replacing `data.messages` in deduplicated events.
+MESSAGES_REF_FIELD = "messages_ref"
+BLOCKS_FIELD = "blocks"
+
 
 def _reports_dir() -> Path:
     return Path("reports")
@@ -40,25 +76,304 @@ def _utc_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _append_jsonl(path: Path, record: Dict[str, Any]) -> None:
+def _crc(body: str) -> str:
+    return format(zlib.crc32(body.encode("utf-8")), "08x")
+
+
+def _encode(record: Dict[str, Any]) -> str:
+    body = json.dumps(record, ensure_ascii=False)
+    return json.dumps({**record, CRC_FIELD: _crc(body)}, ensure_ascii=False) + "\n"
+
+
+def _fsync(f: TextIO) -> None:
+    try:
+        os.fsync(f.fileno())
+    except Exception:
+        # fsync may not be available on some platforms; ignore
+        pass
+
+
+class ReplayJournal:
+    """Per-task append handles with configurable fsync policy.
+
+    :param durability: One of 'always', 'batched' or 'on_task_end'.
+    :type durability: str
+    :param group_commit_ms: Window covered by one fsync in 'batched' mode.
+    :type group_commit_ms: float
+    :param max_open_files: Journals kept open at once; the least recently
+        used one is synced and closed when the limit is reached.
+    :type max_open_files: int
     """
-    Append a single JSON record + newline. Best-effort durability:
-    - open(..., 'a', buffering=1) for line-buffered text
-    - flush + os.fsync to reduce data loss on crash
-    Never raises; logs errors and returns.
+
+    def __init__(
+        self,
+        durability: str = "batched",
+        group_commit_ms: float = 20.0,
+        max_open_files: int = 64,
+    ):
+        if durability not in DURABILITY_MODES:
+            logger.warning(
+                "Unknown replay durability %r; using 'batched'.", durability
+            )
+            durability = "batched"
+        self.durability = durability
+        self.group_commit_s = max(0.001, group_commit_ms / 1000.0)
+        self.max_open_files = max(1, max_open_files)
+        self._files: "OrderedDict[Path, TextIO]" = OrderedDict()
+        self._dirty: Dict[Path, TextIO] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._committer: Optional[threading.Thread] = None
+        self.fsyncs = 0
+
+    def append(self, path: Path, record: Dict[str, Any]) -> None:
+        """Writes one record and applies the durability policy.
+
+        :param path: The journal file.
+        :type path: Path
+        :param record: The JSON-serializable record.
+        :type record: Dict[str, Any]
+        """
+        line = _encode(record)
+        with self._lock:
+            f = self._handle(path)
+            f.write(line)
+            f.flush()
+            if self.durability == "always":
+                _fsync(f)
+                self.fsyncs += 1
+            elif self.durability == "batched":
+                self._dirty[path] = f
+                self._ensure_committer()
+
+    def close(self, path: Path) -> None:
+        """Syncs and closes one journal (called when its task ends).
+
+        :param path: The journal file.
+        :type path: Path
+        """
+        with self._lock:
+            self._dirty.pop(path, None)
+            f = self._files.pop(path, None)
+            if f is not None:
+                self._close_file(f)
+
+    def close_all(self) -> None:
+        """Syncs and closes every open journal."""
+        with self._lock:
+            self._dirty.clear()
+            while self._files:
+                _, f = self._files.popitem(last=False)
+                self._close_file(f)
+
+    # --- internals (callers hold self._lock) ---
+
+    def _handle(self, path: Path) -> TextIO:
+        f = self._files.get(path)
+        if f is not None:
+            self._files.move_to_end(path)
+            return f
+        if len(self._files) >= self.max_open_files:
+            old_path, old = self._files.popitem(last=False)
+            self._dirty.pop(old_path, None)
+            self._close_file(old)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        f = path.open("a", encoding="utf-8")
+        self._files[path] = f
+        return f
+
+    def _close_file(self, f: TextIO) -> None:
+        try:
+            f.flush()
+            if self.durability != "always":
+                _fsync(f)
+                self.fsyncs += 1
+            f.close()
+        except Exception as e:
+            logger.error("Failed to close replay journal: %s", e)
+
+    def _ensure_committer(self) -> None:
+        if self._committer is None or not self._committer.is_alive():
+            self._committer = threading.Thread(
+                target=self._commit_loop, name="aegis-replay-commit", daemon=True
+            )
+            self._committer.start()
+
+    def _commit_loop(self) -> None:
+        while True:
+            self._wake.wait(self.group_commit_s)
+            self._wake.clear()
+            with self._lock:
+                batch = []
+                for f in self._dirty.values():
+                    try:
+                        # A duplicate fd stays valid even if the journal is
+                        # closed while we sync it outside the lock.
+                        batch.append(os.dup(f.fileno()))
+                    except Exception:
+                        pass
+                self._dirty.clear()
+            for fd in batch:
+                try:
+                    os.fsync(fd)
+                    self.fsyncs += 1
+                except Exception:
+                    pass
+                finally:
+                    os.close(fd)
+
+
+def _message_digest(message: Dict[str, Any]) -> str:
+    body = json.dumps(message, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()[:16]
+
+
+class PromptBlocks:
+    """Tracks which message blocks each journal already contains.
+
+    Encoding and appending an event must happen under `lock`, so a record
+    never references a block that a concurrent writer has yet to append.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._written: Dict[Path, Set[str]] = {}
+
+    def encode(
+        self, path: Path, data: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], List[str]]:
+        """Replaces `data["messages"]` by digests and the blocks new to `path`.
+
+        :param path: The journal the event goes to.
+        :type path: Path
+        :param data: The event data.
+        :type data: Dict[str, Any]
+        :return: The encoded data and the digests it writes for the first
+            time (to be forgotten if the append fails).
+        :rtype: Tuple[Dict[str, Any], List[str]]
+        """
+        messages = data.get("messages")
+        if not isinstance(messages, list) or not all(
+            isinstance(m, dict) for m in messages
+        ):
+            return data, []
+        written = self._written.setdefault(path, set())
+        refs: List[str] = []
+        blocks: Dict[str, Any] = {}
+        for message in messages:
+            digest = _message_digest(message)
+            refs.append(digest)
+            if digest not in written and digest not in blocks:
+                blocks[digest] = message
+        written.update(blocks)
+        encoded = {k: v for k, v in data.items() if k != "messages"}
+        encoded[MESSAGES_REF_FIELD] = refs
+        encoded[BLOCKS_FIELD] = blocks
+        return encoded, list(blocks)
+
+    def discard(self, path: Path, digests: List[str]) -> None:
+        self._written.get(path, set()).difference_update(digests)
+
+    def forget(self, path: Path) -> None:
+        """Drops a closed journal; a reopened one gets its blocks again."""
+        with self.lock:
+            self._written.pop(path, None)
+
+
+def expand_messages(
+    events: List[Dict[str, Any]],
+    block_of: Optional[Callable[[str], Any]] = None,
+) -> int:
+    """Restores `data.messages` of deduplicated events in place.
+
+    :param events: A journal's events in file order.
+    :type events: List[Dict[str, Any]]
+    :param block_of: Looks up blocks written before `events` (e.g. in a
+        replay container); raises KeyError for unknown digests.
+    :type block_of: Optional[Callable[[str], Any]]
+    :return: The number of events left encoded because a block they
+        reference is missing (e.g. lost in a skipped record).
+    :rtype: int
+    """
+    blocks: Dict[str, Any] = {}
+    unresolved = 0
+    for event in events:
+        data = event.get("data")
+        if not isinstance(data, dict) or MESSAGES_REF_FIELD not in data:
+            continue
+        blocks.update(data.get(BLOCKS_FIELD) or {})
+        refs = data[MESSAGES_REF_FIELD]
+        if block_of is not None:
+            for ref in refs:
+                if ref not in blocks:
+                    try:
+                        blocks[ref] = block_of(ref)
+                    except KeyError:
+                        pass
+        if not all(ref in blocks for ref in refs):
+            unresolved += 1
+            continue
+        event["data"] = {
+            k: v for k, v in data.items() if k not in (MESSAGES_REF_FIELD, BLOCKS_FIELD)
+        }
+        event["data"]["messages"] = [blocks[ref] for ref in refs]
+    return unresolved
+
+
+_journal: Optional[ReplayJournal] = None
+_journal_lock = threading.Lock()
+_prompt_blocks: Optional[PromptBlocks] = None
+_prompt_dedup: Optional[bool] = None
+
+
+def _get_journal() -> ReplayJournal:
+    global _journal
+    if _journal is None:
+        with _journal_lock:
+            if _journal is None:
+                try:
+                    from aegis.utils.config import get_config
+
+                    cfg = get_config().get("replay") or {}
+                except Exception:
+                    cfg = {}
+                _journal = ReplayJournal(
+                    durability=str(cfg.get("durability") or "batched"),
+                    group_commit_ms=float(cfg.get("group_commit_ms") or 20.0),
+                    max_open_files=int(cfg.get("max_open_files") or 64),
+                )
+                atexit.register(_journal.close_all)
+    return _journal
+
+
+def _get_prompt_blocks() -> Optional[PromptBlocks]:
+    """The block tracker, or None if `replay.prompt_dedup` is off."""
+    global _prompt_blocks, _prompt_dedup
+    if _prompt_dedup is None:
+        with _journal_lock:
+            if _prompt_dedup is None:
+                try:
+                    from aegis.utils.config import get_config
+
+                    cfg = get_config().get("replay") or {}
+                except Exception:
+                    cfg = {}
+                _prompt_blocks = PromptBlocks()
+                _prompt_dedup = cfg.get("prompt_dedup", True) is not False
+    return _prompt_blocks if _prompt_dedup else None
+
+
+def _append_jsonl(path: Path, record: Dict[str, Any]) -> bool:
+    """
+    Append a single JSON record + newline through the replay journal.
+    Never raises; logs errors and returns False.
     """
     try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
-            try:
-                f.flush()
-                os.fsync(f.fileno())
-            except Exception:
-                # fsync may not be available on some platforms; ignore
-                pass
+        _get_journal().append(path, record)
+        return True
     except Exception as e:
         logger.error("Failed to append replay event to %s: %s", path, e)
+        return False
 
 
 def log_replay_event(
@@ -75,7 +390,113 @@ def log_replay_event(
             "event_type": event_type,
             "data": _safe_jsonable(data or {}),
         }
+        sub_goal_index = sub_goal_context.get()
+        if sub_goal_index is not None:
+            rec["sub_goal_index"] = sub_goal_index
         out = _reports_dir() / rid / "replay.jsonl"
-        _append_jsonl(out, rec)
+        blocks = _get_prompt_blocks()
+        # _safe_jsonable stringifies data it cannot serialize; such events are
+        # written as they are.
+        data = rec["data"]
+        if blocks is None or not isinstance(data, dict) or "messages" not in data:
+            _append_jsonl(out, rec)
+            return
+        with blocks.lock:
+            rec["data"], new = blocks.encode(out, rec["data"])
+            if not _append_jsonl(out, rec):
+                blocks.discard(out, new)
     except Exception as e:
         logger.error("log_replay_event failed: %s", e)
+
+
+def close_replay_journal(run_id: str) -> None:
+    """
+    Sync and close a task's replay journal when the task ends. Never throws.
+
+    With `replay.container: indexed` the journal is then compacted into an
+    indexed container (see `aegis.utils.replay_store`).
+    """
+    try:
+        path = _reports_dir() / run_id / "replay.jsonl"
+        _get_journal().close(path)
+        blocks = _get_prompt_blocks()
+        if blocks is not None:
+            blocks.forget(path)
+        from aegis.utils.replay_store import compact_replay_on_close
+
+        compact_replay_on_close(path.parent)
+    except Exception as e:
+        logger.error("close_replay_journal failed: %s", e)
+
+
+def read_replay_range(
+    path: Path, start: int = 0, end: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], int, int]:
+    """
+    Read the complete records of a journal between two byte offsets.
+
+    Unlike `read_replay_events`, deduplicated messages are left encoded.
+
+    :param path: The replay.jsonl file.
+    :type path: Path
+    :param start: Offset of the first record to read (a record boundary).
+    :type start: int
+    :param end: Stop before any record extending past this offset.
+    :type end: Optional[int]
+    :return: The intact events, the number of skipped lines, and the offset
+        after the last line consumed (where a later read should start).
+    :rtype: Tuple[List[Dict[str, Any]], int, int]
+    """
+    events: List[Dict[str, Any]] = []
+    skipped = 0
+    pos = start
+    with open(path, "rb") as f:
+        f.seek(start)
+        for raw in f:
+            if end is not None and pos + len(raw) > end:
+                break
+            pos += len(raw)
+            line = raw.decode("utf-8", errors="replace")
+            if not line.strip():
+                continue
+            if not line.endswith("\n"):
+                skipped += 1
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if not isinstance(rec, dict):
+                skipped += 1
+                continue
+            crc = rec.pop(CRC_FIELD, None)
+            if crc is not None and crc != _crc(json.dumps(rec, ensure_ascii=False)):
+                skipped += 1
+                continue
+            events.append(rec)
+    return events, skipped, pos
+
+
+def read_replay_events(path: Path) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Read a replay journal, skipping records that fail their checksum.
+
+    A crash can leave a torn last line; such lines (unterminated, not valid
+    JSON, or with a mismatching CRC) are skipped and counted. Records written
+    before checksums were introduced are accepted as-is. Deduplicated chat
+    messages are restored to `data.messages` (see `expand_messages`).
+
+    :param path: The replay.jsonl file.
+    :type path: Path
+    :return: The intact events (without the checksum field) and the number of
+        skipped lines.
+    :rtype: Tuple[List[Dict[str, Any]], int]
+    """
+    events, skipped, _ = read_replay_range(path)
+    unresolved = expand_messages(events)
+    if unresolved:
+        logger.warning(
+            "%s: %d event(s) reference missing message blocks.", path, unresolved
+        )
+    return events, skipped
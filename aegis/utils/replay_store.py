@@ -0,0 +1,576 @@
+# aegis/utils/replay_store.py
+"""
+Indexed, compressed replay container with random access.
+
+`reports/<task_id>/replay.zst` holds a task's replay events as independent
+zstd frames, one per step. A step starts at a PLANNER_INPUT event and runs
+up to the next one; events before the first belong to step 0. Steps are
+counted in journal order, so when sub-goals run in parallel a step can hold
+events of another sub-goal; those events keep their `sub_goal_index`. The
+sidecar `replay.idx.json` maps every event to its frame:
+
+    {"version": 1,
+     "frames": [[offset, length, step], ...],
+     "events": [[step, event_type, ts_iso, frame, position], ...],
+     "blocks": {digest: frame, ...},
+     "container_bytes": size,
+     "jsonl_offset": converted_bytes,
+     "source": {"events": n, "skipped": k, "bytes": jsonl_size}}
+
+A reader decompresses only the frames holding the events it is asked for.
+Event types, timestamps and steps are answered from the index alone. Chat
+message blocks (see `replay_logger`) stay deduplicated across frames: the
+index records the frame that stores each block, and a reader loads it when an
+event references a block from an earlier step.
+
+`convert_jsonl` builds the container from a `replay.jsonl` journal. The
+container is complete once its index exists, since the index is written last.
+A journal kept after conversion may still grow; `jsonl_offset` records how
+much of it the container holds, and readers append only the rest. With
+`replay.container: indexed` a task's journal is converted in the background
+when the task ends: it is renamed to `.replay.jsonl.compacting`, merged into
+the container and removed, so a task resumed meanwhile starts a new journal.
+`open_replay` returns a reader for either format, so callers do not care
+which one a task has.
+
+Requires the optional `zstandard` package.
+
+Config (config.yaml `replay`): container, zstd_level.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from aegis.exceptions import ReplayError
+from aegis.utils.logger import setup_logger
+from aegis.utils.replay_logger import (
+    BLOCKS_FIELD,
+    PromptBlocks,
+    expand_messages,
+    read_replay_range,
+)
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = setup_logger(__name__)
+
+JSONL_FILE = "replay.jsonl"
+CONTAINER_FILE = "replay.zst"
+INDEX_FILE = "replay.idx.json"
+INDEX_VERSION = 1
+# replay.jsonl is renamed to this while it is being compacted.
+COMPACTING_FILE = ".replay.jsonl.compacting"
+
+# Event that opens a new step.
+STEP_EVENT = "PLANNER_INPUT"
+
+
+def _replay_settings() -> Dict[str, Any]:
+    try:
+        from aegis.utils.config import get_config
+
+        return dict(get_config().get("replay") or {})
+    except Exception:
+        return {}
+
+
+def _require_zstandard() -> Any:
+    if zstandard is None:
+        raise ReplayError(
+            "The 'zstandard' package is required for indexed replay containers."
+        )
+    return zstandard
+
+
+def assign_steps(events: List[Dict[str, Any]], seen: int = 0) -> List[int]:
+    """Returns the step of each event, in order (see module docstring).
+
+    :param events: Events in journal order.
+    :type events: List[Dict[str, Any]]
+    :param seen: PLANNER_INPUT events that precede `events` in the journal.
+    :type seen: int
+    """
+    steps = []
+    for event in events:
+        if event.get("event_type") == STEP_EVENT:
+            seen += 1
+        steps.append(max(0, seen - 1))
+    return steps
+
+
+def _journal_files(task_dir: Path, offset: int) -> List[Tuple[Path, int]]:
+    """The unconverted journal files of a task, in order, with read offsets.
+
+    While a journal is being compacted it is renamed to COMPACTING_FILE, and
+    the index's `jsonl_offset` applies to it; a replay.jsonl next to it is
+    newer (the task was resumed meanwhile) and is read from the start.
+    """
+    if (task_dir / COMPACTING_FILE).is_file():
+        return [(task_dir / COMPACTING_FILE, offset), (task_dir / JSONL_FILE, 0)]
+    return [(task_dir / JSONL_FILE, offset)]
+
+
+def _read_journal(
+    task_dir: Path, offset: int = 0, end: Optional[int] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Reads the journal events not yet in the container, still encoded.
+
+    :param offset: Bytes of the journal already in the container.
+    :param end: Read replay.jsonl only up to this size.
+    :return: The events, plus `skipped` records, `bytes` consumed and the
+        `jsonl_offset` a container holding these events should record.
+    """
+    events: List[Dict[str, Any]] = []
+    info = {"skipped": 0, "bytes": 0, "jsonl_offset": 0}
+    for path, start in _journal_files(task_dir, offset):
+        if not path.is_file():
+            continue
+        bound = end if path.name == JSONL_FILE else None
+        chunk, skipped, stop = read_replay_range(path, start, bound)
+        events.extend(chunk)
+        info["skipped"] += skipped
+        info["bytes"] += max(0, stop - start)
+        if path.name == JSONL_FILE:
+            info["jsonl_offset"] = stop
+    return events, info
+
+
+def convert_jsonl(
+    jsonl_path: Union[str, Path],
+    out_dir: Optional[Union[str, Path]] = None,
+    level: Optional[int] = None,
+) -> Path:
+    """Builds an indexed container from a replay.jsonl journal.
+
+    Records failing their checksum are skipped, as by `read_replay_events`.
+    The journal is left in place; readers ignore the part already converted.
+
+    :param jsonl_path: The journal to convert.
+    :type jsonl_path: Union[str, Path]
+    :param out_dir: Where to write replay.zst and replay.idx.json; defaults to
+        the journal's directory.
+    :type out_dir: Optional[Union[str, Path]]
+    :param level: zstd compression level; defaults to `replay.zstd_level`.
+    :type level: Optional[int]
+    :return: The path of the index file.
+    :rtype: Path
+    :raises ReplayError: If zstandard is missing or the journal is unreadable.
+    """
+    _require_zstandard()
+    jsonl_path = Path(jsonl_path)
+    out = Path(out_dir) if out_dir else jsonl_path.parent
+    try:
+        events, skipped, stop = read_replay_range(
+            jsonl_path, 0, jsonl_path.stat().st_size
+        )
+    except OSError as e:
+        raise ReplayError(f"Cannot read replay journal '{jsonl_path}': {e}") from e
+    expand_messages(events)
+    same_dir = out.resolve() == jsonl_path.parent.resolve()
+    index = write_container(
+        events,
+        out,
+        level=level,
+        source={"skipped": skipped, "bytes": stop},
+        jsonl_offset=stop if same_dir else 0,
+    )
+    logger.info(
+        f"Converted {jsonl_path} ({stop} bytes, {len(events)} events) to "
+        f"{out / CONTAINER_FILE} ({(out / CONTAINER_FILE).stat().st_size} bytes)."
+    )
+    return index
+
+
+def write_container(
+    events: List[Dict[str, Any]],
+    out_dir: Union[str, Path],
+    level: Optional[int] = None,
+    source: Optional[Dict[str, Any]] = None,
+    jsonl_offset: int = 0,
+) -> Path:
+    """Writes events (with `data.messages` expanded) as an indexed container.
+
+    :param events: The events in journal order.
+    :type events: List[Dict[str, Any]]
+    :param out_dir: Where to write replay.zst and replay.idx.json.
+    :type out_dir: Union[str, Path]
+    :param level: zstd compression level; defaults to `replay.zstd_level`.
+    :type level: Optional[int]
+    :param source: Extra facts about the source, stored in the index.
+    :type source: Optional[Dict[str, Any]]
+    :param jsonl_offset: Bytes of the replay.jsonl in `out_dir` that `events`
+        already cover.
+    :type jsonl_offset: int
+    :return: The path of the index file.
+    :rtype: Path
+    """
+    zstd = _require_zstandard()
+    out = Path(out_dir)
+    level = int(level if level is not None else _replay_settings().get("zstd_level") or 3)
+    compressor = zstd.ZstdCompressor(level=level, write_checksum=True)
+    blocks = PromptBlocks()
+    container = out / CONTAINER_FILE
+    index: Dict[str, Any] = {
+        "version": INDEX_VERSION,
+        "frames": [],
+        "events": [],
+        "blocks": {},
+        "source": {"events": len(events), **(source or {})},
+        "jsonl_offset": jsonl_offset,
+    }
+
+    by_step: "OrderedDict[int, List[Dict[str, Any]]]" = OrderedDict()
+    for step, event in zip(assign_steps(events), events):
+        by_step.setdefault(step, []).append(event)
+
+    out.mkdir(parents=True, exist_ok=True)
+    tmp_container = out / f".{CONTAINER_FILE}.tmp"
+    tmp_index = out / f".{INDEX_FILE}.tmp"
+    offset = 0
+    with open(tmp_container, "wb") as f:
+        for step, step_events in by_step.items():
+            frame_no = len(index["frames"])
+            lines = []
+            for position, event in enumerate(step_events):
+                data = event.get("data")
+                if isinstance(data, dict) and "messages" in data:
+                    event = dict(event)
+                    event["data"], new = blocks.encode(container, data)
+                    for digest in new:
+                        index["blocks"][digest] = frame_no
+                lines.append(json.dumps(event, ensure_ascii=False))
+                index["events"].append(
+                    [step, event.get("event_type"), event.get("ts_iso"), frame_no, position]
+                )
+            frame = compressor.compress(("\n".join(lines) + "\n").encode("utf-8"))
+            f.write(frame)
+            index["frames"].append([offset, len(frame), step])
+            offset += len(frame)
+    index["container_bytes"] = offset
+    tmp_index.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp_container, container)
+    os.replace(tmp_index, out / INDEX_FILE)
+    return out / INDEX_FILE
+
+
+class ReplayReader:
+    """Random-access reader for an indexed replay container.
+
+    A task resumed after its journal was compacted writes a new replay.jsonl
+    next to the container. Its events are read as a tail after the
+    container's, until the next compaction merges them in.
+
+    :param task_dir: The directory holding replay.zst and replay.idx.json.
+    :type task_dir: Union[str, Path]
+    :param cache_frames: Decompressed frames kept in memory.
+    :type cache_frames: int
+    :raises ReplayError: If the index is missing, unreadable or of an
+        unknown version, or zstandard is not installed.
+    """
+
+    indexed = True
+
+    def __init__(self, task_dir: Union[str, Path], cache_frames: int = 8):
+        self._zstd = _require_zstandard()
+        self.task_dir = Path(task_dir)
+        self.path = self.task_dir / CONTAINER_FILE
+        try:
+            self.index = json.loads((self.task_dir / INDEX_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            raise ReplayError(f"Cannot read replay index in '{task_dir}': {e}") from e
+        if self.index.get("version") != INDEX_VERSION:
+            raise ReplayError(
+                f"Unsupported replay index version {self.index.get('version')!r}."
+            )
+        try:
+            size = self.path.stat().st_size
+        except OSError as e:
+            raise ReplayError(f"Cannot read replay container '{self.path}': {e}") from e
+        if size != self.index.get("container_bytes"):
+            # Caught between the two renames of a rewrite, or a stray file.
+            raise ReplayError(f"Replay container '{self.path}' does not match its index.")
+        self.cache_frames = max(1, cache_frames)
+        self._frames: "OrderedDict[int, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.frames_read = 0
+
+    def _tail(
+        self, end: Optional[int] = None
+    ) -> Tuple[List[Tuple[int, Dict[str, Any]]], Dict[str, int]]:
+        try:
+            events, info = _read_journal(
+                self.task_dir, self.index.get("jsonl_offset", 0), end
+            )
+        except OSError as e:
+            raise ReplayError(f"Cannot read replay journal in '{self.task_dir}': {e}") from e
+        # Blocks written before the tail started live in the container.
+        expand_messages(events, self._block)
+        seen = sum(1 for e in self.index["events"] if e[1] == STEP_EVENT)
+        return list(zip(assign_steps(events, seen), events)), info
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Step, type and timestamp of every event, from the index alone."""
+        return [
+            {"step": step, "event_type": event_type, "ts_iso": ts_iso}
+            for step, event_type, ts_iso, _, _ in self.index["events"]
+        ] + [
+            {"step": step, "event_type": e.get("event_type"), "ts_iso": e.get("ts_iso")}
+            for step, e in self._tail()[0]
+        ]
+
+    def steps(self) -> List[int]:
+        tail = {s for s, _ in self._tail()[0]}
+        return sorted({frame[2] for frame in self.index["frames"]} | tail)
+
+    def events(
+        self, step: Optional[int] = None, event_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Loads the events of one step and/or type, in journal order.
+
+        :param step: Only events of this step.
+        :type step: Optional[int]
+        :param event_type: Only events of this type.
+        :type event_type: Optional[str]
+        :return: The events, with `data.messages` restored.
+        :rtype: List[Dict[str, Any]]
+        """
+        return list(self.iter_events(step=step, event_type=event_type))
+
+    def iter_events(
+        self, step: Optional[int] = None, event_type: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Streams matching events frame by frame.
+
+        Only frames containing a match (and frames holding message blocks
+        they reference) are read and decompressed.
+        """
+        yield from self._container_events(step, event_type)
+        for ev_step, event in self._tail()[0]:
+            if step is not None and ev_step != step:
+                continue
+            if event_type is not None and event.get("event_type") != event_type:
+                continue
+            yield event
+
+    def _container_events(
+        self, step: Optional[int] = None, event_type: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        wanted: "OrderedDict[int, List[int]]" = OrderedDict()
+        for ev_step, ev_type, _, frame_no, position in self.index["events"]:
+            if step is not None and ev_step != step:
+                continue
+            if event_type is not None and ev_type != event_type:
+                continue
+            wanted.setdefault(frame_no, []).append(position)
+        for frame_no, positions in wanted.items():
+            frame = self._frame(frame_no)
+            events = [copy.deepcopy(frame[p]) for p in positions]
+            if expand_messages(events, self._block):
+                raise ReplayError(f"Message blocks are missing from {self.path}.")
+            yield from events
+
+    def _block(self, digest: str) -> Any:
+        """Returns a message block stored in the container.
+
+        :raises KeyError: If the container has no such block.
+        """
+        frame_no = self.index["blocks"].get(digest)
+        if frame_no is not None:
+            for event in self._frame(frame_no):
+                data = event.get("data")
+                if isinstance(data, dict) and digest in (data.get(BLOCKS_FIELD) or {}):
+                    return data[BLOCKS_FIELD][digest]
+        raise KeyError(digest)
+
+    def _frame(self, frame_no: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            cached = self._frames.get(frame_no)
+            if cached is not None:
+                self._frames.move_to_end(frame_no)
+                return cached
+        offset, length, _ = self.index["frames"][frame_no]
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                raw = f.read(length)
+            text = self._zstd.ZstdDecompressor().decompress(raw).decode("utf-8")
+        except (OSError, self._zstd.ZstdError) as e:
+            raise ReplayError(f"Cannot read frame {frame_no} of {self.path}: {e}") from e
+        events = [json.loads(line) for line in text.splitlines() if line]
+        with self._lock:
+            self.frames_read += 1
+            self._frames[frame_no] = events
+            while len(self._frames) > self.cache_frames:
+                self._frames.popitem(last=False)
+        return events
+
+
+class JsonlReplay:
+    """The `ReplayReader` interface over a plain replay.jsonl journal.
+
+    Every call scans the whole journal; convert large ones with
+    `convert_jsonl`.
+    """
+
+    indexed = False
+
+    def __init__(self, task_dir: Union[str, Path]):
+        self.task_dir = Path(task_dir)
+        self.path = self.task_dir / JSONL_FILE
+
+    def _load(self) -> Tuple[List[Dict[str, Any]], List[int]]:
+        try:
+            events, _ = _read_journal(self.task_dir)
+        except OSError as e:
+            raise ReplayError(f"Cannot read replay journal '{self.path}': {e}") from e
+        expand_messages(events)
+        return events, assign_steps(events)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        events, steps = self._load()
+        return [
+            {"step": s, "event_type": e.get("event_type"), "ts_iso": e.get("ts_iso")}
+            for s, e in zip(steps, events)
+        ]
+
+    def steps(self) -> List[int]:
+        return sorted(set(self._load()[1]))
+
+    def events(
+        self, step: Optional[int] = None, event_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        return list(self.iter_events(step=step, event_type=event_type))
+
+    def iter_events(
+        self, step: Optional[int] = None, event_type: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        events, steps = self._load()
+        for ev_step, event in zip(steps, events):
+            if step is not None and ev_step != step:
+                continue
+            if event_type is not None and event.get("event_type") != event_type:
+                continue
+            yield event
+
+
+def _has_journal(task_dir: Path) -> bool:
+    return (task_dir / JSONL_FILE).is_file() or (task_dir / COMPACTING_FILE).is_file()
+
+
+def open_replay(task_dir: Union[str, Path]) -> Optional[Union[ReplayReader, JsonlReplay]]:
+    """Opens a task's replay log, preferring the indexed container.
+
+    :param task_dir: The task's reports directory.
+    :type task_dir: Union[str, Path]
+    :return: A reader, or None if the task has no replay log.
+    :rtype: Optional[Union[ReplayReader, JsonlReplay]]
+    :raises ReplayError: If the container exists but cannot be opened.
+    """
+    task_dir = Path(task_dir)
+    if (task_dir / INDEX_FILE).is_file():
+        return ReplayReader(task_dir)
+    if _has_journal(task_dir):
+        return JsonlReplay(task_dir)
+    return None
+
+
+def has_replay(task_dir: Union[str, Path]) -> bool:
+    task_dir = Path(task_dir)
+    return (task_dir / INDEX_FILE).is_file() or _has_journal(task_dir)
+
+
+def convert_task(
+    task_dir: Union[str, Path], level: Optional[int] = None, keep_jsonl: bool = True
+) -> Path:
+    """Converts a task's journal, merging it into an existing container.
+
+    A container already present holds the events from before the task was
+    resumed; the journal events follow them. Events appended to replay.jsonl
+    while converting are left for the next conversion.
+
+    :param task_dir: The task's reports directory.
+    :type task_dir: Union[str, Path]
+    :param level: zstd compression level; defaults to `replay.zstd_level`.
+    :type level: Optional[int]
+    :param keep_jsonl: Leave replay.jsonl in place (readers skip the part
+        already converted) instead of removing it.
+    :type keep_jsonl: bool
+    :return: The path of the index file.
+    :rtype: Path
+    :raises ReplayError: If there is no journal or conversion fails.
+    """
+    task_dir = Path(task_dir)
+    jsonl = task_dir / JSONL_FILE
+    compacting = task_dir / COMPACTING_FILE
+    if not _has_journal(task_dir):
+        raise ReplayError(f"No {JSONL_FILE} to convert in '{task_dir}'.")
+    if not keep_jsonl:
+        if compacting.is_file():
+            # Left behind by an interrupted compaction: merge it first.
+            convert_task(task_dir, level=level)
+        if jsonl.is_file():
+            os.replace(jsonl, compacting)
+    try:
+        end = jsonl.stat().st_size if keep_jsonl and jsonl.is_file() else 0
+        if (task_dir / INDEX_FILE).is_file():
+            reader = ReplayReader(task_dir)
+            tail, info = reader._tail(end)
+            events = list(reader._container_events()) + [e for _, e in tail]
+            previous = reader.index["source"]
+            source = {
+                "skipped": previous.get("skipped", 0) + info["skipped"],
+                "bytes": previous.get("bytes", 0) + info["bytes"],
+            }
+        else:
+            events, info = _read_journal(task_dir, 0, end)
+            expand_messages(events)
+            source = {"skipped": info["skipped"], "bytes": info["bytes"]}
+        index = write_container(
+            events, task_dir, level=level, source=source, jsonl_offset=info["jsonl_offset"]
+        )
+    except Exception as e:
+        if not keep_jsonl and compacting.is_file() and not jsonl.exists():
+            os.replace(compacting, jsonl)
+        if isinstance(e, ReplayError):
+            raise
+        raise ReplayError(f"Cannot convert the replay journal in '{task_dir}': {e}") from e
+    compacting.unlink(missing_ok=True)
+    return index
+
+
+def compact_replay(task_dir: Union[str, Path]) -> Optional[Path]:
+    """Converts a finished task's journal and removes the JSONL file.
+
+    Never raises; on failure the journal is left in place.
+
+    :return: The index path, or None if nothing was converted.
+    :rtype: Optional[Path]
+    """
+    task_dir = Path(task_dir)
+    if not _has_journal(task_dir):
+        return None
+    try:
+        return convert_task(task_dir, keep_jsonl=False)
+    except Exception as e:
+        logger.warning(f"Replay journal in {task_dir} was not compacted: {e}")
+        return None
+
+
+def compact_replay_on_close(task_dir: Union[str, Path]) -> None:
+    """Compacts the journal in a background thread if `replay.container` is
+    'indexed', so a large journal does not hold up the end of its task."""
+    if _replay_settings().get("container") != "indexed":
+        return
+    threading.Thread(
+        target=compact_replay, args=(task_dir,), name="aegis-replay-compact"
+    ).start()
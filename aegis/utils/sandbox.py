@@ -0,0 +1,370 @@
+# aegis/utils/sandbox.py
+"""
+Resource sandboxing for local subprocesses.
+
+Local commands (fuzz targets, `run_local_command`, compose) otherwise run with
+no CPU, memory, or process-count ceiling and can starve a worker that hosts
+other agents. This module confines a child process in one of two ways:
+
+- cgroup v2: a transient cgroup is created under a delegated root
+  (`limits.sandbox.cgroup_root`) with `cpu.max`, `memory.max` and `pids.max`,
+  the child joins it before exec, and peak memory / CPU time are read back
+  from `memory.peak` and `cpu.stat` when it exits. With `scope: task` the
+  limits apply to a per-task parent cgroup shared by all of that task's
+  commands; with `scope: tool` (default) each invocation gets its own limits.
+- setrlimit: when cgroup delegation is unavailable, `RLIMIT_AS` and
+  `RLIMIT_CPU` are applied in the child, and usage is the child's own rusage
+  as returned by `os.wait4` when it is reaped. `pids_max` is not enforced in
+  this mode: RLIMIT_NPROC counts every process of the user, so it would make
+  unrelated forks on a busy worker fail.
+
+The child is confined by a `/bin/sh` shim (`Sandbox.wrap`) that joins the
+cgroup or sets the rlimits and then execs the command, rather than by a
+`preexec_fn`, which is unsafe in the multithreaded server process.
+
+Everything here is best-effort: a sandbox that cannot be set up degrades to
+the next mechanism and finally to running unconfined, with a warning.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from aegis.utils.logger import setup_logger
+
+try:
+    import resource  # noqa: F401 - marks a host with POSIX rlimits
+
+    RESOURCE_AVAILABLE = True
+except Exception:  # pragma: no cover - non-POSIX
+    RESOURCE_AVAILABLE = False
+
+logger = setup_logger(__name__)
+
+__all__ = [
+    "ResourceLimits",
+    "ResourceUsage",
+    "Sandbox",
+    "parse_size",
+    "load_limits",
+]
+
+_CONTROLLERS = ("cpu", "memory", "pids")
+# Exit status of the shim when it cannot confine the child (as for a command
+# that cannot be executed); the command itself is not run.
+_SHIM_FAILED = 126
+# Longest wait for a killed cgroup's processes to exit before its removal.
+_KILL_WAIT_S = 2.0
+_CPU_PERIOD_US = 100_000
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*$", re.IGNORECASE)
+_SIZE_MULT = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30, "t": 1 << 40}
+
+
+def parse_size(value: Any) -> Optional[int]:
+    """Parses a byte size such as ``536870912``, ``"512M"`` or ``"2GiB"``.
+
+    :param value: An int, or a string with an optional K/M/G/T suffix.
+    :type value: Any
+    :return: The size in bytes, or None if unset or unparseable.
+    :rtype: Optional[int]
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value) if value > 0 else None
+    m = _SIZE_RE.match(str(value))
+    if not m:
+        logger.warning(f"Ignoring unparseable size limit: {value!r}")
+        return None
+    return int(float(m.group(1)) * _SIZE_MULT[m.group(2).lower()])
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    """Resource ceilings for a sandboxed subprocess.
+
+    :ivar cpu_max: CPU bandwidth in cores (e.g. 0.5 = half a core).
+    :ivar memory_max: Memory ceiling in bytes.
+    :ivar pids_max: Maximum number of processes/threads.
+    :ivar scope: 'tool' for per-invocation limits, 'task' for limits shared by a task.
+    :ivar cgroup_root: Delegated cgroup v2 directory to create transient cgroups under.
+    """
+
+    cpu_max: Optional[float] = None
+    memory_max: Optional[int] = None
+    pids_max: Optional[int] = None
+    scope: str = "tool"
+    cgroup_root: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        return self.cpu_max is None and self.memory_max is None and self.pids_max is None
+
+
+@dataclass
+class ResourceUsage:
+    """Resource usage observed for one sandboxed subprocess."""
+
+    mechanism: str
+    peak_memory_bytes: Optional[int] = None
+    cpu_user_ms: Optional[float] = None
+    cpu_system_ms: Optional[float] = None
+    cgroup: Optional[str] = None
+    oom_killed: Optional[bool] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: v for k, v in asdict(self).items() if v is not None}
+
+
+def load_limits() -> Optional[ResourceLimits]:
+    """Builds `ResourceLimits` from `limits.sandbox` in config.yaml.
+
+    :return: The configured limits, or None if sandboxing is disabled.
+    :rtype: Optional[ResourceLimits]
+    """
+    try:
+        from aegis.utils.config import get_config
+
+        cfg = (get_config().get("limits") or {}).get("sandbox") or {}
+    except Exception:
+        return None
+    if not cfg.get("enabled"):
+        return None
+    cpu = cfg.get("cpu_max")
+    pids = cfg.get("pids_max")
+    limits = ResourceLimits(
+        cpu_max=float(cpu) if cpu else None,
+        memory_max=parse_size(cfg.get("memory_max")),
+        pids_max=int(pids) if pids else None,
+        scope=str(cfg.get("scope") or "tool"),
+        cgroup_root=cfg.get("cgroup_root") or None,
+    )
+    return None if limits.is_empty() else limits
+
+
+def _write(path: Path, value: str) -> None:
+    with open(path, "w", encoding="ascii") as f:
+        f.write(value)
+
+
+def _read_kv(path: Path) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    try:
+        for line in path.read_text(encoding="ascii").splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[1].isdigit():
+                out[parts[0]] = int(parts[1])
+    except Exception:
+        pass
+    return out
+
+
+def _read_int(path: Path) -> Optional[int]:
+    try:
+        return int(path.read_text(encoding="ascii").strip())
+    except Exception:
+        return None
+
+
+def _cgroup_usable(root: Optional[str]) -> bool:
+    """Checks that `root` is a writable cgroup v2 directory with our controllers."""
+    if not root:
+        return False
+    base = Path(root)
+    controllers = base / "cgroup.controllers"
+    if not controllers.is_file() or not os.access(base, os.W_OK):
+        return False
+    try:
+        available = set(controllers.read_text(encoding="ascii").split())
+    except Exception:
+        return False
+    return all(c in available for c in _CONTROLLERS)
+
+
+def _enable_controllers(path: Path) -> None:
+    try:
+        _write(path / "cgroup.subtree_control", " ".join(f"+{c}" for c in _CONTROLLERS))
+    except OSError:
+        # Already enabled, or delegated without subtree_control write access.
+        pass
+
+
+def _wait_unpopulated(path: Path, timeout: float = _KILL_WAIT_S) -> None:
+    """Waits until `cgroup.events` reports no live processes in `path`.
+
+    A cgroup cannot be removed (EBUSY) while killed processes are still exiting.
+    """
+    deadline = time.monotonic() + timeout
+    while _read_kv(path / "cgroup.events").get("populated", 0):
+        if time.monotonic() >= deadline:
+            logger.debug(f"cgroup {path} still populated after {timeout}s")
+            return
+        time.sleep(0.01)
+
+
+def _apply_cgroup_limits(path: Path, limits: ResourceLimits) -> None:
+    if limits.cpu_max is not None:
+        quota = max(1000, int(limits.cpu_max * _CPU_PERIOD_US))
+        _write(path / "cpu.max", f"{quota} {_CPU_PERIOD_US}")
+    if limits.memory_max is not None:
+        _write(path / "memory.max", str(limits.memory_max))
+        try:
+            _write(path / "memory.swap.max", "0")
+        except OSError:
+            pass
+    if limits.pids_max is not None:
+        _write(path / "pids.max", str(limits.pids_max))
+
+
+class Sandbox:
+    """Confines one subprocess invocation and reports its resource usage.
+
+    Usage::
+
+        box = Sandbox(limits, task_id="abc", timeout=30)
+        subprocess.run(box.wrap(argv), ...)
+        usage = box.finish()
+
+    `finish()` must be called (typically in a `finally`) so the transient
+    cgroup is removed even when the child times out.
+    """
+
+    def __init__(
+        self,
+        limits: ResourceLimits,
+        *,
+        task_id: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ):
+        """
+        :param limits: The resource ceilings to enforce.
+        :param task_id: Task id used to name (and, for scope 'task', share) cgroups.
+        :param timeout: Command timeout; bounds RLIMIT_CPU in the rlimit fallback.
+        """
+        self.limits = limits
+        self.task_id = re.sub(r"[^A-Za-z0-9_.-]", "_", task_id or "session")
+        self.timeout = timeout
+        self.mechanism = "none"
+        self._leaf: Optional[Path] = None
+        self._task_dir: Optional[Path] = None
+        self._setup()
+
+    # --- setup ---
+
+    def _setup(self) -> None:
+        if _cgroup_usable(self.limits.cgroup_root):
+            try:
+                self._setup_cgroup()
+                self.mechanism = "cgroup"
+                return
+            except OSError as e:
+                logger.warning(
+                    f"cgroup sandbox unavailable ({e}); falling back to setrlimit."
+                )
+                self._cleanup_cgroup()
+        if RESOURCE_AVAILABLE:
+            self.mechanism = "rlimit"
+        else:
+            logger.warning("No sandbox mechanism available; running unconfined.")
+
+    def _setup_cgroup(self) -> None:
+        root = Path(self.limits.cgroup_root)  # type: ignore[arg-type]
+        _enable_controllers(root)
+        parent = root
+        if self.limits.scope == "task":
+            self._task_dir = root / f"aegis-task-{self.task_id}"
+            self._task_dir.mkdir(exist_ok=True)
+            _apply_cgroup_limits(self._task_dir, self.limits)
+            _enable_controllers(self._task_dir)
+            parent = self._task_dir
+        self._leaf = parent / f"aegis-{self.task_id}-{uuid.uuid4().hex[:8]}"
+        self._leaf.mkdir()
+        if self.limits.scope != "task":
+            _apply_cgroup_limits(self._leaf, self.limits)
+
+    # --- child side ---
+
+    def wrap(self, argv: List[str]) -> List[str]:
+        """Returns `argv` behind a shim that confines it before exec.
+
+        :param argv: The command to run.
+        :type argv: List[str]
+        :return: The command to pass to subprocess; `argv` itself when there
+            is nothing to apply.
+        :rtype: List[str]
+        """
+        if self.mechanism == "cgroup":
+            # Writing "0" to cgroup.procs moves the writing shell itself.
+            procs = str(self._leaf / "cgroup.procs")  # type: ignore[operator]
+            script = f'echo 0 > "$0" || exit {_SHIM_FAILED}; exec "$@"'
+            return ["/bin/sh", "-c", script, procs, *argv]
+
+        if self.mechanism == "rlimit":
+            steps = []
+            if self.limits.memory_max is not None:
+                steps.append(f"ulimit -v {max(1, self.limits.memory_max // 1024)}")
+            if self.limits.cpu_max is not None and self.timeout:
+                steps.append(f"ulimit -t {max(1, math.ceil(self.limits.cpu_max * self.timeout))}")
+            if not steps:
+                return list(argv)
+            script = " && ".join(steps) + f' || exit {_SHIM_FAILED}; exec "$@"'
+            return ["/bin/sh", "-c", script, "sh", *argv]
+
+        return list(argv)
+
+    # --- teardown ---
+
+    def finish(self, rusage: Any = None) -> ResourceUsage:
+        """Collects usage for the finished child and removes transient cgroups.
+
+        :param rusage: The child's own rusage from `os.wait4`; needed for usage
+            in the rlimit fallback, which reports none without it.
+        :return: The observed resource usage. Never raises.
+        :rtype: ResourceUsage
+        """
+        usage = ResourceUsage(mechanism=self.mechanism)
+        try:
+            if self.mechanism == "cgroup" and self._leaf is not None:
+                stat = _read_kv(self._leaf / "cpu.stat")
+                if "user_usec" in stat:
+                    usage.cpu_user_ms = stat["user_usec"] / 1000.0
+                if "system_usec" in stat:
+                    usage.cpu_system_ms = stat["system_usec"] / 1000.0
+                usage.peak_memory_bytes = _read_int(self._leaf / "memory.peak")
+                events = _read_kv(self._leaf / "memory.events")
+                if events:
+                    usage.oom_killed = events.get("oom_kill", 0) > 0
+                usage.cgroup = str(self._leaf)
+            elif self.mechanism == "rlimit" and rusage is not None:
+                usage.cpu_user_ms = round(rusage.ru_utime * 1000, 3)
+                usage.cpu_system_ms = round(rusage.ru_stime * 1000, 3)
+                # ru_maxrss is in KiB on Linux.
+                usage.peak_memory_bytes = rusage.ru_maxrss * 1024
+        except Exception as e:
+            logger.debug(f"Failed to read sandbox usage: {e}")
+        finally:
+            self._cleanup_cgroup()
+        return usage
+
+    def _cleanup_cgroup(self) -> None:
+        for path in (self._leaf, self._task_dir):
+            if path is None or not path.exists():
+                continue
+            try:
+                kill = path / "cgroup.kill"
+                if path is self._leaf and kill.exists():
+                    _write(kill, "1")
+                    _wait_unpopulated(path)
+            except OSError:
+                pass
+            try:
+                path.rmdir()
+            except OSError:
+                # The task cgroup stays while other commands of the task run.
+                pass
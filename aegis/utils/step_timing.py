@@ -0,0 +1,145 @@
+# aegis/utils/step_timing.py
+"""
+Per-step latency breakdown.
+
+Each graph node times its phases with a `PhaseTimer` and the totals end up in
+`HistoryEntry.timings` (milliseconds per phase). Planning runs before the
+step's history entry exists, so `reflect_and_plan` hands its phases to
+`execute_tool` through `TaskState.pending_timings`; `verify_outcome` adds its
+phase to the entry it verifies.
+
+Phases:
+
+- ``queue``: time between one node finishing and the next starting (graph
+  scheduling, checkpoint writes, routing).
+- ``preselect``: the optional tool pre-selection LLM call.
+- ``prompt_build``: building the planning prompt.
+- ``llm``: the planning LLM call, including a repair attempt.
+- ``policy``: guardrails and policy authorization.
+- ``tool``: running the tool.
+- ``verification``: the verification tool and judgement.
+- ``logging``: replay events, provenance records and log formatting.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+PHASES = (
+    "queue",
+    "preselect",
+    "prompt_build",
+    "llm",
+    "policy",
+    "tool",
+    "verification",
+    "logging",
+)
+
+
+class PhaseTimer:
+    """Accumulates wall-clock milliseconds per phase for one node call.
+
+    :param initial: Phases already measured for this step (e.g. planning).
+    :type initial: Optional[Dict[str, float]]
+    :param last_node_end: Unix time at which the previous node finished; the
+        gap until now is booked as ``queue``.
+    :type last_node_end: Optional[float]
+    """
+
+    def __init__(
+        self,
+        initial: Optional[Dict[str, float]] = None,
+        last_node_end: Optional[float] = None,
+    ):
+        self.phases: Dict[str, float] = dict(initial or {})
+        self._open: Optional[str] = None
+        self._opened_at = 0.0
+        if last_node_end:
+            self.add("queue", max(0.0, (time.time() - last_node_end) * 1000.0))
+
+    def add(self, phase: str, ms: float) -> None:
+        self.phases[phase] = self.phases.get(phase, 0.0) + ms
+
+    def begin(self, name: str) -> None:
+        """Starts timing `name`, ending the phase begun before it, if any."""
+        self.end()
+        self._open = name
+        self._opened_at = time.perf_counter()
+
+    def end(self) -> None:
+        """Ends the phase started with `begin` (no-op if none is open)."""
+        if self._open is not None:
+            self.add(self._open, (time.perf_counter() - self._opened_at) * 1000.0)
+            self._open = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000.0)
+
+    def as_dict(self) -> Dict[str, float]:
+        self.end()
+        return {k: round(v, 3) for k, v in self.phases.items()}
+
+
+def aggregate_timings(history: Iterable[Any]) -> Dict[str, Any]:
+    """Totals, means, maxima and shares per phase over a task's steps.
+
+    :param history: The task's `HistoryEntry` objects (or dicts with `timings`).
+    :type history: Iterable[Any]
+    :return: ``{"steps", "total_ms", "phases": {name: {total_ms, mean_ms,
+        max_ms, share}}}``; phases are listed in `PHASES` order, unknown ones last.
+    :rtype: Dict[str, Any]
+    """
+    totals: Dict[str, float] = {}
+    maxima: Dict[str, float] = {}
+    steps = 0
+    for entry in history:
+        timings = entry.get("timings") if isinstance(entry, dict) else getattr(entry, "timings", None)
+        steps += 1
+        for phase, ms in (timings or {}).items():
+            totals[phase] = totals.get(phase, 0.0) + ms
+            maxima[phase] = max(maxima.get(phase, 0.0), ms)
+    grand = sum(totals.values())
+    order = [p for p in PHASES if p in totals] + sorted(set(totals) - set(PHASES))
+    return {
+        "steps": steps,
+        "total_ms": round(grand, 3),
+        "phases": {
+            p: {
+                "total_ms": round(totals[p], 3),
+                "mean_ms": round(totals[p] / steps, 3) if steps else 0.0,
+                "max_ms": round(maxima[p], 3),
+                "share": round(totals[p] / grand, 4) if grand else 0.0,
+            }
+            for p in order
+        },
+    }
+
+
+def format_timings_markdown(breakdown: Dict[str, Any]) -> Optional[str]:
+    """Renders `aggregate_timings` output as a summary.md section.
+
+    :return: The markdown section, or None if nothing was timed.
+    :rtype: Optional[str]
+    """
+    if not breakdown.get("phases"):
+        return None
+    lines = [
+        "## Latency Breakdown",
+        f"{breakdown['steps']} steps, {breakdown['total_ms'] / 1000.0:.2f}s timed.\n",
+        "| Phase | Total (ms) | Mean/step (ms) | Max (ms) | Share |",
+        "|---|---:|---:|---:|---:|",
+    ]
+    for phase, row in breakdown["phases"].items():
+        lines.append(
+            f"| {phase} | {row['total_ms']:.1f} | {row['mean_ms']:.1f} "
+            f"| {row['max_ms']:.1f} | {row['share'] * 100:.1f}% |"
+        )
+    return "\n".join(lines) + "\n"
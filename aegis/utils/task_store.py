@@ -0,0 +1,340 @@
+# aegis/utils/task_store.py
+"""
+Durable task queue backed by a local SQLite file.
+
+Asynchronous launches (`POST /api/launch?async_mode=true`) are written here
+before they are acknowledged, so queued work survives a process restart. The
+worker pool claims rows atomically, reports progress into them while the graph
+runs, and records the terminal status and result.
+
+Statuses: QUEUED -> RUNNING -> COMPLETED | PAUSED | FAILED | CANCELLED.
+A claimed row records the claiming store's `owner` id and a lease that the
+owner keeps extending (`heartbeat()`) while the task runs. Several processes
+may share one database file, so `recover()` only returns RUNNING rows whose
+lease has expired (their owner crashed or hung) to QUEUED, up to
+`max_attempts` times, after which they are FAILED.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from aegis.exceptions import DuplicateTaskError
+from aegis.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+COMPLETED = "COMPLETED"
+PAUSED = "PAUSED"
+FAILED = "FAILED"
+CANCELLED = "CANCELLED"
+TERMINAL_STATUSES = frozenset({COMPLETED, PAUSED, FAILED, CANCELLED})
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id          TEXT PRIMARY KEY,
+    status           TEXT NOT NULL,
+    payload          TEXT NOT NULL,
+    created_at       REAL NOT NULL,
+    started_at       REAL,
+    finished_at      REAL,
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    worker           TEXT,
+    owner            TEXT,
+    lease_expires_at REAL,
+    progress         TEXT,
+    result           TEXT,
+    error            TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks (status, created_at);
+"""
+
+# Columns added after the first release; created on older database files.
+_ADDED_COLUMNS = (("owner", "TEXT"), ("lease_expires_at", "REAL"))
+
+_JSON_COLUMNS = ("payload", "progress", "result")
+
+DEFAULT_LEASE_S = 60.0
+
+
+class TaskStore:
+    """A small SQLite-backed task table shared by the API and its workers."""
+
+    def __init__(
+        self,
+        db_path: str | Path,
+        max_attempts: int = 3,
+        lease_s: float = DEFAULT_LEASE_S,
+        owner: Optional[str] = None,
+    ):
+        """
+        :param db_path: Path to the SQLite file (created on demand).
+        :param max_attempts: How many times a task may be (re)started before
+                             `recover()` gives up on it.
+        :param lease_s: Seconds a claimed task stays owned by this store
+                        without a `heartbeat()`.
+        :param owner: Id recorded on claimed rows (default: unique per
+                      instance, `<hostname>:<pid>:<random>`).
+        """
+        self.db_path = Path(db_path)
+        self.max_attempts = max_attempts
+        self.lease_s = float(lease_s)
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            existing = {r["name"] for r in conn.execute("PRAGMA table_info(tasks)")}
+            for name, kind in _ADDED_COLUMNS:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE tasks ADD COLUMN {name} {kind}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _row_to_dict(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        rec = dict(row)
+        for col in _JSON_COLUMNS:
+            if rec.get(col):
+                try:
+                    rec[col] = json.loads(rec[col])
+                except Exception:
+                    pass
+        rec["cancel_requested"] = bool(rec.get("cancel_requested"))
+        return rec
+
+    # --- producer side ---
+
+    def enqueue(self, task_id: str, payload: Dict[str, Any]) -> None:
+        """Persists a new QUEUED task.
+
+        :raises DuplicateTaskError: If the task id already exists.
+        """
+        with self._lock, self._connect() as conn:
+            try:
+                conn.execute(
+                    "INSERT INTO tasks (task_id, status, payload, created_at) VALUES (?, ?, ?, ?)",
+                    (task_id, QUEUED, json.dumps(payload, default=str), time.time()),
+                )
+            except sqlite3.IntegrityError as e:
+                raise DuplicateTaskError(f"Task id '{task_id}' already exists.") from e
+
+    def count(self, *statuses: str) -> int:
+        """Counts tasks in the given statuses (all tasks if none given)."""
+        with self._connect() as conn:
+            if not statuses:
+                return conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+            marks = ",".join("?" for _ in statuses)
+            return conn.execute(
+                f"SELECT COUNT(*) FROM tasks WHERE status IN ({marks})", statuses
+            ).fetchone()[0]
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Returns a task row as a dict, or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM tasks WHERE task_id = ?", (task_id,)
+            ).fetchone()
+        return self._row_to_dict(row)
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Lists the most recent tasks, optionally filtered by status."""
+        query = "SELECT * FROM tasks"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._connect() as conn:
+            rows = conn.execute(query, params + (int(limit),)).fetchall()
+        return [self._row_to_dict(r) for r in rows]  # type: ignore[misc]
+
+    def request_cancel(self, task_id: str) -> Optional[str]:
+        """Cancels a queued task outright, or flags a running one.
+
+        :return: The task's status after the request, or None if unknown.
+        """
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT status FROM tasks WHERE task_id = ?", (task_id,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            status = row["status"]
+            if status == QUEUED:
+                conn.execute(
+                    "UPDATE tasks SET status = ?, cancel_requested = 1, finished_at = ? WHERE task_id = ?",
+                    (CANCELLED, time.time(), task_id),
+                )
+                status = CANCELLED
+            elif status == RUNNING:
+                conn.execute(
+                    "UPDATE tasks SET cancel_requested = 1 WHERE task_id = ?",
+                    (task_id,),
+                )
+            conn.execute("COMMIT")
+            return status
+
+    # --- worker side ---
+
+    def claim_next(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Atomically moves the oldest QUEUED task to RUNNING, leased to this
+        store's owner, and returns it."""
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT task_id FROM tasks WHERE status = ? ORDER BY created_at LIMIT 1",
+                (QUEUED,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE tasks SET status = ?, started_at = ?, worker = ?, owner = ?, "
+                "lease_expires_at = ?, attempts = attempts + 1 WHERE task_id = ?",
+                (RUNNING, now, worker, self.owner, now + self.lease_s, row["task_id"]),
+            )
+            claimed = conn.execute(
+                "SELECT * FROM tasks WHERE task_id = ?", (row["task_id"],)
+            ).fetchone()
+            conn.execute("COMMIT")
+        return self._row_to_dict(claimed)
+
+    def heartbeat(self, task_ids: List[str]) -> int:
+        """Extends the lease on tasks this store's owner is still running.
+
+        :return: The number of leases extended; rows taken over by another
+                 owner are left alone.
+        """
+        if not task_ids:
+            return 0
+        marks = ",".join("?" for _ in task_ids)
+        with self._connect() as conn:
+            cur = conn.execute(
+                f"UPDATE tasks SET lease_expires_at = ? "
+                f"WHERE owner = ? AND status = ? AND task_id IN ({marks})",
+                (time.time() + self.lease_s, self.owner, RUNNING, *task_ids),
+            )
+        return cur.rowcount
+
+    def release(self) -> int:
+        """Expires the leases this store's owner holds, so the next `recover()`
+        (in any process) re-queues those tasks without waiting.
+
+        :return: The number of released tasks.
+        """
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET lease_expires_at = 0 WHERE owner = ? AND status = ?",
+                (self.owner, RUNNING),
+            )
+        return cur.rowcount
+
+    def update_progress(self, task_id: str, progress: Dict[str, Any]) -> bool:
+        """Stores the latest progress snapshot.
+
+        :return: True if cancellation has been requested for this task.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET progress = ? WHERE task_id = ?",
+                (json.dumps(progress, default=str), task_id),
+            )
+            row = conn.execute(
+                "SELECT cancel_requested FROM tasks WHERE task_id = ?", (task_id,)
+            ).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def finish(
+        self,
+        task_id: str,
+        status: str,
+        *,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """Records a terminal status for a task this store's owner is running.
+
+        The update is fenced by the lease: once the lease expired and
+        `recover()` re-queued the task (or another worker claimed it), a late
+        finish from the old owner changes nothing.
+
+        :return: True if the task's row was updated.
+        """
+        with self._lock, self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE tasks SET status = ?, finished_at = ?, result = ?, error = ? "
+                "WHERE task_id = ? AND owner = ? AND status = ?",
+                (
+                    status,
+                    time.time(),
+                    json.dumps(result, default=str) if result is not None else None,
+                    error,
+                    task_id,
+                    self.owner,
+                    RUNNING,
+                ),
+            )
+        return cur.rowcount > 0
+
+    def recover(self) -> int:
+        """Re-queues RUNNING tasks whose lease has expired.
+
+        Tasks that already used `max_attempts` are marked FAILED instead, so a
+        task that crashes the process cannot crash-loop it. Tasks whose owner
+        is still heartbeating are left alone, wherever that owner runs.
+
+        :return: The number of re-queued tasks.
+        """
+        expired = "status = ? AND (lease_expires_at IS NULL OR lease_expires_at < ?)"
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            conn.execute(
+                "UPDATE tasks SET status = ?, finished_at = ?, error = ? "
+                f"WHERE {expired} AND attempts >= ?",
+                (
+                    FAILED,
+                    now,
+                    "Abandoned after repeated interruptions.",
+                    RUNNING,
+                    now,
+                    self.max_attempts,
+                ),
+            )
+            cur = conn.execute(
+                "UPDATE tasks SET status = ?, worker = NULL, owner = NULL, "
+                f"lease_expires_at = NULL WHERE {expired}",
+                (QUEUED, RUNNING, now),
+            )
+            conn.execute("COMMIT")
+            requeued = cur.rowcount
+        if requeued:
+            logger.warning(f"Re-queued {requeued} task(s) whose worker stopped renewing its lease.")
+        return requeued
@@ -0,0 +1,294 @@
+# aegis/utils/timeline.py
+"""
+Per-task run timeline: every graph node, LLM call, tool call and verification
+of a task, with start/end times and nesting.
+
+Graph nodes are wrapped in a `node.<id>` span (`timeline_node`). The planner,
+tool, verifier and wrapper spans that already exist nest under them through
+the span context. A span listener buffers each finished span of a task in
+memory. `flush_timeline` appends them to `reports/<task_id>/timeline.jsonl`
+when the task ends, one compact JSON line per span. A long task is also
+flushed every `timeline_buffer_spans` spans, so nothing is dropped.
+
+`build_timeline` merges that file with the spans still buffered for a running
+task and adds the task's replay events as point markers. The dashboard reads
+it from `GET /api/reports/{task_id}/timeline`.
+
+Config (config.yaml `tracing`): timeline, timeline_buffer_spans.
+"""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import inspect
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from aegis.utils.logger import setup_logger
+from aegis.utils.redact import redact_for_log
+from aegis.exceptions import ReplayError
+from aegis.utils.replay_store import open_replay
+from aegis.utils.tracing import SpanRecord, add_span_listener, span
+
+logger = setup_logger(__name__)
+
+TIMELINE_FILE = "timeline.jsonl"
+
+# Span name prefix -> timeline kind. Unmatched spans are "other".
+_KINDS = (
+    ("node.", "node"),
+    ("planner.", "llm"),
+    ("verifier.", "verification"),
+    ("execute_tool", "tool"),
+    ("wrapper.", "tool"),
+)
+_MAX_ATTR_CHARS = 200
+
+
+def _timeline_settings() -> Dict[str, Any]:
+    try:
+        from aegis.utils.config import get_config
+
+        cfg = get_config().get("tracing") or {}
+    except Exception:
+        cfg = {}
+    return {
+        "enabled": cfg.get("timeline", True) is not False,
+        "buffer_spans": int(cfg.get("timeline_buffer_spans") or 1000),
+    }
+
+
+_SETTINGS = _timeline_settings()
+_BUFFERS: Dict[str, List[SpanRecord]] = {}
+_LOCK = threading.Lock()
+
+
+def timeline_enabled() -> bool:
+    return _SETTINGS["enabled"]
+
+
+def span_kind(name: str) -> str:
+    for prefix, kind in _KINDS:
+        if name.startswith(prefix):
+            return kind
+    return "other"
+
+
+def _reports_dir() -> Path:
+    return Path("reports")
+
+
+def _on_span(rec: SpanRecord) -> None:
+    if not rec.run_id:
+        return
+    with _LOCK:
+        buf = _BUFFERS.setdefault(rec.run_id, [])
+        buf.append(rec)
+        if len(buf) < _SETTINGS["buffer_spans"]:
+            return
+        _BUFFERS[rec.run_id] = []
+    _write(rec.run_id, buf)
+
+
+def _compact(rec: SpanRecord) -> Dict[str, Any]:
+    attrs = {}
+    for key, value in rec.attrs.items():
+        if value is None or isinstance(value, (bool, int, float)):
+            attrs[key] = value
+        elif isinstance(value, str):
+            attrs[key] = value[:_MAX_ATTR_CHARS]
+    try:
+        attrs = redact_for_log(attrs)
+    except Exception:
+        attrs = {}
+    return {
+        "name": rec.name,
+        "kind": span_kind(rec.name),
+        "span_id": f"{rec.span_id:016x}",
+        "parent_id": f"{rec.parent_id:016x}" if rec.parent_id else None,
+        "start_ns": rec.start_ns,
+        "end_ns": rec.end_ns,
+        "status": rec.status,
+        "error": rec.error,
+        "attrs": attrs,
+    }
+
+
+def _write(task_id: str, spans: List[SpanRecord]) -> None:
+    if not spans:
+        return
+    try:
+        path = _reports_dir() / task_id / TIMELINE_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = "".join(json.dumps(_compact(s), ensure_ascii=False) + "\n" for s in spans)
+        with path.open("a", encoding="utf-8") as f:
+            f.write(lines)
+    except Exception as e:
+        logger.error(f"Failed to write timeline for task '{task_id}': {e}")
+
+
+def flush_timeline(task_id: str) -> None:
+    """Appends a task's buffered spans to its timeline file. Never raises.
+
+    :param task_id: The task whose spans to write.
+    :type task_id: str
+    """
+    with _LOCK:
+        spans = _BUFFERS.pop(task_id, [])
+    _write(task_id, spans)
+
+
+def _flush_all() -> None:
+    with _LOCK:
+        task_ids = list(_BUFFERS)
+    for task_id in task_ids:
+        flush_timeline(task_id)
+
+
+def _task_id_of(state: Any) -> Optional[str]:
+    if isinstance(state, dict):
+        return state.get("task_id")
+    return getattr(state, "task_id", None)
+
+
+def timeline_node(node_id: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wraps a graph node in a `node.<node_id>` span for the run timeline.
+
+    :param node_id: The node's id in the graph.
+    :type node_id: str
+    :param func: The node function (sync or async).
+    :type func: Callable[..., Any]
+    :return: A wrapper with the same signature.
+    :rtype: Callable[..., Any]
+    """
+    name = f"node.{node_id}"
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(state: Any, *args: Any, **kwargs: Any) -> Any:
+            with span(name, run_id=_task_id_of(state), node=node_id):
+                return await func(state, *args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(state: Any, *args: Any, **kwargs: Any) -> Any:
+        with span(name, run_id=_task_id_of(state), node=node_id):
+            return func(state, *args, **kwargs)
+
+    return wrapper
+
+
+def _read_spans(path: Path) -> List[Dict[str, Any]]:
+    spans = []
+    try:
+        with path.open("r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(rec, dict) and "start_ns" in rec and "end_ns" in rec:
+                    spans.append(rec)
+    except OSError:
+        pass
+    return spans
+
+
+def _iso_to_ns(value: Any) -> Optional[int]:
+    try:
+        return int(datetime.fromisoformat(str(value)).timestamp() * 1e9)
+    except (TypeError, ValueError):
+        return None
+
+
+def build_timeline(
+    task_id: str, reports_dir: Optional[Path] = None
+) -> Optional[Dict[str, Any]]:
+    """Assembles a task's timeline for the waterfall view.
+
+    Times are milliseconds from the first span or marker. `depth` is the
+    nesting level: 0 for graph nodes, 1 for spans opened inside them, and so on.
+
+    :param task_id: The task to build the timeline for.
+    :type task_id: str
+    :param reports_dir: Reports root; defaults to `reports/`.
+    :type reports_dir: Optional[Path]
+    :return: ``{"task_id", "start_unix", "duration_ms", "counts",
+        "spans": [{id, parent_id, name, kind, depth, start_ms, end_ms,
+        duration_ms, status, error, attrs}], "markers": [{event_type,
+        at_ms}]}``, or None if the task has no spans and no replay events.
+    :rtype: Optional[Dict[str, Any]]
+    """
+    task_dir = (reports_dir or _reports_dir()) / task_id
+    spans = _read_spans(task_dir / TIMELINE_FILE)
+    with _LOCK:
+        live = list(_BUFFERS.get(task_id, ()))
+    spans += [_compact(s) for s in live]
+
+    markers = []
+    try:
+        # Markers need only types and times: an indexed replay container
+        # answers them from its index without decompressing any event.
+        replay = open_replay(task_dir)
+        entries = replay.entries() if replay is not None else []
+    except ReplayError as e:
+        logger.warning(f"Replay markers unavailable for task {task_id}: {e}")
+        entries = []
+    for ev in entries:
+        at_ns = _iso_to_ns(ev.get("ts_iso"))
+        if at_ns is not None:
+            markers.append({"event_type": ev.get("event_type"), "at_ns": at_ns})
+
+    if not spans and not markers:
+        return None
+
+    # Parents start no later than their children; on ties the longer span
+    # (the parent) sorts first.
+    spans.sort(key=lambda s: (s["start_ns"], -s["end_ns"]))
+    base = min([s["start_ns"] for s in spans] + [m["at_ns"] for m in markers])
+    end = max([s["end_ns"] for s in spans] + [m["at_ns"] for m in markers])
+
+    depths: Dict[str, int] = {}
+    counts: Dict[str, int] = {}
+    rows = []
+    for s in spans:
+        parent = s.get("parent_id")
+        depth = depths[parent] + 1 if parent in depths else 0
+        depths[s["span_id"]] = depth
+        counts[s["kind"]] = counts.get(s["kind"], 0) + 1
+        rows.append(
+            {
+                "id": s["span_id"],
+                "parent_id": parent,
+                "name": s["name"],
+                "kind": s["kind"],
+                "depth": depth,
+                "start_ms": round((s["start_ns"] - base) / 1e6, 3),
+                "end_ms": round((s["end_ns"] - base) / 1e6, 3),
+                "duration_ms": round((s["end_ns"] - s["start_ns"]) / 1e6, 3),
+                "status": s.get("status"),
+                "error": s.get("error"),
+                "attrs": s.get("attrs") or {},
+            }
+        )
+    return {
+        "task_id": task_id,
+        "start_unix": base / 1e9,
+        "duration_ms": round((end - base) / 1e6, 3),
+        "counts": counts,
+        "spans": rows,
+        "markers": [
+            {"event_type": m["event_type"], "at_ms": round((m["at_ns"] - base) / 1e6, 3)}
+            for m in sorted(markers, key=lambda m: m["at_ns"])
+        ],
+    }
+
+
+if _SETTINGS["enabled"]:
+    add_span_listener(_on_span)
+    atexit.register(_flush_all)
@@ -8,8 +8,8 @@ Conventions:
     - executor.run
     - verifier.judge
     - wrapper.docker.run / wrapper.compose.up / wrapper.slack.send
-- Pass contextual fields as kwargs; they will be redacted for logs and forwarded
-  best-effort to Langfuse as input metadata.
+- Pass contextual fields as kwargs; they will be redacted for export and
+  forwarded best-effort to Langfuse as input metadata.
 
 Usage:
     from aegis.utils.tracing import span
@@ -18,45 +18,155 @@ Usage:
         ... your code ...
 
 Behavior:
-- Always logs SpanStart / SpanEnd with duration_ms (attrs redacted in logs).
+- A finished span is a small record appended to a fixed-size in-memory ring
+  buffer (`recent_spans()`); the hot path does no logging, redaction or I/O.
+- Head sampling keeps `sample_rate` of traces (decided per run id, so a
+  trace is kept or dropped as a whole); tail sampling always keeps spans that
+  raised or took at least `slow_ms`.
+- Kept spans are redacted and exported in batches by a background thread to
+  the configured exporters: `log` (a SpanEnd record in the task's log),
+  `file` (JSONL) and `otlp` (OTLP/HTTP JSON).
 - If LANGFUSE_* keys are present and installation succeeds, initializes a
-  Langfuse client once per process. All Langfuse calls are best-effort
-  and fully wrapped in try/except so they never break the run.
+  Langfuse client once per process; trace handles are kept in a bounded LRU.
+  All Langfuse calls are best-effort and fully wrapped in try/except so they
+  never break the run.
+
+- Span attributes and `log_generation` prompts/outputs are held by reference
+  and only redacted and serialized when a sink will emit them.
+- Listeners registered with `add_span_listener` see every finished span,
+  sampled or not (the per-task timeline in `aegis.utils.timeline` is one).
+
+Config (config.yaml `tracing`): ring_size, sample_rate, slow_ms, exporters,
+file_path, otlp_endpoint, otlp_headers, export_batch_size,
+export_interval_ms, export_queue_size, trace_cache_size,
+log_generation_payloads (timeline and timeline_buffer_spans are read by
+`aegis.utils.timeline`).
 
 Env:
-- AEGIS_TRACE_SPANS=0 disables span logging entirely.
+- AEGIS_TRACE_SPANS=0 disables span recording entirely.
+- OTEL_EXPORTER_OTLP_TRACES_ENDPOINT: OTLP/HTTP endpoint if none is configured.
 """
 
 from __future__ import annotations
 
+import atexit
+import collections
+import contextvars
+import hashlib
+import json
+import logging
 import os
+import random
+import threading
 import time
-from typing import Any, Dict, Optional
+import zlib
+from collections import OrderedDict
 from contextlib import contextmanager
-import contextvars
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional
 
 from aegis.utils.logger import setup_logger
+from aegis.utils.metrics import record_llm_tokens
 from aegis.utils.redact import redact_for_log
 
 logger = setup_logger(__name__)
 
 _RUN_ID = contextvars.ContextVar("aegis_run_id", default=None)
+_SPAN_ID = contextvars.ContextVar("aegis_span_id", default=None)
+
+
+class _LRUCache:
+    """A small thread-safe LRU mapping used for trace handles."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = max(1, maxsize)
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def _tracing_settings() -> Dict[str, Any]:
+    try:
+        from aegis.utils.config import get_config
+
+        return dict(get_config().get("tracing") or {})
+    except Exception:
+        return {}
+
+
+# Lazy, best-effort Langfuse client. Never required. None = not yet
+# initialized, False = unavailable.
+_LF: Any = None
+_LF_TRACE_CACHE = _LRUCache(int(_tracing_settings().get("trace_cache_size") or 256))
+
+# Whether LLMGeneration log records carry the (redacted) prompt and output.
+_LOG_GENERATION_PAYLOADS = bool(_tracing_settings().get("log_generation_payloads"))
+
+
+class LazyPayload:
+    """
+    A reference to a tracing payload that is built and redacted on first use.
+
+    Holds the caller's object (or a zero-argument callable producing it)
+    without copying, so a sink that does not want the payload costs nothing.
+    """
+
+    __slots__ = ("_source", "_value", "_done")
 
-# Lazy, best-effort Langfuse client. Never required.
-_LF = None
-_LF_TRACE_CACHE: Dict[str, Any] = {}
+    def __init__(self, source: Any):
+        self._source = source
+        self._value: Any = None
+        self._done = False
+
+    def get(self) -> Any:
+        """Return the redacted payload, materializing it once."""
+        if not self._done:
+            try:
+                raw = self._source() if callable(self._source) else self._source
+                self._value = redact_for_log(raw)
+            except Exception:
+                self._value = None
+            self._source = None
+            self._done = True
+        return self._value
 
 
 def _init_langfuse_if_available() -> Optional[Any]:
     """Try to initialize a Langfuse client if keys are present; return client or None."""
     global _LF
     if _LF is not None:
-        return _LF
+        # False caches "not configured" so spans skip the lookup.
+        return _LF or None
     try:
         pk = os.getenv("LANGFUSE_PUBLIC_KEY")
         sk = os.getenv("LANGFUSE_SECRET_KEY")
         host = os.getenv("LANGFUSE_HOST")
         if not (pk and sk):
+            _LF = False
             return None
         # Optional import; fully guarded
         from langfuse import Langfuse  # type: ignore
@@ -70,7 +180,7 @@ def _init_langfuse_if_available() -> Optional[Any]:
         return _LF
     except Exception:
         # Never block if Langfuse isn't installed or init fails
-        _LF = None
+        _LF = False
         return None
 
 
@@ -83,50 +193,348 @@ def _lf_get_or_create_trace(run_id: Optional[str]) -> Optional[Any]:
         if not run_id:
             # Create an ephemeral trace if no id provided
             return lf.trace()
-        if run_id in _LF_TRACE_CACHE:
-            return _LF_TRACE_CACHE[run_id]
-        tr = lf.trace(id=run_id)
-        _LF_TRACE_CACHE[run_id] = tr
+        tr = _LF_TRACE_CACHE.get(run_id)
+        if tr is None:
+            tr = lf.trace(id=run_id)
+            _LF_TRACE_CACHE.put(run_id, tr)
         return tr
     except Exception:
         return None
 
 
+class SpanRecord(NamedTuple):
+    """A finished span. Attributes are raw; exporters redact them."""
+
+    name: str
+    run_id: Optional[str]
+    span_id: int
+    parent_id: Optional[int]
+    start_ns: int
+    end_ns: int
+    status: str
+    error: Optional[str]
+    attrs: Dict[str, Any]
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        try:
+            attrs = redact_for_log(self.attrs)
+        except Exception:
+            attrs = {}
+        return {
+            "name": self.name,
+            "run_id": self.run_id,
+            "trace_id": _trace_id(self.run_id),
+            "span_id": f"{self.span_id:016x}",
+            "parent_span_id": f"{self.parent_id:016x}" if self.parent_id else None,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "error": self.error,
+            "attrs": attrs,
+        }
+
+
+def _trace_id(run_id: Optional[str]) -> str:
+    # Stable per run, so every span of a task lands in one OTLP trace.
+    return hashlib.sha256((run_id or "session").encode("utf-8")).hexdigest()[:32]
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, str):
+        return {"stringValue": value}
+    return {"stringValue": json.dumps(value, default=str, ensure_ascii=False)}
+
+
+def _otlp_payload(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    out = []
+    for sp in spans:
+        attrs = dict(sp["attrs"] or {})
+        if sp["run_id"]:
+            attrs["aegis.run_id"] = sp["run_id"]
+        item = {
+            "traceId": sp["trace_id"],
+            "spanId": sp["span_id"],
+            "name": sp["name"],
+            "kind": 1,
+            "startTimeUnixNano": str(sp["start_time_unix_nano"]),
+            "endTimeUnixNano": str(sp["end_time_unix_nano"]),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attrs.items()],
+            "status": (
+                {"code": 2, "message": sp["error"] or ""}
+                if sp["status"] == "error"
+                else {"code": 1}
+            ),
+        }
+        if sp["parent_span_id"]:
+            item["parentSpanId"] = sp["parent_span_id"]
+        out.append(item)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": "aegis"}}
+                    ]
+                },
+                "scopeSpans": [{"scope": {"name": "aegis.tracing"}, "spans": out}],
+            }
+        ]
+    }
+
+
+class SpanRecorder:
+    """
+    Ring buffer of recent spans plus a sampled, batched export pipeline.
+
+    `record` is the only call on the hot path: it appends the span to the ring
+    and, if the span is sampled, to the export queue (both bounded deques, so
+    appends never block and the oldest entries fall off). A daemon thread
+    drains the export queue every `export_interval_ms` or when it reaches
+    `export_batch_size`, redacts the batch and hands it to each exporter.
+    """
+
+    EXPORTERS = ("log", "file", "otlp")
+
+    def __init__(
+        self,
+        ring_size: int = 4096,
+        sample_rate: float = 1.0,
+        slow_ms: float = 1000.0,
+        exporters: Optional[List[str]] = None,
+        file_path: str = "reports/traces/spans.jsonl",
+        otlp_endpoint: Optional[str] = None,
+        otlp_headers: Optional[Dict[str, str]] = None,
+        export_batch_size: int = 512,
+        export_interval_ms: float = 1000.0,
+        export_queue_size: int = 10000,
+    ):
+        self.ring: Deque[SpanRecord] = collections.deque(maxlen=max(1, ring_size))
+        self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+        self.slow_ns = int(float(slow_ms) * 1e6)
+        self.exporters = [e for e in (exporters if exporters is not None else ["log"]) if e in self.EXPORTERS]
+        self.file_path = Path(file_path)
+        self.otlp_endpoint = otlp_endpoint or os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT")
+        self.otlp_headers = dict(otlp_headers or {})
+        self.export_batch_size = max(1, export_batch_size)
+        self.export_interval_s = max(0.01, export_interval_ms / 1000.0)
+        self._queue: Deque[SpanRecord] = collections.deque(maxlen=max(1, export_queue_size))
+        self._threshold = int(self.sample_rate * 0xFFFFFFFF)
+        self._wake = threading.Event()
+        self._exporter: Optional[threading.Thread] = None
+        self._export_lock = threading.Lock()
+        self.counters: Dict[str, int] = dict.fromkeys(
+            ("recorded", "sampled", "dropped", "exported", "export_errors"), 0
+        )
+
+    def head_sampled(self, run_id: Optional[str]) -> bool:
+        """Head decision; deterministic per run id so traces stay whole."""
+        if self._threshold >= 0xFFFFFFFF:
+            return True
+        if run_id:
+            return zlib.crc32(run_id.encode("utf-8")) <= self._threshold
+        return random.random() < self.sample_rate
+
+    def record(self, rec: SpanRecord, head_sampled: bool) -> None:
+        self.ring.append(rec)
+        self.counters["recorded"] += 1
+        if not self.exporters:
+            return
+        if head_sampled or rec.status == "error" or rec.end_ns - rec.start_ns >= self.slow_ns:
+            if len(self._queue) == self._queue.maxlen:
+                self.counters["dropped"] += 1
+            self._queue.append(rec)
+            self.counters["sampled"] += 1
+            if self._exporter is None or not self._exporter.is_alive():
+                self._start_exporter()
+            elif len(self._queue) >= self.export_batch_size:
+                self._wake.set()
+
+    def recent(self, run_id: Optional[str] = None, limit: Optional[int] = None) -> List[SpanRecord]:
+        spans = [s for s in list(self.ring) if run_id is None or s.run_id == run_id]
+        return spans[-limit:] if limit else spans
+
+    def flush(self) -> None:
+        """Export everything queued now (blocking)."""
+        self._export_pending()
+
+    def _start_exporter(self) -> None:
+        self._exporter = threading.Thread(
+            target=self._export_loop, name="aegis-span-export", daemon=True
+        )
+        self._exporter.start()
+
+    def _export_loop(self) -> None:
+        while True:
+            self._wake.wait(self.export_interval_s)
+            self._wake.clear()
+            self._export_pending()
+
+    def _export_pending(self) -> None:
+        with self._export_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.export_batch_size:
+                    batch.append(self._queue.popleft())
+                self._export(batch)
+
+    def _active_exporters(self) -> List[str]:
+        """Exporters that would actually emit something right now."""
+        active = []
+        for name in self.exporters:
+            if name == "log" and not logger.isEnabledFor(logging.INFO):
+                continue
+            if name == "otlp" and not self.otlp_endpoint:
+                continue
+            active.append(name)
+        return active
+
+    def _export(self, batch: List[SpanRecord]) -> None:
+        exporters = self._active_exporters()
+        if not exporters:
+            # Nobody wants the batch: skip redaction and serialization.
+            return
+        spans = [rec.to_dict() for rec in batch]
+        for name in exporters:
+            try:
+                getattr(self, f"_export_{name}")(spans)
+                self.counters["exported"] += len(spans)
+            except Exception as e:
+                self.counters["export_errors"] += 1
+                if self.counters["export_errors"] == 1:
+                    logger.warning(f"Span export to '{name}' failed: {e}")
+
+    def _export_log(self, spans: List[Dict[str, Any]]) -> None:
+        from aegis.utils.log_sinks import task_id_context
+
+        for sp in spans:
+            # Runs on the exporter thread: route each record to its task's log.
+            task_id_context.set(sp["run_id"])
+            logger.info(
+                f"Span: {sp['name']}",
+                extra={
+                    "event_type": "SpanEnd",
+                    "span": sp["name"],
+                    "run_id": sp["run_id"],
+                    "span_id": sp["span_id"],
+                    "parent_span_id": sp["parent_span_id"],
+                    "duration_ms": sp["duration_ms"],
+                    "status": sp["status"],
+                    "error": sp["error"],
+                    "attrs": sp["attrs"],
+                },
+            )
+        task_id_context.set(None)
+
+    def _export_file(self, spans: List[Dict[str, Any]]) -> None:
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.file_path.open("a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(sp, default=str, ensure_ascii=False) + "\n" for sp in spans))
+
+    def _export_otlp(self, spans: List[Dict[str, Any]]) -> None:
+        if not self.otlp_endpoint:
+            return
+        import httpx
+
+        resp = httpx.post(
+            self.otlp_endpoint,
+            json=_otlp_payload(spans),
+            headers={"Content-Type": "application/json", **self.otlp_headers},
+            timeout=10.0,
+        )
+        resp.raise_for_status()
+
+
+_RECORDER: Optional[SpanRecorder] = None
+_RECORDER_LOCK = threading.Lock()
+
+
+def get_span_recorder() -> SpanRecorder:
+    """Return the process-wide span recorder, built from config on first use."""
+    global _RECORDER
+    if _RECORDER is None:
+        with _RECORDER_LOCK:
+            if _RECORDER is None:
+                cfg = _tracing_settings()
+                kwargs = {
+                    k: cfg[k]
+                    for k in (
+                        "ring_size",
+                        "sample_rate",
+                        "slow_ms",
+                        "exporters",
+                        "file_path",
+                        "otlp_endpoint",
+                        "otlp_headers",
+                        "export_batch_size",
+                        "export_interval_ms",
+                        "export_queue_size",
+                    )
+                    if cfg.get(k) is not None
+                }
+                _RECORDER = SpanRecorder(**kwargs)
+                atexit.register(_RECORDER.flush)
+    return _RECORDER
+
+
+_SPAN_LISTENERS: List[Callable[[SpanRecord], None]] = []
+
+
+def add_span_listener(listener: Callable[[SpanRecord], None]) -> None:
+    """Call `listener` with every finished span, sampled or not.
+
+    Listeners run on the span's thread as it closes, so they must be cheap and
+    must not raise (exceptions are swallowed).
+    """
+    if listener not in _SPAN_LISTENERS:
+        _SPAN_LISTENERS.append(listener)
+
+
+def recent_spans(run_id: Optional[str] = None, limit: Optional[int] = None) -> List[SpanRecord]:
+    """Return finished spans still in the ring buffer, oldest first."""
+    return get_span_recorder().recent(run_id, limit)
+
+
+_ENABLED = os.getenv("AEGIS_TRACE_SPANS", "1") != "0"
+
+
 @contextmanager
 def span(name: str, *, run_id: Optional[str] = None, **attrs: Any):
     """
-    Context manager for a tracing span. Always logs start/end; optionally reports to Langfuse.
+    Context manager for a tracing span. Records it in the ring buffer and
+    exports it if sampled; optionally reports to Langfuse.
+    Yields the span's attribute dict, so attributes known only at the end
+    can be added to it.
     Example:
         with span("wrapper.compose.up", run_id=task_id, project_name="app", services=2):
             ...
     """
-    # Global off-switch for span logging/telemetry
-    if os.getenv("AEGIS_TRACE_SPANS", "1") == "0":
-        yield
+    # Global off-switch for span recording/telemetry
+    if not _ENABLED:
+        yield {}
         return
-    start = time.time()
-    _token = _RUN_ID.set(run_id)
-    safe_attrs = {}
-
-    try:
-        # Redact attrs for logs; keep original for Langfuse if available
-        safe_attrs = redact_for_log(attrs) if isinstance(attrs, dict) else {}
-    except Exception:
-        safe_attrs = {}
-
-    logger.info(
-        f"Span start: {name}",
-        extra={
-            "event_type": "SpanStart",
-            "span": name,
-            "run_id": run_id,
-            "attrs": safe_attrs,
-        },
-    )
+    recorder = _RECORDER or get_span_recorder()
+    if run_id is None:
+        run_id = _RUN_ID.get()
+    parent_id = _SPAN_ID.get()
+    span_id = random.getrandbits(64) or 1
+    run_token = _RUN_ID.set(run_id)
+    span_token = _SPAN_ID.set(span_id)
+    head = recorder.head_sampled(run_id)
 
     # Best-effort Langfuse span
     _lf_span = None
-    _lf_trace = _lf_get_or_create_trace(run_id)
+    _lf_trace = _lf_get_or_create_trace(run_id) if _LF is not False else None
     if _lf_trace is not None:
         try:
             # Different SDK versions may accept different kwargs—guard everything.
@@ -134,43 +542,40 @@ def span(name: str, *, run_id: Optional[str] = None, **attrs: Any):
         except Exception:
             _lf_span = None
 
+    status = "success"
+    error = None
+    start_ns = time.time_ns()
     try:
-        yield
-        status = "success"
-        error_info = None
-    except Exception as e:
-        status = "error"
-        error_info = {"type": type(e).__name__, "msg": str(e)}
+        yield attrs
+    except BaseException as e:
+        status = "error" if isinstance(e, Exception) else "cancelled"
+        error = f"{type(e).__name__}: {e}"
         # Try to report the error; never let it bubble from here
         if _lf_span is not None:
             try:
-                _lf_span.update(output=error_info, status_message=str(e))  # type: ignore[attr-defined]
+                _lf_span.update(output={"type": type(e).__name__, "msg": str(e)}, status_message=str(e))  # type: ignore[attr-defined]
             except Exception:
                 pass
         raise
     finally:
-        duration_ms = int((time.time() - start) * 1000)
-
+        end_ns = time.time_ns()
         try:
-            _RUN_ID.reset(_token)
+            _SPAN_ID.reset(span_token)
+            _RUN_ID.reset(run_token)
         except Exception:
             pass
-
-        logger.info(
-            f"Span end: {name}",
-            extra={
-                "event_type": "SpanEnd",
-                "span": name,
-                "run_id": run_id,
-                "duration_ms": duration_ms,
-                "status": status,
-            },
-        )
+        rec = SpanRecord(name, run_id, span_id, parent_id, start_ns, end_ns, status, error, attrs)
+        recorder.record(rec, head)
+        for listener in _SPAN_LISTENERS:
+            try:
+                listener(rec)
+            except Exception:
+                pass
         if _lf_span is not None:
             try:
                 # Close out the span with timing metadata
                 _lf_span.end(
-                    output={"duration_ms": duration_ms, "status": status},  # type: ignore[attr-defined]
+                    output={"duration_ms": int((end_ns - start_ns) / 1e6), "status": status},  # type: ignore[attr-defined]
                 )
             except Exception:
                 pass
@@ -185,7 +590,13 @@ def log_generation(
     usage: Optional[Dict[str, Any]] = None,
     meta: Optional[Dict[str, Any]] = None,
 ) -> None:
-    """Best-effort LLM generation log + optional Langfuse generation."""
+    """
+    Best-effort LLM generation log + optional Langfuse generation.
+
+    `prompt` and `output` may be values or zero-argument callables; they are
+    only built and redacted if a sink wants them (Langfuse is configured, or
+    `tracing.log_generation_payloads` is on and INFO records are logged).
+    """
     # Fall back to the active span's run_id if none was provided
     if run_id is None:
         try:
@@ -194,22 +605,28 @@ def log_generation(
             run_id = None
 
     try:
-        safe_prompt = redact_for_log(prompt)
-        safe_output = redact_for_log(output)
+        record_llm_tokens(usage)
     except Exception:
-        safe_prompt, safe_output = prompt, output
+        pass
+
+    safe_prompt = LazyPayload(prompt)
+    safe_output = LazyPayload(output)
 
-    logger.info(
-        "LLM generation",
-        extra={
+    if logger.isEnabledFor(logging.INFO):
+        extra = {
             "event_type": "LLMGeneration",
             "run_id": run_id,
             "model": model,
             "usage": usage or {},
             "meta": meta or {},
-        },
-    )
+        }
+        if _LOG_GENERATION_PAYLOADS:
+            extra["prompt"] = safe_prompt.get()
+            extra["output"] = safe_output.get()
+        logger.info("LLM generation", extra=extra)
 
+    if _LF is False:
+        return
     try:
         tr = _lf_get_or_create_trace(run_id)
         if tr is None:
@@ -217,8 +634,8 @@ def log_generation(
         # SDKs differ; this is best-effort and fully guarded.
         gen = tr.generation(  # type: ignore[attr-defined]
             model=model or "unknown",
-            input=safe_prompt,
-            output=safe_output,
+            input=safe_prompt.get(),
+            output=safe_output.get(),
             usage=usage or None,
             metadata=meta or None,
         )
@@ -2,10 +2,12 @@
 import React, { useEffect, useState, useRef } from 'react';
 import { Accordion, AccordionItem } from '@szhsin/react-accordion';
 import ReactMarkdown from 'react-markdown';
+import TimelineWaterfall from './components/TimelineWaterfall';
+import ReplayStepViewer from './components/ReplayStepViewer';
 
 /**
  * A component to view the details of a single task's artifacts, fetched on demand.
- * It displays a summary and a provenance tab for the selected task.
+ * It displays summary, provenance, timeline and replay tabs for the selected task.
  * @param {object} props - The component props.
  * @param {object} props.task - The metadata object for the task.
  * @returns {React.Component} The artifact viewer component.
@@ -44,6 +46,8 @@ const ArtifactViewer = ({ task }) => {
             <div style={{ marginBottom: '1rem', borderBottom: '1px solid var(--border)' }}>
                 <button onClick={() => setActiveTab('summary')} style={{ background: activeTab === 'summary' ? 'var(--accent)' : 'none', border: 'none', padding: '0.5rem 1rem' }}>Summary</button>
                 <button onClick={() => setActiveTab('provenance')} style={{ background: activeTab === 'provenance' ? 'var(--accent)' : 'none', border: 'none', padding: '0.5rem 1rem' }}>Provenance</button>
+                <button onClick={() => setActiveTab('timeline')} style={{ background: activeTab === 'timeline' ? 'var(--accent)' : 'none', border: 'none', padding: '0.5rem 1rem' }}>Timeline</button>
+                <button onClick={() => setActiveTab('replay')} style={{ background: activeTab === 'replay' ? 'var(--accent)' : 'none', border: 'none', padding: '0.5rem 1rem' }}>Replay</button>
             </div>
             {activeTab === 'summary' && (
                 <div style={{ background: '#1a192b', padding: '1rem', borderRadius: '4px', border: '1px solid var(--border)'}}>
@@ -55,6 +59,8 @@ const ArtifactViewer = ({ task }) => {
                     {provenance ? JSON.stringify(provenance, null, 2) : 'No provenance data available.'}
                 </pre>
             )}
+            {activeTab === 'timeline' && <TimelineWaterfall taskId={task.task_id} />}
+            {activeTab === 'replay' && <ReplayStepViewer taskId={task.task_id} />}
         </div>
     );
 };
@@ -0,0 +1,70 @@
+// aegis/web/react_ui/src/components/ReplayStepViewer.jsx
+import React, { useEffect, useState } from 'react';
+
+/**
+ * Browses a task's replay log one step at a time. The step list comes from
+ * `/api/reports/{taskId}/replay/index`; the events of the selected step are
+ * fetched on demand, so an indexed replay container only decompresses that step.
+ * @param {object} props - The component props.
+ * @param {string} props.taskId - The ID of the task to show.
+ * @returns {React.Component} The replay step viewer component.
+ */
+export default function ReplayStepViewer({ taskId }) {
+  const [index, setIndex] = useState(null);
+  const [step, setStep] = useState(null);
+  const [events, setEvents] = useState(null);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    setIndex(null);
+    setStep(null);
+    setError(null);
+    fetch(`/api/reports/${taskId}/replay/index`)
+      .then(res => (res.ok ? res.json() : Promise.reject(new Error(`HTTP ${res.status}`))))
+      .then(data => {
+        setIndex(data);
+        if (data.steps.length > 0) setStep(data.steps[0].step);
+      })
+      .catch(err => setError(err.message));
+  }, [taskId]);
+
+  useEffect(() => {
+    if (step === null) return;
+    setEvents(null);
+    fetch(`/api/reports/${taskId}/replay?step=${step}`)
+      .then(res => (res.ok ? res.json() : Promise.reject(new Error(`HTTP ${res.status}`))))
+      .then(data => setEvents(data.events))
+      .catch(err => setError(err.message));
+  }, [taskId, step]);
+
+  if (error) return <p>No replay log available ({error}).</p>;
+  if (!index) return <p>Loading replay index...</p>;
+
+  return (
+    <div style={{ display: 'grid', gridTemplateColumns: '12rem 1fr', gap: '1rem', fontSize: '0.85em' }}>
+      <div style={{ maxHeight: '500px', overflowY: 'auto', borderRight: '1px solid var(--border)' }}>
+        <div style={{ opacity: 0.7, marginBottom: '0.5rem' }}>{index.indexed ? 'Indexed container' : 'JSONL journal'}</div>
+        {index.steps.map(s => (
+          <button
+            key={s.step}
+            onClick={() => setStep(s.step)}
+            style={{ display: 'block', width: '100%', textAlign: 'left', border: 'none', padding: '0.3rem 0.5rem', background: s.step === step ? 'var(--accent)' : 'none' }}
+          >
+            Step {s.step} <span style={{ opacity: 0.6 }}>({s.events.length} events)</span>
+          </button>
+        ))}
+      </div>
+      <div>
+        {!events && <p>Loading step...</p>}
+        {events && events.map((ev, i) => (
+          <details key={i} open={ev.event_type !== 'PLANNER_INPUT'} style={{ marginBottom: '0.5rem' }}>
+            <summary style={{ fontFamily: 'var(--font-mono)' }}>{ev.event_type} <span style={{ opacity: 0.6 }}>{ev.ts_iso}</span></summary>
+            <pre style={{ background: '#000', padding: '0.5rem', overflowX: 'auto', whiteSpace: 'pre-wrap', maxHeight: '300px' }}>
+              {JSON.stringify(ev.data, null, 2)}
+            </pre>
+          </details>
+        ))}
+      </div>
+    </div>
+  );
+}
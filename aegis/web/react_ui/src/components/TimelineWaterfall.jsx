@@ -0,0 +1,89 @@
+// aegis/web/react_ui/src/components/TimelineWaterfall.jsx
+import React, { useEffect, useState } from 'react';
+
+const KIND_COLORS = {
+  node: '#5c6bc0',
+  llm: '#ab47bc',
+  tool: '#26a69a',
+  verification: '#ffa726',
+  other: '#78909c',
+};
+
+const formatMs = (ms) => (ms >= 1000 ? `${(ms / 1000).toFixed(2)}s` : `${ms.toFixed(1)}ms`);
+
+/**
+ * A waterfall view of a task's run timeline, fetched from
+ * `/api/reports/{taskId}/timeline`. Each span is a bar offset by its start
+ * time and indented by its nesting depth; replay events are drawn as ticks.
+ * @param {object} props - The component props.
+ * @param {string} props.taskId - The ID of the task to show.
+ * @returns {React.Component} The timeline waterfall component.
+ */
+export default function TimelineWaterfall({ taskId }) {
+  const [timeline, setTimeline] = useState(null);
+  const [error, setError] = useState(null);
+
+  useEffect(() => {
+    setTimeline(null);
+    setError(null);
+    fetch(`/api/reports/${taskId}/timeline`)
+      .then(res => (res.ok ? res.json() : Promise.reject(new Error(`HTTP ${res.status}`))))
+      .then(setTimeline)
+      .catch(err => setError(err.message));
+  }, [taskId]);
+
+  if (error) return <p>No timeline available ({error}).</p>;
+  if (!timeline) return <p>Loading timeline...</p>;
+
+  const total = Math.max(timeline.duration_ms, 1);
+  const pct = (ms) => `${(ms / total) * 100}%`;
+
+  return (
+    <div style={{ fontFamily: 'var(--font-mono)', fontSize: '0.8em' }}>
+      <div style={{ marginBottom: '0.5rem', opacity: 0.8 }}>
+        {formatMs(timeline.duration_ms)} total ·{' '}
+        {Object.entries(timeline.counts).map(([kind, n]) => (
+          <span key={kind} style={{ color: KIND_COLORS[kind] || KIND_COLORS.other, marginRight: '0.75rem' }}>
+            {kind}: {n}
+          </span>
+        ))}
+      </div>
+      <div style={{ position: 'relative', maxHeight: '500px', overflowY: 'auto' }}>
+        <div style={{ position: 'relative', height: '10px', marginLeft: '30%', marginBottom: '4px' }}>
+          {timeline.markers.map((m, i) => (
+            <div
+              key={i}
+              title={`${m.event_type} @ ${formatMs(m.at_ms)}`}
+              style={{ position: 'absolute', left: pct(m.at_ms), width: '2px', height: '10px', background: 'var(--fg)', opacity: 0.5 }}
+            />
+          ))}
+        </div>
+        {timeline.spans.map(s => (
+          <div key={s.id} style={{ display: 'flex', alignItems: 'center', height: '18px' }}>
+            <div
+              style={{ width: '30%', paddingLeft: `${s.depth * 12}px`, overflow: 'hidden', textOverflow: 'ellipsis', whiteSpace: 'nowrap' }}
+              title={s.name}
+            >
+              {s.name}{s.attrs.tool ? ` (${s.attrs.tool})` : ''}
+            </div>
+            <div style={{ position: 'relative', flex: 1, height: '12px' }}>
+              <div
+                title={`${s.name}: ${formatMs(s.duration_ms)} at +${formatMs(s.start_ms)}${s.error ? `\n${s.error}` : ''}`}
+                style={{
+                  position: 'absolute',
+                  left: pct(s.start_ms),
+                  width: `max(2px, ${pct(s.duration_ms)})`,
+                  height: '100%',
+                  background: KIND_COLORS[s.kind] || KIND_COLORS.other,
+                  outline: s.status === 'error' ? '1px solid #ff6666' : 'none',
+                  borderRadius: '2px',
+                }}
+              />
+            </div>
+            <div style={{ width: '70px', textAlign: 'right', opacity: 0.7 }}>{formatMs(s.duration_ms)}</div>
+          </div>
+        ))}
+      </div>
+    </div>
+  );
+}
@@ -8,13 +8,17 @@ outputs generated by completed agent tasks, such as summaries and provenance log
 
 import json
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import PlainTextResponse
 
+from aegis.exceptions import ReplayError
 from aegis.utils.config import get_config
 from aegis.utils.logger import setup_logger
+from aegis.utils.replay_store import open_replay
+from aegis.utils.step_timing import aggregate_timings
+from aegis.utils.timeline import build_timeline
 
 router = APIRouter()
 logger = setup_logger(__name__)
@@ -124,3 +128,116 @@ async def get_provenance_artifact(task_id: str):
         raise HTTPException(
             status_code=500, detail=f"Error reading or parsing provenance file: {e}"
         )
+
+
+@router.get("/artifacts/{task_id}/timings", tags=["Artifacts"])
+async def get_timings_artifact(task_id: str) -> Dict[str, Any]:
+    """Returns a task's per-step latency breakdown and its aggregate.
+
+    :param task_id: The ID of the task.
+    :type task_id: str
+    :return: ``{"task_id", "breakdown", "steps": [{step, tool_name,
+        duration_ms, timings}]}``, read from the task's provenance.json.
+    :rtype: Dict[str, Any]
+    :raises HTTPException: If the provenance file is missing or invalid.
+    """
+    provenance = await get_provenance_artifact(task_id)
+    events = provenance.get("events") or []
+    return {
+        "task_id": task_id,
+        "breakdown": provenance.get("latency_breakdown")
+        or aggregate_timings(events),
+        "steps": [
+            {
+                "step": ev.get("step"),
+                "tool_name": ev.get("tool_name"),
+                "duration_ms": ev.get("duration_ms"),
+                "timings": ev.get("timings") or {},
+            }
+            for ev in events
+        ],
+    }
+
+
+@router.get("/reports/{task_id}/timeline", tags=["Artifacts"])
+async def get_task_timeline(task_id: str) -> Dict[str, Any]:
+    """Returns a task's run timeline for the waterfall view.
+
+    Lists every graph node, LLM call, tool call and verification with start
+    and end offsets and nesting depth, plus replay events as markers. Spans
+    of a task that is still running are included.
+
+    :param task_id: The ID of the task.
+    :type task_id: str
+    :return: The timeline built by `aegis.utils.timeline.build_timeline`.
+    :rtype: Dict[str, Any]
+    :raises HTTPException: If the task has no timeline or replay data.
+    """
+    timeline = build_timeline(task_id, REPORTS_DIR)
+    if timeline is None:
+        raise HTTPException(status_code=404, detail="Timeline not found.")
+    return timeline
+
+
+def _open_replay_or_404(task_id: str):
+    try:
+        replay = open_replay(REPORTS_DIR / task_id)
+    except ReplayError as e:
+        logger.error(f"Failed to open replay log for task {task_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if replay is None:
+        raise HTTPException(status_code=404, detail="Replay log not found.")
+    return replay
+
+
+@router.get("/reports/{task_id}/replay/index", tags=["Artifacts"])
+async def get_replay_index(task_id: str) -> Dict[str, Any]:
+    """Lists a task's replay steps and the event types in each.
+
+    With an indexed replay container this is read from the index alone.
+
+    :param task_id: The ID of the task.
+    :type task_id: str
+    :return: ``{"task_id", "indexed", "steps": [{"step", "events": [{event_type, ts_iso}]}]}``.
+    :rtype: Dict[str, Any]
+    :raises HTTPException: If the task has no replay log.
+    """
+    replay = _open_replay_or_404(task_id)
+    steps: Dict[int, List[Dict[str, Any]]] = {}
+    for entry in replay.entries():
+        steps.setdefault(entry["step"], []).append(
+            {"event_type": entry["event_type"], "ts_iso": entry["ts_iso"]}
+        )
+    return {
+        "task_id": task_id,
+        "indexed": replay.indexed,
+        "steps": [{"step": step, "events": events} for step, events in steps.items()],
+    }
+
+
+@router.get("/reports/{task_id}/replay", tags=["Artifacts"])
+async def get_replay_events(
+    task_id: str, step: Optional[int] = None, event_type: Optional[str] = None
+) -> Dict[str, Any]:
+    """Returns a task's replay events, filtered by step and/or event type.
+
+    With an indexed replay container only the frames holding the requested
+    step are decompressed.
+
+    :param task_id: The ID of the task.
+    :type task_id: str
+    :param step: Only events of this step (see `aegis.utils.replay_store`).
+    :type step: Optional[int]
+    :param event_type: Only events of this type, e.g. ``PLANNER_OUTPUT``.
+    :type event_type: Optional[str]
+    :return: ``{"task_id", "step", "event_type", "events"}``.
+    :rtype: Dict[str, Any]
+    :raises HTTPException: If the task has no replay log.
+    """
+    replay = _open_replay_or_404(task_id)
+    try:
+        events = replay.events(step=step, event_type=event_type)
+    except ReplayError as e:
+        logger.error(f"Failed to read replay events for task {task_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"task_id": task_id, "step": step, "event_type": event_type, "events": events}
@@ -4,13 +4,16 @@ API route for comparing artifacts from two different task runs.
 """
 
 import difflib
+import json
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List
 
 from fastapi import APIRouter, HTTPException, Body
 
+from aegis.exceptions import ReplayError
 from aegis.utils.config import get_config
 from aegis.utils.logger import setup_logger
+from aegis.utils.replay_store import open_replay
 
 router = APIRouter()
 logger = setup_logger(__name__)
@@ -79,3 +82,59 @@ async def compare_task_summaries(task_ids: List[str] = Body(...)) -> dict:
     diff = list(diff_generator)
     logger.info(f"Comparison successful, diff generated with {len(diff)} lines.")
     return {"task1_id": task1_id, "task2_id": task2_id, "diff": diff}
+
+
+def _step_lines(task_id: str, step: int) -> List[str]:
+    """Renders one replay step of a task for diffing (timestamps omitted)."""
+    try:
+        replay = open_replay(REPORTS_DIR / task_id)
+        if replay is None:
+            raise HTTPException(
+                status_code=404, detail=f"Replay log for task '{task_id}' not found."
+            )
+        events = replay.events(step=step)
+    except ReplayError as e:
+        logger.error(f"Failed to read replay log of task '{task_id}': {e}")
+        raise HTTPException(status_code=500, detail=f"Error reading replay log: {e}")
+    lines: List[str] = []
+    for event in events:
+        lines.append(f"## {event.get('event_type')}")
+        lines += json.dumps(event.get("data"), indent=2, sort_keys=True, default=str).splitlines()
+    return lines
+
+
+@router.post("/compare_steps", tags=["Artifacts"])
+async def compare_task_steps(
+    task_ids: List[str] = Body(...), step: int = Body(...)
+) -> Dict[str, Any]:
+    """Diffs the replay events of one step across two task runs.
+
+    Only that step is loaded from each task's replay log; with an indexed
+    replay container that is a single compressed frame per task.
+
+    :param task_ids: A list containing exactly two task IDs.
+    :type task_ids: List[str]
+    :param step: The step to compare (see `aegis.utils.replay_store`).
+    :type step: int
+    :return: A dictionary containing the task IDs, the step and the diff.
+    :rtype: dict
+    :raises HTTPException: If inputs are invalid or a replay log is missing.
+    """
+    if len(task_ids) != 2:
+        raise HTTPException(
+            status_code=400, detail="Please provide exactly two task IDs to compare."
+        )
+    task1_id, task2_id = task_ids
+    diff = list(
+        difflib.unified_diff(
+            _step_lines(task1_id, step),
+            _step_lines(task2_id, step),
+            fromfile=f"{task1_id}/step {step}",
+            tofile=f"{task2_id}/step {step}",
+            lineterm="",
+        )
+    )
+    logger.info(
+        f"Step {step} of tasks {task1_id} and {task2_id} compared, {len(diff)} diff lines."
+    )
+    return {"task1_id": task1_id, "task2_id": task2_id, "step": step, "diff": diff}
@@ -9,6 +9,7 @@ from pydantic import BaseModel
 
 from aegis.utils.cli_helpers import validate_all_configs, create_new_tool
 from aegis.utils.logger import setup_logger
+from aegis.utils.loop_watchdog import loop_lag_stats
 
 router = APIRouter(prefix="/dev", tags=["Developer"])
 logger = setup_logger(__name__)
@@ -52,3 +53,9 @@ def new_tool_endpoint(payload: NewToolRequest):
         raise HTTPException(
             status_code=500, detail=f"An unexpected error occurred: {e}"
         )
+
+
+@router.get("/loop-lag")
+def loop_lag_endpoint():
+    """Returns the event-loop lag histogram and the last blocking stall."""
+    return {"watchdogs": loop_lag_stats()}
@@ -6,20 +6,29 @@ The primary API route for launching agent tasks.
 import json
 import traceback
 import uuid
-from typing import Dict
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 from fastapi import APIRouter, HTTPException
-from langgraph.errors import GraphInterrupt
 from pydantic import ValidationError
 
 from aegis.agents.agent_graph import AgentGraph
+from aegis.agents.task_lifecycle import finalize_task
 from aegis.agents.task_state import TaskState
-from aegis.exceptions import ConfigurationError, PlannerError, ToolError
+from aegis.exceptions import (
+    ConfigurationError,
+    DuplicateTaskError,
+    PlannerError,
+    QueueFullError,
+    ToolError,
+)
 from aegis.executors.redis_exec import RedisExecutor
 from aegis.schemas.agent import AgentConfig, AgentGraphConfig
 from aegis.schemas.api import HistoryStepResponse, LaunchResponse
 from aegis.schemas.launch import LaunchRequest
+from aegis.utils.checkpointer import delete_checkpoints, get_checkpointer
 from aegis.utils.config_loader import load_agent_config
+from aegis.utils import fault_injection
+from aegis.utils import metrics
 from aegis.utils.log_sinks import task_id_context
 from aegis.utils.logger import setup_logger
 
@@ -28,7 +37,9 @@ logger = setup_logger(__name__)
 
 
 @router.post("/launch", response_model=LaunchResponse)
-async def launch_task(payload: LaunchRequest) -> LaunchResponse:
+async def launch_task(
+    payload: LaunchRequest, async_mode: bool = False
+) -> LaunchResponse:
     """Handles an agent task launch request.
 
     This is the main entry point for running an agent task via the API. It
@@ -41,8 +52,14 @@ async def launch_task(payload: LaunchRequest) -> LaunchResponse:
     5. Building and invoking the execution graph.
     6. Returning the final result or a detailed error.
 
+    With `?async_mode=true` the task is written to the durable task queue and
+    the response (status 'QUEUED') is returned immediately; poll
+    `GET /api/tasks/{task_id}` for progress and the final result.
+
     :param payload: The launch request containing the task and configuration.
     :type payload: LaunchRequest
+    :param async_mode: If true, enqueue the task instead of running it inline.
+    :type async_mode: bool
     :return: A dictionary containing the task ID, final summary, and history.
     :rtype: dict
     :raises HTTPException: If there is a configuration, planning, or tool error.
@@ -52,101 +69,11 @@ async def launch_task(payload: LaunchRequest) -> LaunchResponse:
     logger.info(f"🚀 Received launch request for task: '{payload.task.prompt[:50]}...'")
     logger.debug(f"Full launch payload received: {payload.model_dump_json(indent=2)}")
 
-    try:
-        preset_config: AgentConfig = load_agent_config(
-            profile=payload.config if isinstance(payload.config, str) else None,
-            raw_config=payload.config if isinstance(payload.config, dict) else None,
-        )
-        runtime_config = preset_config.runtime
-        if payload.execution:
-            runtime_config = runtime_config.model_copy(
-                update=payload.execution.model_dump(exclude_unset=True)
-            )
-        if payload.iterations is not None:
-            runtime_config.iterations = payload.iterations
-
-        # Added detailed logging for the final runtime configuration
-        logger.debug(
-            f"Final runtime configuration for task {task_id}:\n"
-            f"{runtime_config.model_dump_json(indent=2)}"
-        )
-
-        initial_state = TaskState(
-            task_id=task_id, task_prompt=payload.task.prompt, runtime=runtime_config
-        )
-
-        graph_structure = AgentGraphConfig(
-            state_type=preset_config.state_type,
-            entrypoint=preset_config.entrypoint,
-            nodes=preset_config.nodes,
-            edges=preset_config.edges,
-            condition_node=preset_config.condition_node,
-            condition_map=preset_config.condition_map,
-            middleware=preset_config.middleware,
-            interrupt_nodes=preset_config.interrupt_nodes,
-        )
-
-        agent_graph = AgentGraph(graph_structure).build_graph()
-
-        final_state_dict = await agent_graph.ainvoke(initial_state.model_dump())
-        final_state = TaskState(**final_state_dict)
-
-        # After the graph has run, check if the last action was an interruption
-        if (
-            final_state.history
-            and final_state.history[-1].plan.tool_name == "ask_human_for_input"
-        ):
-            logger.info(f"⏸️  Task {task_id} has been paused for human input.")
-            # Persist the interrupted state to Redis instead of in-memory.
-            try:
-                redis = RedisExecutor()
-                session_data = {
-                    "state": final_state.model_dump(),
-                    "profile": (
-                        payload.config if isinstance(payload.config, str) else None
-                    ),
-                    "raw_config": (
-                        payload.config if isinstance(payload.config, dict) else None
-                    ),
-                }
-                redis.set_value(
-                    f"aegis:interrupted:{task_id}",
-                    json.dumps(session_data, default=str),
-                )
-                logger.info(f"Interrupted state for task {task_id} saved to Redis.")
-            except Exception as e:
-                logger.exception(
-                    f"CRITICAL: Failed to save interrupted state for task {task_id} to Redis."
-                )
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Task was interrupted but failed to save its state to Redis: {e}",
-                )
-
-            last_observation = final_state.history[-1].observation
-            return LaunchResponse(
-                task_id=task_id,
-                summary=last_observation,
-                status="PAUSED",
-                history=[],
-            )
-
-        logger.info(f"✅ Task {task_id} completed successfully.")
-
-        return LaunchResponse(
-            task_id=task_id,
-            summary=final_state.final_summary,
-            history=[
-                HistoryStepResponse(
-                    thought=entry.plan.thought,
-                    tool_name=entry.plan.tool_name,
-                    tool_args=entry.plan.tool_args,
-                    tool_output=entry.observation,
-                )
-                for entry in final_state.history
-            ],
-        )
+    if async_mode:
+        return await _enqueue_launch(payload, task_id)
 
+    try:
+        return await run_launch(payload, task_id)
     except ValidationError as e:
         logger.error(f"Pydantic validation failed during task launch: {e}")
         error_details = "\n".join(
@@ -171,3 +98,207 @@ async def launch_task(payload: LaunchRequest) -> LaunchResponse:
             status_code=500,
             detail=f"An unexpected error occurred: {e.__class__.__name__}: {e}",
         )
+
+
+async def run_launch(
+    payload: LaunchRequest,
+    task_id: str,
+    on_update: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+) -> LaunchResponse:
+    """Runs one launch request to completion (or to a human-input pause).
+
+    This is shared by the synchronous `/launch` route and the background task
+    workers. Errors propagate unchanged; mapping them to HTTP responses is the
+    caller's job.
+
+    :param payload: The launch request containing the task and configuration.
+    :type payload: LaunchRequest
+    :param task_id: The id to run the task under.
+    :type task_id: str
+    :param on_update: Optional coroutine called with each intermediate state
+                      snapshot (as a dict) while the graph runs.
+    :type on_update: Optional[Callable[[Dict[str, Any]], Awaitable[None]]]
+    :return: The task result.
+    :rtype: LaunchResponse
+    """
+    preset_config: AgentConfig = load_agent_config(
+        profile=payload.config if isinstance(payload.config, str) else None,
+        raw_config=payload.config if isinstance(payload.config, dict) else None,
+    )
+    runtime_config = preset_config.runtime
+    if payload.execution:
+        runtime_config = runtime_config.model_copy(
+            update=payload.execution.model_dump(exclude_unset=True)
+        )
+    if payload.iterations is not None:
+        runtime_config.iterations = payload.iterations
+
+    # Added detailed logging for the final runtime configuration
+    logger.debug(
+        f"Final runtime configuration for task {task_id}:\n"
+        f"{runtime_config.model_dump_json(indent=2)}"
+    )
+
+    initial_state = TaskState(
+        task_id=task_id, task_prompt=payload.task.prompt, runtime=runtime_config
+    )
+    fault_injection.activate(
+        runtime_config.fault_profile, run_id=task_id, seed=runtime_config.seed
+    )
+
+    graph_structure = AgentGraphConfig(
+        state_type=preset_config.state_type,
+        entrypoint=preset_config.entrypoint,
+        nodes=preset_config.nodes,
+        edges=preset_config.edges,
+        condition_node=preset_config.condition_node,
+        condition_map=preset_config.condition_map,
+        middleware=preset_config.middleware,
+        interrupt_nodes=preset_config.interrupt_nodes,
+    )
+
+    # Only a graph with interrupt nodes stops at a resumable checkpoint; other
+    # graphs skip the per-step checkpoint writes and pause through Redis.
+    checkpointer = get_checkpointer() if preset_config.interrupt_nodes else None
+    agent_graph = AgentGraph(graph_structure).build_graph(
+        checkpointer=checkpointer,
+        profile=bool(runtime_config.cpu_profile),
+        memory_profile=bool(runtime_config.memory_profile),
+    )
+    run_config = None
+    if checkpointer is not None:
+        # The task id doubles as the checkpoint thread. The preset travels in
+        # the checkpoint metadata so /resume can rebuild the same graph.
+        run_config = {
+            "configurable": {"thread_id": task_id},
+            "metadata": {
+                "aegis_profile": (
+                    payload.config if isinstance(payload.config, str) else ""
+                ),
+                "aegis_raw_config": (
+                    json.dumps(payload.config, default=str)
+                    if isinstance(payload.config, dict)
+                    else ""
+                ),
+                "aegis_cpu_profile": bool(runtime_config.cpu_profile),
+                "aegis_memory_profile": bool(runtime_config.memory_profile),
+            },
+        }
+
+    metrics.ACTIVE_TASKS.inc()
+    paused = False
+    try:
+        if on_update is None:
+            final_state_dict = await agent_graph.ainvoke(
+                initial_state.model_dump(), config=run_config
+            )
+        else:
+            # Stream full state snapshots so the caller can publish progress.
+            final_state_dict = initial_state.model_dump()
+            async for snapshot in agent_graph.astream(
+                initial_state.model_dump(), config=run_config, stream_mode="values"
+            ):
+                final_state_dict = snapshot
+                await on_update(snapshot)
+        final_state = TaskState(**final_state_dict)
+        paused = bool(
+            final_state.history
+            and final_state.history[-1].plan.tool_name == "ask_human_for_input"
+        )
+    finally:
+        # Sub-agents never outlive their parent, whether it finished, failed
+        # or was cancelled.
+        metrics.ACTIVE_TASKS.dec()
+        await finalize_task(task_id)
+        if checkpointer is not None and not paused:
+            # Only a paused task is ever resumed from its checkpoints.
+            await delete_checkpoints(checkpointer, task_id)
+
+    # After the graph has run, check if the last action was an interruption
+    if paused:
+        logger.info(f"⏸️  Task {task_id} has been paused for human input.")
+        return await _pause_response(
+            agent_graph, run_config, final_state, payload.config, task_id
+        )
+
+    logger.info(f"✅ Task {task_id} completed successfully.")
+
+    return LaunchResponse(
+        task_id=task_id,
+        summary=final_state.final_summary,
+        history=[
+            HistoryStepResponse(
+                thought=entry.plan.thought,
+                tool_name=entry.plan.tool_name,
+                tool_args=entry.plan.tool_args,
+                tool_output=entry.observation,
+            )
+            for entry in final_state.history
+        ],
+    )
+
+
+async def _enqueue_launch(payload: LaunchRequest, task_id: str) -> LaunchResponse:
+    """Writes a launch request to the durable queue and wakes the workers."""
+    from aegis.agents.task_pool import get_task_pool
+
+    pool = get_task_pool()
+    try:
+        await pool.ensure_started()
+        await pool.submit(task_id, payload)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except DuplicateTaskError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    logger.info(f"📥 Task {task_id} queued for background execution.")
+    return LaunchResponse(task_id=task_id, status="QUEUED", history=[])
+
+
+async def _pause_response(
+    agent_graph: Any,
+    run_config: Optional[Dict[str, Any]],
+    final_state: TaskState,
+    config: Any,
+    task_id: str,
+) -> LaunchResponse:
+    """Records a paused task so `/resume` can continue it.
+
+    With a checkpointer the graph has already persisted its position; only the
+    checkpoint id is reported. Without one, the full state is serialized to
+    Redis as before.
+    """
+    checkpoint_id = None
+    if run_config is not None:
+        snapshot = await agent_graph.aget_state({"configurable": {"thread_id": task_id}})
+        checkpoint_id = snapshot.config["configurable"].get("checkpoint_id")
+        logger.info(f"Task {task_id} paused at checkpoint {checkpoint_id}.")
+    else:
+        # Persist the interrupted state to Redis instead of in-memory.
+        try:
+            redis = RedisExecutor()
+            session_data = {
+                "state": final_state.model_dump(),
+                "profile": config if isinstance(config, str) else None,
+                "raw_config": config if isinstance(config, dict) else None,
+            }
+            redis.set_value(
+                f"aegis:interrupted:{task_id}",
+                json.dumps(session_data, default=str),
+            )
+            logger.info(f"Interrupted state for task {task_id} saved to Redis.")
+        except Exception as e:
+            logger.exception(
+                f"CRITICAL: Failed to save interrupted state for task {task_id} to Redis."
+            )
+            raise HTTPException(
+                status_code=500,
+                detail=f"Task was interrupted but failed to save its state to Redis: {e}",
+            )
+
+    return LaunchResponse(
+        task_id=task_id,
+        summary=final_state.history[-1].observation,
+        status="PAUSED",
+        history=[],
+        checkpoint_id=checkpoint_id,
+    )
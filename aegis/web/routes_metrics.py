@@ -0,0 +1,22 @@
+# aegis/web/routes_metrics.py
+"""
+Prometheus scrape endpoint.
+
+Mounted at the server root (`GET /metrics`), outside the `/api` prefix, where
+Prometheus looks by default.
+"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from aegis.utils import metrics
+from aegis.web.routes_stream import hub
+
+router = APIRouter(tags=["Metrics"])
+
+metrics.WEBSOCKET_CLIENTS.set_function(lambda: len(hub.clients))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint() -> PlainTextResponse:
+    """Returns all AEGIS metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(metrics.render_metrics(), media_type=metrics.CONTENT_TYPE)
@@ -4,16 +4,21 @@ API route for resuming an interrupted agent task.
 """
 import json
 import traceback
+from typing import Any, Optional
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from aegis.agents.agent_graph import AgentGraph
+from aegis.agents.task_lifecycle import finalize_task
 from aegis.agents.task_state import TaskState
 from aegis.executors.redis_exec import RedisExecutor
 from aegis.schemas.agent import AgentGraphConfig, AgentConfig
 from aegis.schemas.api import HistoryStepResponse, LaunchResponse
+from aegis.utils.checkpointer import delete_checkpoints, get_checkpointer
 from aegis.utils.config_loader import load_agent_config
+from aegis.utils import fault_injection
+from aegis.utils import metrics
 from aegis.utils.log_sinks import task_id_context
 from aegis.utils.logger import setup_logger
 
@@ -24,6 +29,104 @@ logger = setup_logger(__name__)
 class ResumeRequest(BaseModel):
     task_id: str
     human_feedback: str
+    checkpoint_id: Optional[str] = None
+
+
+def _history_response(final_state: TaskState):
+    return [
+        HistoryStepResponse(
+            thought=entry.plan.thought,
+            tool_name=entry.plan.tool_name,
+            tool_args=entry.plan.tool_args,
+            tool_output=entry.observation,
+        )
+        for entry in final_state.history
+    ]
+
+
+async def _resume_from_checkpoint(
+    payload: ResumeRequest, checkpointer: Any
+) -> Optional[LaunchResponse]:
+    """Resumes a task from its graph checkpoint.
+
+    Only `human_feedback` is written before resuming; the rest of the state is
+    read back from the checkpoint. Unless the task pauses again, its
+    checkpoints are deleted when the resumed run ends.
+
+    :return: The result, or None if the task has no checkpoint.
+    """
+    task_id = payload.task_id
+    lookup = {"configurable": {"thread_id": task_id}}
+    if payload.checkpoint_id:
+        lookup["configurable"]["checkpoint_id"] = payload.checkpoint_id
+    saved = await checkpointer.aget_tuple(lookup)
+    if saved is None:
+        return None
+
+    metadata = saved.metadata or {}
+    raw_config = metadata.get("aegis_raw_config")
+    preset_config = load_agent_config(
+        profile=metadata.get("aegis_profile") or None,
+        raw_config=json.loads(raw_config) if raw_config else None,
+    )
+    graph_structure = AgentGraphConfig(**preset_config.model_dump())
+    agent_graph = AgentGraph(graph_structure).build_graph(
+        checkpointer=checkpointer,
+        profile=bool(metadata.get("aegis_cpu_profile")),
+        memory_profile=bool(metadata.get("aegis_memory_profile")),
+    )
+
+    snapshot = await agent_graph.aget_state(saved.config)
+    if not snapshot.next:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Task '{task_id}' is not paused at checkpoint "
+            f"{saved.config['configurable']['checkpoint_id']}.",
+        )
+
+    runtime = snapshot.values.get("runtime")
+    fault_injection.activate(
+        getattr(runtime, "fault_profile", None),
+        run_id=task_id,
+        seed=getattr(runtime, "seed", None),
+    )
+
+    logger.info(
+        f"Resuming task {task_id} from checkpoint "
+        f"{saved.config['configurable']['checkpoint_id']} before {snapshot.next}."
+    )
+    paused = False
+    try:
+        run_config = await agent_graph.aupdate_state(
+            saved.config, {"human_feedback": payload.human_feedback}
+        )
+        final_state = TaskState(**await agent_graph.ainvoke(None, config=run_config))
+        paused = bool(
+            final_state.history
+            and final_state.history[-1].plan.tool_name == "ask_human_for_input"
+        )
+    finally:
+        if not paused:
+            await delete_checkpoints(checkpointer, task_id)
+
+    if paused:
+        pause_snapshot = await agent_graph.aget_state(
+            {"configurable": {"thread_id": task_id}}
+        )
+        return LaunchResponse(
+            task_id=task_id,
+            summary=final_state.history[-1].observation,
+            status="PAUSED",
+            history=[],
+            checkpoint_id=pause_snapshot.config["configurable"].get("checkpoint_id"),
+        )
+
+    logger.info(f"✅ Resumed task {task_id} completed successfully.")
+    return LaunchResponse(
+        task_id=task_id,
+        summary=final_state.final_summary,
+        history=_history_response(final_state),
+    )
 
 
 @router.post("/resume", response_model=LaunchResponse)
@@ -33,7 +136,20 @@ async def resume_task(payload: ResumeRequest):
     task_id_context.set(task_id)
     logger.info(f"▶️ Received resume request for task: {task_id}")
 
+    metrics.ACTIVE_TASKS.inc()
     try:
+        checkpointer = get_checkpointer()
+        if checkpointer is not None:
+            result = await _resume_from_checkpoint(payload, checkpointer)
+            if result is not None:
+                return result
+            if payload.checkpoint_id:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Checkpoint '{payload.checkpoint_id}' not found for task.",
+                )
+
+        # Legacy path: tasks paused without a checkpointer live in Redis.
         redis = RedisExecutor()
         session_json = redis.get_value(f"aegis:interrupted:{task_id}")
         if "No value found" in session_json:
@@ -52,7 +168,16 @@ async def resume_task(payload: ResumeRequest):
         # Re-build the graph config and graph, just like in the launch endpoint
         preset_config = load_agent_config(profile=profile, raw_config=raw_config)
         graph_structure = AgentGraphConfig(**preset_config.model_dump())
-        agent_graph = AgentGraph(graph_structure).build_graph()
+        saved_runtime = saved_state_dict.get("runtime") or {}
+        agent_graph = AgentGraph(graph_structure).build_graph(
+            profile=bool(saved_runtime.get("cpu_profile")),
+            memory_profile=bool(saved_runtime.get("memory_profile")),
+        )
+        fault_injection.activate(
+            saved_runtime.get("fault_profile"),
+            run_id=task_id,
+            seed=saved_runtime.get("seed"),
+        )
 
         # Inject the human feedback into the state dictionary before resuming
         saved_state_dict["human_feedback"] = payload.human_feedback
@@ -65,17 +190,14 @@ async def resume_task(payload: ResumeRequest):
         return LaunchResponse(
             task_id=task_id,
             summary=final_state.final_summary,
-            history=[
-                HistoryStepResponse(
-                    thought=entry.plan.thought,
-                    tool_name=entry.plan.tool_name,
-                    tool_args=entry.plan.tool_args,
-                    tool_output=entry.observation,
-                )
-                for entry in final_state.history
-            ],
+            history=_history_response(final_state),
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"An unexpected error occurred during task resumption: {e}")
         logger.debug(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Failed to resume task: {e}")
+    finally:
+        metrics.ACTIVE_TASKS.dec()
+        await finalize_task(task_id)
@@ -2,56 +2,252 @@
 """
 Manages WebSocket connections and provides a logging handler to stream
 logs to connected UI clients.
+
+Log records are fanned out by a `LogHub`: the handler only formats a record
+and appends it to an intake buffer (one loop wake-up is scheduled per burst,
+not per record). On the event loop the hub filters each record against every
+client's subscription and appends it to that client's bounded queue, and a
+per-client sender task writes the queue to its socket. A slow browser tab
+therefore only fills its own queue; depending on `logging.websocket.policy`
+its oldest messages are dropped or it is disconnected.
+
+Clients subscribe with query parameters, e.g. `/api/ws/logs?task_id=abc&level=INFO`
+(`task_id` may be repeated), or later by sending
+`{"subscribe": {"task_ids": ["abc"], "level": "WARNING"}}`; an empty
+`task_ids` list means all tasks.
 """
 import asyncio
+import collections
+import json
 import logging
-from typing import List
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
+from aegis.utils.log_sinks import TaskIdFilter
 from aegis.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 router = APIRouter()
 
-connected_clients: List[WebSocket] = []
+POLICIES = ("drop_oldest", "disconnect")
+
+
+def _stream_settings() -> Dict[str, Any]:
+    try:
+        from aegis.utils.config import get_config
+
+        return dict((get_config().get("logging") or {}).get("websocket") or {})
+    except Exception:
+        return {}
+
+
+def _parse_level(level: Any, default: int = logging.DEBUG) -> int:
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level or "").upper())
+    return value if isinstance(value, int) else default
+
+
+class LogClient:
+    """One connected viewer: its subscription, bounded queue and sender task."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        task_ids: Optional[Set[str]] = None,
+        level: int = logging.DEBUG,
+        queue_size: int = 1000,
+    ):
+        self.websocket = websocket
+        self.task_ids = task_ids or set()
+        self.level = level
+        # Entries are [coalescing key, text, repeat count].
+        self.queue: Deque[List[Any]] = collections.deque()
+        self.queue_size = max(1, queue_size)
+        self.ready = asyncio.Event()
+        self.sender: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+
+    def wants(self, task_id: Optional[str], levelno: int) -> bool:
+        if levelno < self.level:
+            return False
+        return not self.task_ids or task_id in self.task_ids
+
+    def offer(self, key: Optional[Tuple], text: str, policy: str) -> bool:
+        """Queues a message; returns False if the client must be disconnected."""
+        if key is not None and self.queue and self.queue[-1][0] == key:
+            # Same record repeated back to back: send it once with a count.
+            self.queue[-1][2] += 1
+            self.coalesced += 1
+            return True
+        if len(self.queue) >= self.queue_size:
+            if policy == "disconnect":
+                return False
+            self.queue.popleft()
+            self.dropped += 1
+        self.queue.append([key, text, 1])
+        self.ready.set()
+        return True
+
+    async def run_sender(self) -> None:
+        while not self.closed:
+            await self.ready.wait()
+            self.ready.clear()
+            while self.queue:
+                _, text, count = self.queue.popleft()
+                if count > 1:
+                    text = f"{text} [x{count}]"
+                await self.websocket.send_text(text)
+                self.sent += 1
+
+
+class LogHub:
+    """Fans formatted log records out to subscribed WebSocket clients."""
+
+    def __init__(self, queue_size: int = 1000, policy: str = "drop_oldest"):
+        self.queue_size = queue_size
+        self.policy = policy if policy in POLICIES else "drop_oldest"
+        self.clients: List[LogClient] = []
+        self._intake: Deque[Tuple[Optional[str], int, Optional[Tuple], str]] = collections.deque(
+            maxlen=10000
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._scheduled = False
+
+    # --- producer side (any thread) ---
+
+    def publish(
+        self, text: str, task_id: Optional[str] = None, levelno: int = logging.INFO, key: Optional[Tuple] = None
+    ) -> None:
+        """Queues a message for fan-out; safe to call from any thread."""
+        loop = self._loop
+        if loop is None or not self.clients:
+            return
+        self._intake.append((task_id, levelno, key, text))
+        if not self._scheduled:
+            self._scheduled = True
+            try:
+                loop.call_soon_threadsafe(self._drain)
+            except RuntimeError:
+                # The loop is closed (shutdown).
+                self._scheduled = False
+
+    # --- event loop side ---
+
+    def _drain(self) -> None:
+        self._scheduled = False
+        while self._intake:
+            task_id, levelno, key, text = self._intake.popleft()
+            for client in list(self.clients):
+                if client.wants(task_id, levelno) and not client.offer(key, text, self.policy):
+                    logger.warning("Disconnecting slow WebSocket log client (queue full).")
+                    self._drop(client)
+
+    def _drop(self, client: LogClient) -> None:
+        client.closed = True
+        if client in self.clients:
+            self.clients.remove(client)
+        if client.sender is not None:
+            client.sender.cancel()
+        asyncio.ensure_future(self._close_socket(client.websocket))
+
+    @staticmethod
+    async def _close_socket(websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=1013)
+        except Exception:
+            pass
+
+    def add(self, websocket: WebSocket, task_ids: Optional[Set[str]] = None, level: int = logging.DEBUG) -> LogClient:
+        self._loop = asyncio.get_running_loop()
+        client = LogClient(websocket, task_ids, level, self.queue_size)
+        client.sender = asyncio.create_task(client.run_sender())
+        self.clients.append(client)
+        return client
+
+    async def remove(self, client: LogClient) -> None:
+        client.closed = True
+        if client in self.clients:
+            self.clients.remove(client)
+        if client.sender is not None:
+            client.sender.cancel()
+            await asyncio.gather(client.sender, return_exceptions=True)
+
+    async def close_all(self) -> None:
+        """Closes every client connection (server shutdown)."""
+        clients = list(self.clients)
+        for client in clients:
+            await self.remove(client)
+        await asyncio.gather(
+            *(c.websocket.close() for c in clients), return_exceptions=True
+        )
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "task_ids": sorted(c.task_ids),
+                "level": logging.getLevelName(c.level),
+                "queued": len(c.queue),
+                "sent": c.sent,
+                "dropped": c.dropped,
+                "coalesced": c.coalesced,
+            }
+            for c in self.clients
+        ]
+
+
+_settings = _stream_settings()
+hub = LogHub(
+    queue_size=int(_settings.get("queue_size") or 1000),
+    policy=str(_settings.get("policy") or "drop_oldest"),
+)
 
 
 async def broadcast_log(message: str):
     """Broadcasts a log message to all connected WebSocket clients."""
-    if not connected_clients:
-        return
-
-    logger.debug(f"Broadcasting log message to {len(connected_clients)} clients.")
-    tasks = [client.send_text(message) for client in connected_clients]
-    await asyncio.gather(*tasks, return_exceptions=True)
+    # A system-wide message: clients subscribed to specific tasks skip it.
+    hub.publish(message, levelno=logging.CRITICAL)
+    await asyncio.sleep(0)
 
 
 @router.websocket("/logs")
 async def websocket_logs_endpoint(websocket: WebSocket):
     """The FastAPI endpoint that clients connect to for receiving logs."""
     await websocket.accept()
-    connected_clients.append(websocket)
+    params = websocket.query_params
+    client = hub.add(
+        websocket,
+        task_ids=set(params.getlist("task_id")),
+        level=_parse_level(params.get("level"), _parse_level(_settings.get("default_level"))),
+    )
     logger.info(
-        f"New WebSocket client connected to log stream. Total clients: {len(connected_clients)}"
+        f"New WebSocket client connected to log stream. Total clients: {len(hub.clients)}"
     )
     try:
         while True:
-            await websocket.receive_text()
+            text = await websocket.receive_text()
+            try:
+                sub = json.loads(text).get("subscribe")
+            except (ValueError, AttributeError):
+                continue
+            if isinstance(sub, dict):
+                client.task_ids = set(sub.get("task_ids") or [])
+                client.level = _parse_level(sub.get("level"), client.level)
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected.")
     except Exception as e:
         logger.error(f"An unexpected error occurred in the WebSocket connection: {e}")
     finally:
-        if websocket in connected_clients:
-            connected_clients.remove(websocket)
-        logger.info(
-            f"WebSocket client removed. Total clients: {len(connected_clients)}"
-        )
+        await hub.remove(client)
+        logger.info(f"WebSocket client removed. Total clients: {len(hub.clients)}")
 
 
 class WebSocketLogHandler(logging.Handler):
-    """A custom logging handler that broadcasts log records to WebSocket clients."""
+    """A custom logging handler that publishes log records to the `LogHub`."""
 
     def __init__(self):
         """Initializes the handler and sets a standard formatter."""
@@ -60,19 +256,15 @@ class WebSocketLogHandler(logging.Handler):
         self.setFormatter(
             logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
         )
+        self.addFilter(TaskIdFilter())
 
     def emit(self, record: logging.LogRecord):
-        """Formats the log record and broadcasts it via the WebSocket."""
-        if "routes_stream" in record.name:
+        """Formats the record and hands it to the hub (never blocks on clients)."""
+        if not hub.clients or "routes_stream" in record.name:
             return
-
         try:
-            msg = self.format(record)
-            # This is a thread-safe way to call an async function from a synchronous one (like this handler).
-            loop = asyncio.get_running_loop()
-            asyncio.run_coroutine_threadsafe(broadcast_log(msg), loop)
-        except RuntimeError:
-            # This can happen if no event loop is running on the current thread. Safe to ignore.
-            pass
+            task_id = getattr(record, "task_id", None)
+            key = (task_id, record.levelno, record.name, record.getMessage())
+            hub.publish(self.format(record), task_id, record.levelno, key)
         except Exception:
             self.handleError(record)
@@ -0,0 +1,82 @@
+# aegis/web/routes_tasks.py
+"""
+API routes for inspecting and cancelling background tasks.
+
+Tasks are created by `POST /api/launch?async_mode=true` and executed by the
+task pool (`aegis.agents.task_pool`).
+"""
+
+import asyncio
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException
+
+from aegis.agents.task_pool import get_task_pool
+from aegis.schemas.api import TaskStatusResponse
+from aegis.utils import task_store as ts
+from aegis.utils.logger import setup_logger
+
+router = APIRouter(prefix="/tasks", tags=["Tasks"])
+logger = setup_logger(__name__)
+
+
+def _to_response(row: dict) -> TaskStatusResponse:
+    return TaskStatusResponse(
+        task_id=row["task_id"],
+        status=row["status"],
+        created_at=row["created_at"],
+        started_at=row.get("started_at"),
+        finished_at=row.get("finished_at"),
+        attempts=row.get("attempts") or 0,
+        cancel_requested=row.get("cancel_requested", False),
+        progress=row.get("progress"),
+        result=row.get("result"),
+        error=row.get("error"),
+    )
+
+
+@router.get("", response_model=List[TaskStatusResponse])
+async def list_tasks(status: Optional[str] = None, limit: int = 50):
+    """Lists recent background tasks, newest first."""
+    rows = await asyncio.to_thread(
+        get_task_pool().store.list, status.upper() if status else None, limit
+    )
+    return [_to_response(r) for r in rows]
+
+
+@router.get("/workers")
+async def list_workers():
+    """Reports health and per-worker task counts for the task pool."""
+    pool = get_task_pool()
+    return {
+        "mode": pool.mode,
+        "started": pool.started,
+        "workers": pool.workers_status(),
+    }
+
+
+@router.get("/{task_id}", response_model=TaskStatusResponse)
+async def get_task(task_id: str):
+    """Returns the status, progress, and (once finished) result of a task."""
+    row = await asyncio.to_thread(get_task_pool().store.get, task_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Task '{task_id}' not found.")
+    return _to_response(row)
+
+
+@router.delete("/{task_id}", response_model=TaskStatusResponse)
+async def cancel_task(task_id: str):
+    """Cancels a queued task, or interrupts a running one."""
+    pool = get_task_pool()
+    row = await asyncio.to_thread(pool.store.get, task_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Task '{task_id}' not found.")
+    if row["status"] in ts.TERMINAL_STATUSES:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Task '{task_id}' already finished with status {row['status']}.",
+        )
+    await pool.cancel(task_id)
+    logger.info(f"Cancellation requested for task {task_id}.")
+    row = await asyncio.to_thread(pool.store.get, task_id)
+    return _to_response(row)
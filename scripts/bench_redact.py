@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for aegis.utils.redact.
+
+Compares `redact_for_log` with the original pattern-by-pattern implementation
+on payloads shaped like our traces: tool args, span attributes and a large
+observation that is redacted several times per step.
+
+Usage:
+  python scripts/bench_redact.py [--repeat 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from aegis.utils import redact  # noqa: E402
+
+
+def _legacy_redact(obj: Any) -> Any:
+    """The implementation before patterns were compiled into one pass."""
+
+    def key(k: str) -> bool:
+        k = k.lower()
+        return any(p in k for p in redact.KEY_PATTERNS)
+
+    def value(v: Any) -> bool:
+        if not isinstance(v, str):
+            return False
+        s = v.strip()
+        return bool(s) and any(rx.search(s) for rx in redact.VALUE_PATTERNS)
+
+    try:
+        if isinstance(obj, Mapping):
+            out: Dict[str, Any] = {}
+            for k, v in obj.items():
+                if key(str(k)) or value(v):
+                    out[k] = redact._redact_primitive(v)
+                else:
+                    out[k] = _legacy_redact(v)
+            return out
+        elif isinstance(obj, (list, tuple)):
+            return type(obj)(_legacy_redact(x) for x in obj)
+        elif isinstance(obj, str):
+            return redact._redact_primitive(obj) if value(obj) else obj
+        return obj
+    except Exception:
+        return redact.REDACTED
+
+
+OBSERVATION = "\n".join(f"line {i}: GET /api/items/{i} 200 OK {i * 7} bytes" for i in range(2000))
+
+PAYLOADS = {
+    "tool_args": {
+        "command": "ls -la /var/log",
+        "machine_name": "web-01",
+        "timeout": 30,
+        "headers": {"Authorization": "Bearer abc.def", "Accept": "application/json"},
+        "api_key": "sk-0123456789abcdef0123456789",
+    },
+    "span_attrs": {
+        "run_id": "3f2b7c1e-1b8a-4d0e-9a77-0c2d3e4f5a6b",
+        "node": "execute_tool",
+        "step": 12,
+        "tags": ["shell", "read-only", "fast"],
+        "tool": "run_local_command",
+    },
+    "observation": {"observation": OBSERVATION, "status": "success"},
+}
+
+
+def _time(fn: Callable[[Any], Any], payload: Any, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(payload)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--repeat", type=int, default=2000)
+    args = ap.parse_args()
+
+    print(f"{'payload':<14}{'legacy µs':>12}{'compiled µs':>14}{'speedup':>10}")
+    for name, payload in PAYLOADS.items():
+        assert redact.redact_for_log(payload) == _legacy_redact(payload), name
+        legacy = _time(_legacy_redact, payload, args.repeat)
+        compiled = _time(redact.redact_for_log, payload, args.repeat)
+        print(f"{name:<14}{legacy:>12.2f}{compiled:>14.2f}{legacy / compiled:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())